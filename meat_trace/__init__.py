@@ -0,0 +1,8 @@
+# Make sure the Celery app is loaded when Django starts so that
+# shared_task uses its broker configuration.
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -18,6 +18,7 @@ except ImportError:
 
 from django.contrib.auth.models import User
 from .models import Notification
+from .role_utils import normalize_role, ROLE_PROCESSOR
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -144,33 +145,36 @@ class ProcessingUpdateConsumer(AsyncWebsocketConsumer):
 
         # Check if user is a processing unit user
         try:
-            profile = await self.get_user_profile()
-            if profile.get('role') != 'processing_unit':
+            processing_unit_ids = await self.get_processing_unit_ids()
+            if not processing_unit_ids:
                 await self.close()
                 return
 
-            processing_unit_id = profile.get('processing_unit_id')
-            if not processing_unit_id:
-                await self.close()
-                return
-
-            # Join processing unit's update group
-            self.processing_group = f'processing_unit_{processing_unit_id}'
-            await self.channel_layer.group_add(
-                self.processing_group,
-                self.channel_name
-            )
+            # Join every processing unit's update group the user belongs to
+            self.processing_groups = [f'processing_unit_{unit_id}' for unit_id in processing_unit_ids]
+            for group in self.processing_groups:
+                await self.channel_layer.group_add(
+                    group,
+                    self.channel_name
+                )
 
             await self.accept()
 
+            # Current pipeline, so clients render without a separate request
+            pipeline = await self.get_pipeline(processing_unit_ids)
+            await self.send(text_data=json.dumps({
+                'type': 'processing_update',
+                'update': {'event': 'pipeline', 'pipeline': pipeline}
+            }))
+
         except Exception:
             await self.close()
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        if hasattr(self, 'processing_group'):
+        for group in getattr(self, 'processing_groups', []):
             await self.channel_layer.group_discard(
-                self.processing_group,
+                group,
                 self.channel_name
             )
 
@@ -186,16 +190,29 @@ class ProcessingUpdateConsumer(AsyncWebsocketConsumer):
         }))
 
     @database_sync_to_async
-    def get_user_profile(self):
-        """Get user profile data"""
+    def get_processing_unit_ids(self):
+        """Processing units of the user's active memberships"""
+        from .models import ProcessingUnitUser
         try:
             profile = self.user.profile
-            return {
-                'role': profile.role,
-                'processing_unit_id': profile.processing_unit.id if profile.processing_unit else None
-            }
-        except:
-            return {'role': None, 'processing_unit_id': None}
+        except Exception:
+            return []
+        if normalize_role(profile.role) != ROLE_PROCESSOR:
+            return []
+        unit_ids = set(ProcessingUnitUser.objects.filter(
+            user=self.user,
+            is_active=True,
+            is_suspended=False
+        ).values_list('processing_unit_id', flat=True))
+        if profile.processing_unit_id:
+            unit_ids.add(profile.processing_unit_id)
+        return sorted(unit_ids)
+
+    @database_sync_to_async
+    def get_pipeline(self, unit_ids):
+        """Cached pipeline stage counts over the user's units"""
+        from .utils.pipeline_service import ProcessingPipelineService
+        return ProcessingPipelineService.get_pipeline(unit_ids)
 
 
 class AuthProgressConsumer(AsyncWebsocketConsumer):
@@ -1,8 +1,198 @@
-# Admin database router has been removed from this project
-# This file is kept to prevent import errors
-
-# class AdminReadReplicaRouter:
-#     """
-#     Database router for directing admin dashboard queries to read replicas.
-#     """
-#     # Implementation removed
+"""
+Read replica routing for MeatTrace
+
+Heavy read-only work (admin analytics and dashboard, MetricsService, exports
+and reports) runs inside ``use_read_replica()`` and its reads are sent to
+the replica alias (``settings.READ_REPLICA_ALIAS``) when one is configured.
+Everything else, and every write, stays on ``default``.
+
+Read-your-writes: once a request writes, its remaining reads go to the
+primary, and ReadYourWritesMiddleware pins the user to the primary for
+``settings.READ_REPLICA_STICKY_SECONDS`` so the next requests see the write
+even while the replica is lagging.
+
+Local setup with two SQLite files:
+
+    DB_READ_REPLICA_NAME=/path/to/replica.sqlite3 python manage.py runserver
+
+Usage:
+    from meat_trace.db_router import use_read_replica, ReadReplicaMixin
+
+    with use_read_replica(request.user):
+        report = build_report()
+
+    class ReportViewSet(ReadReplicaMixin, viewsets.ViewSet):
+        ...
+"""
+
+import contextvars
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_ALIAS = 'default'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_pinned = contextvars.ContextVar('replica_pinned', default=False)
+_wrote = contextvars.ContextVar('replica_wrote', default=False)
+_in_request = contextvars.ContextVar('replica_in_request', default=False)
+_untracked = contextvars.ContextVar('replica_untracked_writes', default=False)
+
+
+def replica_alias():
+    """The configured replica alias, or None when no replica is set up."""
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', 'read_replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def _pin_key(user_id):
+    return f'db_router:primary:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Serve the user's reads from the primary for the sticky window."""
+    seconds = getattr(settings, 'READ_REPLICA_STICKY_SECONDS', 10)
+    if user_id and seconds:
+        cache.set(_pin_key(user_id), True, seconds)
+
+
+def is_pinned(user_id):
+    return bool(user_id) and bool(cache.get(_pin_key(user_id)))
+
+
+class use_read_replica:
+    """
+    Context manager / decorator routing reads to the replica.
+
+    Pass the requesting user so reads stay on the primary while the user is
+    inside the read-your-writes window.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self._tokens = []
+
+    def __enter__(self):
+        user_id = getattr(self.user, 'id', None) if getattr(self.user, 'is_authenticated', False) else None
+        self._tokens.append((
+            _replica_reads.set(True),
+            _pinned.set(_pinned.get() or is_pinned(user_id)),
+            # Outside a request (Celery, shell) writes are tracked per context
+            None if _in_request.get() else _wrote.set(False),
+        ))
+        return self
+
+    def __exit__(self, *exc_info):
+        replica_token, pinned_token, wrote_token = self._tokens.pop()
+        if wrote_token is not None:
+            _wrote.reset(wrote_token)
+        _pinned.reset(pinned_token)
+        _replica_reads.reset(replica_token)
+        return False
+
+    def __call__(self, func):
+        import functools
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with use_read_replica(self.user):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class untracked_writes:
+    """
+    Context manager for bookkeeping writes that later reads never depend on
+    (e.g. export progress); they do not switch the scope to the primary.
+    """
+
+    def __enter__(self):
+        self._token = _untracked.set(True)
+        return self
+
+    def __exit__(self, *exc_info):
+        _untracked.reset(self._token)
+        return False
+
+
+def reads_from_replica():
+    """Whether reads issued now would be sent to the replica."""
+    return bool(_replica_reads.get() and not _pinned.get() and not _wrote.get() and replica_alias())
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads made inside ``use_read_replica()`` to the replica alias.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it
+        if not _untracked.get():
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReadReplicaMixin:
+    """
+    DRF view mixin running the whole request with replica reads for the
+    requesting user.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        # Scoped around dispatch so it is left even when the handler raises
+        with use_read_replica(getattr(request, 'user', None)):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # dispatch() only saw the session user; token-authenticated writers
+        # are known once DRF has authenticated the request
+        if is_pinned(getattr(request.user, 'id', None)):
+            _pinned.set(True)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Tracks writes per request and pins the writing user to the primary for
+    the sticky window, so their next reads do not hit a lagging replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Every request starts from a clean routing state, whatever a
+        # previous request on this thread left behind
+        tokens = [
+            (_replica_reads, _replica_reads.set(False)),
+            (_pinned, _pinned.set(False)),
+            (_wrote, _wrote.set(False)),
+            (_in_request, _in_request.set(True)),
+        ]
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    pin_to_primary(user.id)
+            return response
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
@@ -0,0 +1,24 @@
+"""
+Management command to rebuild the DailyRollup fact table from the raw tables.
+
+Runs once from migration 0083 after deploy; run it again by hand to recount
+the full history (e.g. after a bulk import that bypassed the signals).
+
+Usage:
+    python manage.py backfill_daily_rollups
+"""
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily rollups for every day since the earliest recorded activity'
+
+    def handle(self, *args, **options):
+        from meat_trace.utils.rollup_service import RollupService
+
+        result = RollupService.backfill()
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Backfilled {result['days']} day(s): {result['rows']} rollup rows"
+            ))
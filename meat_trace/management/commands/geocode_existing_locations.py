@@ -31,6 +31,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         from meat_trace.models import ProcessingUnit, Shop, UserProfile
         from meat_trace.utils.geocoding_service import GeocodingService
+        from meat_trace.utils.map_service import MapService
 
         dry_run = options['dry_run']
         limit = options['limit']
@@ -122,7 +123,6 @@ class Command(BaseCommand):
             abbatoir_queryset = abbatoir_queryset[:limit]
         
         for abbatoir in abbatoir_queryset:
-        for abbatoir in farmer_queryset:
             self.stdout.write(f'  Processing: {abbatoir.user.username} - "{abbatoir.address}"')
             
             if dry_run:
@@ -146,6 +146,10 @@ class Command(BaseCommand):
             
             time.sleep(1.1)
 
+        # Coordinates were written with update(), which skips the map signals
+        if not dry_run and total_geocoded:
+            MapService.clear_cache()
+
         # Summary
         self.stdout.write(self.style.NOTICE('\n=== Summary ==='))
         if dry_run:
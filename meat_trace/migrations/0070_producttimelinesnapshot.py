@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:18
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0069_backfill_weight_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTimelineSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trace_events', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Farm-to-shop lineage events')),
+                ('activity_events', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Rejection, sales and inventory events')),
+                ('version', models.PositiveIntegerField(default=1, help_text='Bumped on every lineage change')),
+                ('built_version', models.PositiveIntegerField(default=0, help_text='Version the stored events were built from')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the latest lineage change')),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_snapshot', to='meat_trace.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0070_producttimelinesnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='batch_number',
+            field=models.CharField(db_index=True, default='BATCH001', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='BatchIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Public batch code encoded in QR labels', max_length=120, unique=True)),
+                ('source', models.CharField(choices=[('batch_number', 'Batch number'), ('generated', 'Generated (duplicate batch number)')], default='batch_number', max_length=20)),
+                ('is_primary', models.BooleanField(default=True, help_text='Current public code for the product')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_identifiers', to='meat_trace.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'is_primary'], name='meat_trace__product_24447f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations, transaction
+from django.db.models import Q
+
+CHUNK_SIZE = 1000
+
+
+def backfill_batch_identifiers(apps, schema_editor):
+    """
+    Register a public code for every existing product, oldest first, so the
+    oldest product with a given batch number owns the plain code and later
+    duplicates get "<batch_number>-<id>". Walks products in keyset-ordered
+    chunks, each committed on its own.
+    """
+    Product = apps.get_model('meat_trace', 'Product')
+    BatchIdentifier = apps.get_model('meat_trace', 'BatchIdentifier')
+
+    last = None
+    while True:
+        products = Product.objects.order_by('created_at', 'id')
+        if last is not None:
+            products = products.filter(
+                Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1])
+            )
+        chunk = list(products.values_list('id', 'batch_number', 'created_at')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last = (chunk[-1][2], chunk[-1][0])
+
+        with transaction.atomic():
+            registered = set(
+                BatchIdentifier.objects.filter(product_id__in=[row[0] for row in chunk])
+                .values_list('product_id', flat=True)
+            )
+            claimed = set(
+                BatchIdentifier.objects.filter(code__in={row[1] for row in chunk if row[1]})
+                .values_list('code', flat=True)
+            )
+            identifiers = []
+            for product_id, batch_number, _ in chunk:
+                if product_id in registered:
+                    continue
+                if batch_number and batch_number not in claimed:
+                    code, source = batch_number, 'batch_number'
+                else:
+                    code, source = f"{batch_number}-{product_id}", 'generated'
+                claimed.add(code)
+                identifiers.append(BatchIdentifier(product_id=product_id, code=code, source=source))
+            BatchIdentifier.objects.bulk_create(identifiers, ignore_conflicts=True)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('meat_trace', '0071_batchidentifier'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_batch_identifiers, noop),
+    ]
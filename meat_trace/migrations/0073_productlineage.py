@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0072_backfill_batch_identifiers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductLineage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_type', models.CharField(choices=[('slaughter_part', 'Slaughter Part'), ('animal', 'Animal'), ('abbatoir', 'Abbatoir')], max_length=20)),
+                ('ancestor_id', models.PositiveBigIntegerField(help_text='Primary key of the ancestor row')),
+                ('depth', models.PositiveSmallIntegerField(help_text='Shortest path length from the product')),
+                ('abbatoir', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_lineage', to=settings.AUTH_USER_MODEL)),
+                ('animal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_lineage', to='meat_trace.animal')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineage', to='meat_trace.product')),
+                ('slaughter_part', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_lineage', to='meat_trace.slaughterpart')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'depth'], name='meat_trace__product_1c3bea_idx'), models.Index(fields=['ancestor_type', 'ancestor_id'], name='meat_trace__ancesto_1b3690_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'ancestor_type', 'ancestor_id'), name='unique_product_ancestor')],
+            },
+        ),
+    ]
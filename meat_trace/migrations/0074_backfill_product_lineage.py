@@ -0,0 +1,79 @@
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+
+def backfill_product_lineage(apps, schema_editor):
+    """Populate the lineage closure table for existing products, in id-ordered chunks."""
+    Product = apps.get_model('meat_trace', 'Product')
+    ProductIngredient = apps.get_model('meat_trace', 'ProductIngredient')
+    ProductLineage = apps.get_model('meat_trace', 'ProductLineage')
+
+    last_id = 0
+    while True:
+        product_rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'slaughter_part_id', 'slaughter_part__animal_id', 'slaughter_part__animal__abbatoir_id',
+                'animal_id', 'animal__abbatoir_id',
+            )[:CHUNK_SIZE]
+        )
+        if not product_rows:
+            break
+        product_ids = [row[0] for row in product_rows]
+        last_id = product_ids[-1]
+
+        sources = []
+        for product_id, part_id, part_animal_id, part_abbatoir_id, animal_id, abbatoir_id in product_rows:
+            if part_id:
+                sources.append((product_id, part_id, part_animal_id, part_abbatoir_id))
+            if animal_id:
+                sources.append((product_id, None, animal_id, abbatoir_id))
+        sources.extend(
+            ProductIngredient.objects.filter(product_id__in=product_ids).values_list(
+                'product_id', 'slaughter_part_id', 'slaughter_part__animal_id', 'slaughter_part__animal__abbatoir_id',
+            )
+        )
+
+        closure = {}
+        for product_id, part_id, animal_id, abbatoir_id in sources:
+            base = 1 if part_id else 0
+            for ancestor_type, ancestor_id, depth in (
+                ('slaughter_part', part_id, 1),
+                ('animal', animal_id, base + 1),
+                ('abbatoir', abbatoir_id, base + 2),
+            ):
+                if not ancestor_id:
+                    continue
+                key = (product_id, ancestor_type, ancestor_id)
+                if key not in closure or depth < closure[key]:
+                    closure[key] = depth
+
+        with transaction.atomic():
+            ProductLineage.objects.filter(product_id__in=product_ids).delete()
+            ProductLineage.objects.bulk_create([
+                ProductLineage(
+                    product_id=product_id,
+                    ancestor_type=ancestor_type,
+                    ancestor_id=ancestor_id,
+                    depth=depth,
+                    **{f'{ancestor_type}_id': ancestor_id},
+                )
+                for (product_id, ancestor_type, ancestor_id), depth in closure.items()
+            ])
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('meat_trace', '0073_productlineage'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_product_lineage, noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0074_backfill_product_lineage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('join_request', 'Join Request'), ('join_approved', 'Join Request Approved'), ('join_rejected', 'Join Request Rejected'), ('invitation', 'User Invitation'), ('role_change', 'Role Changed'), ('profile_update', 'Profile Update Required'), ('verification', 'Account Verification'), ('animal_rejected', 'Animal Rejected'), ('part_rejected', 'Slaughter Part Rejected'), ('product_recall', 'Product Recall'), ('appeal_submitted', 'Appeal Submitted'), ('appeal_approved', 'Appeal Approved'), ('appeal_denied', 'Appeal Denied'), ('system_alert', 'System Alert'), ('maintenance', 'Maintenance Notice'), ('custom', 'Custom Notification')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0075_notification_product_recall'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollupDirtyDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local calendar day the activity happened on')),
+                ('species', models.CharField(blank=True, default='', help_text='Animal species (blank when not applicable)', max_length=20)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('animals_registered', models.PositiveIntegerField(default=0)),
+                ('animals_transferred', models.PositiveIntegerField(default=0)),
+                ('animals_slaughtered', models.PositiveIntegerField(default=0)),
+                ('live_weight', models.DecimalField(decimal_places=2, default=0, help_text='Live weight of animals registered', max_digits=14)),
+                ('products_created', models.PositiveIntegerField(default=0)),
+                ('product_weight', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders_placed', models.PositiveIntegerField(default=0)),
+                ('order_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_recorded', models.PositiveIntegerField(default=0)),
+                ('sales_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processing_unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='meat_trace.processingunit')),
+                ('shop', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='meat_trace.shop')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date', 'processing_unit'], name='meat_trace__date_173c63_idx'), models.Index(fields=['date', 'shop'], name='meat_trace__date_af63ba_idx'), models.Index(fields=['date', 'species'], name='meat_trace__date_95074e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0076_dailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['received_by', '-received_at', '-id'], name='meat_trace__receive_6e6f8c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slaughterpart',
+            index=models.Index(fields=['received_by', '-received_at', '-id'], name='meat_trace__receive_8c93ae_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0077_receipt_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['-created_at', '-id'], name='meat_trace__created_5ab07b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['abbatoir', '-created_at', '-id'], name='meat_trace__abbatoi_d11391_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='meat_trace__created_247d25_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['shop', '-created_at', '-id'], name='meat_trace__shop_id_0dc01a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='meat_trace__created_9e0fe8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['processing_unit', '-created_at', '-id'], name='meat_trace__process_ca888e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['received_by_shop', '-created_at', '-id'], name='meat_trace__receive_f384f5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['-created_at', '-id'], name='meat_trace__created_738684_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['shop', '-created_at', '-id'], name='meat_trace__shop_id_da35ed_idx'),
+        ),
+    ]
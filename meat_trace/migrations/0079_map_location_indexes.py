@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0078_custom_report_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processingunit',
+            index=models.Index(fields=['latitude', 'longitude'], name='meat_trace__latitud_3560e0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['latitude', 'longitude'], name='meat_trace__latitud_3bc6b9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='meat_trace__latitud_c96434_idx'),
+        ),
+    ]
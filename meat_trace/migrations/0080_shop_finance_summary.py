@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0079_map_location_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopFinanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoice_count', models.IntegerField(default=0)),
+                ('draft_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('sent_count', models.IntegerField(default=0)),
+                ('partially_paid_count', models.IntegerField(default=0)),
+                ('paid_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('invoiced_total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of invoice totals', max_digits=14)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, help_text='Sum of payments recorded against invoices', max_digits=14)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, help_text='Balance due on invoices that are neither completed nor cancelled', max_digits=14)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='finance_summary', to='meat_trace.shop')),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meat_trace', '0080_shop_finance_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('receive', 'Receive'), ('transfer', 'Transfer'), ('sale', 'Sale'), ('rejection', 'Rejection'), ('waste', 'Waste'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('weight', models.DecimalField(decimal_places=2, help_text="Signed change to the shop's stock weight", max_digits=12)),
+                ('entity_type', models.CharField(blank=True, default='', help_text='Source record type, e.g. sale_item or receipt', max_length=50)),
+                ('entity_id', models.PositiveIntegerField(blank=True, help_text='Source record id', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='meat_trace.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='meat_trace.shop')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['shop', 'product', '-created_at', '-id'], name='meat_trace__shop_id_57617e_idx'), models.Index(fields=['shop', '-created_at', '-id'], name='meat_trace__shop_id_ad1738_idx'), models.Index(fields=['created_at'], name='meat_trace__created_671f26_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(help_text='Movements before this moment are included')),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('movement_count', models.PositiveIntegerField(default=0, help_text='Movements folded into this snapshot')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='meat_trace.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='meat_trace.shop')),
+            ],
+            options={
+                'ordering': ['-as_of'],
+                'indexes': [models.Index(fields=['shop', 'product', '-as_of'], name='meat_trace__shop_id_de85a6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('shop', 'product', 'as_of'), name='unique_stock_snapshot')],
+            },
+        ),
+    ]
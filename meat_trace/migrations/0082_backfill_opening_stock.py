@@ -0,0 +1,48 @@
+from django.db import migrations, transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+def backfill_opening_stock(apps, schema_editor):
+    """
+    Record every shop's current stock as a ledger snapshot, so as-of balances
+    computed from the ledger start from the existing Inventory weights.
+    Walks Inventory rows in id-ordered chunks, each committed on its own.
+    """
+    Inventory = apps.get_model('meat_trace', 'Inventory')
+    StockSnapshot = apps.get_model('meat_trace', 'StockSnapshot')
+
+    as_of = timezone.now()
+    last_id = 0
+    while True:
+        chunk = list(
+            Inventory.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'shop_id', 'product_id', 'weight')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        with transaction.atomic():
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(shop_id=shop_id, product_id=product_id, as_of=as_of, weight=weight)
+                for _, shop_id, product_id, weight in chunk
+            ], ignore_conflicts=True)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('meat_trace', '0081_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_opening_stock, noop),
+    ]
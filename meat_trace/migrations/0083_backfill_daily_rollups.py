@@ -0,0 +1,39 @@
+import logging
+
+from django.core.management import call_command
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    """
+    Fill DailyRollup from the existing history, so the dashboards do not
+    read zeros until the refresh-daily-rollups beat task first runs (or
+    forever, on a deployment without beat). RollupService commits each
+    chunk of days on its own.
+
+    A failure here must not block the deploy: the beat task backfills an
+    empty table on its first run, or run ``backfill_daily_rollups``.
+    """
+    try:
+        call_command('backfill_daily_rollups', verbosity=0)
+    except Exception as e:
+        logger.warning(f"[ROLLUP] Backfill failed, run 'manage.py backfill_daily_rollups': {e}")
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('meat_trace', '0082_backfill_opening_stock'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_rollups, noop),
+    ]
@@ -8,6 +8,7 @@ import qrcode
 import os
 import uuid
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 import json
 from decimal import Decimal
 
@@ -28,6 +29,12 @@ class ProcessingUnit(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Supply chain map tiles are latitude/longitude range scans
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -100,6 +107,12 @@ class Shop(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Supply chain map tiles are latitude/longitude range scans
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -189,6 +202,12 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Supply chain map tiles are latitude/longitude range scans
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
     
@@ -333,14 +352,20 @@ class Animal(models.Model):
             total = measurement.calculated_total_weight
             if total is not None:
                 return total
-        parts_total = sum(
-            (p.weight or Decimal('0')) for p in self.slaughter_parts.all()
-        )
+        # List querysets annotate the parts total (see AnimalViewSet)
+        parts_total = getattr(self, 'annotated_parts_weight', None)
+        if parts_total is None:
+            parts_total = sum(
+                (p.weight or Decimal('0')) for p in self.slaughter_parts.all()
+            )
         return parts_total if parts_total > 0 else None
 
     @property
     def total_waste_weight(self):
         """Sum of all waste records attributed to this animal (kg)."""
+        annotated = getattr(self, 'annotated_waste_weight', None)
+        if annotated is not None:
+            return annotated
         total = self.waste_records.aggregate(
             total=models.Sum('weight_kg')
         )['total']
@@ -401,6 +426,15 @@ class Animal(models.Model):
     appealed_at = models.DateTimeField(null=True, blank=True, help_text="Date and time when the appeal was submitted")
     appeal_resolved_at = models.DateTimeField(null=True, blank=True, help_text="Date and time when the appeal was resolved")
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a processor's receipts (traceability report)
+            models.Index(fields=['received_by', '-received_at', '-id']),
+            # Custom report: date range / abbatoir filters, keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['abbatoir', '-created_at', '-id']),
+        ]
+
     def save(self, *args, **kwargs):
         # Ensure photo field is properly handled
         if self.photo and hasattr(self.photo, 'name'):
@@ -464,13 +498,13 @@ class Animal(models.Model):
             return 'REJECTED'
         
         # Priority 2: Check if whole animal is transferred
-        if self.transferred_to is not None:
+        if self.transferred_to_id is not None:
             return 'TRANSFERRED'
         
         # Priority 3: Check for partial or complete part transfers
         if self.has_slaughter_parts:
             parts = self.slaughter_parts.all()
-            transferred_parts = [p for p in parts if p.transferred_to is not None]
+            transferred_parts = [p for p in parts if p.transferred_to_id is not None]
             
             if transferred_parts:
                 # All parts transferred
@@ -613,6 +647,9 @@ class SlaughterPart(models.Model):
 
     class Meta:
         unique_together = ['animal', 'part_type']  # Prevent duplicate parts for same animal
+        indexes = [
+            models.Index(fields=['received_by', '-received_at', '-id']),
+        ]
 
     def save(self, *args, **kwargs):
         # Ensure part_id exists
@@ -826,6 +863,29 @@ class ProductTimelineEvent(models.Model):
     class Meta:
         ordering = ['timestamp']
 
+class ProductTimelineSnapshot(models.Model):
+    """Materialized farm-to-fork timeline for a product.
+
+    ``version`` is bumped whenever a row that contributes to the timeline
+    (animal, slaughter part, carcass measurement, product, sale, inventory)
+    changes; ``built_version`` records which version the stored events were
+    built from. The snapshot is rebuilt lazily on the next read once the two
+    diverge, so QR scans only pay for a rebuild after something changed."""
+    product = models.OneToOneField('Product', on_delete=models.CASCADE, related_name='timeline_snapshot')
+    trace_events = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder, help_text="Farm-to-shop lineage events")
+    activity_events = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder, help_text="Rejection, sales and inventory events")
+    version = models.PositiveIntegerField(default=1, help_text="Bumped on every lineage change")
+    built_version = models.PositiveIntegerField(default=0, help_text="Version the stored events were built from")
+    changed_at = models.DateTimeField(default=timezone.now, help_text="Time of the latest lineage change")
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Timeline snapshot for product {self.product_id} (v{self.version})"
+
+    @property
+    def is_stale(self):
+        return self.built_version != self.version
+
 class Product(models.Model):
     PRODUCT_TYPE_CHOICES = [
         ('meat', 'Meat'),
@@ -850,7 +910,7 @@ class Product(models.Model):
 
     # Additional fields for detailed product information
     name = models.CharField(max_length=200, default='Unnamed Product')
-    batch_number = models.CharField(max_length=100, default='BATCH001')
+    batch_number = models.CharField(max_length=100, default='BATCH001', db_index=True)
     weight = models.DecimalField(max_digits=8, decimal_places=2, validators=[MinValueValidator(0)], default=0)
     weight_unit = models.CharField(max_length=10, choices=WEIGHT_UNIT_CHOICES, default='kg')
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], default=0)
@@ -890,6 +950,14 @@ class Product(models.Model):
     rejected_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='rejected_products', help_text="User who rejected the product")
     rejected_at = models.DateTimeField(null=True, blank=True, help_text="Date and time when the product was rejected")
 
+    class Meta:
+        indexes = [
+            # Custom report: date range / processing unit / shop filters, keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['processing_unit', '-created_at', '-id']),
+            models.Index(fields=['received_by_shop', '-created_at', '-id']),
+        ]
+
     def __str__(self):
         part_info = f" from {self.slaughter_part.get_part_type_display()}" if self.slaughter_part else ""
         return f"{self.name} ({self.product_type}){part_info} - Batch {self.batch_number}"
@@ -904,6 +972,75 @@ class Product(models.Model):
             self.quantity_rejected = self.weight_rejected
         super().save(*args, **kwargs)
 
+class BatchIdentifier(models.Model):
+    """
+    Registry of public batch codes used by /trace/<code>/.
+
+    Product.batch_number is free text and is not unique (it defaults to
+    'BATCH001' and partial transfers reuse it), so every product is given a
+    unique code here. The oldest product with a given batch number owns the
+    plain batch number; later duplicates get "<batch_number>-<product id>".
+    Codes are never removed when a batch number changes, so previously
+    printed QR codes keep resolving.
+    """
+    SOURCE_CHOICES = [
+        ('batch_number', 'Batch number'),
+        ('generated', 'Generated (duplicate batch number)'),
+    ]
+
+    code = models.CharField(max_length=120, unique=True, help_text="Public batch code encoded in QR labels")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='batch_identifiers')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='batch_number')
+    is_primary = models.BooleanField(default=True, help_text="Current public code for the product")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'is_primary']),
+        ]
+
+    def __str__(self):
+        return f"{self.code} -> product {self.product_id}"
+
+
+class ProductLineage(models.Model):
+    """
+    Closure table mapping a product to every upstream source it was made
+    from: slaughter parts (direct or via ingredients), their animals and the
+    animals' abbatoirs. ``depth`` is the shortest path length from the
+    product (a part is 1, its animal 2, that animal's abbatoir 3; an animal
+    linked directly to the product is 1).
+
+    Rebuilt by LineageService whenever a product is created, its source
+    changes, or its ingredients change.
+    """
+    ANCESTOR_TYPE_CHOICES = [
+        ('slaughter_part', 'Slaughter Part'),
+        ('animal', 'Animal'),
+        ('abbatoir', 'Abbatoir'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='lineage')
+    ancestor_type = models.CharField(max_length=20, choices=ANCESTOR_TYPE_CHOICES)
+    ancestor_id = models.PositiveBigIntegerField(help_text="Primary key of the ancestor row")
+    depth = models.PositiveSmallIntegerField(help_text="Shortest path length from the product")
+    slaughter_part = models.ForeignKey(SlaughterPart, on_delete=models.CASCADE, null=True, blank=True, related_name='product_lineage')
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE, null=True, blank=True, related_name='product_lineage')
+    abbatoir = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='product_lineage')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'ancestor_type', 'ancestor_id'], name='unique_product_ancestor'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'depth']),
+            models.Index(fields=['ancestor_type', 'ancestor_id']),
+        ]
+
+    def __str__(self):
+        return f"Product {self.product_id} <- {self.ancestor_type} {self.ancestor_id} (depth {self.depth})"
+
+
 class Inventory(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='inventory')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inventory')
@@ -967,19 +1104,84 @@ class Receipt(models.Model):
 
         # Update inventory only on initial receipt creation.
         if is_create:
-            inventory, _ = Inventory.objects.get_or_create(
-                shop=self.shop,
-                product=self.product,
-                defaults={'quantity': 0, 'weight': 0, 'weight_unit': self.weight_unit}
+            from .utils.stock_ledger import StockLedgerService
+            StockLedgerService.move(
+                self.shop_id, {self.product_id: self.received_weight}, 'receive',
+                entity=('receipt', self.pk), user_id=self.recorded_by_id,
+                create_missing=True, weight_units={self.product_id: self.weight_unit},
             )
-            inventory.weight += self.received_weight
-            inventory.weight_unit = self.weight_unit
-            inventory.last_updated = timezone.now()
-            inventory.save()
 
     class Meta:
         ordering = ['-created_at']
 
+
+class StockMovement(models.Model):
+    """Append-only ledger of shop stock changes.
+
+    Every change to an Inventory row's weight is recorded as a signed delta
+    (positive into the shop's stock, negative out of it). Inventory.weight
+    stays the live balance and is updated with F() expressions next to the
+    ledger insert, so concurrent writers never overwrite each other.
+    Movements older than the retention window are folded into StockSnapshot
+    rows by StockLedgerService.compact()."""
+    MOVEMENT_TYPE_CHOICES = [
+        ('receive', 'Receive'),
+        ('transfer', 'Transfer'),
+        ('sale', 'Sale'),
+        ('rejection', 'Rejection'),
+        ('waste', 'Waste'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_movements')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE_CHOICES)
+    weight = models.DecimalField(max_digits=12, decimal_places=2, help_text="Signed change to the shop's stock weight")
+    entity_type = models.CharField(max_length=50, blank=True, default='', help_text="Source record type, e.g. sale_item or receipt")
+    entity_id = models.PositiveIntegerField(null=True, blank=True, help_text="Source record id")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Per-product history and as-of balances of a shop
+            models.Index(fields=['shop', 'product', '-created_at', '-id']),
+            models.Index(fields=['shop', '-created_at', '-id']),
+            # Compaction cut-off
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.movement_type} {self.weight:+} of product {self.product_id} at shop {self.shop_id}"
+
+
+class StockSnapshot(models.Model):
+    """Compacted stock balance of a product at a shop.
+
+    Written by StockLedgerService.compact(): ``weight`` is the balance as of
+    ``as_of`` and replaces the movements before that moment, which are then
+    deleted. As-of queries start from the latest snapshot at or before the
+    requested moment."""
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='stock_snapshots')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    as_of = models.DateTimeField(help_text="Movements before this moment are included")
+    weight = models.DecimalField(max_digits=14, decimal_places=2)
+    movement_count = models.PositiveIntegerField(default=0, help_text="Movements folded into this snapshot")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-as_of']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'product', 'as_of'], name='unique_stock_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['shop', 'product', '-as_of']),
+        ]
+
+    def __str__(self):
+        return f"Stock of product {self.product_id} at shop {self.shop_id} as of {self.as_of:%Y-%m-%d %H:%M}: {self.weight}"
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -1002,6 +1204,13 @@ class Order(models.Model):
     # QR code field for processing orders
     qr_code = models.CharField(max_length=500, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Custom report: date range / shop filters, keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['shop', '-created_at', '-id']),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.customer.username} - {self.shop.name} - {self.status}"
 
@@ -1680,6 +1889,7 @@ class Notification(models.Model):
         ('verification', 'Account Verification'),
         ('animal_rejected', 'Animal Rejected'),
         ('part_rejected', 'Slaughter Part Rejected'),
+        ('product_recall', 'Product Recall'),
         ('appeal_submitted', 'Appeal Submitted'),
         ('appeal_approved', 'Appeal Approved'),
         ('appeal_denied', 'Appeal Denied'),
@@ -1941,6 +2151,53 @@ class PerformanceMetric(models.Model):
         return f"{self.name}: {self.value} {self.unit or ''}"
 
 
+class DailyRollup(models.Model):
+    """Pre-aggregated daily activity facts for the analytics dashboards.
+
+    One row per (date, processing unit, shop, species) combination that had
+    activity; dashboards sum these rows instead of counting the raw Animal,
+    Product, Order, Sale and User tables. Rows for a date are replaced as a
+    whole by RollupService.refresh_dates()."""
+    date = models.DateField(help_text="Local calendar day the activity happened on")
+    processing_unit = models.ForeignKey(ProcessingUnit, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_rollups')
+    shop = models.ForeignKey(Shop, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_rollups')
+    species = models.CharField(max_length=20, blank=True, default='', help_text="Animal species (blank when not applicable)")
+
+    new_users = models.PositiveIntegerField(default=0)
+    animals_registered = models.PositiveIntegerField(default=0)
+    animals_transferred = models.PositiveIntegerField(default=0)
+    animals_slaughtered = models.PositiveIntegerField(default=0)
+    live_weight = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Live weight of animals registered")
+    products_created = models.PositiveIntegerField(default=0)
+    product_weight = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders_placed = models.PositiveIntegerField(default=0)
+    order_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales_recorded = models.PositiveIntegerField(default=0)
+    sales_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['date', 'processing_unit']),
+            models.Index(fields=['date', 'shop']),
+            models.Index(fields=['date', 'species']),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.date} (unit {self.processing_unit_id}, shop {self.shop_id}, {self.species or '-'})"
+
+
+class DailyRollupDirtyDate(models.Model):
+    """Past dates whose rollups must be recomputed after an edit or delete."""
+    date = models.DateField(unique=True)
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Dirty rollup date {self.date}"
+
+
 class ComplianceAudit(models.Model):
     """Model for compliance audits and quality checks"""
     AUDIT_TYPE_CHOICES = [
@@ -2280,6 +2537,18 @@ class ProductInfo(models.Model):
     def update_from_product(self):
         """Update this ProductInfo instance from the related Product"""
         product = self.product
+        self.populate_from_product(product)
+
+        # Count related records
+        self.inventory_count = Inventory.objects.filter(product=product).count()
+        self.receipts_count = Receipt.objects.filter(product=product).count()
+        self.orders_count = OrderItem.objects.filter(product=product).count()
+
+        self.updated_at = timezone.now()
+        self.save()
+
+    def populate_from_product(self, product):
+        """Copy the denormalized product, animal and timeline fields (no counts, no save)"""
 
         # Basic product info
         self.product_name = product.name
@@ -2335,7 +2604,7 @@ class ProductInfo(models.Model):
                     'Species': self.animal_species or 'Unknown',
                     'Abbatoir': self.abbatoir_username or 'Unknown',
                     'Age': f'{animal.age} months' if animal.age else 'Not recorded',
-                    'Weight': f'{animal.weight} kg' if animal.weight else 'Not recorded'
+                    'Weight': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded'
                 }
             })
             
@@ -2424,11 +2693,6 @@ class ProductInfo(models.Model):
         timeline.sort(key=lambda x: x['timestamp'])
         self.timeline_events = timeline
 
-        # Count related records
-        self.inventory_count = Inventory.objects.filter(product=product).count()
-        self.receipts_count = Receipt.objects.filter(product=product).count()
-        self.orders_count = OrderItem.objects.filter(product=product).count()
-
         # Carcass measurement data
         if product.animal and hasattr(product.animal, 'carcass_measurement'):
             carcass_measurement = product.animal.carcass_measurement
@@ -2437,9 +2701,6 @@ class ProductInfo(models.Model):
                 'measurements': carcass_measurement.get_all_measurements() if hasattr(carcass_measurement, 'get_all_measurements') else []
             }
 
-        self.updated_at = timezone.now()
-        self.save()
-
 
 class BackupSchedule(models.Model):
     """Model for system backup scheduling"""
@@ -2518,6 +2779,11 @@ class Sale(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Custom report: date range / shop filters, keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['shop', '-created_at', '-id']),
+        ]
 
 
 class RejectionReason(models.Model):
@@ -2631,34 +2897,11 @@ class SaleItem(models.Model):
         is_create = self.pk is None
         super().save(*args, **kwargs)
 
-        # Decrement product weight and inventory when a new sale item is created
+        # Decrement product weight and inventory when a new sale item is created.
+        # F() updates: concurrent sales of the same product cannot lose an update.
         if is_create:
-            import logging
-            logger = logging.getLogger(__name__)
-            decrement_weight = self.weight if self.weight is not None else Decimal('0')
-
-            # 1. Decrement the Product weight (this is what the frontend displays)
-            try:
-                product = self.product
-                product.weight = max(Decimal('0'), product.weight - decrement_weight)
-                if product.remaining_weight is not None:
-                    product.remaining_weight = max(Decimal('0'), product.remaining_weight - decrement_weight)
-                product.save(update_fields=['weight', 'remaining_weight'])
-                logger.info(f"[SALE] Decremented product {product.name} weight by {decrement_weight}. New weight: {product.weight}")
-            except Exception as e:
-                logger.error(f"[SALE] Failed to decrement product weight: {str(e)}")
-
-            # 2. Also decrement the Inventory record (keeps shop-level stock in sync)
-            try:
-                inventory = Inventory.objects.get(shop=self.sale.shop, product=self.product)
-                inventory.weight = max(Decimal('0'), inventory.weight - decrement_weight)
-                inventory.quantity = inventory.weight
-                inventory.save()
-                logger.info(f"[SALE] Decremented inventory for shop {self.sale.shop.name} product {self.product.name} by {decrement_weight}. New inventory weight: {inventory.weight}")
-            except Inventory.DoesNotExist:
-                logger.warning(f"[SALE] No inventory record found for shop {self.sale.shop.id} and product {self.product.id}")
-            except Exception as e:
-                logger.error(f"[SALE] Failed to decrement inventory: {str(e)}")
+            from .utils.stock_ledger import StockLedgerService
+            StockLedgerService.sell(self)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -2910,6 +3153,49 @@ class InvoicePayment(models.Model):
         self.invoice.update_status()
         self.invoice.save()
 
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        # Keep the invoice (and through it the shop finance summary) in step
+        from django.db.models import Sum
+        total_paid = self.invoice.payments.aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
+        self.invoice.amount_paid = total_paid
+        if self.invoice.status in ('paid', 'partially_paid') and total_paid < self.invoice.total_amount:
+            self.invoice.status = 'partially_paid' if total_paid > 0 else 'pending'
+        self.invoice.update_status()
+        self.invoice.save()
+        return result
+
+
+class ShopFinanceSummary(models.Model):
+    """Running invoice and sales totals of one shop for the finance screen.
+
+    Maintained incrementally by the Invoice and Sale signals (F() deltas), so
+    reading it costs one row however many invoices the shop has. Rebuilt from
+    scratch by ShopFinanceService.rebuild() on the shop's first write or read."""
+    shop = models.OneToOneField(Shop, on_delete=models.CASCADE, related_name='finance_summary')
+
+    invoice_count = models.IntegerField(default=0)
+    draft_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    partially_paid_count = models.IntegerField(default=0)
+    paid_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    overdue_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+
+    invoiced_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of invoice totals")
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of payments recorded against invoices")
+    outstanding_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Balance due on invoices that are neither completed nor cancelled")
+
+    sales_count = models.IntegerField(default=0)
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Finance summary for {self.shop_id}"
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # COMPLIANCE AND AUDIT MODELS
@@ -14,7 +14,7 @@ from .models import (
     FeatureFlag, Backup, DataExport, DataImport, GDPRRequest, DataValidation,
     ProductCategory, NotificationTemplate, NotificationChannel,
     NotificationDelivery, NotificationSchedule, ShopSettings, Invoice,
-    InvoiceItem, InvoicePayment, Receipt, Waste, AnimalWeightRecord
+    InvoiceItem, InvoicePayment, Receipt, Waste, AnimalWeightRecord, StockMovement
 )
 
 User = get_user_model()
@@ -453,16 +453,51 @@ class AnimalSerializer(serializers.ModelSerializer):
                            'appealed_at', 'appeal_resolved_at']
 
 
+class AnimalListSerializer(AnimalSerializer):
+    """
+    Compact AnimalSerializer for list endpoints.
+
+    The nested carcass_measurement, slaughter_parts and weight_history
+    blocks are only included when named in the ``expand`` context entry
+    (``?expand=slaughter_parts,weight_history``); ``carcass_type`` is always
+    present so clients can still tell split carcasses apart.
+    """
+    EXPANDABLE = ('carcass_measurement', 'slaughter_parts', 'weight_history')
+
+    carcass_type = serializers.CharField(source='carcass_measurement.carcass_type', read_only=True, default=None)
+
+    class Meta(AnimalSerializer.Meta):
+        pass
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', ())
+        for name in self.EXPANDABLE:
+            if name not in expand:
+                self.fields.pop(name)
+
+
 class ProductSerializer(serializers.ModelSerializer):
     animal_id = serializers.CharField(source='animal.animal_id', read_only=True)
     processing_unit_name = serializers.CharField(source='processing_unit.name', read_only=True)
     transferred_to_name = serializers.CharField(source='transferred_to.name', read_only=True)
     received_by_shop_name = serializers.CharField(source='received_by_shop.name', read_only=True)
+    public_code = serializers.SerializerMethodField()
+    trace_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = '__all__'
 
+    def get_public_code(self, obj):
+        """Unique code for QR labels; products sharing a batch number get distinct codes"""
+        from .utils.batch_registry import BatchRegistry
+        return BatchRegistry.public_code(obj)
+
+    def get_trace_url(self, obj):
+        from .utils.batch_registry import BatchRegistry
+        return BatchRegistry.trace_url(obj)
+
 
 class OrderSerializer(serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.username', read_only=True)
@@ -936,13 +971,21 @@ class AdminProcessingUnitSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
+    # Admin list querysets annotate the counts; single saved objects fall back to a query
+
     def get_member_count(self, obj):
+        if hasattr(obj, 'member_count'):
+            return obj.member_count
         return obj.members.count()
 
     def get_active_members_count(self, obj):
+        if hasattr(obj, 'active_members_count'):
+            return obj.active_members_count
         return obj.members.filter(is_active=True).count()
 
     def get_product_count(self, obj):
+        if hasattr(obj, 'product_count'):
+            return obj.product_count
         return obj.products.count()
 
 
@@ -959,19 +1002,31 @@ class AdminShopSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
+    # Admin list querysets annotate the counts; single saved objects fall back to a query
+
     def get_member_count(self, obj):
+        if hasattr(obj, 'member_count'):
+            return obj.member_count
         return obj.members.count()
 
     def get_active_members_count(self, obj):
+        if hasattr(obj, 'active_members_count'):
+            return obj.active_members_count
         return obj.members.filter(is_active=True).count()
 
     def get_inventory_count(self, obj):
+        if hasattr(obj, 'inventory_count'):
+            return obj.inventory_count
         return obj.inventory.count()
 
     def get_order_count(self, obj):
+        if hasattr(obj, 'order_count'):
+            return obj.order_count
         return obj.orders.count()
 
     def get_sale_count(self, obj):
+        if hasattr(obj, 'sale_count'):
+            return obj.sale_count
         return obj.sales.count()
 
 
@@ -993,6 +1048,9 @@ class AdminAnimalOverviewSerializer(serializers.ModelSerializer):
         ]
 
     def get_has_rejections(self, obj):
+        # Annotated by AdminAnimalViewSet
+        if hasattr(obj, 'has_rejections'):
+            return obj.has_rejections
         return obj.rejection_reasons.exists()
 
     def get_has_appeals(self, obj):
@@ -1383,6 +1441,9 @@ class AdminAbbatoirListSerializer(serializers.ModelSerializer):
         return full_name if full_name else obj.username
 
     def get_animal_count(self, obj):
+        # Annotated by AdminAbbatoirViewSet
+        if hasattr(obj, 'animal_count'):
+            return obj.animal_count
         return obj.animals.count()
 
 
@@ -1608,6 +1669,20 @@ class ReceiptSerializer(serializers.ModelSerializer):
         return None
 
 
+class StockMovementSerializer(serializers.ModelSerializer):
+    """Serializer for shop stock ledger entries"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id', 'shop', 'product', 'product_name', 'movement_type', 'weight',
+            'entity_type', 'entity_id', 'created_by', 'created_by_name', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class WasteSerializer(serializers.ModelSerializer):
     animal_id = serializers.CharField(source='animal.animal_id', read_only=True)
     animal_species = serializers.CharField(source='animal.species', read_only=True)
@@ -34,30 +34,20 @@ def update_inventory_on_order_status_change(sender, instance, created, **kwargs)
     if old_status != 'confirmed' and instance.status == 'confirmed':
         logger.info(f"Order {instance.id} status changed to confirmed, updating inventory")
 
-        for order_item in instance.items.all():
-            try:
-                # Get or create inventory for this shop and product
-                inventory, created = Inventory.objects.get_or_create(
-                    shop=instance.shop,
-                    product=order_item.product,
-                    defaults={'quantity': 0, 'weight': 0, 'weight_unit': getattr(order_item, 'weight_unit', 'kg')}
-                )
-
-                # Subtract ordered weight from inventory (weight-first logic)
-                old_weight = inventory.weight
-                sold_weight = getattr(order_item, 'weight', 0) or 0
-                inventory.weight = max(0, inventory.weight - sold_weight)
-                inventory.last_updated = timezone.now()
-                inventory.save()
-
-                logger.info(
-                    f"Updated inventory for product {order_item.product.name}: "
-                    f"{old_weight} -> {inventory.weight} ({inventory.weight_unit})"
-                )
-
-            except Exception as e:
-                logger.error(f"Failed to update inventory for order item {order_item.id}: {str(e)}")
-                # Continue with other items even if one fails
+        # One F() update and one ledger entry per product, however many lines
+        sold, weight_units = {}, {}
+        for product_id, weight, weight_unit in instance.items.values_list('product_id', 'weight', 'weight_unit'):
+            sold[product_id] = sold.get(product_id, 0) - (weight or 0)
+            weight_units.setdefault(product_id, weight_unit)
+        try:
+            from .utils.stock_ledger import StockLedgerService
+            StockLedgerService.move(
+                instance.shop_id, sold, 'sale', entity=('order', instance.pk), user_id=instance.customer_id,
+                create_missing=True, weight_units=weight_units,
+            )
+            logger.info(f"Updated inventory of {len(sold)} products for order {instance.id}")
+        except Exception as e:
+            logger.error(f"Failed to update inventory for order {instance.id}: {str(e)}")
 
 
 @receiver(pre_save, sender=ProcessingUnitUser)
@@ -213,25 +203,26 @@ def audit_shop_user_changes(sender, instance, created, **kwargs):
 # CACHE INVALIDATION FOR ANALYTICS
 # ══════════════════════════════════════════════════════════════════════════════
 
-from django.core.cache import cache
 from django.db.models.signals import post_delete
+from .utils.tagged_cache import TaggedCache
 
 
-def invalidate_analytics_cache():
-    """Clear all analytics-related cache entries."""
+def invalidate_analytics_cache(model_name):
+    """Drop the cached analytics entries that depend on ``model_name``."""
     try:
-        # For simple cache backends, we clear specific keys if possible
-        # For Redis with pattern support, this would use delete_pattern
-        cache.clear()
-        logger.info("[CACHE] Analytics cache invalidated")
+        # Only entries tagged with the model are invalidated; sessions,
+        # throttle counters and unrelated caches are left alone
+        TaggedCache.invalidate(TaggedCache.model_tag(model_name))
+        logger.info(f"[CACHE] Analytics cache invalidated for {model_name}")
     except Exception as e:
         logger.warning(f"[CACHE] Failed to invalidate cache: {e}")
 
 
 # Models that affect analytics data
 ANALYTICS_TRIGGERS = [
-    'Animal', 'Product', 'Order', 'Sale',
-    'ComplianceAudit', 'Certification', 'RegistrationApplication'
+    'Animal', 'Product', 'Order', 'OrderItem', 'Sale', 'SaleItem',
+    'ComplianceAudit', 'Certification', 'RegistrationApplication',
+    'UserProfile', 'ProcessingUnit', 'Shop', 'Inventory',
 ]
 
 
@@ -240,7 +231,7 @@ def invalidate_cache_on_save(sender, **kwargs):
     """Invalidate analytics cache when relevant models are saved."""
     model_name = sender.__name__
     if model_name in ANALYTICS_TRIGGERS:
-        invalidate_analytics_cache()
+        invalidate_analytics_cache(model_name)
         logger.debug(f"[CACHE] Invalidated due to {model_name} save")
 
 
@@ -249,5 +240,446 @@ def invalidate_cache_on_delete(sender, **kwargs):
     """Invalidate analytics cache when relevant models are deleted."""
     model_name = sender.__name__
     if model_name in ANALYTICS_TRIGGERS:
-        invalidate_analytics_cache()
+        invalidate_analytics_cache(model_name)
         logger.debug(f"[CACHE] Invalidated due to {model_name} delete")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# TIMELINE SNAPSHOT INVALIDATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .models import (
+    Animal, CarcassMeasurement, OrderItem, Product, ProductIngredient,
+    Sale, SaleItem, SlaughterPart,
+)
+from .utils.page_cache import PageCache
+from .utils.traceability import invalidate_animal_timelines, invalidate_product_timelines
+
+
+def _invalidate_timelines(product_ids=None, animal_ids=None):
+    """Bump snapshot versions; never let a cache miss break the write path."""
+    try:
+        if product_ids:
+            invalidate_product_timelines(product_ids)
+        if animal_ids:
+            invalidate_animal_timelines(animal_ids)
+    except Exception as e:
+        logger.warning(f"[TIMELINE] Failed to invalidate snapshots: {e}")
+
+
+@receiver(post_save, sender=Product)
+def invalidate_timeline_on_product_save(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_timelines(product_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_save, sender=SlaughterPart)
+@receiver(post_save, sender=CarcassMeasurement)
+@receiver(post_delete, sender=SlaughterPart)
+@receiver(post_delete, sender=CarcassMeasurement)
+def invalidate_timeline_on_lineage_change(sender, instance, **kwargs):
+    animal_id = instance.pk if sender is Animal else instance.animal_id
+    _invalidate_timelines(animal_ids=[animal_id])
+
+
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=SaleItem)
+@receiver(post_delete, sender=SaleItem)
+def invalidate_timeline_on_product_activity(sender, instance, **kwargs):
+    _invalidate_timelines(product_ids=[instance.product_id])
+
+
+@receiver(post_save, sender=Order)
+def invalidate_timeline_on_order_save(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_timelines(product_ids=instance.items.values('product_id'))
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_pages_on_product_delete(sender, instance, **kwargs):
+    PageCache.touch_products([instance.pk], timezone.now())
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+@receiver(post_save, sender=SaleItem)
+@receiver(post_delete, sender=SaleItem)
+def invalidate_receipt_page_on_sale_change(sender, instance, **kwargs):
+    PageCache.touch_sale(instance.pk if sender is Sale else instance.sale_id)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BATCH IDENTIFIER REGISTRY
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .utils.batch_registry import BatchRegistry
+from .utils.lineage_service import LineageService
+
+# Product fields whose change re-registers the batch code or rebuilds lineage
+PRODUCT_IDENTITY_FIELDS = ('batch_number',) + LineageService.SOURCE_FIELDS
+
+
+def _product_identity_changed(instance, fields):
+    old = getattr(instance, '_old_identity', None) or {}
+    return any(field in old and old[field] != getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=Product)
+def track_product_identity_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the stored batch number and sources so post_save only acts when they change."""
+    instance._old_identity = None
+    if raw or not instance.pk:
+        return
+    fields = [
+        field for field in PRODUCT_IDENTITY_FIELDS
+        if update_fields is None or field in update_fields or field.removesuffix('_id') in update_fields
+    ]
+    if not fields:
+        return
+    try:
+        instance._old_identity = Product.objects.filter(pk=instance.pk).values(*fields).first()
+    except Exception as e:
+        logger.error(f"[PRODUCT] Failed to read previous identity of product {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Product)
+def register_product_batch_code(sender, instance, created, raw=False, **kwargs):
+    """Give every product a unique public batch code for /trace/<code>/."""
+    if raw:
+        return
+    if not created and not _product_identity_changed(instance, ('batch_number',)):
+        return
+    try:
+        BatchRegistry.register(instance)
+    except Exception as e:
+        logger.error(f"[BATCH] Failed to register batch code for product {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PRODUCT LINEAGE CLOSURE TABLE
+# ══════════════════════════════════════════════════════════════════════════════
+
+@receiver(post_save, sender=Product)
+def rebuild_lineage_on_product_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and not _product_identity_changed(instance, LineageService.SOURCE_FIELDS):
+        return
+    try:
+        LineageService.rebuild([instance.pk])
+    except Exception as e:
+        logger.error(f"[LINEAGE] Failed to rebuild lineage for product {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=ProductIngredient)
+@receiver(post_delete, sender=ProductIngredient)
+def rebuild_lineage_on_ingredient_change(sender, instance, raw=False, origin=None, **kwargs):
+    if raw:
+        return
+    # Ingredients removed by a cascading delete of their product or part must
+    # not re-insert rows for ancestors that are being deleted too.
+    if origin is not None and getattr(origin, 'model', type(origin)) is not ProductIngredient:
+        return
+    try:
+        LineageService.schedule([instance.product_id])
+    except Exception as e:
+        logger.error(f"[LINEAGE] Failed to schedule lineage rebuild for product {instance.product_id}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PRODUCT INFO DENORMALIZATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .models import Receipt
+from .utils.product_info_service import ProductInfoService
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_save, sender=Receipt)
+@receiver(post_delete, sender=Receipt)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def schedule_product_info_refresh(sender, instance, raw=False, **kwargs):
+    """Refresh the product's ProductInfo row in the background."""
+    if raw:
+        return
+    try:
+        ProductInfoService.schedule([instance.pk if sender is Product else instance.product_id])
+    except Exception as e:
+        logger.error(f"[PRODUCT_INFO] Failed to schedule refresh for {sender.__name__} {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DAILY ANALYTICS ROLLUPS
+# ══════════════════════════════════════════════════════════════════════════════
+
+from django.contrib.auth.models import User
+from .utils.rollup_service import RollupService
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def mark_rollup_dates_dirty(sender, instance, raw=False, **kwargs):
+    """Recent days are refreshed on schedule; edits to older days are queued."""
+    if raw:
+        return
+    try:
+        RollupService.mark_dirty(
+            instance.created_at,
+            getattr(instance, 'transferred_at', None),
+            getattr(instance, 'slaughtered_at', None),
+        )
+    except Exception as e:
+        logger.error(f"[ROLLUP] Failed to mark rollup dates for {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_rollup_date_dirty_for_user(sender, instance, created=True, raw=False, **kwargs):
+    # Only creation and deletion change new_users; skip login/profile saves
+    if raw or not created:
+        return
+    try:
+        RollupService.mark_dirty(instance.date_joined)
+    except Exception as e:
+        logger.error(f"[ROLLUP] Failed to mark rollup date for user {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PRODUCTION STATS CACHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .utils.production_stats import ProductionStatsService
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+@receiver(post_save, sender=SlaughterPart)
+@receiver(post_delete, sender=SlaughterPart)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_production_stats(sender, instance, raw=False, **kwargs):
+    """Transfers, receptions, rejections and product changes alter a unit's card."""
+    if raw:
+        return
+    unit_id = instance.processing_unit_id if sender is Product else instance.transferred_to_id
+    try:
+        ProductionStatsService.invalidate([unit_id])
+    except Exception as e:
+        logger.error(f"[PRODUCTION_STATS] Failed to invalidate stats for unit {unit_id}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PROCESSING PIPELINE LIVE COUNTS
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .utils.pipeline_service import ProcessingPipelineService
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+@receiver(post_save, sender=CarcassMeasurement)
+@receiver(post_delete, sender=CarcassMeasurement)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def schedule_pipeline_refresh(sender, instance, raw=False, **kwargs):
+    """Transfers, receptions, measurements and products move animals between stages."""
+    if raw:
+        return
+    try:
+        if sender is Animal:
+            unit_ids = [instance.transferred_to_id]
+        elif sender is Product:
+            unit_ids = [instance.processing_unit_id]
+        else:
+            unit_ids = Animal.objects.filter(pk=instance.animal_id).values_list('transferred_to_id', flat=True)
+        ProcessingPipelineService.schedule(unit_ids)
+    except Exception as e:
+        logger.error(f"[PROCESSING_PIPELINE] Failed to schedule refresh for {sender.__name__} {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SUPPLY CHAIN MAP CACHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .models import ProcessingUnit, Shop, UserProfile
+from .utils.map_service import MapService
+
+
+@receiver(pre_save, sender=ProcessingUnit)
+@receiver(pre_save, sender=Shop)
+@receiver(pre_save, sender=UserProfile)
+@receiver(pre_save, sender=User)
+def track_map_field_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the mapped fields so post_save can tell whether the map changed."""
+    fields = MapService.MAP_FIELDS[sender.__name__]
+    instance._old_map_values = None
+    # Login (last_login) and other targeted saves never touch the map
+    if raw or not instance.pk or (update_fields is not None and not set(update_fields) & set(fields)):
+        return
+    try:
+        instance._old_map_values = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    except Exception as e:
+        logger.error(f"[MAP] Failed to read previous location of {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=ProcessingUnit)
+@receiver(post_save, sender=Shop)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=User)
+def invalidate_map_on_save(sender, instance, created, raw=False, **kwargs):
+    """Geocoding or editing a location (or an abbatoir's account) redraws the map."""
+    if raw:
+        return
+    try:
+        if created:
+            # New users get their profile (and its own signal) separately
+            changed = sender is not User
+        else:
+            old = getattr(instance, '_old_map_values', None)
+            changed = old is not None and any(
+                old[field] != getattr(instance, field) for field in MapService.MAP_FIELDS[sender.__name__]
+            )
+            if changed and sender is User:
+                changed = UserProfile.objects.filter(user=instance, role='Abbatoir').exists()
+        if changed:
+            MapService.clear_cache()
+    except Exception as e:
+        logger.error(f"[MAP] Failed to invalidate map for {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=ProcessingUnit)
+@receiver(post_delete, sender=Shop)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_map_on_delete(sender, instance, **kwargs):
+    """Removed locations drop off the map and out of its summary counts."""
+    try:
+        MapService.clear_cache()
+    except Exception as e:
+        logger.error(f"[MAP] Failed to invalidate map for {sender.__name__} {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SHOP FINANCE SUMMARY
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .models import Invoice
+from .utils.shop_finance import ShopFinanceService
+
+FINANCE_STATE_FIELDS = {
+    Invoice: ('shop_id', 'status', 'total_amount', 'amount_paid'),
+    Sale: ('shop_id', 'total_amount'),
+}
+
+
+def _finance_state(sender, instance):
+    return tuple(getattr(instance, field) for field in FINANCE_STATE_FIELDS[sender])
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Sale)
+def track_finance_state(sender, instance, raw=False, **kwargs):
+    """Remember the stored totals so post_save can apply only the difference."""
+    instance._old_finance_state = None
+    if raw or not instance.pk:
+        return
+    try:
+        instance._old_finance_state = sender.objects.filter(pk=instance.pk).values_list(
+            *FINANCE_STATE_FIELDS[sender]
+        ).first()
+    except Exception as e:
+        logger.error(f"[SHOP_FINANCE] Failed to read previous state of {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Sale)
+def update_finance_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """Invoice edits, payments (via the invoice) and sales adjust the shop's running totals."""
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_old_finance_state', None)
+    if not created and old_state is None:
+        return
+    apply = ShopFinanceService.apply_invoice_change if sender is Invoice else ShopFinanceService.apply_sale_change
+    try:
+        apply(old_state, _finance_state(sender, instance))
+    except Exception as e:
+        logger.error(f"[SHOP_FINANCE] Failed to update summary for {sender.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Sale)
+def update_finance_summary_on_delete(sender, instance, origin=None, **kwargs):
+    """Deleted invoices and sales drop out of the shop's running totals."""
+    # A shop being deleted takes its summary with it
+    if origin is not None and getattr(origin, 'model', type(origin)) is Shop:
+        return
+    apply = ShopFinanceService.apply_invoice_change if sender is Invoice else ShopFinanceService.apply_sale_change
+    try:
+        apply(_finance_state(sender, instance), None)
+    except Exception as e:
+        logger.error(f"[SHOP_FINANCE] Failed to update summary for {sender.__name__} {instance.pk}: {e}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# STOCK LEDGER
+# ══════════════════════════════════════════════════════════════════════════════
+
+from .utils.stock_ledger import StockLedgerService
+
+
+@receiver(pre_save, sender=Inventory)
+def track_inventory_weight(sender, instance, raw=False, **kwargs):
+    """Remember the stored weight so a direct save can be booked as an adjustment."""
+    instance._old_stock_weight = None
+    if raw or not instance.pk:
+        return
+    try:
+        instance._old_stock_weight = Inventory.objects.filter(pk=instance.pk).values_list('weight', flat=True).first()
+    except Exception as e:
+        logger.error(f"[STOCK] Failed to read previous weight of inventory {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Inventory)
+def record_inventory_adjustment(sender, instance, created, raw=False, **kwargs):
+    """
+    Inventory rows saved outside the ledger (admin edits, the inventory API,
+    seeding) get an adjustment movement, so ledger balances keep matching.
+    """
+    if raw:
+        return
+    old_weight = 0 if created else getattr(instance, '_old_stock_weight', None)
+    if old_weight is None or instance.weight == old_weight:
+        return
+    try:
+        StockLedgerService.record_adjustment(instance, instance.weight - old_weight)
+    except Exception as e:
+        logger.error(f"[STOCK] Failed to record adjustment for inventory {instance.pk}: {e}")
+
+
+@receiver(post_delete, sender=Inventory)
+def record_inventory_removal(sender, instance, origin=None, **kwargs):
+    """Deleting an Inventory row writes its remaining stock off the ledger."""
+    # A shop or product being deleted takes its movements with it
+    if origin is not None and getattr(origin, 'model', type(origin)) is not Inventory:
+        return
+    if not instance.weight:
+        return
+    try:
+        StockLedgerService.record_adjustment(instance, -instance.weight)
+    except Exception as e:
+        logger.error(f"[STOCK] Failed to record removal of inventory {instance.pk}: {e}")
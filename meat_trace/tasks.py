@@ -9,16 +9,56 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
     logger.warning("Celery not installed, using dummy shared_task decorator")
-    def shared_task(func):
-        return func
+    def shared_task(func=None, **options):
+        return func if func is not None else (lambda f: f)
 
 from django.utils import timezone
 from django.core.management import call_command
+from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def enqueue(task, *args, fallback=None, **kwargs):
+    """
+    Queue ``task`` once the current transaction commits.
+
+    Runs the task inline when Celery is not installed or the broker cannot
+    be reached, so callers never lose the work. Jobs too heavy for the
+    request thread pass ``fallback``, called with the error instead of the
+    inline run. The callback runs after the commit, so a failing inline
+    run is logged rather than raised into a request whose data is already
+    saved.
+    """
+    def _run_inline():
+        try:
+            task(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Inline run of {task.__name__} failed: {str(e)}")
+
+    def _not_queued(error):
+        if fallback is None:
+            logger.warning(f"Could not queue {task.__name__}, running inline: {error}")
+            _run_inline()
+            return
+        logger.warning(f"Could not queue {task.__name__}: {error}")
+        try:
+            fallback(error)
+        except Exception as e:
+            logger.error(f"Fallback for {task.__name__} failed: {str(e)}")
+
+    def _send():
+        if not hasattr(task, 'apply_async'):
+            return _not_queued('Celery is not installed')
+        try:
+            task.apply_async(args=args, kwargs=kwargs, retry=False)
+        except Exception as e:
+            _not_queued(str(e))
+
+    transaction.on_commit(_send)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # NOTIFICATION TASKS
 # ══════════════════════════════════════════════════════════════════════════════
@@ -83,6 +123,110 @@ def send_notification_via_channel(notification_id, channel_id):
         raise
 
 
+@shared_task(ignore_result=True)
+def deliver_notifications(notification_ids):
+    """
+    Deliver bulk-created notifications via their channels and WebSocket.
+    """
+    from .models import Notification
+    from .utils.notification_service import NotificationService
+
+    notifications = Notification.objects.filter(id__in=notification_ids).select_related('user')
+    delivered = NotificationService.deliver_notifications(notifications)
+    logger.info(f"Delivered {delivered} of {len(notification_ids)} notifications")
+    return {'delivered': delivered}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RECALL TASKS
+# ══════════════════════════════════════════════════════════════════════════════
+
+@shared_task(ignore_result=True)
+def run_recall_assessment(reason, animal_ids=None, slaughter_part_ids=None, initiated_by_id=None):
+    """
+    Assess the downstream impact of a contaminated animal / slaughter part and
+    notify the affected shops and processing units.
+    """
+    from django.contrib.auth.models import User
+    from .utils.recall_service import RecallService
+
+    try:
+        impact = RecallService.assess(animal_ids=animal_ids, slaughter_part_ids=slaughter_part_ids)
+        initiated_by = User.objects.filter(id=initiated_by_id).first() if initiated_by_id else None
+        notified = RecallService.notify(impact, reason, initiated_by=initiated_by)
+        logger.info(
+            f"Recall assessment ({reason}): {impact['totals']['products']} products, "
+            f"{impact['totals']['shops']} shops, {notified} notifications"
+        )
+        return {'totals': impact['totals'], 'notified': notified}
+    except Exception as e:
+        logger.error(f"Recall assessment failed: {str(e)}")
+        raise
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DENORMALIZATION TASKS
+# ══════════════════════════════════════════════════════════════════════════════
+
+@shared_task(ignore_result=True)
+def refresh_product_infos(product_ids):
+    """
+    Rebuild the denormalized ProductInfo rows of the given products.
+    """
+    from .utils.product_info_service import ProductInfoService
+
+    try:
+        created, updated = ProductInfoService.refresh(product_ids)
+        return {'created': created, 'updated': updated}
+    except Exception as e:
+        logger.error(f"Failed to refresh product infos: {str(e)}")
+        raise
+
+
+@shared_task
+def refresh_daily_rollups():
+    """
+    Recompute the daily analytics rollups for recent and dirty dates.
+    """
+    from .utils.rollup_service import RollupService
+
+    try:
+        return RollupService.refresh()
+    except Exception as e:
+        logger.error(f"Failed to refresh daily rollups: {str(e)}")
+        raise
+
+
+@shared_task
+def compact_stock_ledger():
+    """
+    Fold stock movements older than the retention window into snapshots.
+    """
+    from .utils.stock_ledger import StockLedgerService
+
+    try:
+        return StockLedgerService.compact()
+    except Exception as e:
+        logger.error(f"Failed to compact stock ledger: {str(e)}")
+        raise
+
+
+@shared_task(ignore_result=True)
+def refresh_processing_pipelines(unit_ids):
+    """
+    Recount the processing pipeline of the given units and push changes to
+    connected clients.
+    """
+    from .utils.pipeline_service import ProcessingPipelineService
+
+    try:
+        changed = ProcessingPipelineService.refresh(unit_ids)
+        return {'changed': changed}
+    except Exception as e:
+        logger.error(f"Failed to refresh processing pipelines: {str(e)}")
+        raise
+
+
 @shared_task
 def create_backup(backup_id, user_id):
     """
@@ -141,35 +285,25 @@ def restore_backup(backup_id, user_id):
         raise
 
 
-@shared_task
+@shared_task(ignore_result=True)
 def export_data(export_id, user_id):
     """
     Export data based on export configuration.
     """
     from .models import DataExport
-    from django.contrib.auth import get_user_model
-
-    User = get_user_model()
+    from .utils.report_export import ReportExportService
 
     try:
         export_obj = DataExport.objects.get(export_id=export_id)
-        user = User.objects.get(id=user_id)
+        if export_obj.status in ('completed', 'cancelled'):
+            return {'export_id': export_id, 'status': export_obj.status}
 
-        # Implementation would depend on export requirements
-        # This is a placeholder for the actual export logic
-
-        export_obj.status = 'completed'
-        export_obj.completed_at = timezone.now()
-        export_obj.save()
+        records = ReportExportService.run(export_obj)
 
         logger.info(f"Data export {export_id} completed successfully")
-        return {'export_id': export_id, 'status': 'completed'}
+        return {'export_id': export_id, 'status': 'completed', 'records_exported': records}
 
     except Exception as e:
-        export_obj.status = 'failed'
-        export_obj.error_message = str(e)
-        export_obj.save()
-
         logger.error(f"Data export {export_id} failed: {str(e)}")
         raise
 
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from meat_trace.models import (
+    Animal, Inventory, ProcessingUnit, ProcessingUnitUser, Product, RejectionReason,
+    Sale, Shop, ShopUser, SlaughterPart,
+)
+
+# Every admin list endpoint backed by a model viewset
+ADMIN_LIST_ENDPOINTS = [
+    'users', 'processing-units', 'shops', 'animals', 'products', 'slaughter-parts',
+    'abbatoirs', 'compliance', 'certifications', 'registrations', 'workflows',
+]
+
+
+class AdminListQueryCountTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='count_admin', password='testpass123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _add_rows(self, i):
+        """One of everything the admin lists show, covering the lifecycle branches."""
+        abbatoir = User.objects.create_user(username=f'count_abbatoir_{i}', password='testpass123')
+        unit = ProcessingUnit.objects.create(name=f'Count Unit {i}')
+        ProcessingUnitUser.objects.create(user=abbatoir, processing_unit=unit, role='worker')
+        shop = Shop.objects.create(name=f'Count Shop {i}')
+        ShopUser.objects.create(user=abbatoir, shop=shop, role='cashier')
+
+        transferred = Animal.objects.create(
+            abbatoir=abbatoir, species='cow', age=12, live_weight=100, transferred_to=unit,
+        )
+        product = Product.objects.create(
+            processing_unit=unit, animal=transferred, name=f'Count Cut {i}',
+            batch_number=f'CNT-{i}', quantity=1, weight=1,
+        )
+        Inventory.objects.create(shop=shop, product=product, quantity=1)
+        Sale.objects.create(shop=shop, total_amount=1)
+
+        split = Animal.objects.create(abbatoir=abbatoir, species='goat', age=12, live_weight=30, slaughtered=True)
+        SlaughterPart.objects.create(animal=split, part_type='torso', weight=5, transferred_to=unit)
+        SlaughterPart.objects.create(animal=split, part_type='front_legs', weight=5)
+        RejectionReason.objects.create(animal=split, category='quality', specific_reason='poor_condition')
+
+    def _query_counts(self):
+        counts = {}
+        for endpoint in ADMIN_LIST_ENDPOINTS:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/api/v2/admin/{endpoint}/')
+            self.assertEqual(response.status_code, 200, endpoint)
+            counts[endpoint] = len(ctx.captured_queries)
+        return counts
+
+    def test_admin_list_query_counts_do_not_grow_with_rows(self):
+        for i in range(2):
+            self._add_rows(i)
+        small = self._query_counts()
+
+        for i in range(2, 8):
+            self._add_rows(i)
+        large = self._query_counts()
+
+        self.assertEqual(large, small)
+
+    def test_annotated_counts_match_the_relations(self):
+        self._add_rows(0)
+        shop = self.client.get('/api/v2/admin/shops/').data[0]
+        self.assertEqual(
+            (shop['member_count'], shop['inventory_count'], shop['order_count'], shop['sale_count']), (1, 1, 0, 1),
+        )
+        unit = self.client.get('/api/v2/admin/processing-units/').data[0]
+        self.assertEqual((unit['member_count'], unit['active_members_count'], unit['product_count']), (1, 1, 1))
+        abbatoir = self.client.get('/api/v2/admin/abbatoirs/').data[0]
+        self.assertEqual(abbatoir['animal_count'], 2)
+        animals = {a['species']: a for a in self.client.get('/api/v2/admin/animals/').data}
+        self.assertEqual(animals['goat']['lifecycle_status'], 'SEMI-TRANSFERRED')
+        self.assertTrue(animals['goat']['has_rejections'])
+        self.assertFalse(animals['cow']['has_rejections'])
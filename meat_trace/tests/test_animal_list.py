@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, AnimalWeightRecord, SlaughterPart, Waste
+
+URL = '/api/v2/animals/'
+
+
+class AnimalListTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user(username='list_abbatoir', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.farmer)
+
+    def _add_animal(self, i):
+        animal = Animal.objects.create(
+            abbatoir=self.farmer, species='cow', age=24, live_weight=Decimal('300'), slaughtered=True,
+            animal_name=f'List Animal {i}',
+        )
+        SlaughterPart.objects.create(animal=animal, part_type='torso', weight=Decimal('100'))
+        SlaughterPart.objects.create(animal=animal, part_type='front_legs', weight=Decimal('40'))
+        AnimalWeightRecord.objects.create(animal=animal, weight=Decimal('290'))
+        Waste.objects.create(animal=animal, waste_type='evisceration', weight_kg=Decimal('12.5'))
+        Waste.objects.create(animal=animal, waste_type='trimming', weight_kg=Decimal('2.5'))
+        return animal
+
+    def _list(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(ctx.captured_queries)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        for i in range(2):
+            self._add_animal(i)
+        _, small = self._list()
+        _, small_expanded = self._list(expand='carcass_measurement,slaughter_parts,weight_history')
+
+        for i in range(2, 8):
+            self._add_animal(i)
+        data, large = self._list()
+        _, large_expanded = self._list(expand='carcass_measurement,slaughter_parts,weight_history')
+
+        self.assertEqual(len(data), 8)
+        self.assertEqual(large, small)
+        self.assertEqual(large_expanded, small_expanded)
+
+    def test_compact_list_matches_detail_values(self):
+        animal = self._add_animal(0)
+        data, _ = self._list()
+        row = data[0]
+        self.assertNotIn('slaughter_parts', row)
+        self.assertNotIn('weight_history', row)
+        self.assertNotIn('carcass_measurement', row)
+        self.assertIsNone(row['carcass_type'])
+
+        detail = self.client.get(f'{URL}{animal.id}/').data
+        for field in ('total_waste_weight', 'slaughter_weight', 'lifecycle_status', 'current_age_months'):
+            self.assertEqual(row[field], detail[field], field)
+        self.assertEqual(Decimal(row['total_waste_weight']), Decimal('15.00'))
+        self.assertEqual(Decimal(row['slaughter_weight']), Decimal('140.00'))
+        self.assertEqual(len(detail['slaughter_parts']), 2)
+
+    def test_expand_adds_requested_blocks_only(self):
+        self._add_animal(0)
+        data, _ = self._list(expand='slaughter_parts,unknown')
+        self.assertEqual(len(data[0]['slaughter_parts']), 2)
+        self.assertNotIn('weight_history', data[0])
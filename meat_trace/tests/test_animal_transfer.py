@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from meat_trace.models import Activity, Animal, CarcassMeasurement, ProcessingUnit, SlaughterPart
+from meat_trace.utils.pipeline_service import ProcessingPipelineService
+
+URL = '/api/v2/animals/transfer/'
+
+
+class AnimalTransferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.abbatoir = User.objects.create_user(username='transfer_abbatoir', password='testpass123')
+        self.processing_unit = ProcessingUnit.objects.create(name='Transfer Processing Unit')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.abbatoir)
+
+    def _animal(self, slaughtered=True, abbatoir=None):
+        return Animal.objects.create(
+            abbatoir=abbatoir or self.abbatoir, species='cow', age=24, live_weight=300, slaughtered=slaughtered,
+        )
+
+    def _split_carcass(self):
+        animal = self._animal()
+        CarcassMeasurement.objects.create(
+            animal=animal, carcass_type='split', left_carcass_weight=50, right_carcass_weight=50, measurements={},
+        )
+        parts = [
+            SlaughterPart.objects.create(animal=animal, part_type=part_type, weight=50)
+            for part_type in ('left_carcass', 'right_carcass')
+        ]
+        return animal, parts
+
+    def _load(self, count):
+        """``count`` whole animals and ``count`` split carcasses, all parts shipped."""
+        whole = [self._animal() for _ in range(count)]
+        split = [self._split_carcass() for _ in range(count)]
+        return {
+            'processing_unit_id': self.processing_unit.id,
+            'animal_ids': [animal.id for animal in whole],
+            'part_transfers': [
+                {'animal_id': animal.id, 'part_ids': [part.id for part in parts]} for animal, parts in split
+            ],
+        }
+
+    def _transfer(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(URL, payload, format='json')
+        return response, len(ctx.captured_queries)
+
+    def test_truckload_transfer_uses_a_constant_number_of_queries(self):
+        small_response, small = self._transfer(self._load(2))
+        large_response, large = self._transfer(self._load(10))
+
+        self.assertEqual(large_response.status_code, 200)
+        self.assertEqual(large, small)
+        self.assertEqual(large_response.data['whole_animal_count'], 10)
+        self.assertEqual(large_response.data['split_carcass_count'], 10)
+        self.assertEqual(len(large_response.data['transferred_animals']), 20)
+        self.assertEqual(len(large_response.data['transferred_parts']), 20)
+        self.assertEqual(
+            large_response.data['message'],
+            'Successfully transferred 10 whole animals and 10 complete split carcasses and 20 parts '
+            'to Transfer Processing Unit',
+        )
+        self.assertFalse(Animal.objects.filter(transferred_to__isnull=True).exists())
+        self.assertFalse(SlaughterPart.objects.filter(transferred_at__isnull=True).exists())
+        self.assertEqual(Activity.objects.filter(activity_type='transfer').count(), 2)
+
+    def test_partial_and_ineligible_transfers(self):
+        animal, parts = self._split_carcass()
+        foreign = self._animal(abbatoir=User.objects.create_user(username='other_abbatoir', password='testpass123'))
+        ProcessingPipelineService.get_counts([self.processing_unit.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self._transfer({
+                'processing_unit_id': self.processing_unit.id,
+                'animal_ids': [foreign.id],
+                'part_transfers': [{'animal_id': animal.id, 'part_ids': [parts[0].id]}],
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['transferred_animals'], [])
+        self.assertEqual(response.data['transferred_parts'], [parts[0].id])
+        animal.refresh_from_db()
+        self.assertIsNone(animal.transferred_to)
+        self.assertTrue(animal.is_semi_transferred_status)
+
+        # Shipping the last part completes the carcass
+        with self.captureOnCommitCallbacks(execute=True):
+            response, _ = self._transfer({
+                'processing_unit_id': self.processing_unit.id,
+                'part_transfers': [{'animal_id': animal.id, 'part_ids': [parts[0].id, parts[1].id]}],
+            })
+        self.assertEqual(response.data['transferred_animals'], [animal.id])
+        self.assertEqual(response.data['transferred_parts'], [parts[1].id])
+        self.assertEqual(response.data['split_carcass_count'], 1)
+        # The bulk update still refreshes the unit's pipeline counts
+        counts = ProcessingPipelineService.get_counts([self.processing_unit.id])[self.processing_unit.id]
+        self.assertEqual(counts['receive'], 1)
+
+        live = self._animal(slaughtered=False)
+        response, _ = self._transfer({'processing_unit_id': self.processing_unit.id, 'animal_ids': [live.id]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['animals_not_slaughtered'], [live.animal_id])
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from meat_trace.models import BatchIdentifier, ProcessingUnit, Product
+from meat_trace.serializers import ProductSerializer
+from meat_trace.utils.batch_registry import BatchRegistry
+
+
+class BatchRegistryTests(TestCase):
+    def setUp(self):
+        self.processing_unit = ProcessingUnit.objects.create(name='Registry Processing Unit')
+
+    def _product(self, batch_number, **kwargs):
+        return Product.objects.create(
+            processing_unit=self.processing_unit,
+            name=f'Product {batch_number}',
+            batch_number=batch_number,
+            quantity=1,
+            weight=1,
+            **kwargs,
+        )
+
+    def test_duplicate_batch_numbers_resolve_deterministically(self):
+        original = self._product('DUP-001', created_at=timezone.now() - timedelta(days=1))
+        duplicate = self._product('DUP-001')
+
+        self.assertEqual(BatchRegistry.resolve('DUP-001'), original)
+        self.assertEqual(BatchRegistry.public_code(duplicate), f'DUP-001-{duplicate.pk}')
+        self.assertEqual(BatchRegistry.resolve(f'DUP-001-{duplicate.pk}'), duplicate)
+
+        response = self.client.get(reverse('public_trace_view', args=['DUP-001']))
+        self.assertEqual(response.status_code, 200)
+
+    def test_renamed_batch_keeps_old_code(self):
+        product = self._product('OLD-001')
+        product.batch_number = 'NEW-001'
+        product.save()
+
+        self.assertEqual(BatchRegistry.resolve('OLD-001'), product)
+        self.assertEqual(BatchRegistry.public_code(product), 'NEW-001')
+        self.assertEqual(BatchIdentifier.objects.filter(product=product, is_primary=True).count(), 1)
+
+    def test_unregistered_legacy_batch_falls_back_to_oldest_product(self):
+        older = self._product('LEGACY-001', created_at=timezone.now() - timedelta(days=2))
+        self._product('LEGACY-001')
+        BatchIdentifier.objects.all().delete()
+
+        self.assertEqual(BatchRegistry.resolve('LEGACY-001'), older)
+
+    def test_codes_are_registered_only_when_the_batch_number_changes(self):
+        product = self._product('SAVE-001')
+        product.name = 'Renamed'
+        with CaptureQueriesContext(connection) as ctx:
+            product.save()
+        self.assertFalse(any('meat_trace_batchidentifier' in q['sql'] for q in ctx.captured_queries))
+
+    def test_serialized_products_carry_their_unique_trace_url(self):
+        self._product('SHARED-001', created_at=timezone.now() - timedelta(days=1))
+        duplicate = self._product('SHARED-001')
+
+        data = ProductSerializer(duplicate).data
+        self.assertEqual(data['public_code'], f'SHARED-001-{duplicate.pk}')
+        self.assertTrue(data['trace_url'].endswith(f'/trace/SHARED-001-{duplicate.pk}/'))
+        path = reverse('public_trace_view', args=[data['public_code']])
+        self.assertEqual(self.client.get(path).status_code, 200)
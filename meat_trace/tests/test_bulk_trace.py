@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import (
+    Animal, CarcassMeasurement, ProcessingUnit, Product, ProductTimelineSnapshot, Shop, SlaughterPart,
+)
+
+
+class BulkTraceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auditor', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        processing_unit = ProcessingUnit.objects.create(name='Bulk Processing Unit')
+        shop = Shop.objects.create(name='Bulk Shop')
+        self.products = []
+        for i in range(12):
+            animal = Animal.objects.create(
+                abbatoir=self.user, species='cow', age=24, live_weight=400,
+                slaughtered=True, slaughtered_at=timezone.now(),
+                transferred_to=processing_unit, transferred_at=timezone.now(),
+                received_by=self.user, received_at=timezone.now(),
+            )
+            CarcassMeasurement.objects.create(animal=animal, whole_carcass_weight=220, measurements={})
+            part = SlaughterPart.objects.create(animal=animal, part_type='other', weight=40, transferred_to=processing_unit)
+            self.products.append(Product.objects.create(
+                processing_unit=processing_unit, animal=animal, slaughter_part=part,
+                name=f'Bulk {i}', batch_number=f'BULK-{i:03d}', quantity=5, weight=5,
+                transferred_to=shop, transferred_at=timezone.now(),
+            ))
+
+    def _trace(self, batch_numbers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v2/trace/bulk/', {'batch_numbers': batch_numbers}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_constant_in_number_of_products(self):
+        small, small_queries = self._trace([p.batch_number for p in self.products[:3]])
+        ProductTimelineSnapshot.objects.all().delete()
+        large, large_queries = self._trace([p.batch_number for p in self.products])
+
+        self.assertEqual(small.data['count'], 3)
+        self.assertEqual(large.data['count'], 12)
+        self.assertEqual(small_queries, large_queries)
+        stages = [event['stage'] for event in large.data['results'][0]['timeline']]
+        self.assertIn('Slaughter', stages)
+        self.assertIn('Product Dispatch', stages)
+
+    def test_unknown_items_are_reported(self):
+        response = self.client.post(
+            '/api/v2/trace/bulk/',
+            {'batch_numbers': ['BULK-000', 'NOPE'], 'product_ids': [999999]},
+            format='json',
+        )
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['not_found'], {'batch_numbers': ['NOPE'], 'product_ids': [999999]})
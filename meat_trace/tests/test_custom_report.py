@@ -0,0 +1,93 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, Order, OrderItem, ProcessingUnit, Product, Sale, SaleItem, Shop
+
+URL = '/api/v2/admin/analytics/custom_report/'
+
+
+class CustomReportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='report_admin', password='testpass123', is_staff=True)
+        customer = User.objects.create_user(username='report_customer', password='testpass123')
+        unit = ProcessingUnit.objects.create(name='Report Processing Unit')
+        self.shop = Shop.objects.create(name='Report Shop')
+        now = timezone.now()
+        self.products = []
+        for i in range(5):
+            animal = Animal.objects.create(
+                abbatoir=self.admin, species='cow', age=24, live_weight=300,
+                created_at=now - timedelta(hours=i),
+            )
+            self.products.append(Product.objects.create(
+                processing_unit=unit, animal=animal, name=f'Report Cut {i}',
+                batch_number=f'RPT-{i}', quantity=1, weight=2, created_at=now - timedelta(hours=i),
+            ))
+
+        order = Order.objects.create(customer=customer, shop=self.shop, total_amount=Decimal('10.00'))
+        OrderItem.objects.create(
+            order=order, product=self.products[0], quantity=1, unit_price=Decimal('10.00'), subtotal=Decimal('10.00'),
+        )
+        Order.objects.create(customer=customer, shop=self.shop, total_amount=Decimal('5.00'))
+        sale = Sale.objects.create(shop=self.shop, sold_by=self.admin, total_amount=Decimal('10.00'))
+        SaleItem.objects.create(
+            sale=sale, product=self.products[0], quantity=1, unit_price=Decimal('10.00'), subtotal=Decimal('10.00'),
+        )
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('5.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_lists_are_keyset_paginated_without_gaps(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 2}
+            if cursor:
+                params['animals_cursor'] = cursor
+            response = self.client.get(URL, params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['animals'])
+            cursor = response.data['pagination']['animals']['next_cursor']
+            self.assertEqual(response.data['pagination']['animals']['has_more'], cursor is not None)
+            if not cursor:
+                break
+
+        expected = list(Animal.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_product_filter_reaches_orders_and_sales_through_items(self):
+        response = self.client.get(URL, {
+            'product_id': self.products[0].id, 'entities': 'products,orders,sales',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['orders']), 1)
+        self.assertEqual(len(response.data['sales']), 1)
+        self.assertEqual(response.data['sales'][0]['sold_by'], 'report_admin')
+        self.assertEqual(response.data['summary']['total_orders'], 1)
+        self.assertEqual(response.data['summary']['total_revenue'], Decimal('10.00'))
+
+    def test_summary_is_cached_per_filter_and_dropped_on_write(self):
+        params = {'product_id': self.products[1].id}
+        first = self.client.get(URL, params)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(URL, params)
+        self.assertEqual(first.data['summary'], second.data['summary'])
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('1.00'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(URL, params)
+        self.assertTrue(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+    def test_bad_cursor_and_filters_are_rejected(self):
+        self.assertEqual(self.client.get(URL, {'animals_cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'start_date': '2024-13-40'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'entities': 'animals,invoices'}).status_code, 400)
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, DailyRollup, DailyRollupDirtyDate, Order, ProcessingUnit, Product, Sale, Shop
+from meat_trace.utils.rollup_service import RollupService
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='rollup_admin', password='testpass123', is_staff=True)
+        self.processing_unit = ProcessingUnit.objects.create(name='Rollup Processing Unit')
+        self.shop = Shop.objects.create(name='Rollup Shop')
+        self.other_shop = Shop.objects.create(name='Other Rollup Shop')
+
+        now = timezone.now()
+        self.old_animal = Animal.objects.create(
+            abbatoir=self.admin, species='goat', age=12, live_weight=40,
+            created_at=now - timedelta(days=20), transferred_to=self.processing_unit,
+        )
+        Animal.objects.create(abbatoir=self.admin, species='cow', age=24, live_weight=400, created_at=now)
+        Product.objects.create(
+            processing_unit=self.processing_unit, animal=self.old_animal, name='Goat Leg',
+            batch_number='ROLL-001', quantity=5, weight=5, created_at=now - timedelta(days=3),
+        )
+        customer = User.objects.create_user(username='rollup_customer', password='testpass123')
+        Order.objects.create(customer=customer, shop=self.shop, total_amount=Decimal('30.00'))
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('50.00'))
+        Sale.objects.create(shop=self.other_shop, total_amount=Decimal('20.00'), created_at=now - timedelta(days=10))
+
+    def test_first_refresh_backfills_history(self):
+        RollupService.refresh()
+
+        totals = RollupService.totals()
+        self.assertEqual(totals['animals_registered'], Animal.objects.count())
+        self.assertEqual(totals['products_created'], 1)
+        self.assertEqual(totals['orders_placed'], 1)
+        self.assertEqual(totals['sales_recorded'], 2)
+        self.assertEqual(totals['sales_value'], Decimal('70.00'))
+        self.assertEqual(totals['new_users'], User.objects.count())
+
+        self.assertEqual(RollupService.totals(shop_id=self.shop.id)['sales_value'], Decimal('50.00'))
+        self.assertEqual(RollupService.totals(species='goat')['animals_registered'], 1)
+        self.assertEqual(RollupService.totals(species='goat')['products_created'], 1)
+        self.assertEqual(
+            RollupService.totals(processing_unit_id=self.processing_unit.id)['products_created'], 1,
+        )
+
+    def test_backfill_command_recounts_the_whole_history(self):
+        RollupService.refresh()
+        # Bulk writes bypass the signals, so the old day goes stale unnoticed
+        Sale.objects.filter(shop=self.other_shop).update(total_amount=Decimal('35.00'))
+        self.assertEqual(RollupService.totals()['sales_value'], Decimal('70.00'))
+
+        call_command('backfill_daily_rollups', verbosity=0)
+        self.assertEqual(RollupService.totals()['sales_value'], Decimal('85.00'))
+        self.assertFalse(DailyRollupDirtyDate.objects.exists())
+
+    def test_incremental_refresh_picks_up_new_and_deleted_rows(self):
+        RollupService.refresh()
+
+        Animal.objects.create(abbatoir=self.admin, species='pig', age=6, live_weight=90)
+        self.old_animal.delete()
+        self.assertTrue(DailyRollupDirtyDate.objects.exists())
+
+        RollupService.refresh()
+        totals = RollupService.totals()
+        self.assertEqual(totals['animals_registered'], 2)
+        self.assertEqual(totals['products_created'], 1)
+        self.assertFalse(DailyRollupDirtyDate.objects.exists())
+
+    def test_series_buckets_rollups(self):
+        RollupService.refresh()
+        today = timezone.localdate()
+
+        series = RollupService.series('sales_value', today - timedelta(days=13), today, 'day')
+        self.assertEqual(len(series), 14)
+        self.assertEqual(series[today], Decimal('50.00'))
+        self.assertEqual(series[today - timedelta(days=10)], Decimal('20.00'))
+        self.assertEqual(series[today - timedelta(days=1)], 0)
+
+    def test_analytics_endpoints_read_rollups(self):
+        RollupService.refresh()
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        overview = client.get('/api/v2/admin/analytics/overview/?period=7d')
+        self.assertEqual(overview.status_code, 200)
+        self.assertEqual(overview.data['new_animals_count'], 1)
+        self.assertEqual(overview.data['new_sales_count'], 1)
+
+        stats = client.get('/api/v2/admin/dashboard/stats/')
+        self.assertEqual(stats.status_code, 200)
+        self.assertEqual(stats.data['total_animals'], 2)
+        self.assertEqual(stats.data['total_sales'], 2)
+
+        # The endpoints read the rollups, not the raw tables
+        DailyRollup.objects.all().delete()
+        overview = client.get('/api/v2/admin/analytics/overview/?period=7d')
+        self.assertEqual(overview.data['new_animals_count'], 0)
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from meat_trace import db_router
+from meat_trace.db_router import (
+    ReadReplicaRouter, ReadYourWritesMiddleware, is_pinned, pin_to_primary, reads_from_replica,
+    use_read_replica,
+)
+from meat_trace.models import Shop
+
+
+# The replica alias is pointed at the test database, so routed reads still
+# work; the router's return value tells routed (alias) from primary (None).
+@mock.patch.object(db_router, 'replica_alias', return_value='default')
+class ReadReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='replica_admin', password='testpass123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _routed_reads(self, func):
+        routed = []
+        original = ReadReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = original(router, model, **hints)
+            routed.append(alias)
+            return alias
+
+        with mock.patch.object(ReadReplicaRouter, 'db_for_read', record):
+            func()
+        return routed
+
+    def test_only_reads_inside_replica_scope_are_routed(self, _alias):
+        router = ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Shop))
+        with use_read_replica(self.admin):
+            self.assertEqual(router.db_for_read(Shop), 'default')
+            Shop.objects.create(name='Replica Shop')
+            # Reads after a write in the same scope must see it
+            self.assertIsNone(router.db_for_read(Shop))
+        with use_read_replica():
+            self.assertTrue(reads_from_replica())
+
+    def test_admin_analytics_read_from_replica(self, _alias):
+        routed = self._routed_reads(
+            lambda: self.assertEqual(self.client.get('/api/v2/admin/analytics/overview/?period=7d').status_code, 200)
+        )
+        self.assertIn('default', routed)
+
+    def test_writers_are_pinned_to_the_primary(self, _alias):
+        request = RequestFactory().post('/api/v2/shops/')
+        request.user = self.admin
+
+        def write(request):
+            Shop.objects.create(name='Pinned Shop')
+            return HttpResponse()
+
+        with override_settings(READ_REPLICA_STICKY_SECONDS=30):
+            ReadYourWritesMiddleware(write)(request)
+        self.assertTrue(is_pinned(self.admin.id))
+
+        routed = self._routed_reads(lambda: self.client.get('/api/v2/admin/analytics/overview/?period=7d'))
+        self.assertTrue(routed)
+        self.assertEqual(set(routed), {None})
+
+    def test_pin_expires_with_window(self, _alias):
+        with override_settings(READ_REPLICA_STICKY_SECONDS=0):
+            pin_to_primary(self.admin.id)
+        self.assertFalse(is_pinned(self.admin.id))
+
+    def test_replica_scope_is_left_when_the_view_raises(self, _alias):
+        from meat_trace.viewsets import AdminDashboardViewSet
+
+        with mock.patch.object(AdminDashboardViewSet, 'stats', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.client.get('/api/v2/admin/dashboard/stats/')
+        self.assertFalse(reads_from_replica())
+        self.assertFalse(db_router._replica_reads.get())
+
+    def test_middleware_resets_routing_state(self, _alias):
+        seen = []
+
+        def view(request):
+            seen.append((db_router._replica_reads.get(), db_router._pinned.get()))
+            return HttpResponse()
+
+        request = RequestFactory().get('/api/v2/shops/')
+        request.user = self.admin
+        replica_token, pinned_token = db_router._replica_reads.set(True), db_router._pinned.set(True)
+        try:
+            ReadYourWritesMiddleware(view)(request)
+            self.assertEqual(seen, [(False, False)])
+            self.assertTrue(db_router._replica_reads.get())
+        finally:
+            db_router._pinned.reset(pinned_token)
+            db_router._replica_reads.reset(replica_token)
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from meat_trace.models import Animal, ProcessingUnit, Product
+
+
+class PublicTracePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        abbatoir = User.objects.create_user(username='abbatoir1', password='testpass123')
+        processing_unit = ProcessingUnit.objects.create(name='Cache Processing Unit')
+        self.animal = Animal.objects.create(
+            abbatoir=abbatoir,
+            species='goat',
+            age=12,
+            live_weight=40,
+            health_status='Healthy',
+            slaughtered=True,
+            slaughtered_at=timezone.now(),
+        )
+        Product.objects.create(
+            processing_unit=processing_unit,
+            animal=self.animal,
+            product_type='meat',
+            name='Cached Goat',
+            batch_number='CACHE-001',
+            quantity=5,
+            weight=20,
+            weight_unit='kg',
+            price=300,
+        )
+        self.url = reverse('public_trace_view', args=['CACHE-001'])
+
+    def test_repeat_scan_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header('ETag'))
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_lineage_change_invalidates_cached_page(self):
+        first = self.client.get(self.url)
+
+        self.animal.health_status = 'Quarantined'
+        self.animal.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertContains(response, 'Quarantined')
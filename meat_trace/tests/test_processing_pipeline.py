@@ -0,0 +1,105 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, CarcassMeasurement, ProcessingUnit, ProcessingUnitUser, Product
+from meat_trace.utils.pipeline_service import ProcessingPipelineService
+
+
+class ProcessingPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.processor = User.objects.create_user(username='pipeline_processor', password='testpass123')
+        self.processor.profile.role = 'Processor'
+        self.processor.profile.save()
+        self.processing_unit = ProcessingUnit.objects.create(name='Pipeline Processing Unit')
+        ProcessingUnitUser.objects.create(user=self.processor, processing_unit=self.processing_unit, role='owner')
+        self.abbatoir = User.objects.create_user(username='pipeline_abbatoir', password='testpass123')
+
+        # One animal waiting in each of receive, inspect and process, plus one processed
+        self._animal()
+        self._animal(received=True)
+        measured = self._animal(received=True)
+        CarcassMeasurement.objects.create(animal=measured, whole_carcass_weight=200, measurements={})
+        processed = self._animal(received=True)
+        CarcassMeasurement.objects.create(animal=processed, whole_carcass_weight=200, measurements={})
+        Product.objects.create(
+            processing_unit=self.processing_unit, animal=processed, name='Pipeline Steak',
+            batch_number='PIPE-001', quantity=5, weight=5,
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.processor)
+
+    def _animal(self, received=False):
+        return Animal.objects.create(
+            abbatoir=self.abbatoir, species='cow', age=24, live_weight=400,
+            transferred_to=self.processing_unit, transferred_at=timezone.now(),
+            received_by=self.processor if received else None,
+            received_at=timezone.now() if received else None,
+        )
+
+    def _pipeline(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v2/processing-pipeline/')
+        self.assertEqual(response.status_code, 200)
+        counts = {stage['name']: stage['count'] for stage in response.data['pipeline']['stages']}
+        return counts, response.data['pipeline']['total_pending'], ctx.captured_queries
+
+    def test_stage_counts_use_a_constant_number_of_queries(self):
+        counts, total_pending, queries = self._pipeline()
+        self.assertEqual(counts, {'Receive': 1, 'Inspect': 1, 'Process': 1, 'Stock': 1})
+        self.assertEqual(total_pending, 3)
+
+        cache.clear()
+        for _ in range(5):
+            self._animal()
+        counts, _, more_queries = self._pipeline()
+        self.assertEqual(counts['Receive'], 6)
+        self.assertEqual(len(more_queries), len(queries))
+
+    def test_processor_role_aliases_see_the_pipeline(self):
+        # Stored as written, bypassing any normalization on save
+        type(self.processor.profile).objects.filter(user=self.processor).update(role='ProcessingUnit')
+        self.client.force_authenticate(user=User.objects.get(pk=self.processor.pk))
+        counts, total_pending, _ = self._pipeline()
+        self.assertEqual(total_pending, 3)
+        self.assertEqual(counts['Stock'], 1)
+
+    def test_counts_are_served_from_cache(self):
+        self._pipeline()
+        counts, _, queries = self._pipeline()
+        self.assertEqual(counts['Receive'], 1)
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_refresh_pushes_changed_pipeline_to_unit_group(self):
+        ProcessingPipelineService.get_counts([self.processing_unit.id])
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(ProcessingPipelineService.group_name(self.processing_unit.id), channel)
+
+        self._animal()
+        changed = ProcessingPipelineService.refresh([self.processing_unit.id])
+        self.assertEqual(changed, [self.processing_unit.id])
+
+        message = async_to_sync(layer.receive)(channel)
+        self.assertEqual(message['type'], 'processing_update')
+        self.assertEqual(message['update']['event'], 'pipeline')
+        self.assertEqual(message['update']['pipeline']['stages'][0]['count'], 2)
+
+        # Nothing changed since, so nothing is pushed
+        self.assertEqual(ProcessingPipelineService.refresh([self.processing_unit.id]), [])
+
+    def test_events_refresh_cached_counts_after_commit(self):
+        self._pipeline()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._animal()
+
+        counts, _, _ = self._pipeline()
+        self.assertEqual(counts['Receive'], 2)
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from meat_trace.models import Animal, CarcassMeasurement, Inventory, ProcessingUnit, Product, ProductInfo, Shop
+from meat_trace.utils.product_info_service import ProductInfoService
+
+
+class ProductInfoServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='info_admin', password='testpass123', is_staff=True)
+        self.processing_unit = ProcessingUnit.objects.create(name='Info Processing Unit')
+        self.shop = Shop.objects.create(name='Info Shop')
+        self.animal = Animal.objects.create(
+            abbatoir=self.user, species='cow', age=24, live_weight=400,
+            slaughtered=True, slaughtered_at=timezone.now(),
+        )
+        CarcassMeasurement.objects.create(animal=self.animal, whole_carcass_weight=220, measurements={})
+
+    def _create_product(self, batch_number='INFO-001'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                processing_unit=self.processing_unit, animal=self.animal,
+                name='Info Steak', batch_number=batch_number, quantity=5, weight=5,
+            )
+
+    def test_changes_refresh_product_info_in_background(self):
+        product = self._create_product()
+        info = ProductInfo.objects.get(product=product)
+        self.assertEqual(info.product_name, 'Info Steak')
+        self.assertEqual(info.processing_unit_name, 'Info Processing Unit')
+        self.assertEqual(info.animal_species, 'cow')
+        self.assertEqual(info.inventory_count, 0)
+        self.assertIn('Slaughter', [event['stage'] for event in info.timeline_events])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventory.objects.create(shop=self.shop, product=product, quantity=5, weight=5)
+        info.refresh_from_db()
+        self.assertEqual(info.inventory_count, 1)
+
+    def test_refresh_is_idempotent(self):
+        products = [self._create_product(f'INFO-{i:03d}') for i in range(3)]
+        ids = [p.id for p in products]
+        ProductInfo.objects.filter(product_id=ids[0]).delete()
+
+        self.assertEqual(ProductInfoService.refresh(ids), (1, 0))
+        self.assertEqual(ProductInfoService.refresh(ids), (0, 0))
+        self.assertEqual(ProductInfo.objects.filter(product_id__in=ids).count(), 3)
+
+    def test_pending_refresh_coalesces_repeat_changes(self):
+        product = self._create_product()
+        ProductInfo.objects.filter(product=product).delete()
+
+        cache.set(ProductInfoService.pending_key(product.id), True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventory.objects.create(shop=self.shop, product=product, quantity=5, weight=5)
+            Inventory.objects.create(shop=Shop.objects.create(name='Second Shop'), product=product, quantity=1, weight=1)
+        self.assertFalse(ProductInfo.objects.filter(product=product).exists())
+
+        ProductInfoService.refresh([product.id])
+        self.assertEqual(ProductInfo.objects.get(product=product).inventory_count, 2)
+        self.assertIsNone(cache.get(ProductInfoService.pending_key(product.id)))
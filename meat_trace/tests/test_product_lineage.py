@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, ProcessingUnit, Product, ProductIngredient, ProductLineage, SlaughterPart
+from meat_trace.utils.lineage_service import LineageService
+
+
+class ProductLineageTests(TestCase):
+    def setUp(self):
+        self.processing_unit = ProcessingUnit.objects.create(name='Lineage Processing Unit')
+        self.abbatoirs = [
+            User.objects.create_user(username=f'abbatoir{i}', password='testpass123') for i in range(2)
+        ]
+        self.animals = [
+            Animal.objects.create(
+                abbatoir=abbatoir, species='cow', age=24, live_weight=400,
+                slaughtered=True, slaughtered_at=timezone.now(),
+            )
+            for abbatoir in self.abbatoirs
+        ]
+        self.parts = [
+            SlaughterPart.objects.create(animal=animal, part_type='other', weight=50)
+            for animal in self.animals
+        ]
+        self.sausage = Product.objects.create(
+            processing_unit=self.processing_unit,
+            name='Mixed Sausage',
+            batch_number='SAUSAGE-001',
+            quantity=10,
+            weight=10,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for part in self.parts:
+                ProductIngredient.objects.create(product=self.sausage, slaughter_part=part, quantity_used=5)
+
+    def test_ingredients_populate_closure_with_depth(self):
+        rows = set(ProductLineage.objects.filter(product=self.sausage).values_list('ancestor_type', 'ancestor_id', 'depth'))
+        expected = set()
+        for part, animal, abbatoir in zip(self.parts, self.animals, self.abbatoirs):
+            expected |= {('slaughter_part', part.id, 1), ('animal', animal.id, 2), ('abbatoir', abbatoir.id, 3)}
+        self.assertEqual(rows, expected)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductIngredient.objects.filter(slaughter_part=self.parts[1]).delete()
+        self.assertFalse(ProductLineage.objects.filter(product=self.sausage, animal=self.animals[1]).exists())
+
+    def test_recipe_edits_rebuild_once_per_transaction(self):
+        burger = Product.objects.create(
+            processing_unit=self.processing_unit, name='Burger', batch_number='BURGER-001', quantity=2, weight=2,
+        )
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            for part in self.parts:
+                ProductIngredient.objects.create(product=burger, slaughter_part=part, quantity_used=1)
+        self.assertEqual(
+            sum(q['sql'].startswith('INSERT INTO "meat_trace_productlineage"') for q in ctx.captured_queries), 1,
+        )
+        self.assertEqual(ProductLineage.objects.filter(product=burger, ancestor_type='animal').count(), 2)
+
+    def test_product_saves_rebuild_only_when_sources_change(self):
+        self.sausage.name = 'Renamed Sausage'
+        with CaptureQueriesContext(connection) as ctx:
+            self.sausage.save()
+        self.assertFalse(any('meat_trace_productlineage' in q['sql'] for q in ctx.captured_queries))
+
+        self.sausage.animal = self.animals[0]
+        self.sausage.save()
+        self.assertTrue(
+            ProductLineage.objects.filter(product=self.sausage, ancestor_type='animal', animal=self.animals[0], depth=1).exists()
+        )
+
+    def test_lineage_is_read_in_one_query(self):
+        with self.assertNumQueries(1):
+            lineage = LineageService.get_lineage(self.sausage.id)
+        self.assertEqual(len(lineage['slaughter_parts']), 2)
+        self.assertEqual({a['id'] for a in lineage['animals']}, {a.id for a in self.animals})
+        self.assertEqual({a['depth'] for a in lineage['abbatoirs']}, {3})
+
+    def test_products_for_animal_reverse_lookup(self):
+        direct = Product.objects.create(
+            processing_unit=self.processing_unit, animal=self.animals[0],
+            name='Steak', batch_number='STEAK-001', quantity=1, weight=1,
+        )
+        product_ids = set(
+            LineageService.product_ids_for('animal', [self.animals[0].id]).values_list('product_id', flat=True)
+        )
+        self.assertEqual(product_ids, {self.sausage.id, direct.id})
+
+    def test_lineage_endpoint(self):
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        response = client.get(f'/api/v2/products/{self.sausage.id}/lineage/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['animals']), 2)
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, ProcessingUnit, ProcessingUnitUser, Product, SlaughterPart
+
+
+class ProductionStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.processor = User.objects.create_user(username='stats_processor', password='testpass123')
+        self.processor.profile.role = 'Processor'
+        self.processor.profile.save()
+        self.processing_unit = ProcessingUnit.objects.create(name='Stats Processing Unit')
+        ProcessingUnitUser.objects.create(user=self.processor, processing_unit=self.processing_unit, role='owner')
+
+        abbatoir = User.objects.create_user(username='stats_abbatoir', password='testpass123')
+        received = Animal.objects.create(
+            abbatoir=abbatoir, species='cow', age=24, live_weight=400,
+            transferred_to=self.processing_unit, transferred_at=timezone.now(),
+            received_by=self.processor, received_at=timezone.now(),
+        )
+        Animal.objects.create(
+            abbatoir=abbatoir, species='goat', age=12, live_weight=40,
+            transferred_to=self.processing_unit, transferred_at=timezone.now(),
+        )
+        self.part = SlaughterPart.objects.create(
+            animal=received, part_type='other', weight=40, transferred_to=self.processing_unit,
+        )
+        Product.objects.create(
+            processing_unit=self.processing_unit, animal=received, name='Stats Steak',
+            batch_number='STATS-001', quantity=5, weight=5,
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.processor)
+
+    def _stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v2/production-stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data, ctx.captured_queries
+
+    def test_stats_use_conditional_aggregates(self):
+        data, queries = self._stats()
+
+        self.assertEqual(data['received'], 1)
+        self.assertEqual(data['pending'], 2)
+        self.assertEqual(data['products'], 1)
+        self.assertEqual(data['in_stock'], 1)
+        self.assertEqual(data['details']['animals_received_today'], 1)
+        # profile + memberships + one aggregate each over animals, parts and products
+        self.assertLessEqual(len(queries), 5)
+
+    def test_refresh_is_served_from_cache_until_a_unit_event(self):
+        self._stats()
+        data, queries = self._stats()
+        self.assertEqual(data['pending'], 2)
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+        self.part.received_by = self.processor
+        self.part.received_at = timezone.now()
+        self.part.save()
+
+        data, _ = self._stats()
+        self.assertEqual(data['received'], 2)
+        self.assertEqual(data['pending'], 1)
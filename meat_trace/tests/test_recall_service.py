@@ -0,0 +1,129 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import (
+    Animal, Notification, ProcessingUnit, ProcessingUnitUser, Product, ProductIngredient,
+    Receipt, Sale, SaleItem, Shop, ShopUser, SlaughterPart,
+)
+from meat_trace import tasks
+from meat_trace.utils.recall_service import RecallService
+
+
+class RecallServiceTests(TestCase):
+    def setUp(self):
+        abbatoir = User.objects.create_user(username='abbatoir1', password='testpass123')
+        self.processing_unit = ProcessingUnit.objects.create(name='Recall Processing Unit')
+        self.processor = User.objects.create_user(username='processor1', password='testpass123')
+        ProcessingUnitUser.objects.create(user=self.processor, processing_unit=self.processing_unit, role='owner')
+
+        self.shop = Shop.objects.create(name='Recall Shop')
+        self.shop_owner = User.objects.create_user(username='shopowner1', password='testpass123')
+        ShopUser.objects.create(user=self.shop_owner, shop=self.shop, role='owner', is_active=True)
+
+        self.animal = Animal.objects.create(
+            abbatoir=abbatoir, species='cow', age=24, live_weight=400,
+            slaughtered=True, slaughtered_at=timezone.now(),
+        )
+        self.part = SlaughterPart.objects.create(animal=self.animal, part_type='other', weight=80)
+
+        self.products = []
+        for i in range(5):
+            product = Product.objects.create(
+                processing_unit=self.processing_unit, slaughter_part=self.part,
+                name=f'Cut {i}', batch_number=f'RECALL-{i}', quantity=10, weight=10,
+            )
+            Receipt.objects.create(shop=self.shop, product=product, received_quantity=10, received_weight=10)
+            self.products.append(product)
+
+        sausage = Product.objects.create(
+            processing_unit=self.processing_unit, name='Sausage', batch_number='RECALL-S', quantity=4, weight=4,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductIngredient.objects.create(product=sausage, slaughter_part=self.part, quantity_used=2)
+        self.products.append(sausage)
+
+        sale = Sale.objects.create(shop=self.shop, total_amount=Decimal('60.00'))
+        SaleItem.objects.create(sale=sale, product=self.products[0], quantity=3, weight=3, unit_price=20, subtotal=60)
+
+        # Unrelated product must not show up
+        Product.objects.create(processing_unit=self.processing_unit, name='Other', batch_number='OTHER', quantity=1, weight=1)
+
+    def test_assess_walks_downstream_with_constant_queries(self):
+        with self.assertNumQueries(6):
+            impact = RecallService.assess(animal_ids=[self.animal.id])
+
+        self.assertEqual(impact['totals']['products'], len(self.products))
+        self.assertEqual(impact['totals']['shops'], 1)
+        shop = impact['shops'][0]
+        self.assertEqual(shop['shop_id'], self.shop.id)
+        self.assertEqual(shop['receipts'], 5)
+        self.assertEqual(shop['weight_received'], 50.0)
+        self.assertEqual(shop['weight_sold'], 3.0)
+        self.assertEqual(shop['weight_in_stock'], 47.0)
+
+        by_part = RecallService.assess(slaughter_part_ids=[self.part.id])
+        self.assertEqual(by_part['totals']['products'], len(self.products))
+
+    def test_notify_bulk_creates_once_per_recipient(self):
+        impact = RecallService.assess(animal_ids=[self.animal.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = RecallService.notify(impact, 'contamination')
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            set(Notification.objects.filter(notification_type='product_recall').values_list('user_id', flat=True)),
+            {self.processor.id, self.shop_owner.id},
+        )
+
+        # Re-running the same recall does not notify the same users again
+        self.assertEqual(RecallService.notify(impact, 'contamination'), 0)
+
+    def test_recall_endpoint_requires_privileged_role(self):
+        client = APIClient()
+        client.force_authenticate(user=self.shop_owner)
+        response = client.get('/api/v2/recall/impact/', {'animal_ids': str(self.animal.id)})
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        client.force_authenticate(user=admin)
+        response = client.get('/api/v2/recall/impact/', {'animal_ids': str(self.animal.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['products'], len(self.products))
+
+    def test_processors_can_only_recall_what_reached_their_units(self):
+        self.processor.profile.role = 'Processor'
+        self.processor.profile.save()
+        client = APIClient()
+        client.force_authenticate(user=self.processor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/v2/recall/impact/', {'animal_ids': [self.animal.id]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['animal_ids'], [self.animal.id])
+        self.assertFalse(Notification.objects.filter(notification_type='product_recall').exists())
+
+        self.animal.transferred_to = self.processing_unit
+        self.animal.save()
+        response = client.get('/api/v2/recall/impact/', {'animal_ids': str(self.animal.id)})
+        self.assertEqual(response.status_code, 200)
+        response = client.get('/api/v2/recall/impact/', {'slaughter_part_ids': str(self.part.id)})
+        self.assertEqual(response.status_code, 403)
+
+        self.part.received_by = self.processor
+        self.part.save()
+        response = client.get('/api/v2/recall/impact/', {'slaughter_part_ids': str(self.part.id)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_inline_fallback_failure_is_logged_not_raised(self):
+        # Broker unreachable: the task runs inline after commit, and its failure must not escape
+        with mock.patch.object(tasks.deliver_notifications, 'apply_async', side_effect=OSError('no broker')), \
+                mock.patch.object(tasks.deliver_notifications, 'run', side_effect=RuntimeError('boom')), \
+                self.assertLogs('meat_trace.tasks', 'ERROR') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                tasks.enqueue(tasks.deliver_notifications, [1])
+        self.assertIn('Inline run of deliver_notifications failed', logs.output[0])
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from meat_trace.models import (
+    Animal, CarcassMeasurement, ProcessingUnit, Product, ProductTimelineSnapshot, Sale, SaleItem, Shop,
+    SlaughterPart,
+)
+from meat_trace.utils.traceability import TimelineContext, get_product_timelines
+
+
+class ReceiptTimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='receipt_abbatoir', password='testpass123')
+        self.processing_unit = ProcessingUnit.objects.create(name='Receipt Processing Unit')
+        self.shop = Shop.objects.create(name='Receipt Shop')
+
+    def _sale(self, animals, products_per_animal):
+        sale = Sale.objects.create(shop=self.shop, total_amount=0)
+        for a in range(animals):
+            animal = Animal.objects.create(
+                abbatoir=self.user, species='cow', age=24, live_weight=400,
+                slaughtered=True, slaughtered_at=timezone.now(),
+                transferred_to=self.processing_unit, transferred_at=timezone.now(),
+                received_by=self.user, received_at=timezone.now(),
+            )
+            CarcassMeasurement.objects.create(animal=animal, whole_carcass_weight=220, measurements={})
+            part = SlaughterPart.objects.create(
+                animal=animal, part_type='other', weight=40, transferred_to=self.processing_unit,
+            )
+            for p in range(products_per_animal):
+                product = Product.objects.create(
+                    processing_unit=self.processing_unit, animal=animal, slaughter_part=part,
+                    name=f'Cut {sale.pk}-{a}-{p}', batch_number=f'RCPT-{sale.pk}-{a}-{p}',
+                    quantity=5, weight=5, transferred_to=self.shop, transferred_at=timezone.now(),
+                )
+                SaleItem.objects.create(
+                    sale=sale, product=product, quantity=1, weight=1, unit_price=10, subtotal=10,
+                )
+        return sale
+
+    def _render(self, sale):
+        cache.clear()
+        ProductTimelineSnapshot.objects.all().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('public_sale_receipt_view', args=[sale.receipt_uuid]))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_constant_in_number_of_items(self):
+        small, small_queries = self._render(self._sale(animals=1, products_per_animal=2))
+        large, large_queries = self._render(self._sale(animals=4, products_per_animal=3))
+
+        self.assertEqual(len(small.context['items']), 2)
+        self.assertEqual(len(large.context['items']), 12)
+        self.assertEqual(small_queries, large_queries)
+        stages = [event['stage'] for event in large.context['items'][0]['timeline']]
+        self.assertIn('Slaughter', stages)
+
+    def test_products_of_one_animal_share_animal_stages(self):
+        sale = self._sale(animals=1, products_per_animal=3)
+        product_ids = list(sale.items.values_list('product_id', flat=True))
+
+        context = TimelineContext()
+        timelines = get_product_timelines(product_ids, context=context)
+
+        self.assertEqual(len(context.animal_events), 1)
+        self.assertEqual(set(context.changed_at), set(product_ids))
+        self.assertEqual(
+            ProductTimelineSnapshot.objects.filter(product_id__in=product_ids).count(), len(product_ids),
+        )
+        for product_id in product_ids:
+            self.assertIn('Slaughter', [event['stage'] for event in timelines[product_id]])
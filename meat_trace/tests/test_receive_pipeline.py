@@ -0,0 +1,169 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import (
+    Animal, Inventory, Notification, ProcessingUnit, ProcessingUnitUser, Product, RejectionReason,
+    Shop, ShopUser, SlaughterPart, UserAuditLog,
+)
+
+
+class ReceiveAnimalsTests(TestCase):
+    def setUp(self):
+        self.abbatoir = User.objects.create_user(username='receive_abbatoir', password='testpass123')
+        self.processor = User.objects.create_user(username='receive_processor', password='testpass123')
+        self.processing_unit = ProcessingUnit.objects.create(name='Receive Processing Unit')
+        ProcessingUnitUser.objects.create(user=self.processor, processing_unit=self.processing_unit, role='owner')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.processor)
+
+    def _delivery(self, count):
+        """``count`` each of received animals, received parts, rejected animals and rejected parts."""
+        def animal():
+            return Animal.objects.create(
+                abbatoir=self.abbatoir, species='cow', age=24, live_weight=300, slaughtered=True,
+                transferred_to=self.processing_unit, transferred_at=timezone.now(),
+            )
+
+        def part():
+            return SlaughterPart.objects.create(
+                animal=animal(), part_type='torso', weight=50, transferred_to=self.processing_unit,
+            )
+
+        return {
+            'animal_ids': [animal().id for _ in range(count)],
+            'part_receives': [{'part_ids': [part().id for _ in range(count)]}],
+            'animal_rejections': [
+                {'animal_id': animal().id, 'category': 'quality', 'specific_reason': 'poor_condition'}
+                for _ in range(count)
+            ],
+            # Legacy payload format
+            'part_rejections': [{'part_id': part().id, 'reason': 'bruised'} for _ in range(count)],
+        }
+
+    def _receive(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v2/animals/receive_animals/', payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, len(ctx.captured_queries)
+
+    def test_full_delivery_uses_a_bounded_number_of_queries(self):
+        _, small = self._receive(self._delivery(2))
+        data, large = self._receive(self._delivery(8))
+
+        self.assertEqual(large, small)
+        self.assertEqual([len(data[key]) for key in (
+            'received_animals', 'received_parts', 'rejected_animals', 'rejected_parts',
+        )], [8, 8, 8, 8])
+        self.assertEqual(Animal.objects.filter(received_by=self.processor).count(), 10)
+        self.assertEqual(SlaughterPart.objects.filter(received_by=self.processor).count(), 10)
+
+    def test_rejections_return_items_and_notify_after_commit(self):
+        payload = self._delivery(1)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            data, _ = self._receive(payload)
+        self.assertTrue(callbacks)
+
+        animal = Animal.objects.get(id=data['rejected_animals'][0])
+        self.assertEqual(animal.rejection_status, 'rejected')
+        self.assertEqual(animal.rejection_reason_specific, 'poor_condition')
+        self.assertIsNone(animal.transferred_to)
+        part = SlaughterPart.objects.get(id=data['rejected_parts'][0])
+        self.assertEqual((part.rejection_reason_category, part.rejection_reason_specific), ('other', 'bruised'))
+        self.assertIsNone(part.transferred_to)
+
+        reason = RejectionReason.objects.get(animal=animal)
+        self.assertEqual(reason.processing_unit, self.processing_unit)
+        self.assertEqual(UserAuditLog.objects.filter(action__in=['animal_rejected', 'part_rejected']).count(), 2)
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=self.abbatoir).values_list('notification_type', flat=True)),
+            ['animal_rejected', 'part_rejected'],
+        )
+
+
+class ReceiveProductsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='receive_shop_owner', password='testpass123')
+        self.shop = Shop.objects.create(name='Receive Shop')
+        profile = self.user.profile
+        profile.shop = self.shop
+        profile.role = 'ShopOwner'
+        profile.save()
+        ShopUser.objects.create(user=self.user, shop=self.shop, role='owner', is_active=True)
+        self.processing_unit = ProcessingUnit.objects.create(name='Receive Supplier Unit')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _product(self, i, weight='10'):
+        return Product.objects.create(
+            processing_unit=self.processing_unit, name=f'Delivery Cut {i}', batch_number=f'RCV-{i}',
+            quantity=Decimal(weight), weight=Decimal(weight), transferred_to=self.shop,
+        )
+
+    def _receive(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v2/products/receive_products/', payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, len(ctx.captured_queries)
+
+    def _delivery(self, start, count):
+        products = [self._product(i) for i in range(start, start + count)]
+        # Half the products already have stock in the shop
+        for product in products[::2]:
+            Inventory.objects.create(shop=self.shop, product=product, quantity=1, weight=1)
+        return {
+            'receives': [{'product_id': p.id, 'weight_received': 6} for p in products],
+            'rejections': [{'product_id': p.id, 'weight_rejected': 4, 'rejection_reason': 'Torn'} for p in products],
+        }
+
+    def test_delivery_uses_a_bounded_number_of_queries(self):
+        _, small = self._receive(self._delivery(0, 2))
+        data, large = self._receive(self._delivery(2, 8))
+
+        self.assertEqual(large, small)
+        self.assertEqual((len(data['received_products']), len(data['rejected_products'])), (8, 8))
+        self.assertNotIn('errors', data)
+        product = Product.objects.get(batch_number='RCV-2')
+        self.assertEqual((product.weight_received, product.weight_rejected), (Decimal('6'), Decimal('4')))
+        self.assertIsNone(product.rejection_status)
+        self.assertEqual(Inventory.objects.get(product=product).weight, Decimal('7'))
+        self.assertEqual(Inventory.objects.get(product__batch_number='RCV-3').weight, Decimal('6'))
+
+    def test_entries_are_validated_in_order_against_running_totals(self):
+        first, second = self._product(0), self._product(1, weight='5')
+        other_shop = Shop.objects.create(name='Other Receive Shop')
+        elsewhere = Product.objects.create(
+            processing_unit=self.processing_unit, name='Elsewhere', batch_number='RCV-X',
+            quantity=1, weight=1, transferred_to=other_shop,
+        )
+        data, _ = self._receive({
+            'receives': [
+                {'product_id': first.id, 'quantity_received': 6},
+                {'product_id': str(first.id), 'weight_received': 6},
+                {'product_id': elsewhere.id, 'weight_received': 1},
+                {'product_id': first.id, 'weight_received': 0},
+            ],
+            'rejections': [
+                {'product_id': first.id, 'weight_rejected': 4},
+                {'product_id': second.id, 'weight_rejected': 5},
+            ],
+        })
+
+        self.assertEqual([p['total_received_weight'] for p in data['received_products']], [6.0])
+        self.assertEqual(len(data['errors']), 3)
+        self.assertIn('Only 4.00 kg remaining', data['errors'][0])
+        self.assertIn('not available for receipt', data['errors'][1])
+        self.assertIn('must be greater than 0', data['errors'][2])
+        self.assertEqual(
+            [(p['product_id'], p['rejection_status']) for p in data['rejected_products']],
+            [(first.id, None), (second.id, 'rejected')],
+        )
+        first.refresh_from_db()
+        self.assertEqual((first.weight_received, first.weight_rejected), (Decimal('6'), Decimal('4')))
+        self.assertEqual(Inventory.objects.get(shop=self.shop, product=first).weight, Decimal('6'))
+        self.assertFalse(Inventory.objects.filter(product=second).exists())
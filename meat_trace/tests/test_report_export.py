@@ -0,0 +1,102 @@
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from meat_trace import tasks
+from meat_trace.models import Animal, DataExport, ProcessingUnit, Product, Sale, Shop
+from meat_trace.utils.report_export import ReportExportService
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(username='export_admin', password='testpass123', is_staff=True)
+        processing_unit = ProcessingUnit.objects.create(name='Export Processing Unit')
+        for i in range(7):
+            animal = Animal.objects.create(abbatoir=self.admin, species='goat', age=12, live_weight=40)
+            Product.objects.create(
+                processing_unit=processing_unit, animal=animal, name=f'Export Cut {i}',
+                batch_number=f'EXP-{i}', quantity=1, weight=2,
+            )
+        Sale.objects.create(shop=Shop.objects.create(name='Export Shop'), total_amount=Decimal('25.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _export(self, **data):
+        # Small chunks and frequent progress updates exercise the streaming path
+        # A worker picks the job up as soon as it is queued
+        def run_now(args, kwargs, **options):
+            tasks.export_data(*args, **kwargs)
+
+        with mock.patch.object(ReportExportService, 'CHUNK_SIZE', 3), \
+                mock.patch.object(ReportExportService, 'PROGRESS_EVERY', 4), \
+                mock.patch.object(tasks.export_data, 'apply_async', side_effect=run_now), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v2/admin/analytics/export_excel/', data, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+
+        status_response = self.client.get(f"/api/v2/admin/analytics/exports/{response.data['export_id']}/")
+        self.assertEqual(status_response.data['status'], 'completed')
+        self.assertEqual(status_response.data['progress_percentage'], 100.0)
+        self.assertEqual(status_response.data['records_exported'], 14)
+
+        download = self.client.get(f"/api/v2/admin/analytics/exports/{response.data['export_id']}/download/")
+        self.assertEqual(download.status_code, 200)
+        return b''.join(download.streaming_content)
+
+    def test_xlsx_export_runs_as_a_job_and_is_downloadable(self):
+        content = self._export()
+
+        wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True)
+        self.assertEqual(wb.sheetnames, ['Executive Summary', 'Animals', 'Products'])
+        self.assertEqual(len(list(wb['Animals'].rows)), 8)
+        summary = {row[0]: row[1] for row in wb['Executive Summary'].iter_rows(values_only=True)}
+        self.assertEqual(summary['Total Products Created'], 7)
+        self.assertEqual(summary['Total Revenue'], 25)
+
+    def test_csv_export_writes_one_file_per_sheet(self):
+        content = self._export(file_format='csv')
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()), ['animals.csv', 'executive_summary.csv', 'products.csv'],
+            )
+            products = list(csv.reader(io.StringIO(archive.read('products.csv').decode())))
+        self.assertEqual(products[0], ["ID", "Name", "Batch", "Processing Unit", "Created At"])
+        self.assertEqual(len(products), 8)
+
+    def test_unknown_format_and_unfinished_exports_are_rejected(self):
+        response = self.client.post('/api/v2/admin/analytics/export_excel/', {'file_format': 'pdf'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        export = DataExport.objects.create(name='Pending export', export_format='excel')
+        response = self.client.get(f'/api/v2/admin/analytics/exports/{export.export_id}/download/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_export_is_never_run_inline_when_it_cannot_be_queued(self):
+        with mock.patch.object(tasks.export_data, 'apply_async', side_effect=OSError('broker down')), \
+                mock.patch.object(ReportExportService, 'run') as run, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v2/admin/analytics/export_excel/', {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        run.assert_not_called()
+
+        export = DataExport.objects.get(export_id=response.data['export_id'])
+        self.assertEqual(export.status, 'failed')
+        self.assertIn('broker down', export.error_message)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Invoice, InvoicePayment, Sale, Shop, ShopFinanceSummary, ShopUser
+from meat_trace.utils.shop_finance import ShopFinanceService
+
+
+class ShopFinanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='finance_owner', password='testpass123')
+        self.shop = Shop.objects.create(name='Finance Shop')
+        profile = self.user.profile
+        profile.shop = self.shop
+        profile.role = 'ShopOwner'
+        profile.save()
+        ShopUser.objects.create(user=self.user, shop=self.shop, role='owner', is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _invoice(self, number, total, status='pending', shop=None):
+        return Invoice.objects.create(
+            invoice_number=number, shop=shop or self.shop, customer_name='Customer',
+            total_amount=Decimal(total), due_date=timezone.now().date() + timedelta(days=7), status=status,
+        )
+
+    def _summary_fields(self, summary):
+        return {
+            field.name: getattr(summary, field.name)
+            for field in ShopFinanceSummary._meta.fields
+            if field.name not in ('id', 'shop', 'updated_at')
+        }
+
+    def test_stats_is_one_query(self):
+        self._invoice('FIN-1', '100.00')
+        self._invoice('FIN-2', '50.00', status='draft')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v2/invoices/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('meat_trace_invoice' in q['sql'] for q in ctx.captured_queries), 1)
+        self.assertEqual(response.data['total_invoices'], 2)
+        self.assertEqual(response.data['pending'], 1)
+        self.assertEqual(response.data['draft'], 1)
+        self.assertEqual(response.data['total_value'], Decimal('150.00'))
+
+    def test_summary_tracks_invoice_payment_and_sale_writes(self):
+        first = self._invoice('FIN-1', '100.00')
+        # Built from the tables on the first write, maintained by deltas afterwards
+        self.assertEqual(ShopFinanceService.get_summary(self.shop)['invoices']['total'], 1)
+
+        second = self._invoice('FIN-2', '40.00')
+        payment = InvoicePayment.objects.create(invoice=first, amount=Decimal('30.00'), payment_method='cash')
+        InvoicePayment.objects.create(invoice=second, amount=Decimal('40.00'), payment_method='cash')
+        cancelled = self._invoice('FIN-3', '25.00')
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('40.00'), invoice=second)
+        payment.delete()
+        self._invoice('FIN-4', '10.00', shop=Shop.objects.create(name='Other Finance Shop'))
+
+        summary = ShopFinanceSummary.objects.get(shop=self.shop)
+        self.assertEqual(summary.invoice_count, 3)
+        self.assertEqual((summary.pending_count, summary.paid_count, summary.cancelled_count), (1, 1, 1))
+        self.assertEqual(summary.amount_paid, Decimal('40.00'))
+        self.assertEqual(summary.outstanding_balance, Decimal('100.00'))
+        self.assertEqual((summary.sales_count, summary.sales_total), (1, Decimal('40.00')))
+        # The running totals agree with a recount
+        self.assertEqual(self._summary_fields(summary), self._summary_fields(ShopFinanceService.rebuild(self.shop.pk)))
+
+        first.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.invoice_count, summary.outstanding_balance), (2, Decimal('0.00')))
+
+    def test_write_without_a_summary_row_rebuilds_it(self):
+        self._invoice('FIN-1', '100.00')
+        # The row was dropped (or never built) before a concurrent write landed
+        ShopFinanceSummary.objects.filter(shop=self.shop).delete()
+        Invoice.objects.filter(invoice_number='FIN-1').update(total_amount=Decimal('60.00'))
+        self._invoice('FIN-2', '40.00')
+
+        summary = ShopFinanceSummary.objects.get(shop=self.shop)
+        self.assertEqual((summary.invoice_count, summary.invoiced_total), (2, Decimal('100.00')))
+
+        # Deleting the shop cascades without rebuilding its summary
+        self.shop.delete()
+        self.assertFalse(ShopFinanceSummary.objects.exists())
+
+    def test_finance_summary_endpoint_reads_one_row(self):
+        self._invoice('FIN-1', '100.00')
+        self.client.get('/api/v2/invoices/finance_summary/')
+        for i in range(5):
+            self._invoice(f'FIN-{i + 2}', '10.00')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v2/invoices/finance_summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['invoices']['total'], 6)
+        self.assertEqual(response.data['outstanding_balance'], Decimal('150.00'))
+        self.assertFalse(any('meat_trace_invoice"' in q['sql'] for q in ctx.captured_queries))
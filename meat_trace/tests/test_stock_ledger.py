@@ -0,0 +1,166 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import (
+    Inventory, ProcessingUnit, Product, Receipt, Sale, SaleItem, Shop, ShopUser, StockMovement, StockSnapshot,
+)
+from meat_trace.utils.stock_ledger import StockLedgerService
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger_owner', password='testpass123')
+        self.shop = Shop.objects.create(name='Ledger Shop')
+        profile = self.user.profile
+        profile.shop = self.shop
+        profile.role = 'ShopOwner'
+        profile.save()
+        ShopUser.objects.create(user=self.user, shop=self.shop, role='owner', is_active=True)
+        self.processing_unit = ProcessingUnit.objects.create(name='Ledger Processing Unit')
+        self.product = self._product('LEDGER-1')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _product(self, batch_number, weight='20'):
+        return Product.objects.create(
+            processing_unit=self.processing_unit, name=f'Cut {batch_number}', batch_number=batch_number,
+            quantity=Decimal(weight), weight=Decimal(weight), remaining_weight=Decimal(weight),
+            transferred_to=self.shop,
+        )
+
+    def _receive(self, product, weight):
+        return Receipt.objects.create(
+            shop=self.shop, product=product, received_quantity=weight, received_weight=weight,
+            recorded_by=self.user,
+        )
+
+    def _sell(self, product, weight):
+        sale = Sale.objects.create(shop=self.shop, sold_by=self.user, total_amount=Decimal('10'))
+        with CaptureQueriesContext(connection) as ctx:
+            item = SaleItem.objects.create(
+                sale=sale, product=product, quantity=weight, weight=weight,
+                unit_price=Decimal('1'), subtotal=Decimal('1'),
+            )
+        return item, ctx.captured_queries
+
+    def test_sale_decrements_with_f_expressions_in_a_constant_number_of_queries(self):
+        self._receive(self.product, Decimal('12'))
+        other = self._product('LEDGER-2', weight='50')
+        self._receive(other, Decimal('40'))
+
+        item, first = self._sell(self.product, Decimal('5'))
+        _, second = self._sell(other, Decimal('15'))
+        self.assertEqual(len(first), len(second))
+        # Stock is never read back before it is written
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT') and 'meat_trace_inventory' in q['sql'] for q in first
+        ))
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.weight, self.product.remaining_weight), (Decimal('15'), Decimal('15')))
+        self.assertEqual(Inventory.objects.get(shop=self.shop, product=self.product).weight, Decimal('7'))
+        movement = StockMovement.objects.get(entity_type='sale_item', entity_id=item.id)
+        self.assertEqual((movement.movement_type, movement.weight, movement.created_by), ('sale', Decimal('-5'), self.user))
+
+        # Overselling floors the stock at zero; the ledger records what was taken off
+        with self.assertLogs('meat_trace.utils.stock_ledger', 'WARNING') as logs:
+            item, _ = self._sell(self.product, Decimal('10'))
+        self.assertIn('Oversold product', logs.output[0])
+        self.assertEqual(Inventory.objects.get(shop=self.shop, product=self.product).weight, Decimal('0'))
+        self.assertEqual(StockMovement.objects.get(entity_type='sale_item', entity_id=item.id).weight, Decimal('-7'))
+        self.assertEqual(StockLedgerService.balance(self.shop.id, self.product.id), Decimal('0'))
+
+    def test_partial_oversell_applies_each_product_once(self):
+        other = self._product('LEDGER-2', weight='50')
+        self._receive(self.product, Decimal('4'))
+        self._receive(other, Decimal('9'))
+
+        with self.assertLogs('meat_trace.utils.stock_ledger', 'WARNING'):
+            StockLedgerService.move(self.shop.id, {self.product.id: Decimal('-6'), other.id: Decimal('-5')}, 'waste')
+
+        for product, expected in ((self.product, Decimal('0')), (other, Decimal('4'))):
+            self.assertEqual(Inventory.objects.get(shop=self.shop, product=product).weight, expected)
+            self.assertEqual(StockLedgerService.balance(self.shop.id, product.id), expected)
+
+    def test_direct_inventory_saves_are_recorded_as_adjustments(self):
+        inventory = Inventory.objects.create(shop=self.shop, product=self.product, quantity=4, weight=4)
+        inventory.weight = Decimal('9')
+        inventory.save()
+        inventory.delete()
+
+        self.assertEqual(
+            list(StockMovement.objects.order_by('id').values_list('movement_type', 'weight')),
+            [('adjustment', Decimal('4')), ('adjustment', Decimal('5')), ('adjustment', Decimal('-9'))],
+        )
+        self.assertEqual(StockLedgerService.balance(self.shop.id, self.product.id), Decimal('0'))
+
+        # Deleting the shop cascades without writing to the ledger
+        Inventory.objects.create(shop=self.shop, product=self.product, quantity=4, weight=4)
+        self.shop.delete()
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_as_of_balances_survive_compaction(self):
+        now = timezone.now()
+        moments = [now - timedelta(days=days) for days in (30, 20, 10)]
+        for moment, weight in zip(moments, ('10', '-4', '6')):
+            StockMovement.objects.create(
+                shop=self.shop, product=self.product, movement_type='adjustment',
+                weight=Decimal(weight), created_at=moment,
+            )
+        expected = {
+            moment + timedelta(days=1): StockLedgerService.balance(self.shop.id, self.product.id, moment + timedelta(days=1))
+            for moment in moments
+        }
+        self.assertEqual(list(expected.values()), [Decimal('10'), Decimal('6'), Decimal('12')])
+
+        self.assertEqual(StockLedgerService.compact(before=now - timedelta(days=25)), 1)
+        self.assertEqual(StockLedgerService.compact(before=now - timedelta(days=15)), 1)
+        self.assertEqual(StockLedgerService.compact(before=now - timedelta(days=15)), 0)
+
+        self.assertEqual(
+            list(StockSnapshot.objects.order_by('as_of').values_list('weight', 'movement_count')),
+            [(Decimal('10'), 1), (Decimal('6'), 1)],
+        )
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(StockLedgerService.balance(self.shop.id, self.product.id, moments[2] + timedelta(days=1)), Decimal('12'))
+        self.assertEqual(StockLedgerService.balance(self.shop.id, self.product.id, now - timedelta(days=12)), Decimal('6'))
+        self.assertEqual(StockLedgerService.balance(self.shop.id, self.product.id, now - timedelta(days=40)), Decimal('0'))
+
+    def test_stock_endpoints(self):
+        self._receive(self.product, Decimal('12'))
+        self._sell(self.product, Decimal('5'))
+        self._sell(self.product, Decimal('2'))
+
+        response = self.client.get(f'/api/v2/shops/{self.shop.id}/stock/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stock'], [{'product': self.product.id, 'weight': Decimal('5')}])
+        past = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(f'/api/v2/shops/{self.shop.id}/stock/', {'as_of': past})
+        self.assertEqual(response.data['stock'], [])
+        self.assertEqual(self.client.get(f'/api/v2/shops/{self.shop.id}/stock/', {'as_of': 'soon'}).status_code, 400)
+
+        url = f'/api/v2/shops/{self.shop.id}/stock-movements/'
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['weight'] for row in response.data['results']], ['-2.00', '-5.00'])
+        response = self.client.get(url, {'page_size': 2, 'cursor': response.data['next_cursor']})
+        self.assertEqual([row['movement_type'] for row in response.data['results']], ['receive'])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}).status_code, 400)
+
+    def test_stock_endpoints_require_shop_membership_or_admin(self):
+        outsider = User.objects.create_user(username='ledger_outsider', password='testpass123')
+        admin = User.objects.create_user(username='ledger_admin', password='testpass123', is_staff=True)
+        for path in ('stock', 'stock-movements'):
+            url = f'/api/v2/shops/{self.shop.id}/{path}/'
+            self.client.force_authenticate(user=outsider)
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.client.force_authenticate(user=admin)
+            self.assertEqual(self.client.get(url).status_code, 200)
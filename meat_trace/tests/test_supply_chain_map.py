@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from meat_trace.models import ProcessingUnit, Shop, UserProfile
+from meat_trace.utils.map_service import MapService
+
+URL = '/api/v2/admin/dashboard/map/'
+
+
+class SupplyChainMapTests(TestCase):
+    def setUp(self):
+        MapService.clear_cache()
+        self.admin = User.objects.create_user(username='map_admin', password='testpass123', is_staff=True)
+        # Two units a few hundred metres apart in Dar es Salaam, one shop in Arusha
+        self.unit = ProcessingUnit.objects.create(
+            name='Map Unit A', latitude=Decimal('-6.792354'), longitude=Decimal('39.208328'),
+        )
+        ProcessingUnit.objects.create(name='Map Unit B', latitude=Decimal('-6.794000'), longitude=Decimal('39.210000'))
+        self.shop = Shop.objects.create(name='Map Shop', latitude=Decimal('-3.386900'), longitude=Decimal('36.683000'))
+        ProcessingUnit.objects.create(name='Map Unit Ungeocoded')
+
+        farmer = User.objects.create_user(username='map_abbatoir', password='testpass123', first_name='Asha')
+        UserProfile.objects.filter(user=farmer).update(latitude=Decimal('-6.163000'), longitude=Decimal('35.751600'))
+        MapService.clear_cache()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bbox_limits_features_and_high_zoom_returns_points(self):
+        response = self.client.get(URL, {'bbox': '39.20,-6.80,39.22,-6.79', 'zoom': 14})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'FeatureCollection')
+        self.assertFalse(response.data['clustered'])
+        self.assertEqual(
+            sorted(f['properties']['name'] for f in response.data['features']), ['Map Unit A', 'Map Unit B'],
+        )
+        self.assertEqual(response.data['features'][0]['geometry']['type'], 'Point')
+        self.assertEqual(response.data['summary']['processing_units'], {'total': 3, 'geocoded': 2})
+        self.assertEqual(response.data['summary']['abbatoirs'], {'total': 1, 'geocoded': 1})
+
+    def test_low_zoom_clusters_nearby_locations(self):
+        response = self.client.get(URL, {'zoom': 3})
+        self.assertTrue(response.data['clustered'])
+        clusters = [f for f in response.data['features'] if f['properties'].get('cluster')]
+        # Both Dar es Salaam units and the Dodoma abbatoir share a cell; the Arusha shop stands alone
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['properties']['types'], {'Processing Unit': 2, 'Abbatoir': 1})
+        self.assertEqual(len(response.data['features']), 2)
+
+    def test_request_without_parameters_falls_back_to_a_zoom_that_fits(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['zoom'], 3)
+        self.assertTrue(response.data['clustered'])
+        self.assertEqual(len(response.data['features']), 2)
+
+    def test_tiles_are_cached_until_a_location_changes(self):
+        params = {'bbox': '36.0,-7.0,39.5,-3.0', 'zoom': 8}
+        self.client.get(URL, params)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(URL, params)
+        self.assertFalse(any('latitude' in q['sql'] for q in ctx.captured_queries))
+
+        # Saves that do not touch a mapped field keep the cache
+        self.shop.business_license = 'LIC-1'
+        self.shop.save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(URL, params)
+        self.assertFalse(any('latitude' in q['sql'] for q in ctx.captured_queries))
+
+        self.shop.latitude = Decimal('-6.500000')
+        self.shop.save()
+        response = self.client.get(URL, params)
+        shop = next(f for f in response.data['features'] if f['id'] == f'shop_{self.shop.id}')
+        self.assertEqual(shop['geometry']['coordinates'][1], -6.5)
+
+    def test_invalid_bbox_is_rejected(self):
+        self.assertEqual(self.client.get(URL, {'bbox': '40,-7,39,-6'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'bbox': 'a,b,c,d'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'bbox': '-180,-90,180,90', 'zoom': 10}).status_code, 400)
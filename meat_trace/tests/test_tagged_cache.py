@@ -0,0 +1,69 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from meat_trace.models import Animal, Sale, Shop
+from meat_trace.utils.geocoding_service import GeocodingService
+from meat_trace.utils.metrics_service import MetricsService
+from meat_trace.utils.tagged_cache import TaggedCache
+
+
+class TaggedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tagged_cache_user', password='testpass123')
+        self.shop = Shop.objects.create(name='Tagged Cache Shop')
+
+    def test_entries_are_dropped_only_by_their_tags(self):
+        TaggedCache.set('animals', 1, TaggedCache.model_tags(Animal))
+        TaggedCache.set('sales', 2, TaggedCache.model_tags(Sale))
+        shop_tags = [TaggedCache.tenant_tag('shop', self.shop.id)]
+        calls = []
+        compute = lambda: calls.append(1) or 3
+        self.assertEqual(TaggedCache.get_or_set('shop', shop_tags, compute), 3)
+        self.assertEqual(TaggedCache.get_or_set('shop', shop_tags, compute), 3)
+        self.assertEqual(len(calls), 1)
+
+        TaggedCache.invalidate(TaggedCache.model_tag('Sale'))
+        self.assertEqual(TaggedCache.get('shop', shop_tags), 3)
+        self.assertEqual(TaggedCache.get('animals', TaggedCache.model_tags(Animal)), 1)
+        self.assertIsNone(TaggedCache.get('sales', TaggedCache.model_tags(Sale)))
+
+    def test_model_writes_no_longer_clear_the_whole_cache(self):
+        cache.set('session-like-key', 'kept')
+        TaggedCache.set('animals', 1, TaggedCache.model_tags(Animal))
+        TaggedCache.set('overview', 'data', MetricsService.OVERVIEW_TAGS)
+
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('10.00'))
+
+        self.assertEqual(cache.get('session-like-key'), 'kept')
+        self.assertEqual(TaggedCache.get('animals', TaggedCache.model_tags(Animal)), 1)
+        # The overview counts sales, so it is dropped
+        self.assertIsNone(TaggedCache.get('overview', MetricsService.OVERVIEW_TAGS))
+
+        Animal.objects.create(abbatoir=self.user, species='cow', age=24, live_weight=300)
+        self.assertIsNone(TaggedCache.get('animals', TaggedCache.model_tags(Animal)))
+
+    def test_metrics_and_geocoding_namespaces(self):
+        TaggedCache.set('supply_chain_statistics', {'cached': True}, MetricsService.SUPPLY_CHAIN_TAGS)
+        self.assertEqual(MetricsService.get_supply_chain_statistics(), {'cached': True})
+        MetricsService.clear_cache()
+        self.assertIsNone(TaggedCache.get('supply_chain_statistics', MetricsService.SUPPLY_CHAIN_TAGS))
+
+        address = 'Unknown Street, Nowhere'
+        coords = {'latitude': -6.0, 'longitude': 39.0}
+        TaggedCache.set('geocode_unknown_street,_nowhere', coords, (GeocodingService.CACHE_NAMESPACE,))
+        Sale.objects.create(shop=self.shop, total_amount=Decimal('10.00'))
+        MetricsService.clear_cache()
+        with mock.patch('meat_trace.utils.geocoding_service.requests.get') as get:
+            self.assertEqual(GeocodingService.geocode(address), coords)
+            get.assert_not_called()
+
+        GeocodingService.clear_cache()
+        with mock.patch('meat_trace.utils.geocoding_service.requests.get') as get:
+            get.return_value.json.return_value = []
+            self.assertIsNone(GeocodingService.geocode(address))
+            get.assert_called_once()
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal
+from meat_trace.utils.time_buckets import TimeBuckets
+
+
+class BucketedStatsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='stats_admin', password='testpass123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        now = timezone.now()
+        for days_ago in (0, 0, 2):
+            Animal.objects.create(
+                abbatoir=self.admin, species='goat', age=12, live_weight=40,
+                created_at=now - timedelta(days=days_ago),
+            )
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_daily_stats_cost_is_constant_in_number_of_days(self):
+        week, week_queries = self._get('/api/v2/admin/analytics/daily_stats/?days=7')
+        year, year_queries = self._get('/api/v2/admin/analytics/daily_stats/?days=365')
+
+        self.assertEqual(week_queries, year_queries)
+        self.assertEqual(len(week.data['daily_stats']), 7)
+        self.assertEqual(len(year.data['daily_stats']), 365)
+
+        by_date = {row['date']: row['new_animals'] for row in week.data['daily_stats']}
+        today = timezone.localdate()
+        self.assertEqual(by_date[today.isoformat()], 2)
+        self.assertEqual(by_date[(today - timedelta(days=1)).isoformat()], 0)
+        self.assertEqual(by_date[(today - timedelta(days=2)).isoformat()], 1)
+
+    def test_weekly_stats_use_calendar_weeks(self):
+        response, _ = self._get('/api/v2/admin/analytics/weekly_stats/?weeks=3')
+
+        rows = response.data['weekly_stats']
+        self.assertEqual(len(rows), 3)
+        monday = TimeBuckets.bucket_start(timezone.localdate(), 'week')
+        self.assertEqual(rows[-1]['week_start'], monday.isoformat())
+        self.assertEqual(sum(row['new_animals'] for row in rows), 3)
+
+    def test_explicit_range_and_bad_input(self):
+        today = timezone.localdate()
+        start = (today - timedelta(days=40)).isoformat()
+        response, _ = self._get(f'/api/v2/admin/analytics/daily_stats/?start_date={start}&end_date={today.isoformat()}')
+        self.assertEqual(len(response.data['daily_stats']), 41)
+
+        self.assertEqual(self.client.get('/api/v2/admin/analytics/daily_stats/?days=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/v2/admin/analytics/daily_stats/?days=100000').status_code, 400)
+
+    def test_series_fills_gaps_with_zero(self):
+        now = timezone.now()
+        series = TimeBuckets.series(Animal.objects.all(), 'created_at', now - timedelta(hours=5), now, 'hour')
+        self.assertEqual(len(series), 6)
+        self.assertEqual(sum(series.values()), 2)
+        self.assertEqual(list(series.values())[-1], 2)
+
+    def test_metrics_time_series_is_zero_filled(self):
+        from meat_trace.utils.metrics_service import MetricsService
+
+        now = timezone.now()
+        for period, expected in (('day', 31), ('week', None), ('month', None)):
+            series = MetricsService._time_series(
+                Animal.objects.all(), 'created_at', now - timedelta(days=30), now, period,
+            )
+            if expected:
+                self.assertEqual(len(series), expected)
+            self.assertEqual(sum(value for _, value in series), 3)
+            self.assertTrue(all(timezone.is_aware(bucket) for bucket, _ in series))
@@ -0,0 +1,124 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from meat_trace.models import Animal, Order, OrderItem, ProcessingUnit, Product, ProductTimelineSnapshot, Shop
+from meat_trace.utils.traceability import (
+    MAX_SALE_EVENTS, get_materialized_timeline, get_product_activity_events, get_product_timelines,
+)
+
+
+class ProductTimelineSnapshotTests(TestCase):
+    def setUp(self):
+        self.abbatoir = User.objects.create_user(username='abbatoir1', password='testpass123')
+        self.processing_unit = ProcessingUnit.objects.create(name='Snapshot Processing Unit')
+        self.animal = Animal.objects.create(
+            abbatoir=self.abbatoir,
+            species='cow',
+            age=24,
+            live_weight=450,
+            health_status='Healthy',
+            slaughtered=True,
+            slaughtered_at=timezone.now(),
+        )
+        self.product = Product.objects.create(
+            processing_unit=self.processing_unit,
+            animal=self.animal,
+            product_type='meat',
+            name='Snapshot Beef',
+            batch_number='SNAP-001',
+            quantity=10,
+            weight=100,
+            weight_unit='kg',
+            price=500,
+        )
+
+    def _load(self):
+        return Product.objects.select_related(
+            'animal', 'processing_unit', 'category', 'timeline_snapshot',
+        ).get(pk=self.product.pk)
+
+    def test_fresh_snapshot_is_served_without_rebuilding(self):
+        get_materialized_timeline(self._load())
+
+        with self.assertNumQueries(1):
+            timeline = get_materialized_timeline(self._load())
+
+        stages = [event['stage'] for event in timeline]
+        self.assertIn('Animal Registration', stages)
+        self.assertIn('Product Creation', stages)
+
+    def test_animal_change_invalidates_and_rebuilds(self):
+        get_materialized_timeline(self._load())
+        snapshot = ProductTimelineSnapshot.objects.get(product=self.product)
+        self.assertFalse(snapshot.is_stale)
+
+        self.animal.health_status = 'Quarantined'
+        self.animal.save()
+
+        snapshot.refresh_from_db()
+        self.assertTrue(snapshot.is_stale)
+
+        timeline = get_materialized_timeline(self._load())
+        registration = next(e for e in timeline if e['stage'] == 'Animal Registration')
+        self.assertEqual(registration['details']['Health Status'], 'Quarantined')
+        self.assertFalse(ProductTimelineSnapshot.objects.get(product=self.product).is_stale)
+
+    def test_public_trace_view_renders_snapshot(self):
+        response = self.client.get(reverse('public_trace_view', args=['SNAP-001']))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Snapshot Beef')
+
+    def test_sales_history_is_windowed_and_collapsed(self):
+        shop = Shop.objects.create(name='Snapshot Shop')
+        start = timezone.now() - timedelta(days=30)
+        sales = MAX_SALE_EVENTS + 5
+        for i in range(sales):
+            order = Order.objects.create(
+                customer=self.abbatoir, shop=shop, total_amount=100,
+                created_at=start + timedelta(hours=i),
+            )
+            OrderItem.objects.create(order=order, product=self.product, quantity=2, weight=2, unit_price=50, subtotal=100)
+
+        with self.assertNumQueries(2):
+            events = get_product_activity_events(self.product)
+
+        sale_events = [e for e in events if e['category'] == 'sale']
+        self.assertEqual(len(sale_events), MAX_SALE_EVENTS + 1)
+        self.assertEqual(sale_events[0]['details']['Earlier Sales'], 5)
+        latest = sale_events[-1]['details']
+        self.assertEqual(latest['Sale Number'], f'#{sales} of {sales}')
+        self.assertEqual(latest['Total Sold Up To Now'], f'{float(sales * 2)} kg')
+
+    def test_batch_rebuild_persists_snapshots(self):
+        shop = Shop.objects.create(name='Batch Shop')
+        other = Product.objects.create(
+            processing_unit=self.processing_unit, animal=self.animal, product_type='meat',
+            name='Snapshot Steak', batch_number='SNAP-002', quantity=5, weight=50, weight_unit='kg', price=300,
+        )
+        start = timezone.now() - timedelta(days=10)
+        for i, product in enumerate([self.product, other, self.product]):
+            order = Order.objects.create(
+                customer=self.abbatoir, shop=shop, total_amount=100, created_at=start + timedelta(hours=i),
+            )
+            OrderItem.objects.create(order=order, product=product, quantity=2, weight=2, unit_price=50, subtotal=100)
+
+        timelines = get_product_timelines([self.product.pk, other.pk])
+
+        snapshots = ProductTimelineSnapshot.objects.filter(product__in=[self.product, other])
+        self.assertFalse(any(snapshot.is_stale for snapshot in snapshots))
+        for snapshot in snapshots:
+            product = Product.objects.get(pk=snapshot.product_id)
+            expected = json.loads(json.dumps(get_product_activity_events(product), cls=DjangoJSONEncoder))
+            self.assertEqual(snapshot.activity_events, expected)
+        # Sales are numbered per product
+        sales = [e for e in snapshots.get(product=self.product).activity_events if e['category'] == 'sale']
+        self.assertEqual(sales[-1]['details']['Sale Number'], '#2 of 2')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_product_timelines([self.product.pk, other.pk]).keys(), timelines.keys())
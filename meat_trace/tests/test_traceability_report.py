@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meat_trace.models import Animal, ProcessingUnit, Product, SlaughterPart
+
+
+class TraceabilityReportTests(TestCase):
+    def setUp(self):
+        self.processor = User.objects.create_user(username='report_processor', password='testpass123')
+        self.processor.profile.role = 'Processor'
+        self.processor.profile.save()
+        self.processing_unit = ProcessingUnit.objects.create(name='Report Processing Unit')
+        abbatoir = User.objects.create_user(username='report_abbatoir', password='testpass123')
+
+        now = timezone.now()
+        same_moment = now - timedelta(days=1)
+        self.animals = []
+        for i in range(5):
+            animal = Animal.objects.create(
+                abbatoir=abbatoir, species='cow', age=24, live_weight=200,
+                transferred_to=self.processing_unit, received_by=self.processor,
+                # Several receipts share a timestamp to exercise the keyset tie-break
+                received_at=same_moment if i < 3 else now - timedelta(days=i),
+            )
+            for j in range(2):
+                Product.objects.create(
+                    processing_unit=self.processing_unit, animal=animal, name=f'Cut {i}-{j}',
+                    batch_number=f'REP-{i}-{j}', quantity=1, weight=10,
+                )
+            self.animals.append(animal)
+        SlaughterPart.objects.create(
+            animal=self.animals[0], part_type='other', weight=40,
+            received_by=self.processor, received_at=same_moment,
+        )
+        SlaughterPart.objects.create(
+            animal=self.animals[1], part_type='other', weight=40, received_by=self.processor,
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.processor)
+
+    def _get(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v2/processing-unit/traceability/', params)
+        return response, ctx.captured_queries
+
+    def test_keyset_pages_cover_every_item_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response, _ = self._get(**params)
+            self.assertEqual(response.status_code, 200)
+            report = response.data['traceability']
+            self.assertEqual(report['total'], 7)
+            seen += [item['item_id'] for item in report['items']]
+            cursor = report['next_cursor']
+            if not report['has_more']:
+                break
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        # Newest first (ties by kind then id); the part without a receipt time comes last
+        self.assertEqual(seen[0], self.animals[2].animal_id)
+        self.assertEqual(seen[-1], f'{self.animals[1].animal_id}-other')
+
+    def test_page_query_count_does_not_grow_with_items(self):
+        response, small = self._get(page_size=1)
+        self.assertEqual(len(response.data['traceability']['items']), 1)
+        response, large = self._get(page_size=50)
+        items = response.data['traceability']['items']
+        self.assertEqual(len(items), 7)
+        self.assertEqual(len(small), len(large))
+
+        animal = next(item for item in items if item['item_id'] == self.animals[0].animal_id)
+        self.assertEqual(animal['processed_weight'], 20.0)
+        self.assertEqual(animal['utilization_rate'], 10.0)
+        self.assertEqual(len(animal['utilization_history']), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response, _ = self._get(cursor='not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_streams_full_report_as_ndjson_and_csv(self):
+        response, _ = self._get(stream='ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertIn('utilization_history', json.loads(lines[0]))
+
+        response, _ = self._get(stream='csv', species='cow')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][0], 'item_id')
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[1][-1], 'REP-2-0;REP-2-1')
@@ -274,6 +274,8 @@ urlpatterns = [
     path('api/v2/production-stats/', views.production_stats_view, name='production_stats'),
     path('api/v2/processing-pipeline/', views.processing_pipeline_view, name='processing_pipeline'),
     path('api/v2/processing-unit/traceability/', views.traceability_report_view, name='traceability_report'),
+    path('api/v2/recall/impact/', views.recall_impact_view, name='recall_impact'),
+    path('api/v2/trace/bulk/', views.bulk_trace_view, name='bulk_trace'),
 
     # Product info endpoints
     path('api/v2/product-info/view/<int:product_id>/', views.product_info_view, name='product_info_view'),
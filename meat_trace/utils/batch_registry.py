@@ -0,0 +1,139 @@
+"""
+Batch Registry for MeatTrace
+
+Resolves public batch codes (the value encoded in product QR labels) to
+products through the unique, indexed BatchIdentifier table.
+
+Usage:
+    from meat_trace.utils.batch_registry import BatchRegistry
+
+    product = BatchRegistry.resolve('BATCH-2024-001')
+    # Returns the product owning the code, or None
+
+    url = BatchRegistry.trace_url(product)
+    # The /trace/<code>/ URL to encode in the product's QR label
+"""
+
+import logging
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+
+from ..models import BatchIdentifier, Product
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRegistry:
+    """
+    Registers and resolves public batch codes.
+
+    Resolution is deterministic: a registered code maps to exactly one
+    product, and an unregistered legacy batch number falls back to the
+    oldest product carrying it (created_at, then id).
+    """
+
+    @classmethod
+    def generated_code(cls, product):
+        return f"{product.batch_number}-{product.pk}"
+
+    @classmethod
+    def register(cls, product):
+        """
+        Ensure ``product`` owns a public code for its current batch number.
+
+        Returns the product's primary BatchIdentifier.
+        """
+        batch_number = product.batch_number or ''
+        current = BatchIdentifier.objects.filter(
+            product=product, code__in=[batch_number, cls.generated_code(product)],
+        ).first()
+        if current is None:
+            current = cls._claim(product, batch_number, 'batch_number')
+            if current is None:
+                current = cls._claim(product, cls.generated_code(product), 'generated')
+
+        if current is not None and not current.is_primary:
+            BatchIdentifier.objects.filter(product=product, pk=current.pk).update(is_primary=True)
+            current.is_primary = True
+        if current is not None:
+            BatchIdentifier.objects.filter(product=product, is_primary=True).exclude(pk=current.pk).update(is_primary=False)
+        return current
+
+    @classmethod
+    def _claim(cls, product, code, source):
+        """Create ``code`` for ``product``; None if another product already owns it."""
+        if not code:
+            return None
+        try:
+            with transaction.atomic():
+                return BatchIdentifier.objects.create(product=product, code=code, source=source)
+        except IntegrityError:
+            existing = BatchIdentifier.objects.filter(code=code).first()
+            if existing and existing.product_id == product.pk:
+                return existing
+            return None
+
+    @classmethod
+    def resolve(cls, code, queryset=None):
+        """
+        Return the product for a public batch code, or None.
+
+        ``queryset`` lets callers attach select_related/prefetch_related; the
+        lookup itself is a single join on the unique code index.
+        """
+        queryset = queryset if queryset is not None else Product.objects.all()
+        product = queryset.filter(batch_identifiers__code=code).first()
+        if product is None:
+            # Products created through bulk paths that bypass signals, or
+            # before the registry backfill: use the indexed batch_number.
+            product = queryset.filter(batch_number=code).order_by('created_at', 'id').first()
+            if product is not None:
+                logger.info(f"[BATCH] Resolved unregistered batch code {code} to product {product.pk}")
+        return product
+
+    @classmethod
+    def resolve_many(cls, codes):
+        """
+        Resolve many public batch codes at once.
+
+        Returns a dict of code -> product id for every code that resolves,
+        using one query on the registry and one indexed fallback query for
+        unregistered legacy batch numbers.
+        """
+        codes = list(dict.fromkeys(code for code in codes if code))
+        resolved = dict(
+            BatchIdentifier.objects.filter(code__in=codes).values_list('code', 'product_id')
+        )
+        unresolved = [code for code in codes if code not in resolved]
+        if unresolved:
+            legacy = Product.objects.filter(batch_number__in=unresolved).order_by(
+                'batch_number', 'created_at', 'id',
+            ).values_list('batch_number', 'id')
+            for batch_number, product_id in legacy:
+                resolved.setdefault(batch_number, product_id)
+        return resolved
+
+    @staticmethod
+    def prefetch_public_code():
+        """Prefetch for product querysets whose rows are serialized with ``public_code``."""
+        return Prefetch(
+            'batch_identifiers', queryset=BatchIdentifier.objects.filter(is_primary=True),
+            to_attr='primary_batch_identifiers',
+        )
+
+    @classmethod
+    def public_code(cls, product):
+        """The code to print on new labels for ``product``."""
+        identifiers = getattr(product, 'primary_batch_identifiers', None)
+        if identifiers is None:
+            identifiers = product.batch_identifiers.filter(is_primary=True)[:1]
+        return identifiers[0].code if identifiers else product.batch_number
+
+    @classmethod
+    def trace_url(cls, product):
+        """Public /trace/<code>/ URL for ``product``; unique even when batch numbers repeat."""
+        site_url = getattr(settings, 'SITE_URL', None) or 'http://localhost:8000'
+        return f"{site_url}/trace/{quote(cls.public_code(product), safe='')}/"
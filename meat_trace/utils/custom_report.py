@@ -0,0 +1,259 @@
+"""
+Custom Report Service for MeatTrace
+
+Backs AdminAnalyticsViewSet.custom_report: filtered animal, product, order
+and sale lists with keyset pagination, plus a summary block cached per
+filter combination.
+
+Date filters are applied as half-open ``created_at`` ranges (not
+``created_at__date``), so the composite (filter, created_at, id) indexes on
+the four tables serve both the filter and the newest-first order. The
+summary comes from the daily rollups where the filters map onto rollup
+dimensions and from one aggregate per table otherwise; it is cached with
+TaggedCache against the models it counts.
+
+Usage:
+    from meat_trace.utils.custom_report import CustomReportService
+
+    filters = CustomReportService.parse_filters(request.query_params)
+    summary = CustomReportService.summary(filters)
+    rows, next_cursor = CustomReportService.page('animals', filters, cursor, 100)
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+
+from ..models import Animal, Order, OrderItem, Product, Sale, SaleItem
+from .keyset import KeysetPage
+from .rollup_service import RollupService
+from .tagged_cache import TaggedCache
+from .time_buckets import TimeBuckets
+
+logger = logging.getLogger(__name__)
+
+
+class CustomReportService:
+    """
+    Filtered, keyset-paginated entity lists and a cached summary.
+    """
+
+    ID_FILTERS = ('animal_id', 'product_id', 'shop_id', 'abbatoir_id', 'processing_unit_id')
+    DATE_FILTERS = ('start_date', 'end_date')
+
+    ENTITIES = ('animals', 'products', 'orders', 'sales')
+    DEFAULT_ENTITIES = ('animals', 'products')
+
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 500
+
+    # Seconds a summary is served from cache (writes to its models drop it sooner)
+    SUMMARY_TIMEOUT = 300
+    SUMMARY_TAGS = TaggedCache.model_tags(
+        'Animal', 'Product', 'Order', 'OrderItem', 'Sale', 'SaleItem', 'DailyRollup',
+    ) + ('metrics',)
+
+    # ── Filters ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def parse_filters(cls, params):
+        """Validated filters; raises ValueError on a malformed date or id."""
+        filters = {}
+        for key in cls.DATE_FILTERS:
+            try:
+                filters[key] = TimeBuckets.parse_date(params.get(key))
+            except ValueError:
+                raise ValueError(f"{key} must be an ISO date (YYYY-MM-DD)")
+        for key in cls.ID_FILTERS:
+            value = params.get(key)
+            try:
+                filters[key] = int(value) if value not in (None, '') else None
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be an integer")
+        return filters
+
+    @classmethod
+    def parse_entities(cls, value):
+        if not value:
+            return cls.DEFAULT_ENTITIES
+        entities = tuple(entity.strip() for entity in value.split(',') if entity.strip())
+        unknown = set(entities) - set(cls.ENTITIES)
+        if unknown:
+            raise ValueError(f"Unknown entities: {', '.join(sorted(unknown))}")
+        return entities
+
+    @classmethod
+    def clamp_page_size(cls, value):
+        try:
+            page_size = int(value) if value not in (None, '') else cls.DEFAULT_PAGE_SIZE
+        except (TypeError, ValueError):
+            page_size = cls.DEFAULT_PAGE_SIZE
+        return max(1, min(page_size, cls.MAX_PAGE_SIZE))
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _date_range(filters):
+        q = Q()
+        if filters.get('start_date'):
+            q &= Q(created_at__gte=TimeBuckets.to_datetime(filters['start_date']))
+        if filters.get('end_date'):
+            q &= Q(created_at__lt=TimeBuckets.to_datetime(filters['end_date'] + timedelta(days=1)))
+        return q
+
+    @classmethod
+    def querysets(cls, filters):
+        """Filtered querysets of every entity (unordered, no related rows loaded)."""
+        dates = cls._date_range(filters)
+        q_animals = q_products = q_orders = q_sales = dates
+
+        animal_id = filters.get('animal_id')
+        if animal_id:
+            q_animals &= Q(id=animal_id)
+            q_products &= Q(animal_id=animal_id)
+            # Orders and Sales might not link directly to animal, skipping for simplicity or would need joins
+
+        orders = Order.objects.all()
+        sales = Sale.objects.all()
+        product_id = filters.get('product_id')
+        if product_id:
+            q_products &= Q(id=product_id)
+            # Orders and sales reach products through their line items
+            orders = orders.filter(Exists(OrderItem.objects.filter(order=OuterRef('pk'), product_id=product_id)))
+            sales = sales.filter(Exists(SaleItem.objects.filter(sale=OuterRef('pk'), product_id=product_id)))
+
+        shop_id = filters.get('shop_id')
+        if shop_id:
+            q_orders &= Q(shop_id=shop_id)
+            q_sales &= Q(shop_id=shop_id)
+            # Products link to shop via received_by_shop
+            q_products &= Q(received_by_shop_id=shop_id)
+
+        if filters.get('abbatoir_id'):
+            q_animals &= Q(abbatoir_id=filters['abbatoir_id'])
+
+        if filters.get('processing_unit_id'):
+            q_products &= Q(processing_unit_id=filters['processing_unit_id'])
+
+        return {
+            'animals': Animal.objects.filter(q_animals),
+            'products': Product.objects.filter(q_products),
+            'orders': orders.filter(q_orders),
+            'sales': sales.filter(q_sales),
+        }
+
+    # ── Summary ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def summary_key(cls, filters):
+        return 'custom_report_summary:' + '&'.join(
+            f"{key}={value}" for key, value in sorted(filters.items()) if value is not None
+        )
+
+    @classmethod
+    def summary(cls, filters):
+        """Summary block for ``filters``, cached until a counted model changes."""
+        return TaggedCache.get_or_set(
+            cls.summary_key(filters), cls.SUMMARY_TAGS,
+            lambda: cls.compute_summary(filters), cls.SUMMARY_TIMEOUT,
+        )
+
+    @classmethod
+    def compute_summary(cls, filters):
+        start_date, end_date = filters.get('start_date'), filters.get('end_date')
+        shop_id = filters.get('shop_id')
+        processing_unit_id = filters.get('processing_unit_id')
+
+        if filters.get('animal_id') or filters.get('product_id') or filters.get('abbatoir_id'):
+            querysets = cls.querysets(filters)
+            sales = querysets['sales'].aggregate(count=Count('id'), revenue=Sum('total_amount'))
+            return {
+                'total_animals': querysets['animals'].count(),
+                'total_products': querysets['products'].count(),
+                'total_orders': querysets['orders'].count(),
+                'total_sales': sales['count'],
+                'total_revenue': sales['revenue'] or 0,
+            }
+
+        # Date / shop / processing unit filters map onto rollup dimensions
+        all_totals = RollupService.totals(start_date, end_date)
+        shop_totals = RollupService.totals(start_date, end_date, shop_id=shop_id) if shop_id else all_totals
+        if shop_id:
+            # Products are tied to a shop only once received; not a rollup dimension
+            total_products = cls.querysets(filters)['products'].count()
+        elif processing_unit_id:
+            total_products = RollupService.totals(
+                start_date, end_date, processing_unit_id=processing_unit_id,
+            )['products_created']
+        else:
+            total_products = all_totals['products_created']
+        return {
+            'total_animals': all_totals['animals_registered'],
+            'total_products': total_products,
+            'total_orders': shop_totals['orders_placed'],
+            'total_sales': shop_totals['sales_recorded'],
+            'total_revenue': shop_totals['sales_value'],
+        }
+
+    # ── Lists ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _animal_row(a):
+        return {
+            'id': a.id,
+            'animal_id': a.animal_id,
+            'species': a.species,
+            'abbatoir': a.abbatoir.username if a.abbatoir else 'Unknown',
+            'created_at': a.created_at.isoformat(),
+            'slaughtered': a.slaughtered
+        }
+
+    @staticmethod
+    def _product_row(p):
+        return {
+            'id': p.id,
+            'name': p.name,
+            'batch_number': p.batch_number,
+            'processing_unit': p.processing_unit.name if p.processing_unit else 'N/A',
+            'created_at': p.created_at.isoformat()
+        }
+
+    @staticmethod
+    def _order_row(o):
+        return {
+            'id': o.id,
+            'shop': o.shop.name if o.shop else None,
+            'customer': o.customer.username if o.customer else None,
+            'status': o.status,
+            'total_amount': float(o.total_amount or 0),
+            'created_at': o.created_at.isoformat()
+        }
+
+    @staticmethod
+    def _sale_row(s):
+        return {
+            'id': s.id,
+            'shop': s.shop.name if s.shop else None,
+            'sold_by': s.sold_by.username if s.sold_by else None,
+            'total_amount': float(s.total_amount or 0),
+            'created_at': s.created_at.isoformat()
+        }
+
+    @classmethod
+    def _listing(cls, entity, queryset):
+        """Queryset restricted to what the list rows need, and the row builder."""
+        if entity == 'animals':
+            return queryset.select_related('abbatoir'), cls._animal_row
+        if entity == 'products':
+            return queryset.select_related('processing_unit'), cls._product_row
+        if entity == 'orders':
+            return queryset.select_related('shop', 'customer'), cls._order_row
+        return queryset.select_related('shop', 'sold_by'), cls._sale_row
+
+    @classmethod
+    def page(cls, entity, filters, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """One keyset page of ``entity`` rows, newest first: ``(rows, next_cursor)``."""
+        queryset, build = cls._listing(entity, cls.querysets(filters)[entity])
+        objects, next_cursor = KeysetPage.page(queryset, cursor, page_size)
+        return [build(obj) for obj in objects], next_cursor
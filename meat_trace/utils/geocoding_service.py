@@ -15,7 +15,8 @@ Usage:
 import logging
 import requests
 from typing import Optional, Dict
-from django.core.cache import cache
+
+from .tagged_cache import TaggedCache
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ class GeocodingService:
     
     NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
     CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days cache
+    CACHE_NAMESPACE = 'geocoding'  # Tag of every cached lookup (see clear_cache)
     USER_AGENT = "MeatTrace/1.0 (contact@meattrace.com)"  # Required by Nominatim
     
     # Known Tanzanian locations with pre-cached coordinates
@@ -163,7 +165,7 @@ class GeocodingService:
         
         # Check cache
         cache_key = f"geocode_{address_lower.replace(' ', '_')}"
-        cached_result = cache.get(cache_key)
+        cached_result = TaggedCache.get(cache_key, (cls.CACHE_NAMESPACE,))
         if cached_result is not None:
             logger.info(f"[GEOCODING] Cache hit for: {address}")
             return cached_result if cached_result != 'NOT_FOUND' else None
@@ -211,12 +213,12 @@ class GeocodingService:
                 }
                 
                 # Cache the result
-                cache.set(cache_key, coords, cls.CACHE_TIMEOUT)
+                TaggedCache.set(cache_key, coords, (cls.CACHE_NAMESPACE,), cls.CACHE_TIMEOUT)
                 logger.info(f"[GEOCODING] Success: {address} -> {coords}")
                 return coords
             else:
                 # Cache the "not found" result to avoid repeated API calls
-                cache.set(cache_key, 'NOT_FOUND', cls.CACHE_TIMEOUT)
+                TaggedCache.set(cache_key, 'NOT_FOUND', (cls.CACHE_NAMESPACE,), cls.CACHE_TIMEOUT)
                 logger.warning(f"[GEOCODING] No results for: {address}")
                 return None
                 
@@ -276,6 +278,12 @@ class GeocodingService:
         query = ", ".join(components)
         return cls.geocode(query)
     
+    @classmethod
+    def clear_cache(cls):
+        """Forget every cached lookup (e.g. after changing the query bias)."""
+        TaggedCache.invalidate(cls.CACHE_NAMESPACE)
+        logger.info("[GEOCODING] Cleared geocoding cache")
+
     @classmethod
     def geocode_and_save(cls, instance, location_field: str = 'location'):
         """
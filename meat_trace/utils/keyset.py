@@ -0,0 +1,95 @@
+"""
+Keyset pagination helpers for MeatTrace
+
+Opaque cursors that carry the sort key of the last row served, and a
+newest-first paginator over ``(created_at, id)``. Unlike OFFSET pagination
+a deep page costs the same as the first one when an index backs the order.
+
+Usage:
+    from meat_trace.utils.keyset import InvalidCursor, KeysetPage
+
+    cursor = KeysetPage.decode(request.query_params.get('cursor'))
+    rows, next_cursor = KeysetPage.page(Animal.objects.filter(...), cursor, 50)
+    KeysetPage.encode(next_cursor)
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """The pagination cursor could not be decoded."""
+
+
+def encode_cursor(values):
+    """Opaque cursor for a tuple of sort-key values (datetimes, ints, strings or None)."""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value, types):
+    """
+    Tuple of sort-key values from an opaque cursor; None when absent.
+
+    ``types`` gives the type of each position (``datetime``, ``int``,
+    ``str``); a position may always be None.
+    """
+    if not value:
+        return None
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(value.encode()).decode())
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError(raw)
+        values = []
+        for item, kind in zip(raw, types):
+            if item is None:
+                values.append(None)
+            elif kind is datetime:
+                moment = parse_datetime(item)
+                if moment is None:
+                    raise ValueError(item)
+                values.append(moment)
+            else:
+                values.append(kind(item))
+        return tuple(values)
+    except (TypeError, ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise InvalidCursor(f"Invalid cursor: {value}") from e
+
+
+class KeysetPage:
+    """
+    Newest-first keyset pagination over a non-null timestamp and the primary key.
+    """
+
+    TYPES = (datetime, int)
+
+    @classmethod
+    def decode(cls, value):
+        return decode_cursor(value, cls.TYPES)
+
+    @staticmethod
+    def encode(key):
+        return encode_cursor(key) if key else None
+
+    @staticmethod
+    def page(queryset, cursor, page_size, field='created_at'):
+        """
+        Rows after ``cursor`` ordered by (-field, -id), at most ``page_size``.
+
+        Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last
+        page. Costs one query.
+        """
+        if cursor is not None:
+            moment, pk = cursor
+            queryset = queryset.filter(Q(**{f'{field}__lt': moment}) | Q(**{field: moment, 'id__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-id')[:page_size + 1])
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        last = rows[-1]
+        return rows, (getattr(last, field), last.pk)
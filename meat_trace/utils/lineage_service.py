@@ -0,0 +1,171 @@
+"""
+Lineage Service for MeatTrace
+
+Maintains the ProductLineage closure table and answers lineage questions
+("which animals went into this product", "which products contain this
+animal") with a single indexed query.
+
+Usage:
+    from meat_trace.utils.lineage_service import LineageService
+
+    LineageService.rebuild([product.id])
+    LineageService.schedule([product.id])   # rebuild once, when the transaction commits
+    lineage = LineageService.get_lineage(product.id)
+"""
+
+import logging
+import threading
+
+from django.db import transaction
+
+from ..models import Product, ProductIngredient, ProductLineage
+
+logger = logging.getLogger(__name__)
+
+
+class LineageService:
+    """
+    Set-based maintenance of the product lineage closure table.
+    """
+
+    # Product fields whose change alters the product's lineage
+    SOURCE_FIELDS = ('animal_id', 'slaughter_part_id')
+
+    # Products waiting for a rebuild at the end of the current transaction
+    _pending = threading.local()
+
+    @classmethod
+    def _source_rows(cls, product_ids):
+        """
+        Yield (product_id, slaughter_part_id, animal_id, abbatoir_id) for every
+        direct source of the given products: the product's own part/animal and
+        each ingredient's part.
+        """
+        products = Product.objects.filter(id__in=product_ids).values_list(
+            'id', 'slaughter_part_id', 'slaughter_part__animal_id', 'slaughter_part__animal__abbatoir_id',
+            'animal_id', 'animal__abbatoir_id',
+        )
+        for product_id, part_id, part_animal_id, part_abbatoir_id, animal_id, abbatoir_id in products:
+            if part_id:
+                yield product_id, part_id, part_animal_id, part_abbatoir_id
+            if animal_id:
+                yield product_id, None, animal_id, abbatoir_id
+
+        ingredients = ProductIngredient.objects.filter(product_id__in=product_ids).values_list(
+            'product_id', 'slaughter_part_id', 'slaughter_part__animal_id', 'slaughter_part__animal__abbatoir_id',
+        )
+        for row in ingredients:
+            yield row
+
+    @classmethod
+    def build(cls, product_ids):
+        """Compute closure rows for the given products, keeping the shortest depth per ancestor."""
+        closure = {}
+
+        def add(product_id, ancestor_type, ancestor_id, depth):
+            if not ancestor_id:
+                return
+            key = (product_id, ancestor_type, ancestor_id)
+            if key not in closure or depth < closure[key]:
+                closure[key] = depth
+
+        for product_id, part_id, animal_id, abbatoir_id in cls._source_rows(product_ids):
+            base = 1 if part_id else 0
+            add(product_id, 'slaughter_part', part_id, 1)
+            add(product_id, 'animal', animal_id, base + 1)
+            add(product_id, 'abbatoir', abbatoir_id, base + 2)
+
+        return [
+            ProductLineage(
+                product_id=product_id,
+                ancestor_type=ancestor_type,
+                ancestor_id=ancestor_id,
+                depth=depth,
+                **{f'{ancestor_type}_id': ancestor_id},
+            )
+            for (product_id, ancestor_type, ancestor_id), depth in closure.items()
+        ]
+
+    @classmethod
+    def rebuild(cls, product_ids):
+        """Replace the lineage rows of the given products."""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        rows = cls.build(product_ids)
+        with transaction.atomic():
+            ProductLineage.objects.filter(product_id__in=product_ids).delete()
+            ProductLineage.objects.bulk_create(rows)
+        logger.debug(f"[LINEAGE] Rebuilt lineage for {len(product_ids)} product(s): {len(rows)} rows")
+        return len(rows)
+
+    @classmethod
+    def schedule(cls, product_ids):
+        """
+        Rebuild the given products once the current transaction commits.
+        Every product scheduled in the transaction is rebuilt in a single
+        pass, so editing a recipe ingredient by ingredient costs one rebuild.
+        """
+        product_ids = {pid for pid in product_ids if pid}
+        if not product_ids:
+            return
+        if not hasattr(cls._pending, 'ids'):
+            cls._pending.ids = set()
+        cls._pending.ids |= product_ids
+        transaction.on_commit(cls._flush)
+
+    @classmethod
+    def _flush(cls):
+        # The first callback of the transaction takes every pending id; the
+        # rest find nothing left to do
+        product_ids, cls._pending.ids = getattr(cls._pending, 'ids', set()), set()
+        if product_ids:
+            cls.rebuild(sorted(product_ids))
+
+    @classmethod
+    def get_lineage(cls, product_id):
+        """
+        Return the product's ancestors grouped by type, nearest first.
+        One query over the (product, depth) index.
+        """
+        lineage = {'slaughter_parts': [], 'animals': [], 'abbatoirs': []}
+        rows = ProductLineage.objects.filter(product_id=product_id).select_related(
+            'slaughter_part', 'animal', 'abbatoir',
+        ).order_by('depth', 'ancestor_type', 'ancestor_id')
+
+        for row in rows:
+            if row.ancestor_type == 'slaughter_part' and row.slaughter_part:
+                part = row.slaughter_part
+                lineage['slaughter_parts'].append({
+                    'id': part.id,
+                    'part_type': part.part_type,
+                    'part_type_display': part.get_part_type_display(),
+                    'weight': str(part.weight) if part.weight is not None else None,
+                    'animal_id': part.animal_id,
+                    'depth': row.depth,
+                })
+            elif row.ancestor_type == 'animal' and row.animal:
+                animal = row.animal
+                lineage['animals'].append({
+                    'id': animal.id,
+                    'animal_id': animal.animal_id,
+                    'species': animal.species,
+                    'abbatoir_id': animal.abbatoir_id,
+                    'depth': row.depth,
+                })
+            elif row.ancestor_type == 'abbatoir' and row.abbatoir:
+                abbatoir = row.abbatoir
+                lineage['abbatoirs'].append({
+                    'id': abbatoir.id,
+                    'username': abbatoir.username,
+                    'name': abbatoir.get_full_name() or abbatoir.username,
+                    'depth': row.depth,
+                })
+        return lineage
+
+    @classmethod
+    def product_ids_for(cls, ancestor_type, ancestor_ids):
+        """Ids (as a values() queryset) of products descending from any of the given ancestors."""
+        return ProductLineage.objects.filter(
+            ancestor_type=ancestor_type, ancestor_id__in=ancestor_ids,
+        ).values('product_id')
@@ -0,0 +1,301 @@
+"""
+Supply Chain Map Service for MeatTrace
+
+Serves the admin supply-chain map (processing units, shops and abbatoirs
+with coordinates) as GeoJSON. The world is split into a square degree grid
+per zoom level (``360 / 2**zoom`` degrees a side, matching slippy-map tile
+widths). Each tile is read with a latitude/longitude range query - backed by
+the (latitude, longitude) indexes on the three location tables - and cached
+on its own, so a bounding-box request only touches the tiles it overlaps.
+Below CLUSTER_MAX_ZOOM the points of a tile are merged into clusters on a
+finer sub-grid.
+
+Every entry is tagged with CACHE_NAMESPACE; the signals invalidate it only
+when a location row is created, deleted, geocoded or has a field the map
+shows changed (see MAP_FIELDS).
+
+Usage:
+    from meat_trace.utils.map_service import MapService
+
+    bbox = MapService.parse_bbox(request.query_params.get('bbox'))
+    collection = MapService.feature_collection(bbox, zoom=6)
+    MapService.clear_cache()
+"""
+
+import logging
+import math
+
+from django.db.models import Count, Q
+
+from ..models import ProcessingUnit, Shop, UserProfile
+from .tagged_cache import TaggedCache
+
+logger = logging.getLogger(__name__)
+
+
+class MapService:
+    """
+    Tiled, cached GeoJSON of every geocoded supply-chain location.
+    """
+
+    CACHE_NAMESPACE = 'supply_chain_map'  # Tag of every cached tile and summary
+
+    # Seconds a tile is kept; location changes invalidate it sooner
+    CACHE_TIMEOUT = 60 * 60 * 6
+
+    MIN_ZOOM = 0
+    MAX_ZOOM = 18
+    DEFAULT_ZOOM = 6
+
+    # Tiles below this zoom are clustered on a CLUSTER_GRID x CLUSTER_GRID sub-grid
+    CLUSTER_MAX_ZOOM = 12
+    CLUSTER_GRID = 8
+
+    # Largest number of tiles one request may cover
+    MAX_TILES = 64
+
+    # Fields the map renders, per model; a change to any of them invalidates the map
+    MAP_FIELDS = {
+        'ProcessingUnit': ('name', 'location', 'latitude', 'longitude', 'contact_email', 'contact_phone', 'is_active'),
+        'Shop': ('name', 'location', 'latitude', 'longitude', 'contact_email', 'contact_phone', 'is_active'),
+        'UserProfile': ('role', 'address', 'latitude', 'longitude', 'phone'),
+        'User': ('first_name', 'last_name', 'email', 'is_active'),
+    }
+
+    # ── Parameters ───────────────────────────────────────────────────────────
+
+    @classmethod
+    def parse_zoom(cls, value):
+        if value in (None, ''):
+            return cls.DEFAULT_ZOOM
+        try:
+            zoom = int(value)
+        except (TypeError, ValueError):
+            raise ValueError("zoom must be an integer")
+        return max(cls.MIN_ZOOM, min(zoom, cls.MAX_ZOOM))
+
+    @staticmethod
+    def parse_bbox(value):
+        """``west,south,east,north`` in degrees; None when absent."""
+        if not value:
+            return None
+        try:
+            west, south, east, north = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValueError("bbox must be 'west,south,east,north' in degrees")
+        if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+            raise ValueError("bbox must satisfy -180 <= west < east <= 180 and -90 <= south < north <= 90")
+        return west, south, east, north
+
+    # ── Grid ─────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def tile_size(zoom):
+        return 360.0 / (2 ** zoom)
+
+    @classmethod
+    def _tile_index(cls, value, origin, size, span):
+        # Points on the far edge (longitude 180, latitude 90) belong to the last tile
+        last = max(math.ceil(span / size) - 1, 0)
+        return min(int((value - origin) // size), last)
+
+    @classmethod
+    def _tile_ranges(cls, bbox, zoom):
+        west, south, east, north = bbox or (-180, -90, 180, 90)
+        size = cls.tile_size(zoom)
+        xs = range(cls._tile_index(west, -180, size, 360), cls._tile_index(east, -180, size, 360) + 1)
+        ys = range(cls._tile_index(south, -90, size, 180), cls._tile_index(north, -90, size, 180) + 1)
+        return xs, ys
+
+    @classmethod
+    def fit_zoom(cls, bbox, zoom):
+        """The finest zoom up to ``zoom`` at which ``bbox`` spans at most MAX_TILES tiles."""
+        while zoom > cls.MIN_ZOOM:
+            xs, ys = cls._tile_ranges(bbox, zoom)
+            if len(xs) * len(ys) <= cls.MAX_TILES:
+                break
+            zoom -= 1
+        return zoom
+
+    @classmethod
+    def tiles(cls, bbox, zoom):
+        """(x, y) of every tile overlapping ``bbox`` at ``zoom``."""
+        xs, ys = cls._tile_ranges(bbox, zoom)
+        if len(xs) * len(ys) > cls.MAX_TILES:
+            raise ValueError(f"bbox covers more than {cls.MAX_TILES} tiles at zoom {zoom}; zoom out")
+        return [(x, y) for x in xs for y in ys]
+
+    @classmethod
+    def _tile_filter(cls, zoom, x, y):
+        size = cls.tile_size(zoom)
+        west, south = -180 + x * size, -90 + y * size
+        q = Q(longitude__gte=west, latitude__gte=south)
+        # The last column / row is closed so the far edge is not dropped
+        q &= Q(longitude__lte=180) if west + size >= 180 else Q(longitude__lt=west + size)
+        q &= Q(latitude__lte=90) if south + size >= 90 else Q(latitude__lt=south + size)
+        return q
+
+    # ── Features ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _feature(feature_id, lat, lng, properties):
+        return {
+            'type': 'Feature',
+            'id': feature_id,
+            'geometry': {'type': 'Point', 'coordinates': [float(lng), float(lat)]},
+            'properties': properties,
+        }
+
+    @classmethod
+    def _points(cls, q):
+        """Point features of every active location matching ``q``."""
+        features = []
+        processing_units = ProcessingUnit.objects.filter(q, is_active=True).values_list(
+            'id', 'name', 'latitude', 'longitude', 'location', 'contact_email', 'contact_phone',
+        )
+        for pk, name, lat, lng, location, email, phone in processing_units:
+            features.append(cls._feature(f'pu_{pk}', lat, lng, {
+                'name': name, 'type': 'Processing Unit', 'location': location or '',
+                'contact_email': email or '', 'contact_phone': phone or '',
+            }))
+
+        shops = Shop.objects.filter(q, is_active=True).values_list(
+            'id', 'name', 'latitude', 'longitude', 'location', 'contact_email', 'contact_phone',
+        )
+        for pk, name, lat, lng, location, email, phone in shops:
+            features.append(cls._feature(f'shop_{pk}', lat, lng, {
+                'name': name, 'type': 'Shop', 'location': location or '',
+                'contact_email': email or '', 'contact_phone': phone or '',
+            }))
+
+        abbatoirs = UserProfile.objects.filter(q, role='Abbatoir', user__is_active=True).values_list(
+            'id', 'user__first_name', 'user__last_name', 'user__username',
+            'latitude', 'longitude', 'address', 'user__email', 'phone',
+        )
+        for pk, first_name, last_name, username, lat, lng, address, email, phone in abbatoirs:
+            features.append(cls._feature(f'abbatoir_{pk}', lat, lng, {
+                'name': f"{first_name} {last_name}".strip() or username, 'type': 'Abbatoir',
+                'location': address or '', 'contact_email': email or '', 'contact_phone': phone or '',
+            }))
+        return features
+
+    @classmethod
+    def _cluster(cls, features, zoom, x, y):
+        """Merge the points of one tile that share a sub-grid cell."""
+        cell_size = cls.tile_size(zoom) / cls.CLUSTER_GRID
+        west, south = -180 + x * cls.tile_size(zoom), -90 + y * cls.tile_size(zoom)
+        cells = {}
+        for feature in features:
+            lng, lat = feature['geometry']['coordinates']
+            cell = (
+                min(int((lng - west) // cell_size), cls.CLUSTER_GRID - 1),
+                min(int((lat - south) // cell_size), cls.CLUSTER_GRID - 1),
+            )
+            cells.setdefault(cell, []).append(feature)
+
+        clustered = []
+        for (cx, cy), members in sorted(cells.items()):
+            if len(members) == 1:
+                clustered.append(members[0])
+                continue
+            types = {}
+            for member in members:
+                kind = member['properties']['type']
+                types[kind] = types.get(kind, 0) + 1
+            lng = sum(m['geometry']['coordinates'][0] for m in members) / len(members)
+            lat = sum(m['geometry']['coordinates'][1] for m in members) / len(members)
+            clustered.append(cls._feature(f'cluster_{zoom}_{x}_{y}_{cx}_{cy}', lat, lng, {
+                'cluster': True, 'point_count': len(members), 'types': types,
+            }))
+        return clustered
+
+    @classmethod
+    def tile(cls, zoom, x, y):
+        """Features of one tile (clustered below CLUSTER_MAX_ZOOM), cached."""
+        def compute():
+            features = cls._points(cls._tile_filter(zoom, x, y))
+            if zoom < cls.CLUSTER_MAX_ZOOM:
+                features = cls._cluster(features, zoom, x, y)
+            return features
+
+        return TaggedCache.get_or_set(
+            f'supply_chain_map:tile:{zoom}:{x}:{y}', (cls.CACHE_NAMESPACE,), compute, cls.CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def _inside(feature, bbox):
+        if bbox is None:
+            return True
+        west, south, east, north = bbox
+        lng, lat = feature['geometry']['coordinates']
+        return west <= lng <= east and south <= lat <= north
+
+    @classmethod
+    def feature_collection(cls, bbox=None, zoom=DEFAULT_ZOOM):
+        """
+        GeoJSON FeatureCollection of the locations (or clusters) inside
+        ``bbox``. Without a bbox the whole world is returned at the finest
+        zoom that fits MAX_TILES; the zoom used is in the response.
+        """
+        if bbox is None:
+            zoom = cls.fit_zoom(bbox, zoom)
+        features = [
+            feature
+            for x, y in cls.tiles(bbox, zoom)
+            for feature in cls.tile(zoom, x, y)
+            if cls._inside(feature, bbox)
+        ]
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'zoom': zoom,
+            'clustered': zoom < cls.CLUSTER_MAX_ZOOM,
+            'summary': cls.summary(),
+        }
+
+    # ── Summary ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def summary(cls):
+        """Total and geocoded counts per location type, cached (three queries cold)."""
+        def compute():
+            geocoded = Q(latitude__isnull=False, longitude__isnull=False)
+            summary = {}
+            for key, queryset in (
+                ('processing_units', ProcessingUnit.objects.filter(is_active=True)),
+                ('shops', Shop.objects.filter(is_active=True)),
+                ('abbatoirs', UserProfile.objects.filter(role='Abbatoir', user__is_active=True)),
+            ):
+                summary[key] = queryset.aggregate(total=Count('id'), geocoded=Count('id', filter=geocoded))
+            return summary
+
+        return TaggedCache.get_or_set(
+            'supply_chain_map:summary', (cls.CACHE_NAMESPACE,), compute, cls.CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def locations(cls):
+        """Every located point in the legacy ``map_locations`` shape, cached."""
+        def compute():
+            return [{
+                'id': feature['id'],
+                'name': feature['properties']['name'],
+                'type': feature['properties']['type'],
+                'lat': feature['geometry']['coordinates'][1],
+                'lng': feature['geometry']['coordinates'][0],
+                'location': feature['properties']['location'],
+                'contact_email': feature['properties']['contact_email'],
+                'contact_phone': feature['properties']['contact_phone'],
+            } for feature in cls._points(Q(latitude__isnull=False, longitude__isnull=False))]
+
+        return TaggedCache.get_or_set(
+            'supply_chain_map:locations', (cls.CACHE_NAMESPACE,), compute, cls.CACHE_TIMEOUT,
+        )
+
+    # ── Invalidation ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop every cached tile, the summary and the legacy location list."""
+        TaggedCache.invalidate(cls.CACHE_NAMESPACE)
+        logger.info("[MAP] Cleared supply chain map cache")
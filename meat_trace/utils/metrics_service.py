@@ -17,6 +17,9 @@ from ..models import (
     SystemHealth, PerformanceMetric, ComplianceAudit, Certification,
     Activity, Inventory, Order, TransferRequest
 )
+from ..db_router import use_read_replica
+from .tagged_cache import TaggedCache
+from .time_buckets import TimeBuckets
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +27,8 @@ logger = logging.getLogger(__name__)
 class MetricsService:
     """
     Service for collecting and aggregating metrics for the admin dashboard.
-    Uses Redis caching and read replicas for performance.
+    Uses Redis caching and read replicas for performance; public entry points
+    read through the replica router (see db_router).
     """
 
     # Cache keys and TTLs
@@ -32,14 +36,29 @@ class MetricsService:
     CACHE_TTL_MEDIUM = 900  # 15 minutes
     CACHE_TTL_LONG = 3600  # 1 hour
 
+    # Namespace shared by every metrics entry (see clear_cache)
+    CACHE_NAMESPACE = 'metrics'
+
+    # Models each cached entry is computed from; saving one of them drops the entry
+    OVERVIEW_TAGS = TaggedCache.model_tags(
+        'UserProfile', 'ProcessingUnit', 'Shop', 'Animal', 'Product', 'Inventory', 'Sale',
+    ) + (CACHE_NAMESPACE,)
+    DASHBOARD_METRICS_TAGS = TaggedCache.model_tags(
+        'UserProfile', 'Animal', 'Sale', 'DailyRollup',
+    ) + (CACHE_NAMESPACE,)
+    SUPPLY_CHAIN_TAGS = TaggedCache.model_tags(
+        'Animal', 'Product', 'ComplianceAudit', 'Certification',
+    ) + (CACHE_NAMESPACE,)
+
     @classmethod
+    @use_read_replica()
     def get_dashboard_overview(cls):
         """
         Get comprehensive dashboard overview with system health, user metrics, and supply chain data.
         Uses caching for expensive operations.
         """
         cache_key = 'admin_dashboard_overview'
-        cached_data = cache.get(cache_key)
+        cached_data = TaggedCache.get(cache_key, cls.OVERVIEW_TAGS)
 
         if cached_data:
             logger.info("[METRICS_SERVICE] Returning cached dashboard overview")
@@ -71,19 +90,20 @@ class MetricsService:
         }
 
         # Cache for 5 minutes
-        cache.set(cache_key, data, cls.CACHE_TTL_SHORT)
+        TaggedCache.set(cache_key, data, cls.OVERVIEW_TAGS, cls.CACHE_TTL_SHORT)
         logger.info("[METRICS_SERVICE] Cached dashboard overview for 5 minutes")
 
         return data
 
     @classmethod
+    @use_read_replica()
     def get_dashboard_metrics(cls, period='day', start_date=None, end_date=None):
         """
         Get detailed metrics for dashboard charts and graphs.
         Supports time-series aggregation.
         """
         cache_key = f'admin_dashboard_metrics_{period}_{start_date}_{end_date}'
-        cached_data = cache.get(cache_key)
+        cached_data = TaggedCache.get(cache_key, cls.DASHBOARD_METRICS_TAGS)
 
         if cached_data:
             logger.info(f"[METRICS_SERVICE] Returning cached dashboard metrics for {period}")
@@ -105,14 +125,20 @@ class MetricsService:
             else:
                 start_date = end_date - timedelta(days=30)
 
-        # User registrations
-        user_registrations = cls._get_user_registrations_time_series(start_date, end_date, period)
+        if period in ('day', 'week', 'month'):
+            # Whole-day buckets are served from the daily rollups
+            user_registrations = cls._get_rollup_time_series('new_users', start_date, end_date, period, 'count')
+            animal_transfers = cls._get_rollup_time_series('animals_transferred', start_date, end_date, period, 'count')
+            product_sales = cls._get_rollup_time_series('sales_value', start_date, end_date, period, 'value')
+        else:
+            # User registrations
+            user_registrations = cls._get_user_registrations_time_series(start_date, end_date, period)
 
-        # Animal transfers
-        animal_transfers = cls._get_animal_transfers_time_series(start_date, end_date, period)
+            # Animal transfers
+            animal_transfers = cls._get_animal_transfers_time_series(start_date, end_date, period)
 
-        # Product sales
-        product_sales = cls._get_product_sales_time_series(start_date, end_date, period)
+            # Product sales
+            product_sales = cls._get_product_sales_time_series(start_date, end_date, period)
 
         # System performance
         system_performance = cls._get_system_performance_metrics()
@@ -130,7 +156,7 @@ class MetricsService:
         }
 
         # Cache for 5 minutes
-        cache.set(cache_key, data, cls.CACHE_TTL_SHORT)
+        TaggedCache.set(cache_key, data, cls.DASHBOARD_METRICS_TAGS, cls.CACHE_TTL_SHORT)
         logger.info(f"[METRICS_SERVICE] Cached dashboard metrics for {period}")
 
         return data
@@ -192,7 +218,7 @@ class MetricsService:
         """Get user-related metrics"""
         try:
             # Use read replica if available
-            queryset = UserProfile.objects.using('read_replica') if cls._has_read_replica() else UserProfile.objects
+            queryset = UserProfile.objects
 
             total_users = queryset.count()
             active_users_today = cls._get_active_users_today()
@@ -227,10 +253,10 @@ class MetricsService:
         """Get supply chain metrics"""
         try:
             # Use read replica if available
-            animal_queryset = Animal.objects.using('read_replica') if cls._has_read_replica() else Animal.objects
-            product_queryset = Product.objects.using('read_replica') if cls._has_read_replica() else Product.objects
-            pu_queryset = ProcessingUnit.objects.using('read_replica') if cls._has_read_replica() else ProcessingUnit.objects
-            shop_queryset = Shop.objects.using('read_replica') if cls._has_read_replica() else Shop.objects
+            animal_queryset = Animal.objects
+            product_queryset = Product.objects
+            pu_queryset = ProcessingUnit.objects
+            shop_queryset = Shop.objects
 
             total_animals = animal_queryset.count()
             animals_in_transit = animal_queryset.filter(
@@ -261,8 +287,8 @@ class MetricsService:
         """Get product-related metrics"""
         try:
             # Use read replica if available
-            product_queryset = Product.objects.using('read_replica') if cls._has_read_replica() else Product.objects
-            inventory_queryset = Inventory.objects.using('read_replica') if cls._has_read_replica() else Inventory.objects
+            product_queryset = Product.objects
+            inventory_queryset = Inventory.objects
 
             total_products = product_queryset.count()
             products_in_inventory = inventory_queryset.filter(weight__gt=0).count()
@@ -284,38 +310,45 @@ class MetricsService:
                 'low_stock_alerts': 0
             }
 
+    @classmethod
+    def _time_series(cls, queryset, field, start_date, end_date, period, aggregate=None):
+        """Zero-filled (bucket datetime, value) pairs from a single GROUP BY query"""
+        if period not in TimeBuckets.PERIODS:
+            period = 'month'
+        series = TimeBuckets.series(queryset, field, start_date, end_date, period, aggregate)
+        return [(TimeBuckets.to_datetime(key), value) for key, value in series.items()]
+
+    @classmethod
+    def _get_rollup_time_series(cls, metric, start_date, end_date, period, key):
+        """Get a day/week/month time series of a DailyRollup metric"""
+        from .rollup_service import RollupService
+
+        try:
+            series = RollupService.series(metric, start_date, end_date, period)
+            return [
+                {
+                    'timestamp': TimeBuckets.to_datetime(bucket).isoformat(),
+                    key: float(value) if key == 'value' else value
+                }
+                for bucket, value in series.items()
+            ]
+        except Exception as e:
+            logger.error(f"[METRICS_SERVICE] Error getting {metric} rollup time series: {e}")
+            return []
+
     @classmethod
     def _get_user_registrations_time_series(cls, start_date, end_date, period):
         """Get user registrations time series data"""
         try:
             # Use read replica if available
-            queryset = UserProfile.objects.using('read_replica') if cls._has_read_replica() else UserProfile.objects
-
-            # Group by time period
-            if period == 'hour':
-                trunc_field = models.functions.TruncHour('created_at')
-            elif period == 'day':
-                trunc_field = models.functions.TruncDay('created_at')
-            elif period == 'week':
-                trunc_field = models.functions.TruncWeek('created_at')
-            else:  # month
-                trunc_field = models.functions.TruncMonth('created_at')
-
-            registrations = queryset.filter(
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).annotate(
-                period=trunc_field
-            ).values('period').annotate(
-                count=models.Count('id')
-            ).order_by('period')
+            queryset = UserProfile.objects
 
             return [
                 {
-                    'timestamp': item['period'].isoformat(),
-                    'count': item['count']
+                    'timestamp': bucket.isoformat(),
+                    'count': count
                 }
-                for item in registrations
+                for bucket, count in cls._time_series(queryset.all(), 'created_at', start_date, end_date, period)
             ]
         except Exception as e:
             logger.error(f"[METRICS_SERVICE] Error getting user registrations time series: {e}")
@@ -326,34 +359,17 @@ class MetricsService:
         """Get animal transfers time series data"""
         try:
             # Use read replica if available
-            queryset = Animal.objects.using('read_replica') if cls._has_read_replica() else Animal.objects
-
-            # Group by time period
-            if period == 'hour':
-                trunc_field = models.functions.TruncHour('transferred_at')
-            elif period == 'day':
-                trunc_field = models.functions.TruncDay('transferred_at')
-            elif period == 'week':
-                trunc_field = models.functions.TruncWeek('transferred_at')
-            else:  # month
-                trunc_field = models.functions.TruncMonth('transferred_at')
-
-            transfers = queryset.filter(
-                transferred_at__gte=start_date,
-                transferred_at__lte=end_date,
-                transferred_to__isnull=False
-            ).annotate(
-                period=trunc_field
-            ).values('period').annotate(
-                count=models.Count('id')
-            ).order_by('period')
+            queryset = Animal.objects
 
+            transfers = cls._time_series(
+                queryset.filter(transferred_to__isnull=False), 'transferred_at', start_date, end_date, period,
+            )
             return [
                 {
-                    'timestamp': item['period'].isoformat(),
-                    'count': item['count']
+                    'timestamp': bucket.isoformat(),
+                    'count': count
                 }
-                for item in transfers
+                for bucket, count in transfers
             ]
         except Exception as e:
             logger.error(f"[METRICS_SERVICE] Error getting animal transfers time series: {e}")
@@ -364,33 +380,17 @@ class MetricsService:
         """Get product sales time series data"""
         try:
             # Use read replica if available
-            queryset = Sale.objects.using('read_replica') if cls._has_read_replica() else Sale.objects
-
-            # Group by time period
-            if period == 'hour':
-                trunc_field = models.functions.TruncHour('created_at')
-            elif period == 'day':
-                trunc_field = models.functions.TruncDay('created_at')
-            elif period == 'week':
-                trunc_field = models.functions.TruncWeek('created_at')
-            else:  # month
-                trunc_field = models.functions.TruncMonth('created_at')
-
-            sales = queryset.filter(
-                created_at__gte=start_date,
-                created_at__lte=end_date
-            ).annotate(
-                period=trunc_field
-            ).values('period').annotate(
-                value=models.Sum('total_amount')
-            ).order_by('period')
+            queryset = Sale.objects
 
+            sales = cls._time_series(
+                queryset.all(), 'created_at', start_date, end_date, period, models.Sum('total_amount'),
+            )
             return [
                 {
-                    'timestamp': item['period'].isoformat(),
-                    'value': float(item['value'] or 0)
+                    'timestamp': bucket.isoformat(),
+                    'value': float(value or 0)
                 }
-                for item in sales
+                for bucket, value in sales
             ]
         except Exception as e:
             logger.error(f"[METRICS_SERVICE] Error getting product sales time series: {e}")
@@ -510,7 +510,7 @@ class MetricsService:
         """Get count of users active today"""
         try:
             # Use read replica if available
-            queryset = UserProfile.objects.using('read_replica') if cls._has_read_replica() else UserProfile.objects
+            queryset = UserProfile.objects
 
             today = timezone.now().date()
             return queryset.filter(
@@ -524,7 +524,7 @@ class MetricsService:
         """Get count of new users this week"""
         try:
             # Use read replica if available
-            queryset = UserProfile.objects.using('read_replica') if cls._has_read_replica() else UserProfile.objects
+            queryset = UserProfile.objects
 
             week_start = timezone.now() - timedelta(days=7)
             return queryset.filter(
@@ -538,7 +538,7 @@ class MetricsService:
         """Get count of products sold today"""
         try:
             # Use read replica if available
-            queryset = Sale.objects.using('read_replica') if cls._has_read_replica() else Sale.objects
+            queryset = Sale.objects
 
             today = timezone.now().date()
             return queryset.filter(
@@ -556,31 +556,20 @@ class MetricsService:
         except Exception:
             return 0
 
-    @classmethod
-    def _has_read_replica(cls):
-        """Check if read replica database is configured"""
-        return 'read_replica' in getattr(settings, 'DATABASES', {})
-
     @classmethod
     def clear_cache(cls):
         """Clear all metrics-related cache"""
-        cache_keys = [
-            'admin_dashboard_overview',
-        ]
-
-        # Clear pattern-based keys
-        for key in cache_keys:
-            cache.delete(key)
-
-        # Clear time-series metrics (this is a simplified approach)
-        # In production, you might want to use Redis SCAN or maintain a key registry
+        # Every metrics entry (overview, time series for any period and range,
+        # supply chain statistics) is tagged with the namespace
+        TaggedCache.invalidate(cls.CACHE_NAMESPACE)
         logger.info("[METRICS_SERVICE] Cleared metrics cache")
 
     @classmethod
+    @use_read_replica()
     def get_supply_chain_statistics(cls):
         """Get detailed supply chain statistics for compliance and throughput"""
         cache_key = 'supply_chain_statistics'
-        cached_data = cache.get(cache_key)
+        cached_data = TaggedCache.get(cache_key, cls.SUPPLY_CHAIN_TAGS)
 
         if cached_data:
             return cached_data
@@ -603,7 +592,7 @@ class MetricsService:
             }
 
             # Cache for 15 minutes
-            cache.set(cache_key, data, cls.CACHE_TTL_MEDIUM)
+            TaggedCache.set(cache_key, data, cls.SUPPLY_CHAIN_TAGS, cls.CACHE_TTL_MEDIUM)
             return data
 
         except Exception as e:
@@ -658,8 +647,8 @@ class MetricsService:
             thirty_days_ago = timezone.now() - timedelta(days=30)
 
             # Use read replica if available
-            animal_queryset = Animal.objects.using('read_replica') if cls._has_read_replica() else Animal.objects
-            product_queryset = Product.objects.using('read_replica') if cls._has_read_replica() else Product.objects
+            animal_queryset = Animal.objects
+            product_queryset = Product.objects
 
             animals_processed = animal_queryset.filter(
                 slaughtered_at__gte=thirty_days_ago
@@ -692,7 +681,7 @@ class MetricsService:
         """Get animal processing statistics by time period"""
         try:
             # Use read replica if available
-            queryset = Animal.objects.using('read_replica') if cls._has_read_replica() else Animal.objects
+            queryset = Animal.objects
 
             now = timezone.now()
             today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -139,6 +139,28 @@ class NotificationService:
 
         return notifications
 
+    @staticmethod
+    def deliver_notifications(notifications):
+        """
+        Deliver notifications that were inserted with bulk_create (which skips
+        create_notification's channel and WebSocket delivery).
+
+        Args:
+            notifications: Iterable of Notification instances
+
+        Returns:
+            Number of notifications delivered
+        """
+        delivered = 0
+        for notification in notifications:
+            try:
+                notification.send_via_channels()
+                NotificationService._send_realtime_notification(notification)
+                delivered += 1
+            except Exception as e:
+                logger.error(f"Failed to deliver notification {notification.id}: {str(e)}")
+        return delivered
+
     @staticmethod
     def send_via_channel(notification, channel):
         """
@@ -833,31 +855,57 @@ class NotificationService:
         )
 
     @staticmethod
-    def notify_animal_rejected(abbatoir, animal, category, specific_reason):
-        """Send notification for animal rejection"""
-        return NotificationService.create_notification(
-            abbatoir,
-            'animal_rejected',
-            f'Animal {animal.animal_id} rejected',
-            f'Your animal {animal.animal_id} was rejected during processing: {category} - {specific_reason}',
+    def animal_rejected_notification(abbatoir, animal, category, specific_reason):
+        """Unsaved animal rejection notification (for bulk_create + deliver_notifications)"""
+        return Notification(
+            user=abbatoir,
+            notification_type='animal_rejected',
+            title=f'Animal {animal.animal_id} rejected',
+            message=f'Your animal {animal.animal_id} was rejected during processing: {category} - {specific_reason}',
             priority='high',
             action_type='appeal',
             data={'animal_id': animal.animal_id, 'category': category, 'specific_reason': specific_reason}
         )
 
     @staticmethod
-    def notify_part_rejected(abbatoir, part, category, specific_reason):
-        """Send notification for slaughter part rejection"""
-        return NotificationService.create_notification(
-            abbatoir,
-            'part_rejected',
-            f'Animal part rejected',
-            f'A part ({part.part_type}) of your animal {part.animal.animal_id} was rejected: {category} - {specific_reason}',
+    def part_rejected_notification(abbatoir, part, category, specific_reason):
+        """Unsaved slaughter part rejection notification (for bulk_create + deliver_notifications)"""
+        return Notification(
+            user=abbatoir,
+            notification_type='part_rejected',
+            title=f'Animal part rejected',
+            message=f'A part ({part.part_type}) of your animal {part.animal.animal_id} was rejected: {category} - {specific_reason}',
             priority='high',
             action_type='appeal',
             data={'animal_id': part.animal.animal_id, 'part_id': part.id, 'part_type': part.part_type, 'category': category, 'specific_reason': specific_reason}
         )
 
+    @staticmethod
+    def _create_from(notification):
+        return NotificationService.create_notification(
+            notification.user,
+            notification.notification_type,
+            notification.title,
+            notification.message,
+            priority=notification.priority,
+            action_type=notification.action_type,
+            data=notification.data
+        )
+
+    @staticmethod
+    def notify_animal_rejected(abbatoir, animal, category, specific_reason):
+        """Send notification for animal rejection"""
+        return NotificationService._create_from(
+            NotificationService.animal_rejected_notification(abbatoir, animal, category, specific_reason)
+        )
+
+    @staticmethod
+    def notify_part_rejected(abbatoir, part, category, specific_reason):
+        """Send notification for slaughter part rejection"""
+        return NotificationService._create_from(
+            NotificationService.part_rejected_notification(abbatoir, part, category, specific_reason)
+        )
+
     @staticmethod
     def notify_product_rejected(processor_user, product, shop, quantity_rejected, rejection_reason):
         """Send notification to processor when shop rejects a product"""
@@ -0,0 +1,165 @@
+"""
+Page Cache Service for MeatTrace
+
+Caches the rendered HTML of the public trace and receipt pages and answers
+conditional GETs (If-None-Match / If-Modified-Since) for them.
+
+Every cached page records the change token of each object it was rendered
+from (a product's timeline snapshot, a sale). Tokens are stored in the cache
+next to the pages and replaced whenever the underlying lineage changes, so a
+cached page is validated with a single cache round-trip and a repeat scan is
+answered without touching the database.
+
+Usage:
+    from meat_trace.utils.page_cache import PageCache
+
+    page_key = PageCache.trace_page_key(batch_number)
+    entry = PageCache.get(page_key)
+    if entry:
+        return PageCache.respond(request, entry)
+    ...
+    response = render(request, 'meat_trace/trace.html', context)
+    return PageCache.store(request, page_key, response, tokens)
+"""
+
+import hashlib
+import logging
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    Rendered-page cache keyed by batch number / receipt UUID and validated
+    against per-object change tokens.
+    """
+
+    CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours; entries are validated on every hit
+    KEY_PREFIX = 'page_cache'
+
+    # ── Keys ─────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _digest(cls, value):
+        return hashlib.md5(str(value).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def trace_page_key(cls, batch_number):
+        return f'{cls.KEY_PREFIX}:trace:{cls._digest(batch_number)}'
+
+    @classmethod
+    def product_info_page_key(cls, product_id):
+        return f'{cls.KEY_PREFIX}:product_info:{product_id}'
+
+    @classmethod
+    def receipt_page_key(cls, receipt_uuid):
+        return f'{cls.KEY_PREFIX}:receipt:{receipt_uuid}'
+
+    @classmethod
+    def product_token_key(cls, product_id):
+        return f'{cls.KEY_PREFIX}:token:product:{product_id}'
+
+    @classmethod
+    def sale_token_key(cls, sale_id):
+        return f'{cls.KEY_PREFIX}:token:sale:{sale_id}'
+
+    # ── Tokens ───────────────────────────────────────────────────────────────
+
+    @classmethod
+    def product_token(cls, product):
+        """Change token for a product, read from its timeline snapshot."""
+        return cls.change_token(product.timeline_snapshot.changed_at)
+
+    @classmethod
+    def change_token(cls, changed_at):
+        """Change token for a snapshot change time."""
+        return changed_at.timestamp()
+
+    @classmethod
+    def touch_products(cls, product_ids, changed_at):
+        """Record a lineage change for the given products."""
+        token = cls.change_token(changed_at)
+        cache.set_many({cls.product_token_key(pid): token for pid in product_ids}, cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def touch_sale(cls, sale_id):
+        """Record a change to a sale or its line items."""
+        cache.set(cls.sale_token_key(sale_id), timezone.now().timestamp(), cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def sale_token(cls, sale_id):
+        """Current change token for a sale, seeding one if none is cached yet."""
+        key = cls.sale_token_key(sale_id)
+        cache.add(key, timezone.now().timestamp(), cls.CACHE_TIMEOUT)
+        return cache.get(key)
+
+    # ── Pages ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def get(cls, page_key):
+        """Return the cached entry for ``page_key`` if all its tokens are current."""
+        try:
+            entry = cache.get(page_key)
+            if not entry:
+                return None
+            if cache.get_many(list(entry['tokens'])) != entry['tokens']:
+                return None
+            return entry
+        except Exception as e:
+            logger.warning(f"[PAGE_CACHE] Lookup failed for {page_key}: {e}")
+            return None
+
+    @classmethod
+    def respond(cls, request, entry):
+        """Serve a cached entry, or a 304 when the client already has it."""
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        return cls._finalize(request, response, entry['etag'], entry['last_modified'])
+
+    @classmethod
+    def store(cls, request, page_key, response, tokens):
+        """
+        Cache a freshly rendered 200 response and return it (or a 304).
+
+        ``tokens`` maps token keys to the values read together with the data
+        the page was rendered from. Tokens not yet in the cache are seeded
+        with ``add`` so a concurrent invalidation is never overwritten.
+        """
+        etag = cls._etag(page_key, tokens)
+        last_modified = int(max(tokens.values())) if tokens else None
+
+        if response.status_code == 200:
+            try:
+                for key, value in tokens.items():
+                    cache.add(key, value, cls.CACHE_TIMEOUT)
+                cache.set(page_key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'tokens': tokens,
+                }, cls.CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"[PAGE_CACHE] Failed to store {page_key}: {e}")
+
+        return cls._finalize(request, response, etag, last_modified)
+
+    @classmethod
+    def _etag(cls, page_key, tokens):
+        fingerprint = page_key + '|' + '|'.join(f'{k}={tokens[k]}' for k in sorted(tokens))
+        return f'"{cls._digest(fingerprint)}"'
+
+    @classmethod
+    def _finalize(cls, request, response, etag, last_modified):
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        # Let browsers keep the page but revalidate on every scan.
+        patch_cache_control(response, no_cache=True)
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified, response=response,
+        )
@@ -0,0 +1,213 @@
+"""
+Processing Pipeline Service for MeatTrace
+
+Stage counts (Receive -> Inspect -> Process -> Stock) for processing units,
+computed set-based with EXISTS subqueries, cached per unit and pushed to
+connected clients through the ``processing_unit_<id>`` channel group when
+they change.
+
+Usage:
+    from meat_trace.utils.pipeline_service import ProcessingPipelineService
+
+    pipeline = ProcessingPipelineService.get_pipeline(unit_ids)
+    ProcessingPipelineService.schedule([unit_id])   # after commit, coalesced
+"""
+
+import logging
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from ..models import Animal, CarcassMeasurement, Product
+
+try:
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    CHANNELS_AVAILABLE = False
+    get_channel_layer = None
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingPipelineService:
+    """
+    Set-based pipeline stage counts with per-unit caching and live push.
+    """
+
+    KEY_PREFIX = 'processing_pipeline'
+
+    # Seconds a unit's counts are kept; events refresh them much sooner
+    CACHE_TIMEOUT = 3600
+
+    # A unit stays marked as pending for at most this long (seconds)
+    PENDING_TIMEOUT = 300
+
+    STAGES = ('receive', 'inspect', 'process', 'stock')
+
+    @classmethod
+    def counts_key(cls, unit_id):
+        return f'{cls.KEY_PREFIX}:counts:{unit_id}'
+
+    @classmethod
+    def pending_key(cls, unit_id):
+        return f'{cls.KEY_PREFIX}:pending:{unit_id}'
+
+    @classmethod
+    def group_name(cls, unit_id):
+        return f'processing_unit_{unit_id}'
+
+    # ── Computation ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def compute_counts(cls, unit_id):
+        """Stage counts of one processing unit: one aggregate over animals, one over products."""
+        has_measurement = Exists(CarcassMeasurement.objects.filter(animal_id=OuterRef('pk')))
+        has_product = Exists(Product.objects.filter(animal_id=OuterRef('pk'), processing_unit_id=unit_id))
+
+        animals = Animal.objects.filter(
+            transferred_to_id=unit_id,
+            rejection_status__isnull=True,  # Exclude rejected animals
+        ).annotate(
+            has_measurement=has_measurement,
+            has_product=has_product,
+        ).aggregate(
+            # Transferred but not received yet
+            receive=Count('id', filter=Q(received_by__isnull=True)),
+            # Received but no carcass measurement taken yet
+            inspect=Count('id', filter=Q(received_by__isnull=False, has_measurement=False)),
+            # Measured but no products created yet
+            process=Count('id', filter=Q(received_by__isnull=False, has_measurement=True, has_product=False)),
+        )
+
+        # Products created and not transferred out to shops
+        stock = Product.objects.filter(processing_unit_id=unit_id, transferred_to__isnull=True).count()
+        return {**animals, 'stock': stock}
+
+    @staticmethod
+    def build_pipeline(counts):
+        """The pipeline payload served to clients for summed stage counts."""
+        receive_count = counts['receive']
+        inspect_count = counts['inspect']
+        process_count = counts['process']
+        stock_count = counts['stock']
+
+        stages = [
+            {
+                'name': 'Receive',
+                'is_active': receive_count > 0,
+                'is_completed': receive_count == 0,
+                'count': receive_count
+            },
+            {
+                'name': 'Inspect',
+                'is_active': inspect_count > 0,
+                'is_completed': inspect_count == 0 and receive_count == 0,
+                'count': inspect_count
+            },
+            {
+                'name': 'Process',
+                'is_active': process_count > 0,
+                'is_completed': process_count == 0 and inspect_count == 0,
+                'count': process_count
+            },
+            {
+                'name': 'Stock',
+                'is_active': stock_count > 0,
+                'is_completed': True,  # Stock is always "completed" if there are products
+                'count': stock_count
+            }
+        ]
+        return {
+            'stages': stages,
+            'total_pending': receive_count + inspect_count + process_count,
+        }
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def get_counts(cls, unit_ids):
+        """Cached stage counts per unit; missing units are computed and stored."""
+        unit_ids = sorted(set(unit_ids))
+        cached = cache.get_many([cls.counts_key(unit_id) for unit_id in unit_ids])
+        counts = {}
+        for unit_id in unit_ids:
+            entry = cached.get(cls.counts_key(unit_id))
+            if entry is None:
+                entry = cls.compute_counts(unit_id)
+                cache.set(cls.counts_key(unit_id), entry, cls.CACHE_TIMEOUT)
+            counts[unit_id] = entry
+        return counts
+
+    @classmethod
+    def get_pipeline(cls, unit_ids):
+        """Pipeline over all the given units (stage counts are summed)."""
+        per_unit = cls.get_counts(unit_ids)
+        totals = {stage: sum(c[stage] for c in per_unit.values()) for stage in cls.STAGES}
+        return cls.build_pipeline(totals)
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def schedule(cls, unit_ids):
+        """
+        Queue a refresh of the given units once the current transaction
+        commits. Units that already have a refresh pending are skipped, so
+        bursts of events produce one recount and one push.
+        """
+        unit_ids = {unit_id for unit_id in unit_ids if unit_id}
+        if unit_ids:
+            transaction.on_commit(lambda: cls._dispatch(unit_ids))
+
+    @classmethod
+    def _dispatch(cls, unit_ids):
+        new_ids = sorted(
+            unit_id for unit_id in unit_ids
+            if cache.add(cls.pending_key(unit_id), True, cls.PENDING_TIMEOUT)
+        )
+        if new_ids:
+            from ..tasks import enqueue, refresh_processing_pipelines
+            enqueue(refresh_processing_pipelines, new_ids)
+
+    @classmethod
+    def refresh(cls, unit_ids):
+        """
+        Recount the given units, store the counts and push the new pipeline
+        to each unit's channel group when its counts changed. Returns the
+        ids of units whose counts changed.
+        """
+        unit_ids = sorted(set(unit_ids))
+        cache.delete_many([cls.pending_key(unit_id) for unit_id in unit_ids])
+
+        previous = cache.get_many([cls.counts_key(unit_id) for unit_id in unit_ids])
+        changed = []
+        for unit_id in unit_ids:
+            counts = cls.compute_counts(unit_id)
+            cache.set(cls.counts_key(unit_id), counts, cls.CACHE_TIMEOUT)
+            if previous.get(cls.counts_key(unit_id)) != counts:
+                changed.append(unit_id)
+                cls.push(unit_id, counts)
+        return changed
+
+    @classmethod
+    def push(cls, unit_id, counts):
+        """Send the unit's pipeline to its connected clients."""
+        if not CHANNELS_AVAILABLE:
+            return
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer:
+                async_to_sync(channel_layer.group_send)(
+                    cls.group_name(unit_id),
+                    {
+                        'type': 'processing_update',
+                        'update': {
+                            'event': 'pipeline',
+                            'processing_unit_id': unit_id,
+                            'pipeline': cls.build_pipeline(counts),
+                        },
+                    }
+                )
+        except Exception as e:
+            logger.warning(f"[PROCESSING_PIPELINE] Could not push pipeline for unit {unit_id}: {e}")
@@ -0,0 +1,163 @@
+"""
+ProductInfo Service for MeatTrace
+
+Keeps the denormalized ProductInfo rows in step with their products outside
+the request cycle. Changes to products, inventory, receipts and order items
+schedule a refresh; the refresh runs in a Celery task and rewrites the
+affected rows in bulk, so list pages only ever read ProductInfo.
+
+Usage:
+    from meat_trace.utils.product_info_service import ProductInfoService
+
+    ProductInfoService.schedule([product.id])   # after commit, coalesced
+    ProductInfoService.refresh([product.id])    # synchronous, idempotent
+"""
+
+import logging
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Inventory, OrderItem, Product, ProductInfo, Receipt
+
+logger = logging.getLogger(__name__)
+
+
+class ProductInfoService:
+    """
+    Coalesced, bulk maintenance of ProductInfo rows.
+    """
+
+    # Products refreshed per query batch
+    CHUNK_SIZE = 500
+
+    # A product stays marked as pending for at most this long (seconds), so
+    # a lost task only delays the next refresh instead of blocking it.
+    PENDING_TIMEOUT = 600
+
+    # Fields written by a refresh; rows are only updated when one changed
+    FIELDS = (
+        'product_name', 'product_type', 'batch_number', 'weight', 'weight_unit', 'quantity', 'price',
+        'description', 'manufacturer', 'qr_code_url', 'processing_unit_name', 'processing_unit_location',
+        'category_name', 'animal_id', 'animal_name', 'animal_species', 'abbatoir_username',
+        'animal_live_weight', 'animal_slaughtered', 'animal_slaughtered_at', 'animal_transferred_at',
+        'animal_transferred_to_name', 'timeline_events', 'inventory_count', 'receipts_count',
+        'orders_count', 'carcass_measurement_data',
+    )
+
+    @classmethod
+    def pending_key(cls, product_id):
+        return f'product_info:pending:{product_id}'
+
+    @classmethod
+    def schedule(cls, product_ids):
+        """
+        Queue a refresh of the given products once the current transaction
+        commits. Products that already have a refresh pending are skipped,
+        so bursts of changes to one product produce a single rewrite.
+        """
+        product_ids = {pid for pid in product_ids if pid}
+        if product_ids:
+            transaction.on_commit(lambda: cls._dispatch(product_ids))
+
+    @classmethod
+    def _dispatch(cls, product_ids):
+        keys = {cls.pending_key(pid): pid for pid in product_ids}
+        pending = cache.get_many(list(keys))
+        new_ids = sorted(pid for key, pid in keys.items() if key not in pending)
+        if not new_ids:
+            return
+        cache.set_many({cls.pending_key(pid): True for pid in new_ids}, cls.PENDING_TIMEOUT)
+
+        from ..tasks import enqueue, refresh_product_infos
+        enqueue(refresh_product_infos, new_ids)
+
+    @staticmethod
+    def _count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(product=OuterRef('pk')).order_by().values('product')
+                .annotate(total=Count('id')).values('total'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    @classmethod
+    def _products(cls, product_ids):
+        return Product.objects.filter(id__in=product_ids).select_related(
+            'processing_unit', 'category', 'transferred_to', 'received_by_shop',
+            'animal', 'animal__abbatoir', 'animal__transferred_to', 'animal__carcass_measurement',
+        ).annotate(
+            info_inventory_count=cls._count(Inventory),
+            info_receipts_count=cls._count(Receipt),
+            info_orders_count=cls._count(OrderItem),
+        )
+
+    @classmethod
+    def refresh(cls, product_ids):
+        """
+        Rebuild ProductInfo for the given products in bulk.
+
+        Idempotent: rows are recomputed from the current database state and
+        only rows whose values changed are written. Returns
+        (created, updated).
+        """
+        product_ids = sorted(set(product_ids))
+        # Clear the pending marks first: changes committed from here on
+        # schedule a new refresh instead of being folded into this one.
+        cache.delete_many([cls.pending_key(pid) for pid in product_ids])
+
+        created = updated = 0
+        for start in range(0, len(product_ids), cls.CHUNK_SIZE):
+            chunk = product_ids[start:start + cls.CHUNK_SIZE]
+            existing = {info.product_id: info for info in ProductInfo.objects.filter(product_id__in=chunk)}
+            now = timezone.now()
+            to_create, to_update = [], []
+
+            for product in cls._products(chunk):
+                info = existing.get(product.id)
+                if info is None:
+                    info = ProductInfo(product=product)
+                    before = None
+                else:
+                    before = [getattr(info, field) for field in cls.FIELDS]
+
+                try:
+                    info.populate_from_product(product)
+                except Exception as e:
+                    logger.error(f"[PRODUCT_INFO] Could not build info for product {product.id}: {str(e)}")
+                    continue
+                info.product_name = info.product_name or 'Unnamed Product'
+                info.batch_number = info.batch_number or ''
+                info.quantity = info.quantity or 0
+                info.inventory_count = product.info_inventory_count
+                info.receipts_count = product.info_receipts_count
+                info.orders_count = product.info_orders_count
+
+                if before is None:
+                    to_create.append(info)
+                elif before != [getattr(info, field) for field in cls.FIELDS]:
+                    info.updated_at = now
+                    to_update.append(info)
+
+            with transaction.atomic():
+                ProductInfo.objects.bulk_create(to_create, ignore_conflicts=True)
+                ProductInfo.objects.bulk_update(to_update, cls.FIELDS + ('updated_at',))
+            created += len(to_create)
+            updated += len(to_update)
+
+        logger.info(f"[PRODUCT_INFO] Refreshed {len(product_ids)} product(s): {created} created, {updated} updated")
+        return created, updated
+
+    @classmethod
+    def schedule_missing(cls, product_queryset, limit=50):
+        """Schedule products from ``product_queryset`` that have no ProductInfo yet."""
+        missing = list(
+            product_queryset.filter(info__isnull=True).order_by('-created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        cls.schedule(missing)
+        return missing
@@ -0,0 +1,143 @@
+"""
+Production Stats Service for MeatTrace
+
+Computes the processor dashboard card (received / pending / products /
+in stock plus the detail block) with one conditional-aggregate query per
+table, and caches the result per user for a short time. Cards are tagged
+with their processing units (TaggedCache tenant tags) and transfers,
+receptions, rejections and product changes invalidate those tags, so a
+cached card is dropped as soon as anything it counts changes. A dashboard
+refresh costs one cache round trip.
+
+Usage:
+    from meat_trace.utils.production_stats import ProductionStatsService
+
+    stats = ProductionStatsService.get(user, unit_ids)
+    ProductionStatsService.invalidate([unit_id])
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import Animal, Product, SlaughterPart
+from .tagged_cache import TaggedCache
+
+logger = logging.getLogger(__name__)
+
+
+class ProductionStatsService:
+    """
+    Conditional-aggregate production stats with a per-unit tagged cache.
+    """
+
+    KEY_PREFIX = 'production_stats'
+
+    # Seconds a computed card is served from cache
+    CACHE_TIMEOUT = 60
+
+    @classmethod
+    def stats_key(cls, user_id, unit_ids):
+        return f"{cls.KEY_PREFIX}:user:{user_id}:{','.join(map(str, unit_ids))}"
+
+    @staticmethod
+    def unit_tags(unit_ids):
+        return tuple(TaggedCache.tenant_tag('processing_unit', unit_id) for unit_id in unit_ids)
+
+    @classmethod
+    def invalidate(cls, unit_ids):
+        """Drop cached cards of every user of the given processing units."""
+        unit_ids = {unit_id for unit_id in unit_ids if unit_id}
+        if unit_ids:
+            TaggedCache.invalidate(*cls.unit_tags(unit_ids))
+
+    @classmethod
+    def get(cls, user, unit_ids):
+        """Cached production stats of ``user`` over ``unit_ids``."""
+        unit_ids = sorted(set(unit_ids))
+        return TaggedCache.get_or_set(
+            cls.stats_key(user.id, unit_ids),
+            cls.unit_tags(unit_ids),
+            lambda: cls.compute(user, unit_ids),
+            cls.CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def _received_counts(cls, model, user, unit_ids, today_start, week_start, thirty_days_ago):
+        """Received / pending counts for the units plus the user's recent receptions, in one query."""
+        in_units = Q(transferred_to_id__in=unit_ids)
+        by_user = Q(received_by=user)
+        return model.objects.filter(in_units | by_user).aggregate(
+            received=Count('id', filter=in_units & Q(received_by__isnull=False)),
+            pending=Count('id', filter=in_units & Q(received_by__isnull=True, rejection_status__isnull=True)),
+            today=Count('id', filter=by_user & Q(received_at__gte=today_start)),
+            week=Count('id', filter=by_user & Q(received_at__gte=week_start)),
+            last_30_days=Count('id', filter=by_user & Q(received_at__gte=thirty_days_ago)),
+        )
+
+    @classmethod
+    def compute(cls, user, unit_ids):
+        """Production stats over ``unit_ids`` with three aggregate queries."""
+        today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today_start - timedelta(days=today_start.weekday())
+        thirty_days_ago = today_start - timedelta(days=30)
+
+        animals = cls._received_counts(Animal, user, unit_ids, today_start, week_start, thirty_days_ago)
+        parts = cls._received_counts(SlaughterPart, user, unit_ids, today_start, week_start, thirty_days_ago)
+
+        transferred = Q(transferred_to__isnull=False)
+        products = Product.objects.filter(processing_unit_id__in=unit_ids).aggregate(
+            total=Count('id'),
+            in_stock=Count('id', filter=Q(transferred_to__isnull=True)),
+            transferred=Count('id', filter=transferred),
+            created_today=Count('id', filter=Q(created_at__gte=today_start)),
+            # Approximation - we'd need a transfer_date field
+            transferred_today=Count('id', filter=transferred & Q(created_at__gte=today_start)),
+            created_this_week=Count('id', filter=Q(created_at__gte=week_start)),
+        )
+
+        total_animals_received = animals['received'] + parts['received']
+        pending_animals_to_process = animals['pending'] + parts['pending']
+        animals_last_30_days = animals['last_30_days'] + parts['last_30_days']
+        processing_throughput_per_day = round(animals_last_30_days / 30.0, 2) if animals_last_30_days > 0 else 0.0
+
+        # Calculate transfer success rate (assuming all transfers are successful for now)
+        if products['total'] > 0:
+            transfer_success_rate = round((products['transferred'] / products['total']) * 100, 2)
+        else:
+            transfer_success_rate = 0.0
+
+        # Determine operational status
+        if pending_animals_to_process > 10:
+            operational_status = 'high_load'
+        elif pending_animals_to_process > 5:
+            operational_status = 'active'
+        elif total_animals_received > 0:
+            operational_status = 'operational'
+        else:
+            operational_status = 'idle'
+
+        return {
+            # Main stats for Production Overview cards
+            'received': total_animals_received,           # Total received animals/parts since creation
+            'pending': pending_animals_to_process,        # Total animals/parts not yet received or rejected
+            'products': products['total'],                # Total products created since creation
+            'in_stock': products['in_stock'],             # Products not yet fully transferred to shop
+
+            # Additional detailed stats (for future use)
+            'details': {
+                'products_created_today': products['created_today'],
+                'products_created_this_week': products['created_this_week'],
+                'animals_received_today': animals['today'] + parts['today'],
+                'animals_received_this_week': animals['week'] + parts['week'],
+                'processing_throughput_per_day': processing_throughput_per_day,
+                'equipment_uptime_percentage': 95.0,  # Placeholder
+                'operational_status': operational_status,
+                'total_products_transferred': products['transferred'],
+                'products_transferred_today': products['transferred_today'],
+                'transfer_success_rate': transfer_success_rate,
+                'last_updated': timezone.now().isoformat(),
+            }
+        }
@@ -0,0 +1,48 @@
+"""
+Query count helpers for MeatTrace
+
+Correlated COUNT and SUM subqueries for list annotations. Unlike
+``Count()`` / ``Sum()`` over joins, several of them can be combined on one
+queryset without multiplying rows, and each is served by the foreign key
+index of the counted table.
+
+Usage:
+    from meat_trace.utils.query_counts import count_subquery, sum_subquery
+
+    Shop.objects.annotate(
+        member_count=count_subquery(ShopUser, 'shop'),
+        active_members_count=count_subquery(ShopUser, 'shop', is_active=True),
+    )
+    Animal.objects.annotate(waste=sum_subquery(Waste, 'animal', 'weight_kg'))
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field, **filters):
+    """Number of ``model`` rows whose ``field`` points at the outer row (0 when none)."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}, **filters).order_by().values(field)
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def sum_subquery(model, field, column, **filters):
+    """Sum of ``column`` over ``model`` rows whose ``field`` points at the outer row (0 when none)."""
+    output = DecimalField(max_digits=14, decimal_places=2)
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}, **filters).order_by().values(field)
+            .annotate(total=Sum(column)).values('total'),
+            output_field=output,
+        ),
+        Value(Decimal('0')),
+        output_field=output,
+    )
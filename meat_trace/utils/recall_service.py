@@ -0,0 +1,264 @@
+"""
+Recall Service for MeatTrace
+
+Finds everything downstream of a contaminated animal or slaughter part —
+products, shop inventory, receipts, sales and orders — and notifies the
+affected shops and processing units.
+
+The walk uses the ProductLineage closure table, so every step is a single
+set-based query regardless of how many descendants there are.
+
+Usage:
+    from meat_trace.utils.recall_service import RecallService
+
+    impact = RecallService.assess(animal_ids=[animal.id])
+    RecallService.notify(impact, reason='contamination')
+"""
+
+import logging
+from collections import defaultdict
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.utils import timezone
+
+from ..models import (
+    Animal, Inventory, Notification, OrderItem, ProcessingUnitUser, Product, ProductLineage,
+    Receipt, SaleItem, ShopUser, SlaughterPart,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RecallService:
+    """
+    Set-based downstream impact analysis for contamination recalls.
+    """
+
+    # RejectionReason.specific_reason values that trigger a recall
+    RECALL_REASONS = ('contamination', 'disease_symptoms')
+
+    # Products listed individually in an impact report
+    MAX_LISTED_PRODUCTS = 500
+
+    # Membership roles notified about a recall
+    NOTIFIED_ROLES = ('owner', 'manager')
+
+    @classmethod
+    def is_recall_reason(cls, specific_reason):
+        return specific_reason in cls.RECALL_REASONS
+
+    @classmethod
+    def out_of_scope(cls, user, animal_ids=None, slaughter_part_ids=None):
+        """
+        Requested animal and slaughter part ids that never reached one of
+        ``user``'s processing units, i.e. were neither transferred to it nor
+        received by one of its members. Returns ``(animal_ids, part_ids)``.
+        """
+        unit_ids = ProcessingUnitUser.objects.filter(
+            user=user, is_active=True, is_suspended=False,
+        ).values('processing_unit_id')
+        member_ids = ProcessingUnitUser.objects.filter(processing_unit_id__in=unit_ids).values('user_id')
+        reached = Q(transferred_to_id__in=unit_ids) | Q(received_by_id__in=member_ids)
+
+        def foreign(model, ids):
+            if not ids:
+                return []
+            return sorted(set(ids) - set(model.objects.filter(reached, id__in=ids).values_list('id', flat=True)))
+
+        return foreign(Animal, animal_ids), foreign(SlaughterPart, slaughter_part_ids)
+
+    @classmethod
+    def affected_product_ids(cls, animal_ids=None, slaughter_part_ids=None):
+        """Subquery of every product descending from the given animals or parts."""
+        condition = Q(pk__in=[])
+        if animal_ids:
+            condition |= Q(ancestor_type='animal', ancestor_id__in=animal_ids)
+        if slaughter_part_ids:
+            condition |= Q(ancestor_type='slaughter_part', ancestor_id__in=slaughter_part_ids)
+        return ProductLineage.objects.filter(condition).values('product_id')
+
+    @staticmethod
+    def _weight_sold():
+        # Weight-first line items; fall back to quantity for legacy rows
+        return Sum(
+            Case(When(weight__gt=0, then=F('weight')), default=F('quantity')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    @staticmethod
+    def _float(value):
+        return float(value) if value is not None else 0.0
+
+    @classmethod
+    def assess(cls, animal_ids=None, slaughter_part_ids=None):
+        """
+        Build the downstream impact report for the given animals / parts.
+
+        Runs a fixed number of grouped queries: products per processing unit,
+        the (capped) product list, and inventory, receipts, sales and orders
+        per shop.
+        """
+        animal_ids = sorted(set(animal_ids or []))
+        slaughter_part_ids = sorted(set(slaughter_part_ids or []))
+        product_ids = cls.affected_product_ids(animal_ids, slaughter_part_ids)
+
+        processing_units = list(
+            Product.objects.filter(id__in=product_ids)
+            .values('processing_unit_id', 'processing_unit__name')
+            .annotate(products=Count('id'), product_weight=Sum('weight'))
+            .order_by('processing_unit_id')
+        )
+
+        listed = list(
+            Product.objects.filter(id__in=product_ids)
+            .values('id', 'name', 'batch_number', 'weight', 'weight_unit', 'processing_unit_id',
+                    'transferred_to_id', 'received_by_shop_id')
+            .order_by('id')[:cls.MAX_LISTED_PRODUCTS + 1]
+        )
+
+        shops = defaultdict(lambda: {
+            'shop_name': None,
+            'products_in_stock': 0, 'weight_in_stock': 0.0,
+            'receipts': 0, 'weight_received': 0.0,
+            'sales': 0, 'weight_sold': 0.0,
+            'orders': 0, 'weight_ordered': 0.0,
+        })
+
+        for row in (Inventory.objects.filter(product_id__in=product_ids)
+                    .values('shop_id', 'shop__name')
+                    .annotate(products=Count('product_id', distinct=True), weight=Sum('weight'))):
+            shop = shops[row['shop_id']]
+            shop['shop_name'] = row['shop__name']
+            shop['products_in_stock'] = row['products']
+            shop['weight_in_stock'] = cls._float(row['weight'])
+
+        for row in (Receipt.objects.filter(product_id__in=product_ids)
+                    .values('shop_id', 'shop__name')
+                    .annotate(receipts=Count('id'), weight=Sum('received_weight'))):
+            shop = shops[row['shop_id']]
+            shop['shop_name'] = row['shop__name']
+            shop['receipts'] = row['receipts']
+            shop['weight_received'] = cls._float(row['weight'])
+
+        for row in (SaleItem.objects.filter(product_id__in=product_ids)
+                    .values('sale__shop_id', 'sale__shop__name')
+                    .annotate(sales=Count('sale_id', distinct=True), weight=cls._weight_sold())):
+            shop = shops[row['sale__shop_id']]
+            shop['shop_name'] = row['sale__shop__name']
+            shop['sales'] = row['sales']
+            shop['weight_sold'] = cls._float(row['weight'])
+
+        for row in (OrderItem.objects.filter(product_id__in=product_ids)
+                    .values('order__shop_id', 'order__shop__name')
+                    .annotate(orders=Count('order_id', distinct=True), weight=cls._weight_sold())):
+            shop = shops[row['order__shop_id']]
+            shop['shop_name'] = row['order__shop__name']
+            shop['orders'] = row['orders']
+            shop['weight_ordered'] = cls._float(row['weight'])
+
+        shop_list = [{'shop_id': shop_id, **data} for shop_id, data in sorted(shops.items())]
+
+        return {
+            'source': {'animal_ids': animal_ids, 'slaughter_part_ids': slaughter_part_ids},
+            'assessed_at': timezone.now().isoformat(),
+            'totals': {
+                'products': sum(pu['products'] for pu in processing_units),
+                'product_weight': sum(cls._float(pu['product_weight']) for pu in processing_units),
+                'shops': len(shop_list),
+                'weight_in_stock': sum(s['weight_in_stock'] for s in shop_list),
+                'weight_sold': sum(s['weight_sold'] for s in shop_list),
+                'sales': sum(s['sales'] for s in shop_list),
+                'orders': sum(s['orders'] for s in shop_list),
+                'receipts': sum(s['receipts'] for s in shop_list),
+            },
+            'processing_units': [
+                {
+                    'processing_unit_id': pu['processing_unit_id'],
+                    'processing_unit_name': pu['processing_unit__name'],
+                    'products': pu['products'],
+                    'product_weight': cls._float(pu['product_weight']),
+                }
+                for pu in processing_units
+            ],
+            'shops': shop_list,
+            'products': [
+                {**row, 'weight': cls._float(row['weight'])}
+                for row in listed[:cls.MAX_LISTED_PRODUCTS]
+            ],
+            'products_truncated': len(listed) > cls.MAX_LISTED_PRODUCTS,
+        }
+
+    @classmethod
+    def notify(cls, impact, reason, initiated_by=None):
+        """
+        Bulk-create one urgent recall notification per affected shop and
+        processing-unit manager, then queue their delivery.
+
+        Returns the number of notifications created.
+        """
+        shop_ids = [shop['shop_id'] for shop in impact['shops']]
+        unit_ids = [pu['processing_unit_id'] for pu in impact['processing_units'] if pu['processing_unit_id']]
+        if not shop_ids and not unit_ids:
+            return 0
+
+        source = impact['source']
+        group_key = 'recall:' + ':'.join([
+            'a' + ','.join(map(str, source['animal_ids'])),
+            'p' + ','.join(map(str, source['slaughter_part_ids'])),
+        ])[:90]
+
+        recipients = {}
+        for user_id, shop_id in (ShopUser.objects.filter(
+                shop_id__in=shop_ids, is_active=True, role__in=cls.NOTIFIED_ROLES)
+                .values_list('user_id', 'shop_id')):
+            recipients.setdefault(user_id, {'shop_ids': [], 'processing_unit_ids': []})['shop_ids'].append(shop_id)
+        for user_id, unit_id in (ProcessingUnitUser.objects.filter(
+                processing_unit_id__in=unit_ids, is_active=True, is_suspended=False, role__in=cls.NOTIFIED_ROLES)
+                .values_list('user_id', 'processing_unit_id')):
+            recipients.setdefault(user_id, {'shop_ids': [], 'processing_unit_ids': []})['processing_unit_ids'].append(unit_id)
+
+        # Skip users already notified about this recall
+        already_notified = set(
+            Notification.objects.filter(group_key=group_key, user_id__in=recipients)
+            .values_list('user_id', flat=True)
+        )
+
+        shops_by_id = {shop['shop_id']: shop for shop in impact['shops']}
+        totals = impact['totals']
+        reason_display = reason.replace('_', ' ')
+        notifications = []
+        for user_id, scope in recipients.items():
+            if user_id in already_notified:
+                continue
+            weight_in_stock = sum(shops_by_id[s]['weight_in_stock'] for s in scope['shop_ids'] if s in shops_by_id)
+            message = (
+                f"Products traced to a source flagged for {reason_display} must be withdrawn. "
+                f"{totals['products']} product(s) are affected"
+            )
+            if scope['shop_ids']:
+                message += f"; your shop(s) hold {weight_in_stock:g} kg in stock"
+            notifications.append(Notification(
+                user_id=user_id,
+                notification_type='product_recall',
+                title=f'Product recall: {reason_display}',
+                message=message + '.',
+                priority='urgent',
+                action_type='view',
+                group_key=group_key,
+                is_batch_notification=True,
+                data={
+                    'reason': reason,
+                    'source': source,
+                    'shop_ids': scope['shop_ids'],
+                    'processing_unit_ids': scope['processing_unit_ids'],
+                    'product_ids': [p['id'] for p in impact['products']],
+                    'initiated_by': initiated_by.id if initiated_by else None,
+                },
+            ))
+
+        created = Notification.objects.bulk_create(notifications)
+        if created:
+            from ..tasks import deliver_notifications, enqueue
+            enqueue(deliver_notifications, [n.id for n in created if n.id])
+
+        logger.info(f"[RECALL] Queued {len(created)} recall notification(s) for {group_key}")
+        return len(created)
@@ -0,0 +1,235 @@
+"""
+Receive Service for MeatTrace
+
+Batched reception of deliveries: animals and slaughter parts at a
+processing unit, products at a shop. Each batch locks its rows with one
+query per table, applies the received / rejected weights in memory with
+the same validation as before, writes them back with ``bulk_update()``
+and adds the received stock through the StockLedgerService in one F()
+expression update.
+Rejections go through RejectionService.reject_animals / reject_parts,
+which deliver their notifications after commit. A full delivery costs a
+bounded number of queries however many lines it has.
+
+The bulk writes bypass the save signals, so the derived data they used to
+refresh (analytics cache, timeline snapshots, ProductInfo rows, production
+stats, pipeline counts) is refreshed once per batch.
+
+Usage:
+    from meat_trace.utils.receive_service import ReceiveService
+
+    result = ReceiveService.receive_animals(user, animal_ids, part_ids)
+    received, rejected, errors = ReceiveService.receive_products(user, shop, receives, rejections)
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Animal, Product, SlaughterPart
+from .pipeline_service import ProcessingPipelineService
+from .product_info_service import ProductInfoService
+from .production_stats import ProductionStatsService
+from .stock_ledger import StockLedgerService
+from .tagged_cache import TaggedCache
+from .traceability import invalidate_product_timelines
+from .transfer_service import TransferService
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiveService:
+    """
+    Bulk receive / reject of animals, parts and products.
+    """
+
+    # Product fields a receive or rejection can change
+    PRODUCT_FIELDS = [
+        'weight_received', 'quantity_received', 'received_by_shop', 'received_at',
+        'weight_rejected', 'quantity_rejected', 'rejection_reason', 'rejected_by', 'rejected_at',
+        'rejection_status',
+    ]
+
+    # ── Animals and parts at a processing unit ───────────────────────────────
+
+    @classmethod
+    def receive_animals(cls, user, animal_ids=(), part_ids=()):
+        """
+        Mark transferred, not yet received animals and parts as received by
+        ``user``. Returns a dict with the ``animal_ids`` and ``part_ids``
+        that were received.
+        """
+        now = timezone.now()
+        received = {}
+        unit_ids, animal_refs = set(), set()
+        with transaction.atomic():
+            for model, ids, key in ((Animal, animal_ids, 'animal_ids'), (SlaughterPart, part_ids, 'part_ids')):
+                rows = list(
+                    model.objects.select_for_update(of=('self',))
+                    .filter(id__in=ids, transferred_to__isnull=False, received_by__isnull=True)
+                    .order_by('id')
+                    .values_list('id', 'transferred_to_id', 'animal_id' if model is SlaughterPart else 'id')
+                ) if ids else []
+                received[key] = [row_id for row_id, _, _ in rows]
+                if rows:
+                    model.objects.filter(id__in=received[key]).update(received_by=user, received_at=now)
+                    unit_ids.update(unit_id for _, unit_id, _ in rows)
+                    animal_refs.update(animal_id for _, _, animal_id in rows)
+
+            if animal_refs:
+                TransferService.refresh_derived_data(unit_ids, animal_refs)
+
+        logger.info(
+            f"[RECEIVE] {len(received['animal_ids'])} animals and {len(received['part_ids'])} parts "
+            f"received by user {user.pk}"
+        )
+        return received
+
+    # ── Products at a shop ───────────────────────────────────────────────────
+
+    @classmethod
+    def receive_products(cls, user, shop, receives=(), rejections=()):
+        """
+        Apply a shop delivery: ``receives`` and ``rejections`` are the request
+        entries (``product_id`` plus ``weight_received`` / ``weight_rejected``,
+        or the legacy ``quantity_*`` keys). Entries are validated in order
+        exactly as one-at-a-time processing would, against the running totals.
+
+        Returns ``(received_products, rejected_products, errors)``.
+        """
+        receives = [
+            (entry.get('product_id'), Decimal(str(entry.get('weight_received', entry.get('quantity_received', 0)))))
+            for entry in receives
+        ]
+        rejections = [
+            (
+                entry.get('product_id'),
+                Decimal(str(entry.get('weight_rejected', entry.get('quantity_rejected', 0)))),
+                entry.get('rejection_reason', 'Not specified'),
+            )
+            for entry in rejections
+        ]
+        received_products, rejected_products, errors = [], [], []
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Locking the products also serializes concurrent receives of the
+            # same product, which keeps the Inventory upsert below safe
+            product_ids = {product_id for product_id, weight in receives if weight > 0}
+            product_ids |= {product_id for product_id, weight, _ in rejections if weight > 0}
+            # Keyed by str(id): payloads may send ids as strings or numbers
+            products = {
+                str(product.id): product
+                for product in Product.objects.select_for_update(of=('self',)).filter(
+                    id__in=product_ids, transferred_to=shop,
+                )
+            } if product_ids else {}
+            changed = {}
+            stock_in = defaultdict(Decimal)
+
+            for product_id, weight_received in receives:
+                if weight_received <= 0:
+                    errors.append(f"Product {product_id}: weight_received must be greater than 0")
+                    continue
+                product = products.get(str(product_id))
+                if product is None or product.rejection_status is not None:
+                    errors.append(f"Product {product_id} not found or not available for receipt")
+                    continue
+                remaining = product.weight - (product.weight_received + product.weight_rejected)
+                if weight_received > remaining:
+                    errors.append(cls._over_limit_error(product, 'receive', weight_received, remaining))
+                    continue
+
+                product.weight_received += weight_received
+                product.quantity_received = product.weight_received
+                # If fully received, mark as received
+                if product.weight_received + product.weight_rejected >= product.weight:
+                    product.received_by_shop = shop
+                    product.received_at = now
+                changed[product.id] = product
+                stock_in[product.id] += weight_received
+
+                received_products.append({
+                    'product_id': product.id,
+                    'product_name': product.name,
+                    'weight_received': float(weight_received),
+                    'total_received_weight': float(product.weight_received),
+                    'total_weight': float(product.weight),
+                    'weight_unit': product.weight_unit,
+                })
+
+            for product_id, weight_rejected, rejection_reason in rejections:
+                if weight_rejected <= 0:
+                    errors.append(f"Product {product_id}: weight_rejected must be greater than 0")
+                    continue
+                product = products.get(str(product_id))
+                if product is None:
+                    errors.append(f"Product {product_id} not found")
+                    continue
+                remaining = product.weight - (product.weight_received + product.weight_rejected)
+                if weight_rejected > remaining:
+                    errors.append(cls._over_limit_error(product, 'reject', weight_rejected, remaining))
+                    continue
+
+                product.weight_rejected += weight_rejected
+                product.quantity_rejected = product.weight_rejected
+                product.rejection_reason = rejection_reason
+                product.rejected_by = user
+                product.rejected_at = now
+                # If entire product is rejected, mark status as rejected
+                if product.weight_rejected >= product.weight:
+                    product.rejection_status = 'rejected'
+                changed[product.id] = product
+
+                rejected_products.append({
+                    'product_id': product.id,
+                    'product_name': product.name,
+                    'weight_rejected': float(weight_rejected),
+                    'total_rejected_weight': float(product.weight_rejected),
+                    'weight_unit': product.weight_unit,
+                    'rejection_reason': rejection_reason,
+                    'rejection_status': product.rejection_status
+                })
+
+            if changed:
+                Product.objects.bulk_update(changed.values(), cls.PRODUCT_FIELDS)
+            if stock_in:
+                StockLedgerService.move(
+                    shop.pk, stock_in, 'receive', entity=('product_receipt', None), user_id=user.pk,
+                    create_missing=True,
+                    weight_units={product_id: changed[product_id].weight_unit for product_id in stock_in},
+                )
+            if changed:
+                cls._refresh_products(changed.values())
+
+        logger.info(
+            f"[RECEIVE] Shop {shop.pk}: {len(received_products)} product receives, "
+            f"{len(rejected_products)} rejections, {len(errors)} errors"
+        )
+        return received_products, rejected_products, errors
+
+    @staticmethod
+    def _over_limit_error(product, verb, weight, remaining):
+        return (
+            f"Product {product.id}: Cannot {verb} {weight} {product.weight_unit}. "
+            f"Only {remaining} {product.weight_unit} remaining (Total: {product.weight}, "
+            f"Already received: {product.weight_received}, "
+            f"Already rejected: {product.weight_rejected})"
+        )
+
+    @staticmethod
+    def _refresh_products(products):
+        """What the Product save signals would have done, once for the batch."""
+        product_ids = [product.id for product in products]
+        unit_ids = {product.processing_unit_id for product in products}
+        try:
+            TaggedCache.invalidate(TaggedCache.model_tag('Product'))
+            invalidate_product_timelines(product_ids)
+            ProductInfoService.schedule(product_ids)
+            ProductionStatsService.invalidate(unit_ids)
+            ProcessingPipelineService.schedule(unit_ids)
+        except Exception as e:
+            logger.error(f"[RECEIVE] Failed to refresh derived data for products {product_ids}: {e}")
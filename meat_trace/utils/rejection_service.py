@@ -1,6 +1,7 @@
 """
 RejectionService handles processing rejections and sending notifications.
 Provides centralized logic for rejection workflows including notifications and audit logging.
+reject_animals / reject_parts process a whole delivery with bulk queries.
 """
 
 from django.utils import timezone
@@ -12,6 +13,12 @@ from .notification_service import NotificationService
 class RejectionService:
     """Service class for handling rejection processing and notifications"""
 
+    # Fields a rejection writes on an animal or slaughter part
+    REJECTION_FIELDS = [
+        'rejection_status', 'rejection_reason_category', 'rejection_reason_specific', 'rejection_notes',
+        'rejected_by', 'rejected_at', 'transferred_to', 'transferred_at', 'received_by', 'received_at',
+    ]
+
     @staticmethod
     def process_animal_rejection(animal, rejection_data, rejected_by, processing_unit):
         """
@@ -51,6 +58,9 @@ class RejectionService:
                 processing_unit=processing_unit,
             )
 
+            # Contamination / disease: trace and notify everything downstream
+            RejectionService._queue_recall(rejection_data, rejected_by, animal_ids=[animal.id])
+
             # Send notification to abbatoir using NotificationService
             NotificationService.notify_animal_rejected(
                 animal.abbatoir,
@@ -95,6 +105,23 @@ class RejectionService:
                 }
             )
 
+    @staticmethod
+    def _queue_recall(rejection_data, rejected_by, animal_ids=None, slaughter_part_ids=None):
+        """Queue a downstream recall assessment for recall-grade rejection reasons."""
+        from .recall_service import RecallService
+        from ..tasks import enqueue, run_recall_assessment
+
+        reason = rejection_data['specific_reason']
+        if not RecallService.is_recall_reason(reason):
+            return
+        enqueue(
+            run_recall_assessment,
+            reason,
+            animal_ids=animal_ids,
+            slaughter_part_ids=slaughter_part_ids,
+            initiated_by_id=rejected_by.id if rejected_by else None,
+        )
+
     @staticmethod
     def process_part_rejection(part, rejection_data, rejected_by, processing_unit):
         """
@@ -134,6 +161,9 @@ class RejectionService:
                 processing_unit=processing_unit,
             )
 
+            # Contamination / disease: trace and notify everything downstream
+            RejectionService._queue_recall(rejection_data, rejected_by, slaughter_part_ids=[part.id])
+
             # Send notification to abbatoir using NotificationService
             NotificationService.notify_part_rejected(
                 part.animal.abbatoir,
@@ -180,6 +210,221 @@ class RejectionService:
                 }
             )
 
+    @staticmethod
+    def rejection_data(rejection):
+        """Normalize a rejection payload entry (legacy ``reason`` or structured format)."""
+        if 'reason' in rejection:
+            # Old format - convert to new format
+            return {
+                'category': 'other',
+                'specific_reason': rejection.get('reason', 'Not specified'),
+                'notes': ''
+            }
+        return {
+            'category': rejection.get('category', 'other'),
+            'specific_reason': rejection.get('specific_reason', 'Not specified'),
+            'notes': rejection.get('notes', '')
+        }
+
+    @staticmethod
+    def reject_animals(rejections, rejected_by, processing_unit):
+        """
+        Bulk version of process_animal_rejection.
+
+        Args:
+            rejections: dict mapping animal ids (ints or strings) to rejection data
+            rejected_by: User who performed the rejections
+            processing_unit: ProcessingUnit that rejected the animals
+
+        Locks the animals in one query, updates them with one bulk_update and
+        bulk-inserts the reason, activity, audit and notification rows.
+        Notifications are delivered and recalls queued after commit. Unknown
+        ids are skipped. Returns the rejected animals.
+        """
+        from ..models import RejectionReason
+        from .transfer_service import TransferService
+
+        rejections = {str(item_id): data for item_id, data in rejections.items()}
+        with transaction.atomic():
+            animals = list(
+                Animal.objects.select_for_update(of=('self',)).select_related('abbatoir')
+                .filter(id__in=rejections.keys()).order_by('id')
+            )
+            if not animals:
+                return []
+
+            now = timezone.now()
+            unit_ids = {animal.transferred_to_id for animal in animals}
+            moments = [m for a in animals for m in (a.created_at, a.transferred_at, a.slaughtered_at)]
+            reasons, activities, audit_logs, notifications = [], [], [], []
+            for animal in animals:
+                data = rejections[str(animal.id)]
+                animal.rejection_status = 'rejected'
+                animal.rejection_reason_category = data['category']
+                animal.rejection_reason_specific = data['specific_reason']
+                animal.rejection_notes = data.get('notes', '')
+                animal.rejected_by = rejected_by
+                animal.rejected_at = now
+                # Clear transfer and receive fields to return animal to abbatoir
+                animal.transferred_to = None
+                animal.transferred_at = None
+                animal.received_by = None
+                animal.received_at = None
+
+                reasons.append(RejectionReason(
+                    animal=animal,
+                    category=data['category'],
+                    specific_reason=data['specific_reason'],
+                    notes=data.get('notes', ''),
+                    rejected_by=rejected_by,
+                    processing_unit=processing_unit,
+                ))
+                notifications.append(NotificationService.animal_rejected_notification(
+                    animal.abbatoir, animal, data['category'], data['specific_reason']
+                ))
+                activities.append(Activity(
+                    user=rejected_by,
+                    activity_type='transfer',
+                    title=f'Animal {animal.animal_id} rejected',
+                    description=f'Rejected animal {animal.animal_id}: {data["category"]} - {data["specific_reason"]}',
+                    entity_id=str(animal.id),
+                    entity_type='animal',
+                    metadata={
+                        'animal_id': animal.animal_id,
+                        'rejection_category': data['category'],
+                        'rejection_reason': data['specific_reason']
+                    }
+                ))
+                audit_logs.append(RejectionService._audit_log(
+                    'animal_rejected', f'Animal {animal.animal_id}', animal, animal.abbatoir,
+                    data, rejected_by, processing_unit,
+                ))
+
+            Animal.objects.bulk_update(animals, RejectionService.REJECTION_FIELDS)
+            RejectionService._bulk_record(reasons, activities, audit_logs, notifications)
+            RejectionService._queue_recalls(rejections, rejected_by, 'animal_ids', [a.id for a in animals])
+            TransferService.refresh_derived_data(unit_ids, [a.id for a in animals], moments)
+        return animals
+
+    @staticmethod
+    def reject_parts(rejections, rejected_by, processing_unit):
+        """
+        Bulk version of process_part_rejection; same contract as reject_animals
+        with ``rejections`` keyed by slaughter part id.
+        """
+        from ..models import RejectionReason
+        from .transfer_service import TransferService
+
+        rejections = {str(item_id): data for item_id, data in rejections.items()}
+        with transaction.atomic():
+            parts = list(
+                SlaughterPart.objects.select_for_update(of=('self',)).select_related('animal__abbatoir')
+                .filter(id__in=rejections.keys()).order_by('id')
+            )
+            if not parts:
+                return []
+
+            now = timezone.now()
+            unit_ids = {part.transferred_to_id for part in parts}
+            reasons, activities, audit_logs, notifications = [], [], [], []
+            for part in parts:
+                data = rejections[str(part.id)]
+                animal = part.animal
+                part.rejection_status = 'rejected'
+                part.rejection_reason_category = data['category']
+                part.rejection_reason_specific = data['specific_reason']
+                part.rejection_notes = data.get('notes', '')
+                part.rejected_by = rejected_by
+                part.rejected_at = now
+                # Clear transfer and receive fields to return part to abbatoir
+                part.transferred_to = None
+                part.transferred_at = None
+                part.received_by = None
+                part.received_at = None
+
+                reasons.append(RejectionReason(
+                    slaughter_part=part,
+                    category=data['category'],
+                    specific_reason=data['specific_reason'],
+                    notes=data.get('notes', ''),
+                    rejected_by=rejected_by,
+                    processing_unit=processing_unit,
+                ))
+                notifications.append(NotificationService.part_rejected_notification(
+                    animal.abbatoir, part, data['category'], data['specific_reason']
+                ))
+                activities.append(Activity(
+                    user=rejected_by,
+                    activity_type='transfer',
+                    title=f'Part {part.part_type} of animal {animal.animal_id} rejected',
+                    description=f'Rejected part {part.part_type}: {data["category"]} - {data["specific_reason"]}',
+                    entity_id=str(part.id),
+                    entity_type='slaughter_part',
+                    metadata={
+                        'animal_id': animal.animal_id,
+                        'part_id': part.id,
+                        'part_type': part.part_type,
+                        'rejection_category': data['category'],
+                        'rejection_reason': data['specific_reason']
+                    }
+                ))
+                audit_logs.append(RejectionService._audit_log(
+                    'part_rejected', f'Part {part.part_type} of animal {animal.animal_id}', part, animal.abbatoir,
+                    data, rejected_by, processing_unit,
+                ))
+
+            SlaughterPart.objects.bulk_update(parts, RejectionService.REJECTION_FIELDS)
+            RejectionService._bulk_record(reasons, activities, audit_logs, notifications)
+            RejectionService._queue_recalls(rejections, rejected_by, 'slaughter_part_ids', [p.id for p in parts])
+            TransferService.refresh_derived_data(unit_ids, {p.animal_id for p in parts})
+        return parts
+
+    @staticmethod
+    def _audit_log(action, label, item, abbatoir, rejection_data, rejected_by, processing_unit):
+        """Unsaved audit log entry for one rejected animal or part."""
+        unit_name = processing_unit.name if processing_unit else 'unknown'
+        return UserAuditLog(
+            performed_by=rejected_by,
+            affected_user=abbatoir,
+            processing_unit=processing_unit,
+            action=action,
+            description=f'{label} rejected by processing unit {unit_name}',
+            old_values={'received_by': None},
+            new_values={
+                'rejection_status': 'rejected',
+                'rejection_reason_category': rejection_data['category'],
+                'rejection_reason_specific': rejection_data['specific_reason'],
+                'rejected_at': item.rejected_at.isoformat()
+            },
+            metadata={
+                'rejection_category': rejection_data['category'],
+                'rejection_reason': rejection_data['specific_reason'],
+                'rejection_notes': rejection_data.get('notes', '')
+            }
+        )
+
+    @staticmethod
+    def _bulk_record(reasons, activities, audit_logs, notifications):
+        """Insert the rows of a bulk rejection and deliver its notifications after commit."""
+        from ..models import RejectionReason
+        from ..tasks import deliver_notifications, enqueue
+
+        RejectionReason.objects.bulk_create(reasons)
+        Activity.objects.bulk_create(activities)
+        UserAuditLog.objects.bulk_create(audit_logs)
+        created = Notification.objects.bulk_create(notifications)
+        if created:
+            enqueue(deliver_notifications, [n.id for n in created if n.id])
+
+    @staticmethod
+    def _queue_recalls(rejections, rejected_by, id_kwarg, item_ids):
+        """One recall assessment per recall-grade reason across the batch."""
+        by_reason = {}
+        for item_id in item_ids:
+            by_reason.setdefault(rejections[str(item_id)]['specific_reason'], []).append(item_id)
+        for reason, ids in by_reason.items():
+            RejectionService._queue_recall({'specific_reason': reason}, rejected_by, **{id_kwarg: ids})
+
     @staticmethod
     def process_appeal_resolution(item_type, item_id, resolution, resolved_by, resolution_notes=''):
         """
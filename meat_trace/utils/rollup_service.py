@@ -0,0 +1,281 @@
+"""
+Rollup Service for MeatTrace
+
+Maintains the DailyRollup fact table (daily activity per processing unit,
+shop and species) and answers dashboard totals and time series from it, so
+analytics cost depends on the number of days asked for rather than on the
+size of the Animal, Product, Order, Sale and User tables.
+
+Rollups are refreshed by the refresh_daily_rollups beat task: every run
+recomputes the last REFRESH_WINDOW_DAYS days plus any older dates marked
+dirty by edits or deletes. The full history is backfilled by migration
+0083 (``manage.py backfill_daily_rollups`` to redo it by hand).
+
+Usage:
+    from meat_trace.utils.rollup_service import RollupService
+
+    RollupService.refresh()                       # scheduled, incremental
+    RollupService.backfill()                      # every day since the first activity
+    totals = RollupService.totals(start, end, shop_id=3)
+    series = RollupService.series('sales_value', start, end, 'week')
+"""
+
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import CharField, Count, DecimalField, F, IntegerField, Min, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from ..models import Animal, DailyRollup, DailyRollupDirtyDate, Order, Product, Sale
+from .tagged_cache import TaggedCache
+from .time_buckets import TimeBuckets
+
+logger = logging.getLogger(__name__)
+
+
+class RollupService:
+    """
+    Incremental maintenance and reads of the daily rollup fact table.
+    """
+
+    COUNT_METRICS = (
+        'new_users', 'animals_registered', 'animals_transferred', 'animals_slaughtered',
+        'products_created', 'orders_placed', 'sales_recorded',
+    )
+    SUM_METRICS = ('live_weight', 'product_weight', 'order_value', 'sales_value')
+    METRICS = COUNT_METRICS + SUM_METRICS
+
+    # Dimensions a reader may filter on
+    FILTERS = ('processing_unit_id', 'shop_id', 'species')
+
+    # Days (ending today) recomputed on every scheduled run
+    REFRESH_WINDOW_DAYS = 2
+
+    # Days recomputed per transaction during a backfill
+    CHUNK_DAYS = 31
+
+    @staticmethod
+    def _decimal_sum(field):
+        return Coalesce(
+            Sum(field),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    @classmethod
+    def _sources(cls):
+        """
+        (queryset, timestamp field, dimension expressions, metric aggregates)
+        for every fact that feeds the rollups.
+        """
+        no_unit = no_shop = Value(None, output_field=IntegerField())
+        no_species = Value('', output_field=CharField())
+        return [
+            (User.objects.all(), 'date_joined',
+             {'unit': no_unit, 'shop': no_shop, 'kind': no_species},
+             {'new_users': Count('id')}),
+            (Animal.objects.all(), 'created_at',
+             {'unit': F('transferred_to_id'), 'shop': no_shop, 'kind': F('species')},
+             {'animals_registered': Count('id'), 'live_weight': cls._decimal_sum('live_weight')}),
+            (Animal.objects.filter(transferred_to__isnull=False), 'transferred_at',
+             {'unit': F('transferred_to_id'), 'shop': no_shop, 'kind': F('species')},
+             {'animals_transferred': Count('id')}),
+            (Animal.objects.filter(slaughtered=True), 'slaughtered_at',
+             {'unit': F('transferred_to_id'), 'shop': no_shop, 'kind': F('species')},
+             {'animals_slaughtered': Count('id')}),
+            (Product.objects.all(), 'created_at',
+             {'unit': F('processing_unit_id'), 'shop': no_shop, 'kind': Coalesce('animal__species', no_species)},
+             {'products_created': Count('id'), 'product_weight': cls._decimal_sum('weight')}),
+            (Order.objects.all(), 'created_at',
+             {'unit': no_unit, 'shop': F('shop_id'), 'kind': no_species},
+             {'orders_placed': Count('id'), 'order_value': cls._decimal_sum('total_amount')}),
+            (Sale.objects.all(), 'created_at',
+             {'unit': no_unit, 'shop': F('shop_id'), 'kind': no_species},
+             {'sales_recorded': Count('id'), 'sales_value': cls._decimal_sum('total_amount')}),
+        ]
+
+    @classmethod
+    def compute(cls, dates):
+        """
+        Aggregate the raw tables for the given dates.
+
+        Returns unsaved DailyRollup rows, one per (date, processing unit,
+        shop, species) with activity. Runs one GROUP BY query per source.
+        """
+        dates = set(dates)
+        if not dates:
+            return []
+        lower = TimeBuckets.to_datetime(min(dates))
+        upper = TimeBuckets.to_datetime(max(dates) + timedelta(days=1))
+
+        facts = {}
+        for queryset, field, dimensions, aggregates in cls._sources():
+            rows = (
+                queryset.filter(**{f'{field}__gte': lower, f'{field}__lt': upper})
+                .annotate(rollup_date=TruncDate(field), **{f'rollup_{k}': v for k, v in dimensions.items()})
+                .values('rollup_date', 'rollup_unit', 'rollup_shop', 'rollup_kind')
+                .annotate(**aggregates)
+                .order_by()
+            )
+            for row in rows:
+                if row['rollup_date'] not in dates:
+                    continue
+                key = (row['rollup_date'], row['rollup_unit'], row['rollup_shop'], row['rollup_kind'] or '')
+                fact = facts.setdefault(key, {})
+                for metric in aggregates:
+                    fact[metric] = fact.get(metric, 0) + (row[metric] or 0)
+
+        now = timezone.now()
+        return [
+            DailyRollup(
+                date=day, processing_unit_id=unit_id, shop_id=shop_id, species=species,
+                refreshed_at=now, **metrics,
+            )
+            for (day, unit_id, shop_id, species), metrics in facts.items()
+        ]
+
+    @classmethod
+    def refresh_dates(cls, dates):
+        """Replace the rollup rows of the given dates. Returns the number of rows written."""
+        # Contiguous runs of at most CHUNK_DAYS, so an old dirty date does
+        # not widen the scanned range to everything in between.
+        chunks = []
+        for day in sorted(set(dates)):
+            if chunks and (day - chunks[-1][-1]).days == 1 and len(chunks[-1]) < cls.CHUNK_DAYS:
+                chunks[-1].append(day)
+            else:
+                chunks.append([day])
+
+        written = 0
+        for chunk in chunks:
+            rows = cls.compute(chunk)
+            with transaction.atomic():
+                DailyRollup.objects.filter(date__in=chunk).delete()
+                DailyRollup.objects.bulk_create(rows)
+            written += len(rows)
+        TaggedCache.invalidate(TaggedCache.model_tag(DailyRollup))
+        return written
+
+    @classmethod
+    def _first_activity_date(cls):
+        firsts = [
+            queryset.aggregate(first=Min(field))['first']
+            for queryset, field, _, _ in cls._sources()
+        ]
+        firsts = [value for value in firsts if value is not None]
+        return TimeBuckets.bucket_start(min(firsts), 'day') if firsts else None
+
+    @classmethod
+    def refresh(cls):
+        """
+        Scheduled, incremental refresh.
+
+        Recomputes the trailing window and every dirty date; on the first
+        run (no rollups yet) backfills from the earliest recorded activity.
+        """
+        today = timezone.localdate()
+        window_start = today - timedelta(days=cls.REFRESH_WINDOW_DAYS - 1)
+
+        if not DailyRollup.objects.exists():
+            return cls.backfill()
+
+        dirty = list(DailyRollupDirtyDate.objects.values_list('id', 'date'))
+        dates = {window_start + timedelta(days=i) for i in range(cls.REFRESH_WINDOW_DAYS)}
+        dates.update(day for _, day in dirty)
+
+        written = cls.refresh_dates(dates)
+        if dirty:
+            DailyRollupDirtyDate.objects.filter(id__in=[pk for pk, _ in dirty]).delete()
+        logger.info(f"[ROLLUP] Refreshed {len(dates)} day(s): {written} rollup rows")
+        return {'days': len(dates), 'rows': written}
+
+    @classmethod
+    def backfill(cls):
+        """Recompute every day from the earliest recorded activity to today."""
+        today = timezone.localdate()
+        window_start = today - timedelta(days=cls.REFRESH_WINDOW_DAYS - 1)
+        first = cls._first_activity_date()
+        start = min(first, window_start) if first else window_start
+        dates = [start + timedelta(days=i) for i in range((today - start).days + 1)]
+        # Dates marked before the recount are covered by it
+        dirty_ids = list(DailyRollupDirtyDate.objects.values_list('id', flat=True))
+
+        written = cls.refresh_dates(dates)
+        if dirty_ids:
+            DailyRollupDirtyDate.objects.filter(id__in=dirty_ids).delete()
+        logger.info(f"[ROLLUP] Backfilled {len(dates)} day(s): {written} rollup rows")
+        return {'days': len(dates), 'rows': written}
+
+    @classmethod
+    def mark_dirty(cls, *moments):
+        """
+        Queue past dates for recomputation after an edit or delete.
+
+        Dates inside the trailing window are skipped; the next scheduled run
+        recomputes them anyway.
+        """
+        window_start = timezone.localdate() - timedelta(days=cls.REFRESH_WINDOW_DAYS - 1)
+        dates = set()
+        for moment in moments:
+            if moment is None:
+                continue
+            day = TimeBuckets.bucket_start(moment, 'day')
+            if day < window_start:
+                dates.add(day)
+        if dates:
+            DailyRollupDirtyDate.objects.bulk_create(
+                [DailyRollupDirtyDate(date=day) for day in dates], ignore_conflicts=True,
+            )
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _queryset(cls, start_date=None, end_date=None, **filters):
+        queryset = DailyRollup.objects.all()
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        unknown = set(filters) - set(cls.FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown rollup filter(s): {', '.join(sorted(unknown))}")
+        return queryset.filter(**{k: v for k, v in filters.items() if v not in (None, '')})
+
+    @classmethod
+    def totals(cls, start_date=None, end_date=None, **filters):
+        """Sum of every metric between two dates (inclusive), in one query."""
+        totals = cls._queryset(start_date, end_date, **filters).aggregate(
+            **{metric: Sum(metric) for metric in cls.METRICS}
+        )
+        return {metric: totals[metric] or 0 for metric in cls.METRICS}
+
+    @classmethod
+    def series(cls, metric, start_date, end_date, period='day', **filters):
+        """
+        Zero-filled per-bucket values of ``metric`` for day/week/month buckets.
+
+        Returns a dict of bucket start date -> value from one query.
+        """
+        if metric not in cls.METRICS:
+            raise ValueError(f"Unknown rollup metric: {metric}")
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        data = dict.fromkeys(TimeBuckets.buckets(start_date, end_date, period), 0)
+        rows = (
+            cls._queryset(start_date, end_date, **filters)
+            .values('date').annotate(value=Sum(metric)).order_by('date')
+        )
+        for row in rows:
+            key = TimeBuckets.bucket_start(row['date'], period)
+            if key in data:
+                data[key] += row['value'] or 0
+        return data
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return TimeBuckets.bucket_start(value, 'day')
+    return value
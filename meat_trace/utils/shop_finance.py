@@ -0,0 +1,180 @@
+"""
+Shop Finance Service for MeatTrace
+
+Invoice statistics and the per-shop running finance summary.
+
+``invoice_stats`` computes the status breakdown of a shop's invoices in one
+conditional-aggregate query. ``ShopFinanceSummary`` keeps the same numbers
+(plus outstanding balance and sales totals) as a single row per shop: the
+Invoice and Sale signals turn every write into field deltas applied with
+F() expressions, so concurrent writers never overwrite each other and the
+finance screen reads one row. A shop without a row is rebuilt from the
+source tables on its first write or read; ``rebuild`` also repairs a row
+after bulk ``update()`` calls, which bypass the signals.
+
+Usage:
+    from meat_trace.utils.shop_finance import ShopFinanceService
+
+    stats = ShopFinanceService.invoice_stats(shop)
+    summary = ShopFinanceService.get_summary(shop)
+    ShopFinanceService.apply_invoice_change(old_state, new_state)
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import Invoice, Sale, ShopFinanceSummary
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+
+class ShopFinanceService:
+    """
+    Single-query invoice stats and incrementally maintained shop finance rows.
+    """
+
+    STATUSES = tuple(status for status, _ in Invoice.STATUS_CHOICES)
+
+    # Invoices whose balance is no longer collectable or already settled by a sale
+    CLOSED_STATUSES = ('completed', 'cancelled')
+
+    # ── Invoice statistics ───────────────────────────────────────────────────
+
+    @classmethod
+    def _invoice_aggregates(cls):
+        money = DecimalField(max_digits=14, decimal_places=2)
+        balance = ExpressionWrapper(F('total_amount') - F('amount_paid'), output_field=money)
+        aggregates = {
+            'invoice_count': Count('id'),
+            'invoiced_total': Coalesce(Sum('total_amount'), Value(ZERO), output_field=money),
+            'amount_paid': Coalesce(Sum('amount_paid'), Value(ZERO), output_field=money),
+            'outstanding_balance': Coalesce(
+                Sum(balance, filter=~Q(status__in=cls.CLOSED_STATUSES)), Value(ZERO), output_field=money,
+            ),
+        }
+        for status in cls.STATUSES:
+            aggregates[f'{status}_count'] = Count('id', filter=Q(status=status))
+        return aggregates
+
+    @classmethod
+    def _invoice_totals(cls, invoices):
+        # Aggregate aliases may not shadow model fields (amount_paid), hence the prefix
+        totals = invoices.aggregate(**{f'sum_{key}': value for key, value in cls._invoice_aggregates().items()})
+        return {key[len('sum_'):]: value for key, value in totals.items()}
+
+    @classmethod
+    def invoice_stats(cls, shop):
+        """Status counts, total value and total paid of ``shop``'s invoices (one query)."""
+        totals = cls._invoice_totals(Invoice.objects.filter(shop=shop))
+        stats = {'total_invoices': totals['invoice_count']}
+        stats.update({status: totals[f'{status}_count'] for status in cls.STATUSES})
+        stats['total_value'] = totals['invoiced_total']
+        stats['total_paid'] = totals['amount_paid']
+        return stats
+
+    # ── Running summary ──────────────────────────────────────────────────────
+
+    @classmethod
+    def rebuild(cls, shop_id):
+        """Recompute a shop's summary row from its invoices and sales."""
+        with transaction.atomic():
+            # Lock the row before aggregating: a write committing meanwhile
+            # either waits and applies its delta afterwards, or finds no row
+            # and rebuilds once this one is in place
+            ShopFinanceSummary.objects.get_or_create(shop_id=shop_id)
+            summary = ShopFinanceSummary.objects.select_for_update().get(shop_id=shop_id)
+            invoices = cls._invoice_totals(Invoice.objects.filter(shop_id=shop_id))
+            sales = Sale.objects.filter(shop_id=shop_id).aggregate(
+                sales_count=Count('id'), sales_total=Sum('total_amount'),
+            )
+            values = dict(invoices, sales_count=sales['sales_count'], sales_total=sales['sales_total'] or ZERO)
+            for field, value in values.items():
+                setattr(summary, field, value)
+            summary.save()
+        logger.info(f"[SHOP_FINANCE] Rebuilt summary for shop {shop_id}")
+        return summary
+
+    @classmethod
+    def _apply(cls, shop_id, deltas):
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not shop_id or not deltas:
+            return
+        updated = ShopFinanceSummary.objects.filter(shop_id=shop_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated:
+            # No row yet: build it from the tables, which already hold this write
+            cls.rebuild(shop_id)
+
+    @classmethod
+    def _invoice_contribution(cls, state):
+        """Summary fields one invoice adds, from its (shop_id, status, total_amount, amount_paid)."""
+        if state is None:
+            return None, {}
+        shop_id, status, total, paid = state
+        total, paid = total or ZERO, paid or ZERO
+        contribution = {
+            'invoice_count': 1,
+            f'{status}_count': 1,
+            'invoiced_total': total,
+            'amount_paid': paid,
+            'outstanding_balance': ZERO if status in cls.CLOSED_STATUSES else total - paid,
+        }
+        return shop_id, contribution
+
+    @classmethod
+    def apply_invoice_change(cls, old_state, new_state):
+        """
+        Move one invoice's contribution from ``old_state`` to ``new_state``.
+
+        States are ``(shop_id, status, total_amount, amount_paid)`` tuples;
+        None stands for "did not exist" (creation / deletion).
+        """
+        cls._move(cls._invoice_contribution(old_state), cls._invoice_contribution(new_state))
+
+    @classmethod
+    def apply_sale_change(cls, old_state, new_state):
+        """Same as apply_invoice_change for sales; states are ``(shop_id, total_amount)``."""
+        def contribution(state):
+            if state is None:
+                return None, {}
+            shop_id, total = state
+            return shop_id, {'sales_count': 1, 'sales_total': total or ZERO}
+
+        cls._move(contribution(old_state), contribution(new_state))
+
+    @classmethod
+    def _move(cls, old, new):
+        """Replace the ``(shop_id, fields)`` contribution ``old`` by ``new``."""
+        (old_shop, old_fields), (new_shop, new_fields) = old, new
+        if old_shop == new_shop:
+            cls._apply(new_shop, {
+                field: new_fields.get(field, 0) - old_fields.get(field, 0)
+                for field in set(old_fields) | set(new_fields)
+            })
+        else:
+            cls._apply(old_shop, {field: -value for field, value in old_fields.items()})
+            cls._apply(new_shop, new_fields)
+
+    @classmethod
+    def get_summary(cls, shop):
+        """The shop's finance summary as a response dict (one query once built)."""
+        summary = ShopFinanceSummary.objects.filter(shop=shop).first() or cls.rebuild(shop.pk)
+        return {
+            'shop': shop.pk,
+            'invoices': {
+                'total': summary.invoice_count,
+                'by_status': {status: getattr(summary, f'{status}_count') for status in cls.STATUSES},
+            },
+            'invoiced_total': summary.invoiced_total,
+            'amount_paid': summary.amount_paid,
+            'outstanding_balance': summary.outstanding_balance,
+            'sales': {'count': summary.sales_count, 'total': summary.sales_total},
+            'updated_at': summary.updated_at,
+        }
@@ -0,0 +1,277 @@
+"""
+Stock Ledger Service for MeatTrace
+
+Append-only history of shop stock. Every receive, sale, transfer,
+rejection, waste or manual adjustment of an Inventory row is written as a
+signed StockMovement, and the live Inventory / Product weights are changed
+with F() expressions in the same transaction: a sale line the stock covers
+costs three writes, never reads the current balance and cannot lose a
+concurrent update. Stock is floored at zero; an oversell locks and reads
+the row, takes off what is left and logs the shortfall, so the ledger always
+records the change that was actually applied.
+
+Stock at any past moment is the latest StockSnapshot at or before it plus
+the movements since. ``compact`` periodically folds movements older than
+the retention window into snapshots, so the ledger stays small; history
+older than the window is kept at compaction-run granularity.
+
+Usage:
+    from meat_trace.utils.stock_ledger import StockLedgerService
+
+    StockLedgerService.move(shop.id, {product.id: Decimal('5')}, 'receive', entity=('receipt', receipt.id))
+    StockLedgerService.sell(sale_item)
+    stock = StockLedgerService.stock_as_of(shop.id, at=yesterday)
+    StockLedgerService.compact()
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..models import Inventory, Product, StockMovement, StockSnapshot
+from .product_info_service import ProductInfoService
+from .production_stats import ProductionStatsService
+from .rollup_service import RollupService
+from .tagged_cache import TaggedCache
+from .traceability import invalidate_product_timelines
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+
+class StockLedgerService:
+    """
+    Ledger writes with F() balance updates, as-of queries and compaction.
+    """
+
+    # Movements younger than this are kept individually
+    RETENTION_DAYS = 90
+
+    WEIGHT = DecimalField(max_digits=12, decimal_places=2)
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _per_product(values, output_field, default):
+        return Case(
+            *[When(product_id=product_id, then=Value(value)) for product_id, value in values.items()],
+            default=default, output_field=output_field,
+        )
+
+    @classmethod
+    def _balance_updates(cls, deltas, now, weight_units):
+        balance = F('weight') + cls._per_product(deltas, cls.WEIGHT, Value(ZERO))
+        updates = {'weight': balance, 'quantity': balance, 'last_updated': now}
+        if weight_units:
+            updates['weight_unit'] = cls._per_product(weight_units, CharField(), F('weight_unit'))
+        return updates
+
+    @classmethod
+    def move(cls, shop_id, deltas, movement_type, entity=None, user_id=None, create_missing=False, weight_units=None):
+        """
+        Apply signed weight ``deltas`` ({product_id: weight}) to a shop's
+        Inventory rows and append one movement per product.
+
+        When every row holds enough stock the deltas are applied with one
+        F() expression UPDATE. Otherwise the rows are locked and read, stock
+        is floored at zero as before and the shortfall is logged; movements
+        record the delta actually applied, so ledger balances always match
+        Inventory. ``entity`` is the ``(type, id)`` of the source record.
+        Products without an Inventory row are skipped unless
+        ``create_missing``.
+        """
+        deltas = {product_id: Decimal(str(delta)) for product_id, delta in deltas.items() if delta}
+        if not deltas:
+            return []
+        now = timezone.now()
+        weight_units = weight_units or {}
+        entity_type, entity_id = entity or ('', None)
+        rows = Inventory.objects.filter(shop_id=shop_id, product_id__in=deltas)
+
+        with transaction.atomic():
+            if create_missing:
+                Inventory.objects.bulk_create([
+                    Inventory(
+                        shop_id=shop_id, product_id=product_id, quantity=ZERO, weight=ZERO,
+                        weight_unit=weight_units.get(product_id, 'kg'), last_updated=now,
+                    )
+                    for product_id in deltas
+                ], ignore_conflicts=True)
+
+            # Fast path: no row goes below zero, so nothing needs to be read
+            enough = Q()
+            for product_id, delta in deltas.items():
+                enough |= Q(product_id=product_id, weight__gte=-delta) if delta < 0 else Q(product_id=product_id)
+            applied = None
+            with transaction.atomic():
+                if rows.filter(enough).update(**cls._balance_updates(deltas, now, weight_units)) == len(deltas):
+                    applied = deltas
+                else:
+                    transaction.set_rollback(True)
+            if applied is None:
+                applied = cls._apply_floored(shop_id, rows, deltas, now, weight_units)
+
+            movements = StockMovement.objects.bulk_create([
+                StockMovement(
+                    shop_id=shop_id, product_id=product_id, movement_type=movement_type, weight=delta,
+                    entity_type=entity_type, entity_id=entity_id, created_by_id=user_id, created_at=now,
+                )
+                for product_id, delta in applied.items()
+            ])
+        cls._refresh(list(deltas))
+        return movements
+
+    @classmethod
+    def _apply_floored(cls, shop_id, rows, deltas, now, weight_units):
+        """Slow path of move(): apply the deltas under a row lock, flooring stock at zero."""
+        current = dict(rows.select_for_update().values_list('product_id', 'weight'))
+        missing = set(deltas) - set(current)
+        if missing:
+            logger.warning(f"[STOCK] No inventory record for shop {shop_id} and products {sorted(missing)}")
+
+        applied = {}
+        for product_id, weight in current.items():
+            delta = max(deltas[product_id], -max(weight, ZERO))
+            if delta != deltas[product_id]:
+                logger.warning(
+                    f"[STOCK] Oversold product {product_id} at shop {shop_id} by "
+                    f"{delta - deltas[product_id]}: only {delta.copy_abs()} was in stock"
+                )
+            if delta:
+                applied[product_id] = delta
+        if applied:
+            rows.filter(product_id__in=applied).update(**cls._balance_updates(applied, now, weight_units))
+        return applied
+
+    @classmethod
+    def sell(cls, sale_item):
+        """Take a new sale line's weight off the product and the shop's stock."""
+        weight = sale_item.weight if sale_item.weight is not None else ZERO
+        if not weight:
+            return
+        # Product weight is what the frontend displays; remaining_weight stays NULL when unset
+        Product.objects.filter(pk=sale_item.product_id).update(
+            weight=Greatest(F('weight') - weight, Value(ZERO)),
+            remaining_weight=Case(
+                When(remaining_weight__isnull=True, then=Value(None)),
+                default=Greatest(F('remaining_weight') - weight, Value(ZERO)),
+                output_field=cls.WEIGHT,
+            ),
+        )
+        product = sale_item.product
+        product.weight = max(ZERO, product.weight - weight)
+        if product.remaining_weight is not None:
+            product.remaining_weight = max(ZERO, product.remaining_weight - weight)
+
+        sale = sale_item.sale
+        cls.move(sale.shop_id, {product.pk: -weight}, 'sale', entity=('sale_item', sale_item.pk), user_id=sale.sold_by_id)
+        try:
+            # Product save signals: analytics, rollup product weight, unit stats
+            TaggedCache.invalidate(TaggedCache.model_tag('Product'))
+            RollupService.mark_dirty(product.created_at)
+            ProductionStatsService.invalidate([product.processing_unit_id])
+        except Exception as e:
+            logger.error(f"[STOCK] Failed to refresh derived data for product {product.pk}: {e}")
+        logger.info(f"[SALE] Sold {weight} of product {product.pk} at shop {sale.shop_id}")
+
+    @staticmethod
+    def record_adjustment(inventory, delta, user_id=None):
+        """Ledger entry for an Inventory row saved directly (admin edits, seeding)."""
+        return StockMovement.objects.create(
+            shop_id=inventory.shop_id, product_id=inventory.product_id, movement_type='adjustment',
+            weight=delta, entity_type='inventory', entity_id=inventory.pk, created_by_id=user_id,
+        )
+
+    @staticmethod
+    def _refresh(product_ids):
+        """What the Inventory save signals would have done, once for the batch."""
+        try:
+            TaggedCache.invalidate(TaggedCache.model_tag('Inventory'))
+            invalidate_product_timelines(product_ids)
+            ProductInfoService.schedule(product_ids)
+        except Exception as e:
+            logger.error(f"[STOCK] Failed to refresh derived data for products {product_ids}: {e}")
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _latest_snapshots(snapshots, at=None):
+        """The newest snapshot per (shop, product) in ``snapshots``, at or before ``at``."""
+        newer = StockSnapshot.objects.filter(shop_id=OuterRef('shop_id'), product_id=OuterRef('product_id'))
+        if at is not None:
+            newer = newer.filter(as_of__lte=at)
+        return snapshots.filter(as_of=Subquery(newer.order_by('-as_of').values('as_of')[:1]))
+
+    @classmethod
+    def stock_as_of(cls, shop_id, at=None, product_ids=None):
+        """
+        ``{product_id: weight}`` of the shop's stock at ``at`` (now when
+        None), optionally limited to ``product_ids``. Two queries.
+        """
+        snapshots = StockSnapshot.objects.filter(shop_id=shop_id)
+        movements = StockMovement.objects.filter(shop_id=shop_id)
+        if at is not None:
+            snapshots = snapshots.filter(as_of__lte=at)
+            movements = movements.filter(created_at__lte=at)
+        if product_ids is not None:
+            snapshots = snapshots.filter(product_id__in=product_ids)
+            movements = movements.filter(product_id__in=product_ids)
+
+        # Compaction deletes every movement before its cut-off, so the
+        # movements left are all newer than the latest snapshot
+        stock = dict(cls._latest_snapshots(snapshots, at).values_list('product_id', 'weight'))
+        for row in movements.order_by().values('product_id').annotate(total=Sum('weight')):
+            stock[row['product_id']] = stock.get(row['product_id'], ZERO) + row['total']
+        return stock
+
+    @classmethod
+    def balance(cls, shop_id, product_id, at=None):
+        """Stock of one product at a shop at ``at`` (now when None)."""
+        return cls.stock_as_of(shop_id, at, product_ids=[product_id]).get(product_id, ZERO)
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def compact(cls, before=None):
+        """
+        Fold movements created before ``before`` (default: the retention
+        window) into one snapshot per (shop, product) at ``before`` and
+        delete them. Returns the number of snapshots written.
+        """
+        if before is None:
+            before = timezone.now() - timedelta(days=cls.RETENTION_DAYS)
+        with transaction.atomic():
+            old = StockMovement.objects.filter(created_at__lt=before)
+            # Bound by id so rows inserted while compacting are never deleted unseen
+            last_id = old.aggregate(last_id=Max('id'))['last_id']
+            if last_id is None:
+                return 0
+            old = old.filter(id__lte=last_id)
+            totals = list(
+                old.order_by().values('shop_id', 'product_id').annotate(total=Sum('weight'), count=Count('id'))
+            )
+            previous = {
+                (shop_id, product_id): weight
+                for shop_id, product_id, weight in cls._latest_snapshots(StockSnapshot.objects.filter(
+                    shop_id__in={row['shop_id'] for row in totals},
+                    product_id__in={row['product_id'] for row in totals},
+                )).values_list('shop_id', 'product_id', 'weight')
+            }
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(
+                    shop_id=row['shop_id'], product_id=row['product_id'], as_of=before,
+                    weight=previous.get((row['shop_id'], row['product_id']), ZERO) + row['total'],
+                    movement_count=row['count'],
+                )
+                for row in totals
+            ])
+            deleted, _ = old.delete()
+
+        logger.info(f"[STOCK] Compacted {deleted} movements into {len(totals)} snapshots as of {before:%Y-%m-%d %H:%M}")
+        return len(totals)
@@ -0,0 +1,135 @@
+"""
+Tagged Cache for MeatTrace
+
+Namespace-versioned cache entries. Every entry declares the tags it
+depends on - models (``model:Animal``), tenants (``processing_unit:3``,
+``shop:7``) or plain namespaces (``metrics``, ``geocoding``). Each tag has a
+version token in the cache; an entry stores the tokens it was computed
+against and is only served while they are all unchanged. Invalidating a
+tag replaces its token, which drops exactly the entries that depend on it
+and leaves everything else in the cache (sessions, throttle counters, ...)
+untouched. A read costs one get_many for the entry and its tag tokens.
+
+Usage:
+    from meat_trace.utils.tagged_cache import TaggedCache
+
+    tags = TaggedCache.model_tags('Animal', 'Product') + ('metrics',)
+    data = TaggedCache.get_or_set('admin_dashboard_overview', tags, compute, 300)
+    TaggedCache.invalidate(TaggedCache.model_tag('Animal'))
+"""
+
+import logging
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class TaggedCache:
+    """
+    Cache entries invalidated through versioned tags instead of key deletes.
+    """
+
+    KEY_PREFIX = 'tagged_cache'
+
+    # Seconds a tag version token is kept (must outlive every entry timeout)
+    TAG_TIMEOUT = 60 * 60 * 24 * 31
+
+    # ── Tags ─────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def model_tag(model):
+        """Tag of a model class or model name."""
+        name = model if isinstance(model, str) else model.__name__
+        return f'model:{name}'
+
+    @classmethod
+    def model_tags(cls, *models):
+        return tuple(cls.model_tag(model) for model in models)
+
+    @staticmethod
+    def tenant_tag(kind, pk):
+        """Tag of one tenant, e.g. ``tenant_tag('processing_unit', 3)``."""
+        return f'{kind}:{pk}'
+
+    @classmethod
+    def tag_key(cls, tag):
+        return f'{cls.KEY_PREFIX}:tag:{tag}'
+
+    @classmethod
+    def entry_key(cls, key):
+        return f'{cls.KEY_PREFIX}:entry:{key}'
+
+    @classmethod
+    def invalidate(cls, *tags):
+        """Drop every entry that depends on any of ``tags``."""
+        tags = {tag for tag in tags if tag}
+        if tags:
+            token = uuid.uuid4().hex
+            cache.set_many({cls.tag_key(tag): token for tag in tags}, cls.TAG_TIMEOUT)
+
+    @classmethod
+    def _current_versions(cls, tag_keys, known):
+        """Tokens of ``tag_keys``, seeding any that are missing."""
+        missing = [key for key in tag_keys if known.get(key) is None]
+        if not missing:
+            return {key: known[key] for key in tag_keys}
+        # Seed with add() so a concurrent invalidate wins, then re-read, so
+        # an entry computed now never validates against a replaced token.
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, cls.TAG_TIMEOUT)
+        return cache.get_many(tag_keys)
+
+    # ── Entries ──────────────────────────────────────────────────────────────
+
+    @classmethod
+    def get(cls, key, tags, default=None):
+        """The cached value of ``key`` if none of its tags changed since it was set."""
+        tag_keys = [cls.tag_key(tag) for tag in sorted(set(tags))]
+        cached = cache.get_many([cls.entry_key(key)] + tag_keys)
+        entry = cached.get(cls.entry_key(key))
+        if entry is None:
+            return default
+        if any(cached.get(tag_key) is None or entry['versions'].get(tag_key) != cached[tag_key]
+               for tag_key in tag_keys):
+            return default
+        return entry['value']
+
+    @classmethod
+    def set(cls, key, value, tags, timeout=None):
+        """Cache ``value`` under ``key`` against the current versions of ``tags``."""
+        tag_keys = [cls.tag_key(tag) for tag in sorted(set(tags))]
+        versions = cls._current_versions(tag_keys, cache.get_many(tag_keys))
+        cls._store(key, value, tag_keys, versions, timeout)
+
+    @classmethod
+    def _store(cls, key, value, tag_keys, versions, timeout):
+        if any(versions.get(tag_key) is None for tag_key in tag_keys):
+            return
+        cache.set(cls.entry_key(key), {'versions': versions, 'value': value}, timeout)
+
+    @classmethod
+    def get_or_set(cls, key, tags, compute, timeout=None):
+        """
+        The cached value of ``key``, or ``compute()`` cached against ``tags``.
+
+        Tag versions are read before computing, so a change that lands while
+        the value is being computed leaves the stored entry already stale.
+        """
+        tag_keys = [cls.tag_key(tag) for tag in sorted(set(tags))]
+        cached = cache.get_many([cls.entry_key(key)] + tag_keys)
+        entry = cached.get(cls.entry_key(key))
+        versions = cls._current_versions(tag_keys, cached)
+        if entry is not None and all(
+            entry['versions'].get(tag_key) == cached.get(tag_key) for tag_key in tag_keys
+        ):
+            return entry['value']
+
+        value = compute()
+        cls._store(key, value, tag_keys, versions, timeout)
+        return value
+
+    @classmethod
+    def delete(cls, key):
+        cache.delete(cls.entry_key(key))
@@ -0,0 +1,146 @@
+"""
+Time Buckets for MeatTrace
+
+Bucketed aggregation for analytics time series. Each series is a single
+GROUP BY query over a truncated timestamp (TruncHour / TruncDate /
+TruncWeek / TruncMonth) restricted to whole buckets, and gaps are filled
+with zeros in Python, so the cost does not depend on the number of buckets.
+
+Usage:
+    from meat_trace.utils.time_buckets import TimeBuckets
+
+    counts = TimeBuckets.series(Animal.objects.all(), 'created_at', start, end, 'day')
+    # {date(2024, 1, 1): 3, date(2024, 1, 2): 0, ...}
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDate, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+
+class TimeBuckets:
+    """
+    Zero-filled, single-query time series over hour/day/week/month buckets.
+
+    Hour buckets are keyed by aware datetimes in the current time zone; the
+    other periods are keyed by the date the bucket starts on (weeks start on
+    Monday, months on the 1st).
+    """
+
+    PERIODS = ('hour', 'day', 'week', 'month')
+
+    @classmethod
+    def trunc(cls, field, period):
+        if period == 'hour':
+            return TruncHour(field)
+        if period == 'day':
+            return TruncDate(field)
+        if period == 'week':
+            return TruncWeek(field, output_field=DateField())
+        if period == 'month':
+            return TruncMonth(field, output_field=DateField())
+        raise ValueError(f"Unknown period: {period}")
+
+    @classmethod
+    def bucket_start(cls, value, period):
+        """The key of the bucket containing ``value`` (a date or datetime)."""
+        if isinstance(value, datetime):
+            if timezone.is_aware(value):
+                value = timezone.localtime(value)
+            if period == 'hour':
+                return value.replace(minute=0, second=0, microsecond=0)
+            value = value.date()
+        elif period == 'hour':
+            return cls.to_datetime(value)
+
+        if period == 'week':
+            return value - timedelta(days=value.weekday())
+        if period == 'month':
+            return value.replace(day=1)
+        return value
+
+    @classmethod
+    def next_bucket(cls, key, period):
+        if period == 'hour':
+            return timezone.localtime(key + timedelta(hours=1))
+        if period == 'day':
+            return key + timedelta(days=1)
+        if period == 'week':
+            return key + timedelta(weeks=1)
+        if key.month == 12:
+            return key.replace(year=key.year + 1, month=1)
+        return key.replace(month=key.month + 1)
+
+    @staticmethod
+    def to_datetime(value):
+        """Start of ``value`` as an aware datetime in the current time zone."""
+        if isinstance(value, datetime):
+            return value
+        return timezone.make_aware(datetime.combine(value, time.min))
+
+    @classmethod
+    def buckets(cls, start, end, period):
+        """Keys of every bucket from the one containing ``start`` to the one containing ``end``."""
+        key = cls.bucket_start(start, period)
+        last = cls.bucket_start(end, period)
+        keys = []
+        while key <= last:
+            keys.append(key)
+            key = cls.next_bucket(key, period)
+        return keys
+
+    @classmethod
+    def series(cls, queryset, field, start, end, period, aggregate=None):
+        """
+        Aggregate ``queryset`` per bucket of ``field`` between ``start`` and
+        ``end`` (both inclusive, widened to whole buckets).
+
+        ``aggregate`` defaults to Count('id'). Returns a dict of bucket key ->
+        value in chronological order, with 0 for empty buckets.
+        """
+        keys = cls.buckets(start, end, period)
+        if not keys:
+            return {}
+        lower = cls.to_datetime(keys[0])
+        upper = cls.to_datetime(cls.next_bucket(keys[-1], period))
+
+        rows = (
+            queryset.filter(**{f'{field}__gte': lower, f'{field}__lt': upper})
+            .annotate(bucket=cls.trunc(field, period))
+            .values('bucket')
+            .annotate(value=aggregate if aggregate is not None else Count('id'))
+            .order_by('bucket')
+        )
+
+        data = dict.fromkeys(keys, 0)
+        for row in rows:
+            key = cls.bucket_start(row['bucket'], period) if period == 'hour' else row['bucket']
+            if key in data:
+                data[key] = row['value'] or 0
+        return data
+
+    @classmethod
+    def table(cls, sources, start, end, period):
+        """
+        Several series over the same buckets, one query per source.
+
+        ``sources`` maps a column name to (queryset, field). Returns a list of
+        (bucket key, {column: value}) in chronological order.
+        """
+        columns = {
+            name: cls.series(queryset, field, start, end, period)
+            for name, (queryset, field) in sources.items()
+        }
+        return [
+            (key, {name: values[key] for name, values in columns.items()})
+            for key in cls.buckets(start, end, period)
+        ]
+
+    @staticmethod
+    def parse_date(value):
+        """Parse an ISO date query parameter; None when absent."""
+        if not value:
+            return None
+        return date.fromisoformat(value)
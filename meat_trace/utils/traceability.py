@@ -1,191 +1,234 @@
 import logging
+from collections import defaultdict
+
+from django.db import IntegrityError
+from django.db.models import Case, Count, F, Q, Sum, When, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
-from ..models import Animal, Product, CarcassMeasurement
+from django.utils.dateparse import parse_datetime
+from ..models import Animal, Product, CarcassMeasurement, Inventory, OrderItem, ProductTimelineSnapshot
+from .page_cache import PageCache
 
 logger = logging.getLogger(__name__)
 
-def get_product_timeline(product):
+# Sales listed individually on the product info page; older ones are collapsed.
+MAX_SALE_EVENTS = 20
+
+
+class TimelineContext:
     """
-    Build a comprehensive traceability timeline for a product.
-    Refactored from views.py for reusability.
+    Shared lookups for building many timelines in one pass.
+
+    Products cut from the same animal share its registration, transfer,
+    reception, slaughter and breakdown events, so they are built once per
+    animal. ``changed_at`` records the snapshot change time read alongside
+    each product's events (used for page-cache tokens).
     """
+
+    def __init__(self):
+        self.animal_events = {}
+        self.changed_at = {}
+
+
+def _animal_events(animal, product):
+    """Events 1-5: everything that happened to the source animal."""
     timeline = []
-    
+
     # 1. Animal Registration (Farmer Stage)
-    if product.animal:
-        animal = product.animal
+    # Building this section touches several optional/related fields
+    # (abbatoir profile, computed age, etc). A single bad field used to
+    # raise out of this function uncaught, which the calling view turned
+    # into a generic failure — the whole product page (and every other
+    # timeline stage) would silently disappear instead of just this one
+    # section. Isolate it so one bad field can't hide the entire product.
+    try:
+        farmer_details = {
+            'Animal ID': animal.animal_id,
+            'Animal Name': animal.animal_name or 'Not named',
+            'Species': animal.get_species_display(),
+            'Gender': animal.get_gender_display() if hasattr(animal, 'gender') else 'Unknown',
+            'Age': f'{animal.current_age_months} months' if animal.current_age_months else 'Not recorded',
+            'Live Weight': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
+            'Health Status': animal.health_status or 'Not recorded',
+            'Breed': animal.breed or 'Not specified',
+            'Abbatoir Name': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
+            'Abbatoir Email': animal.abbatoir.email or 'Not provided',
+            'Notes': animal.notes or 'None'
+        }
 
-        # Building this section touches several optional/related fields
-        # (abbatoir profile, computed age, etc). A single bad field used to
-        # raise out of this function uncaught, which the calling view turned
-        # into a generic failure — the whole product page (and every other
-        # timeline stage) would silently disappear instead of just this one
-        # section. Isolate it so one bad field can't hide the entire product.
-        try:
-            farmer_details = {
-                'Animal ID': animal.animal_id,
-                'Animal Name': animal.animal_name or 'Not named',
-                'Species': animal.get_species_display(),
-                'Gender': animal.get_gender_display() if hasattr(animal, 'gender') else 'Unknown',
-                'Age': f'{animal.current_age_months} months' if animal.current_age_months else 'Not recorded',
-                'Live Weight': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
-                'Health Status': animal.health_status or 'Not recorded',
-                'Breed': animal.breed or 'Not specified',
-                'Abbatoir Name': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
-                'Abbatoir Email': animal.abbatoir.email or 'Not provided',
-                'Notes': animal.notes or 'None'
-            }
+        # Add abbatoir phone if available
+        if hasattr(animal.abbatoir, 'profile') and hasattr(animal.abbatoir.profile, 'phone'):
+            farmer_details['Abbatoir Phone'] = animal.abbatoir.profile.phone or 'Not provided'
+        elif hasattr(animal.abbatoir, 'phone_number'):
+            farmer_details['Abbatoir Phone'] = animal.abbatoir.phone_number or 'Not provided'
 
-            # Add abbatoir phone if available
-            if hasattr(animal.abbatoir, 'profile') and hasattr(animal.abbatoir.profile, 'phone'):
-                farmer_details['Abbatoir Phone'] = animal.abbatoir.profile.phone or 'Not provided'
-            elif hasattr(animal.abbatoir, 'phone_number'):
-                farmer_details['Abbatoir Phone'] = animal.abbatoir.phone_number or 'Not provided'
+        timeline.append({
+            'stage': 'Animal Registration',
+            'category': 'abbatoir',
+            'timestamp': animal.created_at,
+            'location': f'Abbatoir - {animal.abbatoir.username}',
+            'actor': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
+            'action': f'Animal {animal.animal_id} registered at farm',
+            'icon': 'fa-clipboard-list',
+            'details': farmer_details
+        })
+    except Exception:
+        logger.exception(
+            'Failed to build Animal Registration timeline entry for animal %s on product %s',
+            getattr(animal, 'animal_id', animal.pk), product.pk,
+        )
+        timeline.append({
+            'stage': 'Animal Registration',
+            'category': 'abbatoir',
+            'timestamp': animal.created_at or product.created_at,
+            'location': 'Abbatoir',
+            'actor': 'Unknown',
+            'action': f'Animal {animal.animal_id} registered at farm (some details unavailable)',
+            'icon': 'fa-clipboard-list',
+            'details': {'Animal ID': animal.animal_id, 'Note': 'Full animal details could not be loaded — see server logs.'},
+        })
+    # 2. Animal Transfer to Processing Unit
+    if animal.transferred_at and animal.transferred_to:
+        # Prefer post-slaughter carcass weight over live weight for transfer record
+        sw = animal.slaughter_weight
+        weight_label = f'{sw} kg' if sw else (f'{animal.live_weight} kg (live)' if animal.live_weight else 'Not recorded')
+        transfer_details = {
+            'From': f'Abbatoir - {animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username}',
+            'To': animal.transferred_to.name,
+            'Transfer Date': animal.transferred_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'Transfer Mode': 'Carcass / Live Animal Transport',
+            'Animal ID': animal.animal_id,
+            'Animal Species': animal.get_species_display(),
+            'Transfer Weight': weight_label,
+            'Live Weight (pre-slaughter)': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
+            'Health Status': animal.health_status or 'Not recorded',
+            'Processing Unit': animal.transferred_to.name,
+            'Processing Unit Location': animal.transferred_to.location if hasattr(animal.transferred_to, 'location') else 'Not specified'
+        }
 
-            timeline.append({
-                'stage': 'Animal Registration',
-                'category': 'abbatoir',
-                'timestamp': animal.created_at,
-                'location': f'Abbatoir - {animal.abbatoir.username}',
-                'actor': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
-                'action': f'Animal {animal.animal_id} registered at farm',
-                'icon': 'fa-clipboard-list',
-                'details': farmer_details
-            })
+        timeline.append({
+            'stage': 'Animal Transfer to Processing',
+            'category': 'logistics',
+            'timestamp': animal.transferred_at,
+            'location': animal.transferred_to.name,
+            'actor': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
+            'action': f'Live animal transported to {animal.transferred_to.name}',
+            'icon': 'fa-truck',
+            'details': transfer_details
+        })
+
+    # 3. Animal Reception at Processing Unit
+    if animal.received_at and animal.received_by:
+        reception_details = {
+            'Received By': animal.received_by.get_full_name() if animal.received_by.first_name else animal.received_by.username,
+            'Reception Date': animal.received_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'Processing Unit': animal.transferred_to.name if animal.transferred_to else 'Unknown',
+            'Animal ID': animal.animal_id,
+            'Species': animal.get_species_display(),
+            'Reception Status': 'Accepted for processing',
+            'Health Inspection': animal.health_status or 'Passed',
+        }
+
+        if hasattr(animal.received_by, 'email'):
+            reception_details['Inspector Email'] = animal.received_by.email or 'Not provided'
+
+        timeline.append({
+            'stage': 'Animal Reception & Inspection',
+            'category': 'processing',
+            'timestamp': animal.received_at,
+            'location': animal.transferred_to.name if animal.transferred_to else 'Processing Unit',
+            'actor': animal.received_by.get_full_name() if animal.received_by.first_name else animal.received_by.username,
+            'action': f'Animal received, inspected and approved for processing',
+            'icon': 'fa-check-circle',
+            'details': reception_details
+        })
+
+    # 4. Slaughter Event
+    if animal.slaughtered and animal.slaughtered_at:
+        slaughter_details = {
+            'Animal ID': animal.animal_id,
+            'Species': animal.get_species_display(),
+            'Slaughter Date': animal.slaughtered_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'Processing Unit': animal.transferred_to.name if animal.transferred_to else 'Unknown',
+            'Abbatoir': animal.abbatoir_name or 'Not specified',
+            'Pre-Slaughter Weight': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
+        }
+
+        # Add carcass measurement if available
+        try:
+            if hasattr(animal, 'carcass_measurement') and animal.carcass_measurement:
+                cm = animal.carcass_measurement
+                slaughter_details['Carcass Weight'] = f'{cm.carcass_weight} kg' if hasattr(cm, 'carcass_weight') and cm.carcass_weight else 'Not recorded'
+                slaughter_details['Dressing Percentage'] = f'{(cm.carcass_weight / animal.live_weight * 100):.1f}%' if animal.live_weight and hasattr(cm, 'carcass_weight') and cm.carcass_weight else 'Not calculated'
         except Exception:
-            logger.exception(
-                'Failed to build Animal Registration timeline entry for animal %s on product %s',
-                getattr(animal, 'animal_id', animal.pk), product.pk,
-            )
-            timeline.append({
-                'stage': 'Animal Registration',
-                'category': 'abbatoir',
-                'timestamp': animal.created_at or product.created_at,
-                'location': 'Abbatoir',
-                'actor': 'Unknown',
-                'action': f'Animal {animal.animal_id} registered at farm (some details unavailable)',
-                'icon': 'fa-clipboard-list',
-                'details': {'Animal ID': animal.animal_id, 'Note': 'Full animal details could not be loaded — see server logs.'},
-            })
-        # 2. Animal Transfer to Processing Unit
-        if animal.transferred_at and animal.transferred_to:
-            # Prefer post-slaughter carcass weight over live weight for transfer record
-            sw = animal.slaughter_weight
-            weight_label = f'{sw} kg' if sw else (f'{animal.live_weight} kg (live)' if animal.live_weight else 'Not recorded')
-            transfer_details = {
-                'From': f'Abbatoir - {animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username}',
-                'To': animal.transferred_to.name,
-                'Transfer Date': animal.transferred_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Transfer Mode': 'Carcass / Live Animal Transport',
-                'Animal ID': animal.animal_id,
-                'Animal Species': animal.get_species_display(),
-                'Transfer Weight': weight_label,
-                'Live Weight (pre-slaughter)': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
-                'Health Status': animal.health_status or 'Not recorded',
-                'Processing Unit': animal.transferred_to.name,
-                'Processing Unit Location': animal.transferred_to.location if hasattr(animal.transferred_to, 'location') else 'Not specified'
-            }
-            
-            timeline.append({
-                'stage': 'Animal Transfer to Processing',
-                'category': 'logistics',
-                'timestamp': animal.transferred_at,
-                'location': animal.transferred_to.name,
-                'actor': animal.abbatoir.get_full_name() if animal.abbatoir.first_name else animal.abbatoir.username,
-                'action': f'Live animal transported to {animal.transferred_to.name}',
-                'icon': 'fa-truck',
-                'details': transfer_details
-            })
-        
-        # 3. Animal Reception at Processing Unit
-        if animal.received_at and animal.received_by:
-            reception_details = {
-                'Received By': animal.received_by.get_full_name() if animal.received_by.first_name else animal.received_by.username,
-                'Reception Date': animal.received_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Processing Unit': animal.transferred_to.name if animal.transferred_to else 'Unknown',
-                'Animal ID': animal.animal_id,
-                'Species': animal.get_species_display(),
-                'Reception Status': 'Accepted for processing',
-                'Health Inspection': animal.health_status or 'Passed',
-            }
-            
-            if hasattr(animal.received_by, 'email'):
-                reception_details['Inspector Email'] = animal.received_by.email or 'Not provided'
-            
-            timeline.append({
-                'stage': 'Animal Reception & Inspection',
-                'category': 'processing',
-                'timestamp': animal.received_at,
-                'location': animal.transferred_to.name if animal.transferred_to else 'Processing Unit',
-                'actor': animal.received_by.get_full_name() if animal.received_by.first_name else animal.received_by.username,
-                'action': f'Animal received, inspected and approved for processing',
-                'icon': 'fa-check-circle',
-                'details': reception_details
-            })
-        
-        # 4. Slaughter Event
-        if animal.slaughtered and animal.slaughtered_at:
-            slaughter_details = {
-                'Animal ID': animal.animal_id,
-                'Species': animal.get_species_display(),
-                'Slaughter Date': animal.slaughtered_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Processing Unit': animal.transferred_to.name if animal.transferred_to else 'Unknown',
-                'Abbatoir': animal.abbatoir_name or 'Not specified',
-                'Pre-Slaughter Weight': f'{animal.live_weight} kg' if animal.live_weight else 'Not recorded',
+            pass
+
+        timeline.append({
+            'stage': 'Slaughter',
+            'category': 'processing',
+            'timestamp': animal.slaughtered_at,
+            'location': animal.transferred_to.name if animal.transferred_to else 'Processing Unit',
+            'actor': 'Processing Unit Slaughter Team',
+            'action': f'Animal {animal.animal_id} ({animal.get_species_display()}) slaughtered',
+            'icon': 'fa-cut',
+            'details': slaughter_details
+        })
+
+        # 5. Carcass Breakdown - Detailed Part Tracking
+        if animal.slaughter_parts.exists():
+            parts = animal.slaughter_parts.all()
+            total_parts_weight = sum([p.weight for p in parts if p.weight])
+
+            parts_breakdown = {
+                'Total Parts Created': parts.count(),
+                'Total Parts Weight': f'{total_parts_weight} kg',
+                'Breakdown Date': animal.slaughtered_at.strftime('%Y-%m-%d %H:%M:%S'),
             }
-            
-            # Add carcass measurement if available
-            try:
-                if hasattr(animal, 'carcass_measurement') and animal.carcass_measurement:
-                    cm = animal.carcass_measurement
-                    slaughter_details['Carcass Weight'] = f'{cm.carcass_weight} kg' if hasattr(cm, 'carcass_weight') and cm.carcass_weight else 'Not recorded'
-                    slaughter_details['Dressing Percentage'] = f'{(cm.carcass_weight / animal.live_weight * 100):.1f}%' if animal.live_weight and hasattr(cm, 'carcass_weight') and cm.carcass_weight else 'Not calculated'
-            except Exception:
-                pass
-            
+
+            for idx, part in enumerate(parts, 1):
+                part_key = f'Part {idx}'
+                part_value = f'{part.get_part_type_display()} - {part.weight} kg'
+
+                if hasattr(part, 'transferred_to') and part.transferred_to:
+                    part_value += f' \u2192 {part.transferred_to.name}'
+                elif hasattr(part, 'processing_unit') and part.processing_unit:
+                    part_value += f' (at {part.processing_unit.name})'
+
+                parts_breakdown[part_key] = part_value
+
             timeline.append({
-                'stage': 'Slaughter',
+                'stage': 'Carcass Breakdown & Distribution',
                 'category': 'processing',
                 'timestamp': animal.slaughtered_at,
                 'location': animal.transferred_to.name if animal.transferred_to else 'Processing Unit',
-                'actor': 'Processing Unit Slaughter Team',
-                'action': f'Animal {animal.animal_id} ({animal.get_species_display()}) slaughtered',
-                'icon': 'fa-cut',
-                'details': slaughter_details
+                'actor': 'Butchery Team',
+                'action': f'Carcass divided into {parts.count()} parts',
+                'icon': 'fa-th-large',
+                'details': parts_breakdown
             })
-            
-            # 5. Carcass Breakdown - Detailed Part Tracking
-            if animal.slaughter_parts.exists():
-                parts = animal.slaughter_parts.all()
-                total_parts_weight = sum([p.weight for p in parts if p.weight])
-                
-                parts_breakdown = {
-                    'Total Parts Created': parts.count(),
-                    'Total Parts Weight': f'{total_parts_weight} kg',
-                    'Breakdown Date': animal.slaughtered_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }
-                
-                for idx, part in enumerate(parts, 1):
-                    part_key = f'Part {idx}'
-                    part_value = f'{part.get_part_type_display()} - {part.weight} kg'
-                    
-                    if hasattr(part, 'transferred_to') and part.transferred_to:
-                        part_value += f' \u2192 {part.transferred_to.name}'
-                    elif hasattr(part, 'processing_unit') and part.processing_unit:
-                        part_value += f' (at {part.processing_unit.name})'
-                    
-                    parts_breakdown[part_key] = part_value
-                
-                timeline.append({
-                    'stage': 'Carcass Breakdown & Distribution',
-                    'category': 'processing',
-                    'timestamp': animal.slaughtered_at,
-                    'location': animal.transferred_to.name if animal.transferred_to else 'Processing Unit',
-                    'actor': 'Butchery Team',
-                    'action': f'Carcass divided into {parts.count()} parts',
-                    'icon': 'fa-th-large',
-                    'details': parts_breakdown
-                })
+
+    return timeline
+
+
+def get_product_timeline(product, context=None):
+    """
+    Build a comprehensive traceability timeline for a product.
+    Refactored from views.py for reusability.
+
+    Pass a shared TimelineContext when building timelines for several
+    products so that per-animal events are computed once.
+    """
+    timeline = []
+    
+    # 1-5. Animal stages (shared between products of the same animal)
+    if product.animal:
+        animal = product.animal
+        if context is None:
+            timeline.extend(_animal_events(animal, product))
+        else:
+            if animal.pk not in context.animal_events:
+                context.animal_events[animal.pk] = _animal_events(animal, product)
+            timeline.extend(context.animal_events[animal.pk])
     else:
         logger.info('Product %s has no linked animal (animal_id is NULL) — skipping Animal Registration stage', product.pk)
 
@@ -271,3 +314,366 @@ def get_product_timeline(product):
     # Sort timeline chronologically
     timeline.sort(key=lambda x: x['timestamp'])
     return timeline
+
+
+def _latest_sales(product_ids):
+    """
+    The latest MAX_SALE_EVENTS order items of each product, oldest first,
+    keyed by product id. One windowed query computes each sale's position,
+    the running weight sold and the product's total sale count.
+    """
+    partition = [F('product_id')]
+    sale_window_order = [F('order__created_at').asc(), F('id').asc()]
+    order_items = (
+        OrderItem.objects.filter(product_id__in=product_ids)
+        .select_related('order', 'order__shop')
+        .annotate(
+            weight_sold=Case(When(weight__gt=0, then=F('weight')), default=F('quantity')),
+        )
+        .annotate(
+            sale_number=Window(expression=RowNumber(), partition_by=partition, order_by=sale_window_order),
+            total_sold_so_far=Window(expression=Sum('weight_sold'), partition_by=partition, order_by=sale_window_order),
+            sales_count=Window(expression=Count('id'), partition_by=partition),
+        )
+        .filter(sale_number__gt=F('sales_count') - MAX_SALE_EVENTS)
+        .order_by('product_id', 'order__created_at', 'id')
+    )
+    sales = defaultdict(list)
+    for item in order_items:
+        sales[item.product_id].append(item)
+    return sales
+
+
+def _shop_stock(product_ids):
+    """Inventory rows (with their shop) of each product, keyed by product id."""
+    stock = defaultdict(list)
+    for inv_item in Inventory.objects.filter(product_id__in=product_ids).select_related('shop').order_by('id'):
+        stock[inv_item.product_id].append(inv_item)
+    return stock
+
+
+def get_product_activity_events(product, order_items=None, inventory=None):
+    """
+    Build the post-production events for a product: quality rejection,
+    retail sales with running inventory, and current shop stock.
+    Refactored from product_info_view so it can be materialized.
+
+    ``order_items`` and ``inventory`` are the product's entries from
+    _latest_sales() / _shop_stock() when building many products at once.
+    """
+    timeline = []
+
+    # 9. Quality Issues / Rejection - Enhanced
+    if hasattr(product, 'rejected_at') and product.rejected_at and hasattr(product, 'rejection_status') and product.rejection_status:
+        rejection_details = {
+            'Rejected By': product.rejected_by.get_full_name() if product.rejected_by and product.rejected_by.first_name else (product.rejected_by.username if product.rejected_by else 'Unknown'),
+            'Rejection Date': product.rejected_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'Rejection Status': product.get_rejection_status_display() if hasattr(product, 'get_rejection_status_display') else product.rejection_status,
+            'Weight Rejected': f'{product.weight_rejected} {product.weight_unit}' if hasattr(product, 'weight_rejected') and product.weight_rejected else f'Full weight ({product.weight} {product.weight_unit})',
+            'Reason': product.rejection_reason or 'Not specified',
+            'Location': product.received_by_shop.name if product.received_by_shop else 'Unknown',
+        }
+
+        if product.rejected_by and hasattr(product.rejected_by, 'email') and product.rejected_by.email:
+            rejection_details['Rejector Email'] = product.rejected_by.email
+
+        timeline.append({
+            'stage': 'Product Rejection / Quality Issue',
+            'category': 'quality',
+            'timestamp': product.rejected_at,
+            'location': product.received_by_shop.name if product.received_by_shop else 'Shop',
+            'actor': product.rejected_by.get_full_name() if product.rejected_by and product.rejected_by.first_name else (product.rejected_by.username if product.rejected_by else 'Shop Staff'),
+            'action': f'Product rejected: {product.rejection_reason or "Quality concerns"}',
+            'icon': 'fa-times-circle',
+            'details': rejection_details
+        })
+
+    # 10. Sales Events - Inventory Tracking (no customer PII: this page is
+    # public and unauthenticated, reachable by anyone who scans the
+    # product's QR code, so past buyers' names/phone/email/address must
+    # never appear here — only facts about the product itself).
+    #
+    # Only the most recent MAX_SALE_EVENTS sales are fetched; older sales
+    # are collapsed into a summary event.
+    initial_inventory = float(product.weight) if product.weight else 0
+    if order_items is None:
+        order_items = _latest_sales([product.pk]).get(product.pk, [])
+
+    sales_count = order_items[0].sales_count if order_items else 0
+    total_weight_sold = float(order_items[-1].total_sold_so_far or 0) if order_items else 0
+    remaining_after_sale = initial_inventory - total_weight_sold if order_items else 0
+
+    if order_items and order_items[0].sale_number > 1:
+        first_shown = order_items[0]
+        collapsed_count = first_shown.sale_number - 1
+        collapsed_weight = float(first_shown.total_sold_so_far or 0) - float(first_shown.weight_sold or 0)
+        timeline.append({
+            'stage': f'Sales #1 - #{collapsed_count}',
+            'category': 'sale',
+            'timestamp': first_shown.order.created_at,
+            'location': 'Retail Shops',
+            'actor': 'Retail Shops',
+            'action': f'{collapsed_count} earlier sales totalling {collapsed_weight} {product.weight_unit}',
+            'icon': 'fa-shopping-cart',
+            'details': {
+                'Earlier Sales': collapsed_count,
+                'Weight Sold': f'{collapsed_weight} {product.weight_unit}',
+                'Note': f'Only the latest {MAX_SALE_EVENTS} sales are listed individually',
+            }
+        })
+
+    for item in order_items:
+        shop = item.order.shop
+        order = item.order
+        idx = item.sale_number
+        total_sold_so_far = float(item.total_sold_so_far or 0)
+        remaining = initial_inventory - total_sold_so_far
+
+        # Build sale details
+        sale_details = {
+            'Sale Number': f'#{idx} of {sales_count}',
+            'Sale Date & Time': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+        # Sale Details
+        sale_details['---Sale Details---'] = '---'
+        sale_details['Weight Sold This Order'] = f'{item.weight} {product.weight_unit}'
+        sale_details['Unit Price'] = f'TZS {item.unit_price}' if item.unit_price else 'N/A'
+        sale_details['Subtotal for This Item'] = f'TZS {item.subtotal}' if item.subtotal else f'TZS {float(item.weight_sold) * float(item.unit_price) if item.unit_price else 0:.2f}'
+        sale_details['Order Status'] = order.get_status_display()
+
+        # Inventory Tracking
+        sale_details['---Inventory Status---'] = '---'
+        sale_details['Initial Product Weight'] = f'{initial_inventory} {product.weight_unit}'
+        sale_details['Total Sold Up To Now'] = f'{total_sold_so_far} {product.weight_unit}'
+        sale_details['Remaining After This Sale'] = f'{remaining} {product.weight_unit}'
+        sale_details['Percentage Sold'] = f'{(total_sold_so_far / initial_inventory * 100):.1f}%' if initial_inventory > 0 else 'N/A'
+
+        # Shop Information
+        sale_details['---Shop Information---'] = '---'
+        sale_details['Shop Name'] = shop.name if shop else 'Unknown Shop'
+        if shop and hasattr(shop, 'location'):
+            sale_details['Shop Location'] = shop.location
+
+        timeline.append({
+            'stage': f'Sale #{idx}',
+            'category': 'sale',
+            'timestamp': order.created_at,
+            'location': shop.name if shop else 'Retail Shop',
+            'actor': shop.name if shop else 'Retail Shop',
+            'action': f'Sold {item.weight_sold} {product.weight_unit} at retail',
+            'icon': 'fa-shopping-cart',
+            'details': sale_details
+        })
+
+    # 11. Current Inventory Status (if product still has remaining stock)
+    if remaining_after_sale > 0 or total_weight_sold == 0:
+        if inventory is None:
+            inventory = product.inventory.select_related('shop')
+        for inv_item in inventory:
+            inventory_details = {
+                'Shop Name': inv_item.shop.name if inv_item.shop else 'Unknown',
+                'Current Stock': f'{inv_item.weight} {product.weight_unit}',
+                'Stock Status': 'In Stock' if inv_item.weight > 0 else 'Out of Stock',
+                'Last Updated': inv_item.updated_at.strftime('%Y-%m-%d %H:%M:%S') if hasattr(inv_item, 'updated_at') and inv_item.updated_at else 'Not tracked',
+            }
+
+            if hasattr(inv_item.shop, 'location'):
+                inventory_details['Shop Location'] = inv_item.shop.location
+
+            if total_weight_sold > 0:
+                inventory_details['Original Weight'] = f'{initial_inventory} {product.weight_unit}'
+                inventory_details['Total Sold'] = f'{total_weight_sold} {product.weight_unit}'
+                inventory_details['Sales Count'] = sales_count
+
+            timeline.append({
+                'stage': 'Current Inventory Status',
+                'category': 'shop',
+                'timestamp': inv_item.updated_at if hasattr(inv_item, 'updated_at') and inv_item.updated_at else product.created_at,
+                'location': inv_item.shop.name if inv_item.shop else 'Shop',
+                'actor': 'Inventory System',
+                'action': f'Current stock level: {inv_item.weight} {product.weight_unit}',
+                'icon': 'fa-warehouse',
+                'details': inventory_details
+            })
+
+    return timeline
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MATERIALIZED TIMELINE SNAPSHOTS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _timeline_product_queryset():
+    """Product queryset with every relation the timeline builders walk."""
+    return Product.objects.select_related(
+        'animal', 'animal__abbatoir', 'animal__abbatoir__profile',
+        'animal__transferred_to', 'animal__received_by', 'animal__carcass_measurement',
+        'processing_unit', 'category', 'slaughter_part', 'transferred_to',
+        'received_by_shop', 'rejected_by',
+    ).prefetch_related(
+        'animal__slaughter_parts__transferred_to',
+        'ingredients__slaughter_part',
+    )
+
+
+def _load_events(events):
+    """Restore datetime timestamps on events read back from a JSONField."""
+    loaded = []
+    for event in events:
+        event = dict(event)
+        timestamp = event.get('timestamp')
+        if isinstance(timestamp, str):
+            event['timestamp'] = parse_datetime(timestamp)
+        loaded.append(event)
+    return loaded
+
+
+def rebuild_timeline_snapshot(product_id):
+    """Rebuild and persist the timeline snapshot for a product.
+
+    The version is read before the events are built and recorded as
+    ``built_version``, so an invalidation that races with the rebuild
+    leaves the snapshot stale instead of being silently overwritten.
+    """
+    product = _timeline_product_queryset().get(pk=product_id)
+    try:
+        snapshot, _ = ProductTimelineSnapshot.objects.get_or_create(product=product)
+    except IntegrityError:
+        snapshot = ProductTimelineSnapshot.objects.get(product=product)
+    version = snapshot.version
+
+    snapshot.trace_events = get_product_timeline(product)
+    snapshot.activity_events = get_product_activity_events(product)
+    snapshot.built_version = version
+    snapshot.built_at = timezone.now()
+    ProductTimelineSnapshot.objects.filter(pk=snapshot.pk).update(
+        trace_events=snapshot.trace_events,
+        activity_events=snapshot.activity_events,
+        built_version=version,
+        built_at=snapshot.built_at,
+    )
+    return snapshot
+
+
+def get_timeline_snapshot(product):
+    """Return a fresh timeline snapshot for ``product``.
+
+    Load the product with ``select_related('timeline_snapshot')`` so the
+    common case — nothing changed since the last scan — costs no extra
+    query. Missing or stale snapshots are rebuilt on demand.
+    """
+    try:
+        snapshot = product.timeline_snapshot
+    except ProductTimelineSnapshot.DoesNotExist:
+        snapshot = None
+    if snapshot is None or snapshot.is_stale:
+        snapshot = rebuild_timeline_snapshot(product.pk)
+        product.timeline_snapshot = snapshot
+    return snapshot
+
+
+def get_materialized_timeline(product, include_activity=False):
+    """Chronological timeline for ``product`` served from its snapshot."""
+    snapshot = get_timeline_snapshot(product)
+    events = _load_events(snapshot.trace_events)
+    if include_activity:
+        events.extend(_load_events(snapshot.activity_events))
+    events.sort(key=lambda x: x['timestamp'])
+    return events
+
+
+def get_product_timelines(product_ids, context=None):
+    """
+    Farm-to-shop timelines for many products at once, keyed by product id.
+
+    Fresh snapshots are read in one query; products whose snapshot is missing
+    or stale are loaded together through _timeline_product_queryset(), so
+    animals, slaughter parts, carcass measurements, processing units and
+    shops are fetched once for the whole set, and per-animal stages are
+    built once through the shared ``context``. The query count does not
+    depend on the number of products.
+
+    Rebuilt snapshots (trace and activity events) are written back with one
+    ``bulk_update()`` so later reads are served from them. Missing snapshot
+    rows are created first so every product has a change time; it is
+    recorded in ``context.changed_at``.
+    """
+    context = context if context is not None else TimelineContext()
+    product_ids = list(dict.fromkeys(product_ids))
+    timelines = {}
+    stale = {}
+    snapshots = ProductTimelineSnapshot.objects.filter(product_id__in=product_ids).only(
+        'product_id', 'trace_events', 'version', 'built_version', 'changed_at',
+    )
+    for snapshot in snapshots:
+        context.changed_at[snapshot.product_id] = snapshot.changed_at
+        if snapshot.is_stale:
+            stale[snapshot.product_id] = snapshot
+        else:
+            timelines[snapshot.product_id] = _load_events(snapshot.trace_events)
+
+    missing_ids = [pid for pid in product_ids if pid not in context.changed_at]
+    if missing_ids:
+        changed_at = timezone.now()
+        ProductTimelineSnapshot.objects.bulk_create(
+            [ProductTimelineSnapshot(product_id=pid, changed_at=changed_at) for pid in missing_ids],
+            ignore_conflicts=True,
+        )
+        for snapshot in ProductTimelineSnapshot.objects.filter(product_id__in=missing_ids).only(
+            'product_id', 'version', 'built_version', 'changed_at',
+        ):
+            context.changed_at[snapshot.product_id] = snapshot.changed_at
+            stale[snapshot.product_id] = snapshot
+
+    if stale:
+        stale_ids = list(stale)
+        sales, stock = _latest_sales(stale_ids), _shop_stock(stale_ids)
+        built_at = timezone.now()
+        rebuilt = []
+        for product in _timeline_product_queryset().filter(id__in=stale_ids):
+            timelines[product.id] = get_product_timeline(product, context)
+            snapshot = stale[product.id]
+            snapshot.trace_events = timelines[product.id]
+            snapshot.activity_events = get_product_activity_events(
+                product, sales.get(product.id, []), stock.get(product.id, []),
+            )
+            # The version read above: a concurrent invalidation leaves the row stale
+            snapshot.built_version = snapshot.version
+            snapshot.built_at = built_at
+            rebuilt.append(snapshot)
+        ProductTimelineSnapshot.objects.bulk_update(
+            rebuilt, ['trace_events', 'activity_events', 'built_version', 'built_at'],
+        )
+    return timelines
+
+
+def invalidate_product_timelines(product_ids):
+    """Mark the snapshots of the given products (ids or a values() queryset) stale.
+
+    Also replaces the products' page-cache tokens so cached trace and
+    receipt pages built from the old snapshots stop validating.
+    """
+    snapshot_product_ids = list(
+        ProductTimelineSnapshot.objects.filter(product_id__in=product_ids)
+        .values_list('product_id', flat=True)
+    )
+    if not snapshot_product_ids:
+        return 0
+    changed_at = timezone.now()
+    updated = ProductTimelineSnapshot.objects.filter(product_id__in=snapshot_product_ids).update(
+        version=F('version') + 1,
+        changed_at=changed_at,
+    )
+    PageCache.touch_products(snapshot_product_ids, changed_at)
+    return updated
+
+
+def invalidate_animal_timelines(animal_ids):
+    """Mark stale every product whose lineage includes one of the given animals."""
+    product_ids = Product.objects.filter(
+        Q(animal_id__in=animal_ids)
+        | Q(slaughter_part__animal_id__in=animal_ids)
+        | Q(ingredients__slaughter_part__animal_id__in=animal_ids)
+    ).values('id')
+    return invalidate_product_timelines(product_ids)
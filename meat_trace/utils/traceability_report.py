@@ -0,0 +1,274 @@
+"""
+Traceability Report Service for MeatTrace
+
+Builds the processor traceability report (received animals and slaughter
+parts with the products made from them and their yield). Products and
+processed weights are loaded with Prefetch and an aggregated Sum, so a page
+costs a fixed number of queries however many items it holds.
+
+Items are ordered newest receipt first and paginated by keyset: the cursor
+encodes the (received_at, kind, id) of the last item served, so deep pages
+are as cheap as the first one. ``iter_items`` walks the whole report in
+chunks for the streaming (NDJSON / CSV) downloads.
+
+Usage:
+    from meat_trace.utils.traceability_report import TraceabilityReportService
+
+    filters = TraceabilityReportService.filters_from_params(request.query_params)
+    page = TraceabilityReportService.page(user, filters, cursor=None, page_size=50)
+    for item in TraceabilityReportService.iter_items(user, filters):
+        ...
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Animal, Product, SlaughterPart
+from .keyset import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+class TraceabilityReportService:
+    """
+    Prefetched, keyset-paginated traceability report of a processor's receipts.
+    """
+
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    # Items loaded per round trip while streaming the full report
+    STREAM_CHUNK_SIZE = 500
+
+    # Tie-break between sources received at the same moment (higher first)
+    ANIMAL_RANK = 1
+    PART_RANK = 0
+
+    CSV_COLUMNS = (
+        'item_id', 'name', 'species', 'origin', 'initial_weight', 'remaining_weight',
+        'processed_weight', 'utilization_rate', 'received_at', 'products', 'product_batches',
+    )
+
+    # ── Query building ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def filters_from_params(params):
+        return {
+            'species': params.get('species'),
+            'search': params.get('search'),
+            'date_from': params.get('date_from'),
+            'date_to': params.get('date_to'),
+        }
+
+    @staticmethod
+    def _products_prefetch():
+        return Prefetch(
+            'products',
+            queryset=Product.objects.select_related('transferred_to').order_by('created_at', 'id'),
+        )
+
+    @staticmethod
+    def _processed_weight():
+        return Coalesce(
+            Sum('products__weight'),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    @classmethod
+    def _animals(cls, user, filters):
+        query = Q(received_by=user)
+        if filters.get('species'):
+            query &= Q(species__iexact=filters['species'])
+        if filters.get('search'):
+            query &= (Q(animal_id__icontains=filters['search']) | Q(animal_name__icontains=filters['search']))
+        if filters.get('date_from'):
+            query &= Q(received_at__gte=filters['date_from'])
+        if filters.get('date_to'):
+            query &= Q(received_at__lte=filters['date_to'])
+        return Animal.objects.filter(query)
+
+    @classmethod
+    def _parts(cls, user, filters):
+        query = Q(received_by=user)
+        # SlaughterPart doesn't have species directly, we access via animal
+        if filters.get('species'):
+            query &= Q(animal__species__iexact=filters['species'])
+        if filters.get('search'):
+            query &= (Q(part_id__icontains=filters['search']) | Q(animal__animal_id__icontains=filters['search']))
+        if filters.get('date_from'):
+            query &= Q(received_at__gte=filters['date_from'])
+        if filters.get('date_to'):
+            query &= Q(received_at__lte=filters['date_to'])
+        return SlaughterPart.objects.filter(query)
+
+    @staticmethod
+    def _after(cursor, rank):
+        """Rows of a source with ``rank`` that sort after ``cursor`` (newest first, nulls last)."""
+        if cursor is None:
+            return Q()
+        received_at, cursor_rank, pk = cursor
+        if rank < cursor_rank:
+            same_moment = Q()
+        elif rank == cursor_rank:
+            same_moment = Q(id__lt=pk)
+        else:
+            same_moment = None
+
+        if received_at is None:
+            return Q(received_at__isnull=True) & same_moment if same_moment is not None else Q(pk__in=[])
+        after = Q(received_at__lt=received_at) | Q(received_at__isnull=True)
+        if same_moment is not None:
+            after |= Q(received_at=received_at) & same_moment
+        return after
+
+    @classmethod
+    def _ordered(cls, queryset, cursor, rank, limit):
+        return list(
+            queryset.filter(cls._after(cursor, rank))
+            .annotate(processed_weight=cls._processed_weight())
+            .prefetch_related(cls._products_prefetch())
+            .order_by(F('received_at').desc(nulls_last=True), '-id')[:limit]
+        )
+
+    # ── Cursors ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def encode_cursor(key):
+        return encode_cursor(key)
+
+    @staticmethod
+    def decode_cursor(value):
+        return decode_cursor(value, (datetime, int, int))
+
+    @staticmethod
+    def _sort_key(key):
+        received_at, rank, pk = key
+        return (received_at is not None, received_at.timestamp() if received_at else 0, rank, pk)
+
+    # ── Items ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _history(products):
+        return [
+            {
+                'name': p.name,
+                'batch_number': p.batch_number,
+                'weight': float(p.weight) if p.weight else 0.0,
+                'weight_unit': p.weight_unit or 'kg',
+                'formatted_date': p.created_at.strftime("%b %d, %Y") if p.created_at else "",
+                'transferred_to': p.transferred_to.name if p.transferred_to else None
+            }
+            for p in products
+        ]
+
+    @staticmethod
+    def _received(moment):
+        return {
+            'received_at': moment.isoformat() if moment else timezone.now().isoformat(),
+            'formatted_received_date': moment.strftime("%b %d, %Y") if moment else "Unknown",
+        }
+
+    @classmethod
+    def _animal_item(cls, animal):
+        initial_weight = animal.live_weight if animal.live_weight else 0.0
+        # Use simple default if weights are missing to avoid division by zero
+        if initial_weight <= 0:
+            initial_weight = 1.0
+        remaining_weight = animal.remaining_weight if animal.remaining_weight is not None else 0.0
+        processed_weight = animal.processed_weight
+        return {
+            'item_id': animal.animal_id,
+            'name': f"{animal.species} (Whole)",
+            'species': animal.species or 'Unknown',
+            'origin': animal.abbatoir.username if animal.abbatoir else "Unknown Source",
+            'initial_weight': float(initial_weight),
+            'remaining_weight': float(remaining_weight),
+            'processed_weight': float(processed_weight),
+            'utilization_rate': float(processed_weight) / float(initial_weight) * 100,
+            **cls._received(animal.received_at),
+            'utilization_history': cls._history(animal.products.all()),
+        }
+
+    @classmethod
+    def _part_item(cls, part):
+        initial_weight = part.weight if part.weight else 1.0
+        remaining_weight = part.remaining_weight if part.remaining_weight is not None else 0.0
+        processed_weight = part.processed_weight
+        animal = part.animal
+        return {
+            'item_id': f"{animal.animal_id}-{part.part_type}",
+            'name': f"{part.part_type} (Part)",
+            'species': animal.species if animal else 'Unknown',
+            'origin': animal.abbatoir.username if animal and animal.abbatoir else "Unknown Source",
+            'initial_weight': float(initial_weight),
+            'remaining_weight': float(remaining_weight),
+            'processed_weight': float(processed_weight),
+            'utilization_rate': float(processed_weight) / float(initial_weight) * 100,
+            **cls._received(part.received_at),
+            'utilization_history': cls._history(part.products.all()),
+        }
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def clamp_page_size(cls, value):
+        try:
+            page_size = int(value) if value not in (None, '') else cls.DEFAULT_PAGE_SIZE
+        except (TypeError, ValueError):
+            page_size = cls.DEFAULT_PAGE_SIZE
+        return max(1, min(page_size, cls.MAX_PAGE_SIZE))
+
+    @classmethod
+    def page(cls, user, filters, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        One page of report items after ``cursor`` (a decoded cursor tuple).
+
+        Returns ``(items, next_cursor)``; ``next_cursor`` is None on the last
+        page. Costs two queries per source (rows and their products).
+        """
+        animals = cls._ordered(
+            cls._animals(user, filters).select_related('abbatoir'), cursor, cls.ANIMAL_RANK, page_size + 1,
+        )
+        parts = cls._ordered(
+            cls._parts(user, filters).select_related('animal', 'animal__abbatoir'), cursor, cls.PART_RANK, page_size + 1,
+        )
+
+        rows = [((a.received_at, cls.ANIMAL_RANK, a.pk), cls._animal_item, a) for a in animals]
+        rows += [((p.received_at, cls.PART_RANK, p.pk), cls._part_item, p) for p in parts]
+        rows.sort(key=lambda row: cls._sort_key(row[0]), reverse=True)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        items = [build(obj) for _, build, obj in rows]
+        next_cursor = rows[-1][0] if has_more else None
+        return items, next_cursor
+
+    @classmethod
+    def count(cls, user, filters):
+        return cls._animals(user, filters).count() + cls._parts(user, filters).count()
+
+    @classmethod
+    def iter_items(cls, user, filters, chunk_size=None):
+        """Every report item, loaded STREAM_CHUNK_SIZE at a time."""
+        chunk_size = chunk_size or cls.STREAM_CHUNK_SIZE
+        cursor = None
+        while True:
+            items, cursor = cls.page(user, filters, cursor, chunk_size)
+            yield from items
+            if cursor is None:
+                return
+
+    @classmethod
+    def csv_row(cls, item):
+        history = item['utilization_history']
+        return [
+            *(item[column] for column in cls.CSV_COLUMNS[:-2]),
+            len(history),
+            ';'.join(entry['batch_number'] for entry in history),
+        ]
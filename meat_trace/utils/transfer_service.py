@@ -0,0 +1,138 @@
+"""
+Transfer Service for MeatTrace
+
+Set-based transfer of animals and slaughter parts from an abbatoir to a
+processing unit. A transfer locks the eligible rows, moves them with one
+``update()`` per table, and finds the animals whose parts are now all
+transferred with a single ``NOT EXISTS`` query, so a truckload costs the
+same number of queries as a single carcass.
+
+``update()`` bypasses the Animal / SlaughterPart signals;
+``refresh_derived_data`` applies their effects once for the whole batch
+(analytics cache, timeline snapshots, rollup dates, production stats and
+pipeline counts) and is shared with the bulk receive and reject paths.
+
+Usage:
+    from meat_trace.utils.transfer_service import TransferService
+
+    missing = TransferService.not_slaughtered(user, animal_ids)
+    result = TransferService.transfer(user, processing_unit, animal_ids, part_ids)
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ..models import Animal, CarcassMeasurement, SlaughterPart
+from .pipeline_service import ProcessingPipelineService
+from .production_stats import ProductionStatsService
+from .rollup_service import RollupService
+from .tagged_cache import TaggedCache
+from .traceability import invalidate_animal_timelines
+
+logger = logging.getLogger(__name__)
+
+
+class TransferService:
+    """
+    Bulk transfers with a constant query count.
+    """
+
+    @staticmethod
+    def _open_animals(user, animal_ids):
+        return Animal.objects.filter(id__in=animal_ids, abbatoir=user, transferred_to__isnull=True)
+
+    @classmethod
+    def not_slaughtered(cls, user, animal_ids):
+        """``animal_id`` codes of requested animals that cannot travel yet (one query)."""
+        if not animal_ids:
+            return []
+        return list(cls._open_animals(user, animal_ids).filter(slaughtered=False).values_list('animal_id', flat=True))
+
+    @classmethod
+    def transfer(cls, user, processing_unit, animal_ids=(), part_ids=()):
+        """
+        Transfer ``user``'s animals and parts to ``processing_unit``.
+
+        Animals and parts that are already transferred or belong to another
+        abbatoir are skipped. An animal whose parts are all transferred after
+        this call is transferred with them. Returns a dict with the
+        ``animal_ids`` and ``part_ids`` that moved, and ``split_animal_ids``,
+        the transferred animals that are split carcasses.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            animals = list(
+                cls._open_animals(user, animal_ids).select_for_update(of=('self',))
+                .values_list('id', 'created_at', 'slaughtered_at')
+            ) if animal_ids else []
+
+            parts = list(
+                SlaughterPart.objects.select_for_update(of=('self',))
+                .filter(id__in=part_ids, animal__abbatoir=user, transferred_to__isnull=True)
+                .values_list('id', 'animal_id')
+            ) if part_ids else []
+            moved_part_ids = [part_id for part_id, _ in parts]
+            part_animal_ids = {animal_id for _, animal_id in parts}
+
+            if moved_part_ids:
+                SlaughterPart.objects.filter(id__in=moved_part_ids).update(
+                    transferred_to=processing_unit, transferred_at=now,
+                )
+                # Animals with no untransferred part left travel as a whole
+                whole_ids = {animal_id for animal_id, _, _ in animals}
+                open_parts = SlaughterPart.objects.filter(animal=OuterRef('pk'), transferred_to__isnull=True)
+                animals += list(
+                    Animal.objects.filter(id__in=part_animal_ids - whole_ids, transferred_to__isnull=True)
+                    .filter(~Exists(open_parts))
+                    .values_list('id', 'created_at', 'slaughtered_at')
+                )
+
+            moved_animal_ids = [animal_id for animal_id, _, _ in animals]
+            if moved_animal_ids:
+                Animal.objects.filter(id__in=moved_animal_ids).update(
+                    transferred_to=processing_unit, transferred_at=now,
+                )
+
+            split_ids = set(
+                CarcassMeasurement.objects.filter(animal_id__in=moved_animal_ids, carcass_type='split')
+                .values_list('animal_id', flat=True)
+            ) if moved_animal_ids else set()
+
+            if moved_animal_ids or moved_part_ids:
+                cls.refresh_derived_data(
+                    [processing_unit.pk],
+                    set(moved_animal_ids) | part_animal_ids,
+                    [moment for _, created, slaughtered in animals for moment in (created, slaughtered)] + [now],
+                )
+
+        logger.info(
+            f"[TRANSFER] {len(moved_animal_ids)} animals and {len(moved_part_ids)} parts "
+            f"transferred to processing unit {processing_unit.pk}"
+        )
+        return {
+            'animal_ids': moved_animal_ids,
+            'part_ids': moved_part_ids,
+            'split_animal_ids': [animal_id for animal_id in moved_animal_ids if animal_id in split_ids],
+        }
+
+    @staticmethod
+    def refresh_derived_data(unit_ids, animal_ids, moments=()):
+        """
+        What the Animal / SlaughterPart save signals would have done, once
+        for a batch moved with ``update()`` / ``bulk_update()``.
+
+        ``unit_ids`` are the processing units gaining or losing the animals,
+        ``moments`` the animals' timestamps whose rollup days changed.
+        """
+        try:
+            TaggedCache.invalidate(TaggedCache.model_tag('Animal'))
+            invalidate_animal_timelines(animal_ids)
+            # Rollups group registered / slaughtered animals by unit as well
+            RollupService.mark_dirty(*moments)
+            ProductionStatsService.invalidate(unit_ids)
+            ProcessingPipelineService.schedule(unit_ids)
+        except Exception as e:
+            logger.error(f"[TRANSFER] Failed to refresh derived data for units {sorted(filter(None, unit_ids))}: {e}")
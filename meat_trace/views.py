@@ -5,6 +5,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 import json
+import logging
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -16,17 +17,28 @@ from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
 from django.db import models
 from django.db import transaction
 
-from .models import Animal, Product, Receipt, UserProfile, ProductCategory, ProcessingStage, ProductTimelineEvent, Inventory, Order, OrderItem, CarcassMeasurement, SlaughterPart, ProcessingUnit, ProcessingUnitUser, Shop, ShopUser, UserAuditLog, JoinRequest, Notification, Activity, SystemAlert, PerformanceMetric, ComplianceAudit, Certification, SystemHealth, SecurityLog, TransferRequest, BackupSchedule, Sale, SaleItem, RejectionReason, ShopSettings, Invoice, InvoiceItem, InvoicePayment
+from .models import Animal, Product, Receipt, UserProfile, ProductCategory, ProcessingStage, ProductTimelineEvent, Inventory, Order, OrderItem, CarcassMeasurement, SlaughterPart, ProcessingUnit, ProcessingUnitUser, Shop, ShopUser, UserAuditLog, JoinRequest, Notification, Activity, SystemAlert, PerformanceMetric, ComplianceAudit, Certification, SystemHealth, SecurityLog, TransferRequest, BackupSchedule, Sale, SaleItem, RejectionReason, ShopSettings, Invoice, InvoiceItem, InvoicePayment, StockMovement
 from .abbatoir_dashboard_serializer import AbbatoirDashboardSerializer
-from .serializers import AnimalSerializer, ProductSerializer, OrderSerializer, ShopSerializer, SlaughterPartSerializer, ActivitySerializer, ProcessingUnitSerializer, JoinRequestSerializer, ProductCategorySerializer, CarcassMeasurementSerializer, SaleSerializer, SaleItemSerializer, NotificationSerializer, UserProfileSerializer, ShopSettingsSerializer, InvoiceSerializer, InvoiceCreateSerializer, InvoiceItemSerializer, InvoicePaymentSerializer, ReceiptSerializer
+from .serializers import AnimalSerializer, AnimalListSerializer, ProductSerializer, OrderSerializer, ShopSerializer, SlaughterPartSerializer, ActivitySerializer, ProcessingUnitSerializer, JoinRequestSerializer, ProductCategorySerializer, CarcassMeasurementSerializer, SaleSerializer, SaleItemSerializer, NotificationSerializer, UserProfileSerializer, ShopSettingsSerializer, InvoiceSerializer, InvoiceCreateSerializer, InvoiceItemSerializer, InvoicePaymentSerializer, ReceiptSerializer
 from .utils.rejection_service import RejectionService
 from .role_utils import normalize_role, ROLE_ABBATOIR, ROLE_PROCESSOR, ROLE_SHOPOWNER, ROLE_ADMIN
 from .utils.pdf_utils import download_pdf_response
-from .utils.traceability import get_product_timeline
+from .utils.traceability import TimelineContext, get_materialized_timeline, get_product_timelines
+from .utils.page_cache import PageCache
+from .utils.batch_registry import BatchRegistry
+from .utils.lineage_service import LineageService
+from .utils.product_info_service import ProductInfoService
+from .utils.production_stats import ProductionStatsService
+from .utils.pipeline_service import ProcessingPipelineService
+from .utils.transfer_service import TransferService
+from .utils.receive_service import ReceiveService
+
+logger = logging.getLogger(__name__)
 
 
 class AnimalViewSet(viewsets.ModelViewSet):
@@ -34,6 +46,46 @@ class AnimalViewSet(viewsets.ModelViewSet):
     serializer_class = AnimalSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_class(self):
+        # Lists are compact; nested blocks are opt-in through ?expand=
+        if self.action == 'list':
+            return AnimalListSerializer
+        return AnimalSerializer
+
+    def _expand(self):
+        """Nested blocks requested with ?expand= (every block outside of list)."""
+        if self.action != 'list':
+            return set(AnimalListSerializer.EXPANDABLE)
+        requested = self.request.query_params.get('expand', '')
+        return {name.strip() for name in requested.split(',')} & set(AnimalListSerializer.EXPANDABLE)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self._expand()
+        return context
+
+    def _with_related(self, queryset):
+        """Load everything the serializer reads in a fixed number of queries."""
+        from django.db.models import Prefetch
+        from .models import Waste
+        from .utils.query_counts import sum_subquery
+
+        expand = self._expand()
+        queryset = queryset.select_related('abbatoir', 'transferred_to', 'carcass_measurement').annotate(
+            annotated_waste_weight=sum_subquery(Waste, 'animal', 'weight_kg'),
+            annotated_parts_weight=sum_subquery(SlaughterPart, 'animal', 'weight'),
+        )
+        if 'slaughter_parts' in expand:
+            queryset = queryset.prefetch_related('slaughter_parts')
+        else:
+            # lifecycle_status only needs to know which parts were transferred
+            queryset = queryset.prefetch_related(Prefetch(
+                'slaughter_parts', queryset=SlaughterPart.objects.only('id', 'animal', 'transferred_to'),
+            ))
+        if 'weight_history' in expand:
+            queryset = queryset.prefetch_related('weight_history')
+        return queryset
+
     def get_queryset(self):
         """
         Return animals for the current user with optional filtering.
@@ -96,6 +148,9 @@ class AnimalViewSet(viewsets.ModelViewSet):
         if ordering:
             queryset = queryset.order_by(ordering)
 
+        # Actions that modify the animal re-serialize it, so only reads get the prefetches
+        if self.action in ('list', 'retrieve'):
+            queryset = self._with_related(queryset)
         return queryset
 
     def perform_create(self, serializer):
@@ -197,82 +252,33 @@ class AnimalViewSet(viewsets.ModelViewSet):
                 status=status_module.HTTP_404_NOT_FOUND
             )
 
-        transferred_animals = []
-        transferred_parts = []
+        not_slaughtered = TransferService.not_slaughtered(request.user, animal_ids)
+        if not_slaughtered:
+            # Enforce: slaughter must happen before transfer so the
+            # weight that travels is the post-slaughter (carcass)
+            # weight, not the live weight.
+            return Response(
+                {
+                    'error': 'Slaughter must be completed before transfer.',
+                    'animals_not_slaughtered': not_slaughtered,
+                },
+                status=status_module.HTTP_400_BAD_REQUEST,
+            )
+
+        part_ids = [part_id for part_transfer in part_transfers for part_id in part_transfer.get('part_ids', [])]
 
         try:
             with transaction.atomic():
-                # Transfer whole animals
-                if animal_ids:
-                    animals = Animal.objects.filter(
-                        id__in=animal_ids,
-                        abbatoir=request.user,
-                        transferred_to__isnull=True  # Not already transferred
-                    )
-
-                    # Enforce: slaughter must happen before transfer so the
-                    # weight that travels is the post-slaughter (carcass)
-                    # weight, not the live weight.
-                    not_slaughtered = [a.animal_id for a in animals if not a.slaughtered]
-                    if not_slaughtered:
-                        return Response(
-                            {
-                                'error': 'Slaughter must be completed before transfer.',
-                                'animals_not_slaughtered': not_slaughtered,
-                            },
-                            status=status_module.HTTP_400_BAD_REQUEST,
-                        )
-
-                    for animal in animals:
-                        animal.transferred_to = processing_unit
-                        animal.transferred_at = timezone.now()
-                        animal.save()
-                        transferred_animals.append(animal)
-
-                # Transfer parts
-                if part_transfers:
-                    animals_with_transferred_parts = set()  # Track animals whose parts are being transferred
-                    
-                    for part_transfer in part_transfers:
-                        part_ids = part_transfer.get('part_ids', [])
-                        parts = SlaughterPart.objects.filter(
-                            id__in=part_ids,
-                            animal__abbatoir=request.user,
-                            transferred_to__isnull=True  # Not already transferred
-                        )
+                result = TransferService.transfer(request.user, processing_unit, animal_ids, part_ids)
+                transferred_animals = result['animal_ids']
+                transferred_parts = result['part_ids']
 
-                        for part in parts:
-                            part.transferred_to = processing_unit
-                            part.transferred_at = timezone.now()
-                            part.save()
-                            transferred_parts.append(part)
-                            animals_with_transferred_parts.add(part.animal)
-                    
-                    # Check if all parts of any animal are now transferred
-                    # If so, mark the parent animal as transferred
-                    for animal in animals_with_transferred_parts:
-                        all_parts = animal.slaughter_parts.all()
-                        if all_parts.exists():
-                            transferred_parts_count = sum(1 for p in all_parts if p.transferred_to is not None)
-                            
-                            # If all parts are transferred, mark the animal as transferred
-                            if transferred_parts_count == len(all_parts):
-                                animal.transferred_to = processing_unit
-                                animal.transferred_at = timezone.now()
-                                animal.save()
-                                transferred_animals.append(animal)
-                                
-                                # Log for debugging
-                                import logging
-                                logger = logging.getLogger(__name__)
-                                logger.info(f"[TRANSFER] All {len(all_parts)} parts of animal {animal.animal_id} transferred - marking animal as transferred")
+                # Count how many animals were transferred as complete split carcasses
+                split_carcass_count = len(result['split_animal_ids'])
+                whole_animal_count = len(transferred_animals) - split_carcass_count
 
                 # Create activity log
                 if transferred_animals or transferred_parts:
-                    # Count how many animals were transferred as complete split carcasses
-                    split_carcass_count = sum(1 for a in transferred_animals if a.is_split_carcass)
-                    whole_animal_count = len(transferred_animals) - split_carcass_count
-                    
                     # Build descriptive title
                     title_parts = []
                     if whole_animal_count > 0:
@@ -301,9 +307,6 @@ class AnimalViewSet(viewsets.ModelViewSet):
                     )
 
                 # Build success message
-                split_carcass_count = sum(1 for a in transferred_animals if a.is_split_carcass)
-                whole_animal_count = len(transferred_animals) - split_carcass_count
-                
                 message_parts = []
                 if whole_animal_count > 0:
                     message_parts.append(f'{whole_animal_count} whole animal{"s" if whole_animal_count != 1 else ""}')
@@ -316,8 +319,8 @@ class AnimalViewSet(viewsets.ModelViewSet):
                 
                 return Response({
                     'message': success_message,
-                    'transferred_animals': [a.id for a in transferred_animals],
-                    'transferred_parts': [p.id for p in transferred_parts],
+                    'transferred_animals': transferred_animals,
+                    'transferred_parts': transferred_parts,
                     'whole_animal_count': whole_animal_count,
                     'split_carcass_count': split_carcass_count
                 })
@@ -365,118 +368,37 @@ class AnimalViewSet(viewsets.ModelViewSet):
                 status=status_module.HTTP_400_BAD_REQUEST
             )
 
-        received_animals = []
-        received_parts = []
-        rejected_animals = []
-        rejected_parts = []
+        part_ids = [part_id for part_receive in part_receives for part_id in part_receive.get('part_ids', [])]
 
         try:
             with transaction.atomic():
-                # Receive whole animals
-                if animal_ids:
-                    animals = Animal.objects.filter(
-                        id__in=animal_ids,
-                        transferred_to__isnull=False,
-                        received_by__isnull=True  # Not already received
-                    )
-
-                    for animal in animals:
-                        animal.received_by = request.user
-                        animal.received_at = timezone.now()
-                        animal.save()
-                        received_animals.append(animal)
-
-                # Receive parts
-                if part_receives:
-                    for part_receive in part_receives:
-                        part_ids = part_receive.get('part_ids', [])
-                        parts = SlaughterPart.objects.filter(
-                            id__in=part_ids,
-                            transferred_to__isnull=False,
-                            received_by__isnull=True  # Not already received
-                        )
-
-                        for part in parts:
-                            part.received_by = request.user
-                            part.received_at = timezone.now()
-                            part.save()
-                            received_parts.append(part)
-
-                # Get processing unit for rejection service
-                processing_unit = None
-                try:
-                    # Get the first active processing unit for this user
-                    from .models import ProcessingUnitUser
+                # Receive whole animals and parts
+                received = ReceiveService.receive_animals(request.user, animal_ids, part_ids)
+                received_animals = received['animal_ids']
+                received_parts = received['part_ids']
+                rejected_animals = []
+                rejected_parts = []
+
+                if animal_rejections or part_rejections:
+                    # Get the first active processing unit for this user for the rejection records
                     pu_user = ProcessingUnitUser.objects.filter(
                         user=request.user,
                         is_active=True,
                         is_suspended=False
-                    ).first()
-                    if pu_user:
-                        processing_unit = pu_user.processing_unit
-                except Exception:
-                    pass  # No processing unit found, continue with None
-
-                # Process rejections using RejectionService
-                if animal_rejections:
-                    for rejection in animal_rejections:
-                        animal_id = rejection.get('animal_id')
-                        
-                        # Build rejection data
-                        if 'reason' in rejection:
-                            # Old format - convert to new format
-                            rejection_data = {
-                                'category': 'other',
-                                'specific_reason': rejection.get('reason', 'Not specified'),
-                                'notes': ''
-                            }
-                        else:
-                            # New structured format
-                            rejection_data = {
-                                'category': rejection.get('category', 'other'),
-                                'specific_reason': rejection.get('specific_reason', 'Not specified'),
-                                'notes': rejection.get('notes', '')
-                            }
-
-                        try:
-                            animal = Animal.objects.get(id=animal_id)
-                            # Use RejectionService to handle rejection with notifications
-                            RejectionService.process_animal_rejection(
-                                animal, rejection_data, request.user, processing_unit
-                            )
-                            rejected_animals.append(animal)
-                        except Animal.DoesNotExist:
-                            continue
-
-                if part_rejections:
-                    for rejection in part_rejections:
-                        part_id = rejection.get('part_id')
-                        
-                        # Build rejection data
-                        if 'reason' in rejection:
-                            # Old format - convert to new format
-                            rejection_data = {
-                                'category': 'other',
-                                'specific_reason': rejection.get('reason', 'Not specified'),
-                                'notes': ''
-                            }
-                        else:
-                            # New structured format
-                            rejection_data = {
-                                'category': rejection.get('category', 'other'),
-                                'specific_reason': rejection.get('specific_reason', 'Not specified'),
-                                'notes': rejection.get('notes', '')
-                            }
-
-                        try:
-                            part = SlaughterPart.objects.get(id=part_id)
-                            # Use RejectionService to handle rejection with notifications
-                            RejectionService.process_part_rejection(
-                                part, rejection_data, request.user, processing_unit
-                            )
-                            rejected_parts.append(part)
-                        except SlaughterPart.DoesNotExist:
-                            continue
+                    ).select_related('processing_unit').first()
+                    processing_unit = pu_user.processing_unit if pu_user else None
+
+                    # Process rejections in bulk; unknown ids are skipped
+                    if animal_rejections:
+                        rejected_animals = [a.id for a in RejectionService.reject_animals(
+                            {r.get('animal_id'): RejectionService.rejection_data(r) for r in animal_rejections},
+                            request.user, processing_unit,
+                        )]
+                    if part_rejections:
+                        rejected_parts = [p.id for p in RejectionService.reject_parts(
+                            {r.get('part_id'): RejectionService.rejection_data(r) for r in part_rejections},
+                            request.user, processing_unit,
+                        )]
 
                 # Create activity log
                 if received_animals or received_parts or rejected_animals or rejected_parts:
@@ -496,10 +418,10 @@ class AnimalViewSet(viewsets.ModelViewSet):
 
                 return Response({
                     'message': f'Successfully processed receive operation',
-                    'received_animals': [a.id for a in received_animals],
-                    'received_parts': [p.id for p in received_parts],
-                    'rejected_animals': [a.id for a in rejected_animals],
-                    'rejected_parts': [p.id for p in rejected_parts]
+                    'received_animals': received_animals,
+                    'received_parts': received_parts,
+                    'rejected_animals': rejected_animals,
+                    'rejected_parts': rejected_parts
                 })
 
         except Exception as e:
@@ -1414,145 +1336,25 @@ def _can_access_product_for_user(user, product):
 
 
 def product_info_view(request, product_id):
+    # Only anonymous QR scans are served from the page cache; signed-in users
+    # still go through the access check below (and get ETag support).
+    page_key = PageCache.product_info_page_key(product_id)
+    if not request.user.is_authenticated:
+        cached = PageCache.get(page_key)
+        if cached:
+            return PageCache.respond(request, cached)
+
     try:
         product = Product.objects.select_related(
-            'animal', 'animal__abbatoir', 'processing_unit', 
-            'category', 'slaughter_part', 'transferred_to',
-            'received_by_shop'
-        ).prefetch_related(
-            'inventory', 'receipts', 'orderitem_set', 
-            'ingredients__slaughter_part',
-            'animal__slaughter_parts'
+            'animal', 'processing_unit', 'category', 'timeline_snapshot',
         ).get(id=product_id)
 
         if not _can_access_product_for_user(request.user, product):
             return render(request, 'meat_trace/trace.html', {'error': 'Not found'}, status=404)
 
-        timeline = get_product_timeline(product)
-
-        # 9. Quality Issues / Rejection - Enhanced
-        if hasattr(product, 'rejected_at') and product.rejected_at and hasattr(product, 'rejection_status') and product.rejection_status:
-            rejection_details = {
-                'Rejected By': product.rejected_by.get_full_name() if product.rejected_by and product.rejected_by.first_name else (product.rejected_by.username if product.rejected_by else 'Unknown'),
-                'Rejection Date': product.rejected_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Rejection Status': product.get_rejection_status_display() if hasattr(product, 'get_rejection_status_display') else product.rejection_status,
-                'Weight Rejected': f'{product.weight_rejected} {product.weight_unit}' if hasattr(product, 'weight_rejected') and product.weight_rejected else f'Full weight ({product.weight} {product.weight_unit})',
-                'Reason': product.rejection_reason or 'Not specified',
-                'Location': product.received_by_shop.name if product.received_by_shop else 'Unknown',
-            }
-            
-            if product.rejected_by and hasattr(product.rejected_by, 'email') and product.rejected_by.email:
-                rejection_details['Rejector Email'] = product.rejected_by.email
-            
-            timeline.append({
-                'stage': 'Product Rejection / Quality Issue',
-                'category': 'quality',
-                'timestamp': product.rejected_at,
-                'location': product.received_by_shop.name if product.received_by_shop else 'Shop',
-                'actor': product.rejected_by.get_full_name() if product.rejected_by and product.rejected_by.first_name else (product.rejected_by.username if product.rejected_by else 'Shop Staff'),
-                'action': f'Product rejected: {product.rejection_reason or "Quality concerns"}',
-                'icon': 'fa-times-circle',
-                'details': rejection_details
-            })
-        
-        # 10. Sales Events - Inventory Tracking (no customer PII: this page is
-        # public and unauthenticated, reachable by anyone who scans the
-        # product's QR code, so past buyers' names/phone/email/address must
-        # never appear here — only facts about the product itself).
-        sales = []
-
-        # Calculate running inventory after each sale
-        total_weight_sold = 0
-        remaining_after_sale = 0
-        initial_inventory = float(product.weight) if product.weight else 0
-
-        order_items = product.orderitem_set.select_related('order', 'order__shop').order_by('order__created_at')
-
-        for idx, item in enumerate(order_items, 1):
-            if item.order:
-                shop = item.order.shop
-                order = item.order
-
-                # Calculate inventory after this sale
-                weight_sold_in_this_order = float(item.weight) if hasattr(item, 'weight') and item.weight else (
-                    float(item.quantity) if hasattr(item, 'quantity') and item.quantity else 0
-                )
-                total_weight_sold += weight_sold_in_this_order
-                remaining_after_sale = initial_inventory - total_weight_sold
-
-                # Build sale details
-                sale_details = {
-                    'Sale Number': f'#{idx} of {order_items.count()}',
-                    'Sale Date & Time': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                }
-
-                # Sale Details
-                sale_details['---Sale Details---'] = '---'
-                sale_details['Weight Sold This Order'] = f'{item.weight if hasattr(item, "weight") else item.quantity} {product.weight_unit}'
-                sale_details['Unit Price'] = f'TZS {item.unit_price}' if hasattr(item, 'unit_price') and item.unit_price else 'N/A'
-                sale_details['Subtotal for This Item'] = f'TZS {item.subtotal}' if hasattr(item, 'subtotal') and item.subtotal else f'TZS {float(item.weight if hasattr(item, "weight") and item.weight else item.quantity) * float(item.unit_price) if hasattr(item, "unit_price") and item.unit_price else 0:.2f}'
-                sale_details['Order Status'] = order.get_status_display() if hasattr(order, 'get_status_display') else order.status
-
-                # Inventory Tracking
-                sale_details['---Inventory Status---'] = '---'
-                sale_details['Initial Product Weight'] = f'{initial_inventory} {product.weight_unit}'
-                sale_details['Total Sold Up To Now'] = f'{total_weight_sold} {product.weight_unit}'
-                sale_details['Remaining After This Sale'] = f'{remaining_after_sale} {product.weight_unit}'
-                sale_details['Percentage Sold'] = f'{(total_weight_sold / initial_inventory * 100):.1f}%' if initial_inventory > 0 else 'N/A'
-
-                # Shop Information
-                sale_details['---Shop Information---'] = '---'
-                sale_details['Shop Name'] = shop.name if shop else 'Unknown Shop'
-                if shop and hasattr(shop, 'location'):
-                    sale_details['Shop Location'] = shop.location
-
-                sales.append({
-                    'stage': f'Sale #{idx}',
-                    'category': 'sale',
-                    'timestamp': order.created_at,
-                    'location': shop.name if shop else 'Retail Shop',
-                    'actor': shop.name if shop else 'Retail Shop',
-                    'action': f'Sold {item.weight if hasattr(item, "weight") and item.weight else item.quantity} {product.weight_unit} at retail',
-                    'icon': 'fa-shopping-cart',
-                    'details': sale_details
-                })
-        
-        timeline.extend(sales)
-        
-        # 11. Current Inventory Status (if product still has remaining stock)
-        if remaining_after_sale > 0 or total_weight_sold == 0:
-            current_inventory_items = product.inventory.select_related('shop').all()
-            
-            if current_inventory_items.exists():
-                for inv_item in current_inventory_items:
-                    inventory_details = {
-                        'Shop Name': inv_item.shop.name if inv_item.shop else 'Unknown',
-                        'Current Stock': f'{inv_item.weight} {product.weight_unit}' if hasattr(inv_item, 'weight') else 'Unknown',
-                        'Stock Status': 'In Stock' if (hasattr(inv_item, 'weight') and inv_item.weight > 0) else 'Out of Stock',
-                        'Last Updated': inv_item.updated_at.strftime('%Y-%m-%d %H:%M:%S') if hasattr(inv_item, 'updated_at') and inv_item.updated_at else 'Not tracked',
-                    }
-                    
-                    if hasattr(inv_item.shop, 'location'):
-                        inventory_details['Shop Location'] = inv_item.shop.location
-                    
-                    if total_weight_sold > 0:
-                        inventory_details['Original Weight'] = f'{initial_inventory} {product.weight_unit}'
-                        inventory_details['Total Sold'] = f'{total_weight_sold} {product.weight_unit}'
-                        inventory_details['Sales Count'] = order_items.count()
-                    
-                    timeline.append({
-                        'stage': 'Current Inventory Status',
-                        'category': 'shop',
-                        'timestamp': inv_item.updated_at if hasattr(inv_item, 'updated_at') and inv_item.updated_at else product.created_at,
-                        'location': inv_item.shop.name if inv_item.shop else 'Shop',
-                        'actor': 'Inventory System',
-                        'action': f'Current stock level: {inv_item.weight if hasattr(inv_item, "weight") else "Unknown"} {product.weight_unit}',
-                        'icon': 'fa-warehouse',
-                        'details': inventory_details
-                    })
-        
-        # Sort timeline chronologically
-        timeline.sort(key=lambda x: x['timestamp'])
+        # Lineage, rejection, sales and inventory events are materialized in
+        # ProductTimelineSnapshot and rebuilt only after a related change.
+        timeline = get_materialized_timeline(product, include_activity=True)
 
         context = {
             'product': product,
@@ -1560,6 +1362,9 @@ def product_info_view(request, product_id):
             'timeline': timeline,
             'timestamp': timezone.now(),
         }
+        response = render(request, 'meat_trace/trace.html', context)
+        tokens = {PageCache.product_token_key(product.pk): PageCache.product_token(product)}
+        return PageCache.store(request, page_key, response, tokens)
 
     except Product.DoesNotExist:
         context = {'error': 'Product not found'}
@@ -1608,36 +1413,14 @@ def product_info_list_view(request):
             elif role == ROLE_ABBATOIR:
                 product_queryset = Product.objects.filter(animal__abbatoir=user)
 
-        # Get or create ProductInfo only for products visible to this user
-        product_infos = ProductInfo.objects.select_related('product').filter(product__in=product_queryset).distinct()[:50]
-        
-        # If no ProductInfo exists, create them
-        if not product_infos.exists():
-            products = product_queryset[:50]
-            for product in products:
-                try:
-                    # Check if ProductInfo exists
-                    if not hasattr(product, 'info'):
-                        # Create ProductInfo with required fields from product
-                        product_info = ProductInfo(
-                            product=product,
-                            product_name=product.name or 'Unnamed Product',
-                            product_type=product.product_type,
-                            batch_number=product.batch_number or 'BATCH001',
-                            quantity=product.weight or 0
-                        )
-                        product_info.save()
-                        # Now update with full details
-                        product_info.update_from_product()
-                    else:
-                        # Update existing ProductInfo if timeline is empty
-                        product_info = product.info
-                        if not product_info.timeline_events:
-                            product_info.update_from_product()
-                except Exception as e:
-                    print(f"Error creating ProductInfo for product {product.id}: {e}")
-                    pass
-            product_infos = ProductInfo.objects.select_related('product').all()[:50]
+        # ProductInfo rows are maintained in the background; this page only
+        # reads them. Visible products without a row yet are queued.
+        product_infos = list(
+            ProductInfo.objects.select_related('product')
+            .filter(product__in=product_queryset).distinct()[:50]
+        )
+        if len(product_infos) < 50:
+            ProductInfoService.schedule_missing(product_queryset, limit=50 - len(product_infos))
         
         # Calculate summary statistics
         total_inventory = sum(info.inventory_count for info in product_infos)
@@ -1724,153 +1507,16 @@ def production_stats_view(request):
 
         # Get user's processing units
         from .models import ProcessingUnitUser
-        user_processing_units = ProcessingUnitUser.objects.filter(
+        user_processing_units = list(ProcessingUnitUser.objects.filter(
             user=user,
             is_active=True,
             is_suspended=False
-        ).values_list('processing_unit_id', flat=True)
+        ).values_list('processing_unit_id', flat=True))
 
         if not user_processing_units:
             return Response({'production': {}})
 
-        from datetime import datetime, timedelta
-
-        # RECEIVED: Count whole animals + slaughter parts received by this unit
-        # (Animals/parts where transferred_to matches user's unit and received_by is NOT NULL)
-        received_whole_animals = Animal.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=False
-        ).count()
-        
-        received_slaughter_parts = SlaughterPart.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=False
-        ).count()
-        
-        total_animals_received = received_whole_animals + received_slaughter_parts
-
-        # PENDING: Count animals/parts transferred to processing unit but not yet received or rejected
-        pending_whole_animals = Animal.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=True,
-            rejection_status__isnull=True  # Not rejected
-        ).count()
-        
-        pending_slaughter_parts = SlaughterPart.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=True,
-            rejection_status__isnull=True  # Not rejected
-        ).count()
-        
-        pending_animals_to_process = pending_whole_animals + pending_slaughter_parts
-
-        # PRODUCTS: Total products created by this processing unit since creation
-        total_products_created = Product.objects.filter(
-            processing_unit_id__in=user_processing_units
-        ).count()
-
-        # IN STOCK: Products not yet fully transferred (transferred_to is null or not transferred to shop)
-        products_in_stock = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            transferred_to__isnull=True  # Not transferred to shop
-        ).count()
-
-        # TRANSFERRED: Total products transferred to shops
-        total_products_transferred = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            transferred_to__isnull=False  # Transferred to shop
-        ).count()
-
-        # Calculate today's stats
-        today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        animals_received_today = Animal.objects.filter(
-            received_by=user,
-            received_at__gte=today_start
-        ).count() + SlaughterPart.objects.filter(
-            received_by=user,
-            received_at__gte=today_start
-        ).count()
-        
-        products_created_today = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            created_at__gte=today_start
-        ).count()
-        
-        products_transferred_today = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            transferred_to__isnull=False,
-            created_at__gte=today_start  # Approximation - we'd need a transfer_date field
-        ).count()
-
-        # Calculate this week's stats
-        week_start = today_start - timedelta(days=today_start.weekday())
-        
-        animals_received_this_week = Animal.objects.filter(
-            received_by=user,
-            received_at__gte=week_start
-        ).count() + SlaughterPart.objects.filter(
-            received_by=user,
-            received_at__gte=week_start
-        ).count()
-        
-        products_created_this_week = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            created_at__gte=week_start
-        ).count()
-
-        # Calculate throughput (animals processed per day over last 30 days)
-        thirty_days_ago = today_start - timedelta(days=30)
-        animals_last_30_days = Animal.objects.filter(
-            received_by=user,
-            received_at__gte=thirty_days_ago
-        ).count() + SlaughterPart.objects.filter(
-            received_by=user,
-            received_at__gte=thirty_days_ago
-        ).count()
-        
-        processing_throughput_per_day = round(animals_last_30_days / 30.0, 2) if animals_last_30_days > 0 else 0.0
-
-        # Calculate transfer success rate (assuming all transfers are successful for now)
-        if total_products_created > 0:
-            transfer_success_rate = round((total_products_transferred / total_products_created) * 100, 2)
-        else:
-            transfer_success_rate = 0.0
-
-        # Determine operational status
-        if pending_animals_to_process > 10:
-            operational_status = 'high_load'
-        elif pending_animals_to_process > 5:
-            operational_status = 'active'
-        elif total_animals_received > 0:
-            operational_status = 'operational'
-        else:
-            operational_status = 'idle'
-
-        # Return stats matching the exact requirements
-        stats = {
-            # Main stats for Production Overview cards
-            'received': total_animals_received,           # Total received animals/parts since creation
-            'pending': pending_animals_to_process,        # Total animals/parts not yet received or rejected
-            'products': total_products_created,           # Total products created since creation
-            'in_stock': products_in_stock,                # Products not yet fully transferred to shop
-            
-            # Additional detailed stats (for future use)
-            'details': {
-                'products_created_today': products_created_today,
-                'products_created_this_week': products_created_this_week,
-                'animals_received_today': animals_received_today,
-                'animals_received_this_week': animals_received_this_week,
-                'processing_throughput_per_day': processing_throughput_per_day,
-                'equipment_uptime_percentage': 95.0,  # Placeholder
-                'operational_status': operational_status,
-                'total_products_transferred': total_products_transferred,
-                'products_transferred_today': products_transferred_today,
-                'transfer_success_rate': transfer_success_rate,
-                'last_updated': timezone.now().isoformat(),
-            }
-        }
-
+        stats = ProductionStatsService.get(user, user_processing_units)
         return Response(stats)
 
     except Exception as e:
@@ -1887,6 +1533,13 @@ def production_stats_view(request):
         })
 
 
+class _Echo:
+    """File-like object whose write() hands the value back, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def traceability_report_view(request):
@@ -1897,135 +1550,128 @@ def traceability_report_view(request):
     2. SlaughterParts received (partial carcasses)
     
     Calculates yield based on products created from these inputs.
+
+    Items are returned newest first, ``page_size`` (default 50, max 200) at a
+    time; pass ``next_cursor`` back as ``cursor`` for the next page. With
+    ``stream=ndjson`` or ``stream=csv`` the whole report is streamed instead.
     """
-    user = request.user
-    
-    # Get filters
-    species_filter = request.query_params.get('species')
-    search_query = request.query_params.get('search')
-    date_from = request.query_params.get('date_from')
-    date_to = request.query_params.get('date_to')
-    
-    # 1. Fetch Animals received by this user
-    animals_query = Q(received_by=user)
-    if species_filter:
-        animals_query &= Q(species__iexact=species_filter)
-    if search_query:
-        animals_query &= (Q(animal_id__icontains=search_query) | Q(animal_name__icontains=search_query))
-    if date_from:
-        animals_query &= Q(received_at__gte=date_from)
-    if date_to:
-        animals_query &= Q(received_at__lte=date_to)
-        
-    received_animals = Animal.objects.filter(animals_query).select_related('abbatoir')
-    
-    # 2. Fetch SlaughterParts received by this user
-    parts_query = Q(received_by=user)
-    # SlaughterPart doesn't have species directly, we access via animal
-    if species_filter:
-        parts_query &= Q(animal__species__iexact=species_filter)
-    if search_query:
-        parts_query &= (Q(part_id__icontains=search_query) | Q(animal__animal_id__icontains=search_query))
-    if date_from:
-        parts_query &= Q(received_at__gte=date_from)
-    if date_to:
-        parts_query &= Q(received_at__lte=date_to)
-        
-    received_parts = SlaughterPart.objects.filter(parts_query).select_related('animal', 'animal__abbatoir')
+    from django.http import StreamingHttpResponse
+    from .db_router import use_read_replica
+    from .utils.keyset import InvalidCursor
+    from .utils.traceability_report import TraceabilityReportService
 
-    items = []
-    
-    # Process Animals
-    for animal in received_animals:
-        # Calculate derived products
-        products = Product.objects.filter(animal=animal)
-        processed_weight = sum(p.weight for p in products if p.weight)
-        
-        initial_weight = animal.live_weight if animal.live_weight else 0.0
-        # Use simple default if weights are missing to avoid division by zero
-        if initial_weight <= 0:
-            initial_weight = 1.0 
-            
-        remaining_weight = animal.remaining_weight if animal.remaining_weight is not None else 0.0
-        
-        utilization_rate = 0.0
-        if initial_weight > 0:
-            utilization_rate = (processed_weight / initial_weight) * 100
-            
-        # Utilization history (products created)
-        history = []
-        for p in products:
-            history.append({
-                'name': p.name,
-                'batch_number': p.batch_number,
-                'weight': float(p.weight) if p.weight else 0.0,
-                'weight_unit': p.weight_unit or 'kg',
-                'formatted_date': p.created_at.strftime("%b %d, %Y") if p.created_at else "",
-                'transferred_to': p.transferred_to.name if p.transferred_to else None
-            })
-            
-        items.append({
-            'item_id': animal.animal_id,
-            'name': f"{animal.species} (Whole)",
-            'species': animal.species or 'Unknown',
-            'origin': animal.abbatoir.username if animal.abbatoir else "Unknown Source",
-            'initial_weight': float(initial_weight),
-            'remaining_weight': float(remaining_weight),
-            'processed_weight': float(processed_weight),
-            'utilization_rate': float(utilization_rate),
-            'received_at': animal.received_at.isoformat() if animal.received_at else timezone.now().isoformat(),
-            'formatted_received_date': animal.received_at.strftime("%b %d, %Y") if animal.received_at else "Unknown",
-            'utilization_history': history
-        })
+    user = request.user
+    filters = TraceabilityReportService.filters_from_params(request.query_params)
+
+    def report_items():
+        # Streamed after the view returns, so the replica scope lives here
+        with use_read_replica(user):
+            yield from TraceabilityReportService.iter_items(user, filters)
+
+    stream = request.query_params.get('stream')
+    if stream == 'ndjson':
+        lines = (json.dumps(item) + '\n' for item in report_items())
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="traceability_report.ndjson"'
+        return response
+    if stream == 'csv':
+        import csv
+        writer = csv.writer(_Echo())
+
+        def rows():
+            yield writer.writerow(TraceabilityReportService.CSV_COLUMNS)
+            for item in report_items():
+                yield writer.writerow(TraceabilityReportService.csv_row(item))
+
+        response = StreamingHttpResponse(rows(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="traceability_report.csv"'
+        return response
+    if stream:
+        return Response({'error': 'stream must be "ndjson" or "csv"'}, status=400)
 
-    # Process Parts
-    for part in received_parts:
-        # Calculate derived products
-        products = Product.objects.filter(slaughter_part=part)
-        processed_weight = sum(p.weight for p in products if p.weight)
-        
-        initial_weight = part.weight if part.weight else 1.0
-        remaining_weight = part.remaining_weight if part.remaining_weight is not None else 0.0
-        
-        utilization_rate = 0.0
-        if initial_weight > 0:
-            utilization_rate = (processed_weight / initial_weight) * 100
-            
-         # Utilization history
-        history = []
-        for p in products:
-            history.append({
-                'name': p.name,
-                'batch_number': p.batch_number,
-                'weight': float(p.weight) if p.weight else 0.0,
-                'weight_unit': p.weight_unit or 'kg',
-                'formatted_date': p.created_at.strftime("%b %d, %Y") if p.created_at else "",
-                'transferred_to': p.transferred_to.name if p.transferred_to else None
-            })
+    try:
+        cursor = TraceabilityReportService.decode_cursor(request.query_params.get('cursor'))
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=400)
+    page_size = TraceabilityReportService.clamp_page_size(request.query_params.get('page_size'))
 
-        items.append({
-            'item_id': f"{part.animal.animal_id}-{part.part_type}",
-            'name': f"{part.part_type} (Part)",
-            'species': part.animal.species if part.animal else 'Unknown',
-            'origin': part.animal.abbatoir.username if part.animal and part.animal.abbatoir else "Unknown Source",
-            'initial_weight': float(initial_weight),
-            'remaining_weight': float(remaining_weight),
-            'processed_weight': float(processed_weight),
-            'utilization_rate': float(utilization_rate),
-            'received_at': part.received_at.isoformat() if part.received_at else timezone.now().isoformat(),
-            'formatted_received_date': part.received_at.strftime("%b %d, %Y") if part.received_at else "Unknown",
-            'utilization_history': history
-        })
+    with use_read_replica(user):
+        items, next_cursor = TraceabilityReportService.page(user, filters, cursor, page_size)
+        total = TraceabilityReportService.count(user, filters)
 
     return Response({
         'traceability': {
             'items': items,
-            'total': len(items),
+            'total': total,
+            'next_cursor': TraceabilityReportService.encode_cursor(next_cursor) if next_cursor else None,
+            'has_more': next_cursor is not None,
             'message': 'Report generated successfully'
         }
     })
 
 
+def _parse_id_list(value):
+    """Parse a comma separated id list from a query param or a JSON list."""
+    if value in (None, ''):
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(',')
+    try:
+        return [int(item) for item in items if str(item).strip()]
+    except (TypeError, ValueError):
+        raise ValidationError({'detail': 'Ids must be integers'})
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def recall_impact_view(request):
+    """
+    Downstream impact of contaminated animals / slaughter parts.
+
+    GET  ?animal_ids=1,2&slaughter_part_ids=3  -> impact report
+    POST {"animal_ids": [...], "slaughter_part_ids": [...], "reason": "contamination"}
+         -> impact report, and recall notifications are queued for every
+            affected shop and processing unit
+    """
+    from .utils.recall_service import RecallService
+
+    user = request.user
+    try:
+        role = normalize_role(user.profile.role)
+    except UserProfile.DoesNotExist:
+        role = None
+    if not (user.is_staff or user.is_superuser or role in (ROLE_ADMIN, ROLE_PROCESSOR)):
+        return Response({'error': 'Only administrators and processing units can run recalls'}, status=403)
+
+    params = request.data if request.method == 'POST' else request.query_params
+    animal_ids = _parse_id_list(params.get('animal_ids'))
+    slaughter_part_ids = _parse_id_list(params.get('slaughter_part_ids'))
+    if not animal_ids and not slaughter_part_ids:
+        return Response({'error': 'Provide animal_ids and/or slaughter_part_ids'}, status=400)
+
+    # Processing units may only recall what passed through their own units
+    if not (user.is_staff or user.is_superuser or role == ROLE_ADMIN):
+        foreign_animals, foreign_parts = RecallService.out_of_scope(user, animal_ids, slaughter_part_ids)
+        if foreign_animals or foreign_parts:
+            return Response({
+                'error': 'You can only recall animals and parts received by your processing units',
+                'animal_ids': foreign_animals,
+                'slaughter_part_ids': foreign_parts,
+            }, status=403)
+
+    impact = RecallService.assess(animal_ids=animal_ids, slaughter_part_ids=slaughter_part_ids)
+
+    if request.method == 'POST':
+        reason = params.get('reason', 'contamination')
+        if not RecallService.is_recall_reason(reason):
+            return Response({'error': f'reason must be one of {", ".join(RecallService.RECALL_REASONS)}'}, status=400)
+        impact['notifications_queued'] = RecallService.notify(impact, reason, initiated_by=user)
+
+    return Response(impact)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_sale_receipt_api(request, receipt_uuid):
@@ -2059,21 +1705,34 @@ def public_sale_receipt_api(request, receipt_uuid):
 @permission_classes([AllowAny])
 def public_sale_receipt_view(request, receipt_uuid):
     """Public web view for digital receipt with traceability integration."""
+    page_key = PageCache.receipt_page_key(receipt_uuid)
+    cached = PageCache.get(page_key)
+    if cached:
+        return PageCache.respond(request, cached)
+
     try:
         sale = Sale.objects.select_related('shop').get(receipt_uuid=receipt_uuid)
-        sale_items = sale.items.all().select_related('product', 'product__processing_unit', 'product__category')
-        
-        # Build item list with individual timelines
+        tokens = {PageCache.sale_token_key(sale.pk): PageCache.sale_token(sale.pk)}
+        sale_items = list(sale.items.all().select_related(
+            'product', 'product__processing_unit', 'product__category',
+        ))
+
+        # Build every item's timeline in one batch; items cut from the same
+        # animal share its farm, transfer and slaughter stages.
+        timeline_context = TimelineContext()
+        product_ids = [item.product_id for item in sale_items if item.product_id]
+        timelines = get_product_timelines(product_ids, context=timeline_context)
+        for product_id in product_ids:
+            tokens[PageCache.product_token_key(product_id)] = PageCache.change_token(
+                timeline_context.changed_at[product_id]
+            )
+
         items_with_timelines = []
         for item in sale_items:
-            timeline = []
-            if item.product:
-                timeline = get_product_timeline(item.product)
-                
             items_with_timelines.append({
                 'item': item,
                 'product': item.product,
-                'timeline': timeline
+                'timeline': timelines.get(item.product_id, []) if item.product_id else [],
             })
             
         context = {
@@ -2084,7 +1743,8 @@ def public_sale_receipt_view(request, receipt_uuid):
             'timestamp': timezone.now()
         }
         
-        return render(request, 'meat_trace/public_receipt.html', context)
+        response = render(request, 'meat_trace/public_receipt.html', context)
+        return PageCache.store(request, page_key, response, tokens)
     except Sale.DoesNotExist:
         return render(request, 'meat_trace/public_receipt.html', {'error': 'Receipt not found'}, status=404)
     except Exception as e:
@@ -2092,6 +1752,68 @@ def public_sale_receipt_view(request, receipt_uuid):
         return render(request, 'meat_trace/public_receipt.html', {'error': f'An unexpected error occurred: {str(e)}'}, status=500)
 
 
+MAX_BULK_TRACE_ITEMS = 200
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_trace_view(request):
+    """
+    Trace many products in one request.
+
+    Payload: {"batch_numbers": ["B-001", ...], "product_ids": [12, ...]}
+    Returns one entry per resolved product with its farm-to-shop timeline,
+    plus the batch numbers / ids that could not be found. The query count is
+    constant in the number of products requested.
+    """
+    batch_numbers = request.data.get('batch_numbers') or []
+    product_ids = _parse_id_list(request.data.get('product_ids'))
+    if not isinstance(batch_numbers, list):
+        return Response({'error': 'batch_numbers must be a list'}, status=400)
+    batch_numbers = [str(b).strip() for b in batch_numbers if str(b).strip()]
+    if not batch_numbers and not product_ids:
+        return Response({'error': 'Provide batch_numbers and/or product_ids'}, status=400)
+    if len(batch_numbers) + len(product_ids) > MAX_BULK_TRACE_ITEMS:
+        return Response({'error': f'At most {MAX_BULK_TRACE_ITEMS} items can be traced per request'}, status=400)
+
+    resolved_batches = BatchRegistry.resolve_many(batch_numbers)
+    requested = [('batch_number', code, resolved_batches.get(code)) for code in batch_numbers]
+    requested += [('product_id', pid, pid) for pid in product_ids]
+
+    wanted_ids = {pid for _, _, pid in requested if pid}
+    products = Product.objects.select_related(
+        'processing_unit', 'category', 'animal', 'transferred_to', 'received_by_shop',
+    ).in_bulk(wanted_ids)
+    timelines = get_product_timelines(list(products))
+
+    results = []
+    not_found = {'batch_numbers': [], 'product_ids': []}
+    for kind, query, pid in requested:
+        product = products.get(pid)
+        if product is None:
+            not_found[f'{kind}s'].append(query)
+            continue
+        results.append({
+            'query': {kind: query},
+            'product': {
+                'id': product.id,
+                'name': product.name,
+                'batch_number': product.batch_number,
+                'product_type': product.product_type,
+                'weight': str(product.weight),
+                'weight_unit': product.weight_unit,
+                'category': product.category.name if product.category else None,
+                'processing_unit': product.processing_unit.name if product.processing_unit else None,
+                'animal_id': product.animal.animal_id if product.animal else None,
+                'shop': (product.received_by_shop or product.transferred_to).name
+                        if (product.received_by_shop or product.transferred_to) else None,
+            },
+            'timeline': timelines.get(product.id, []),
+        })
+
+    return Response({'count': len(results), 'results': results, 'not_found': not_found})
+
+
 def public_trace_view(request, batch_number):
     """
     Public farm-to-fork traceability page for consumers.
@@ -2099,17 +1821,20 @@ def public_trace_view(request, batch_number):
     URL: /trace/<batch_number>/
     No authentication required.
     """
+    page_key = PageCache.trace_page_key(batch_number)
+    cached = PageCache.get(page_key)
+    if cached:
+        return PageCache.respond(request, cached)
+
     try:
-        product = Product.objects.select_related(
-            'animal', 'animal__abbatoir', 'processing_unit',
-            'category', 'slaughter_part', 'transferred_to',
-            'received_by_shop',
-        ).prefetch_related(
-            'animal__slaughter_parts',
-            'ingredients__slaughter_part',
-        ).get(batch_number=batch_number)
+        product = BatchRegistry.resolve(
+            batch_number,
+            Product.objects.select_related('animal', 'processing_unit', 'category', 'timeline_snapshot'),
+        )
+        if product is None:
+            raise Product.DoesNotExist
 
-        timeline = get_product_timeline(product)
+        timeline = get_materialized_timeline(product)
 
         context = {
             'product': product,
@@ -2117,7 +1842,9 @@ def public_trace_view(request, batch_number):
             'timeline': timeline,
             'timestamp': timezone.now(),
         }
-        return render(request, 'meat_trace/trace.html', context)
+        response = render(request, 'meat_trace/trace.html', context)
+        tokens = {PageCache.product_token_key(product.pk): PageCache.product_token(product)}
+        return PageCache.store(request, page_key, response, tokens)
 
     except Product.DoesNotExist:
         return render(
@@ -2152,106 +1879,27 @@ def processing_pipeline_view(request):
         user = request.user
         profile = user.profile
 
-        # Only processing unit users can see pipeline data
-        # Accept canonical role 'processing_unit' and tolerate legacy/capitalized variants
+        # Only processing unit users can see pipeline data (any accepted role alias)
         import logging
         logger = logging.getLogger(__name__)
 
-        allowed_roles = ('processing_unit', 'Processor', 'processor')
-        if profile.role not in allowed_roles:
+        if normalize_role(profile.role) != ROLE_PROCESSOR:
             logger.info(f"[PROCESSING_PIPELINE] User {user.username} has role '{getattr(profile, 'role', None)}' which is not a processing unit role - returning empty pipeline")
             return Response(empty_pipeline)
 
         # Get user's processing units
         from .models import ProcessingUnitUser
-        user_processing_units = ProcessingUnitUser.objects.filter(
+        user_processing_units = list(ProcessingUnitUser.objects.filter(
             user=user,
             is_active=True,
             is_suspended=False
-        ).values_list('processing_unit_id', flat=True)
+        ).values_list('processing_unit_id', flat=True))
 
         if not user_processing_units:
             return Response(empty_pipeline)
 
-        # Calculate pipeline stages
-        pipeline_data = {
-            'stages': [],
-            'total_pending': 0
-        }
-
-        # Stage 1: Receive - Animals transferred to processing unit but not received yet
-        # Excludes rejected animals
-        receive_count = Animal.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=True,
-            rejection_status__isnull=True  # Exclude rejected animals
-        ).count()
-
-        # Stage 2: Inspect - Animals received but no carcass measurement taken yet
-        # This is the inspection phase where processor evaluates the carcass
-        from .models import CarcassMeasurement
-        
-        # Get animals that are received but don't have carcass measurements
-        received_animal_ids = Animal.objects.filter(
-            transferred_to_id__in=user_processing_units,
-            received_by__isnull=False,
-            rejection_status__isnull=True  # Exclude rejected animals
-        ).values_list('id', flat=True)
-        
-        # Get animals that have carcass measurements
-        animals_with_measurements = CarcassMeasurement.objects.filter(
-            animal_id__in=received_animal_ids
-        ).values_list('animal_id', flat=True)
-        
-        # Inspect = received but no carcass measurement
-        inspect_count = len(received_animal_ids) - len(animals_with_measurements)
-
-        # Stage 3: Process - Animals with carcass measurement but no products created yet
-        # These animals have been inspected and are being processed into products
-        animals_with_products = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            animal_id__isnull=False
-        ).values_list('animal_id', flat=True).distinct()
-        
-        # Process = has carcass measurement but no products yet
-        process_count = len([aid for aid in animals_with_measurements if aid not in animals_with_products])
-
-        # Stage 4: Stock - Products created and in inventory (not transferred to shops)
-        stock_count = Product.objects.filter(
-            processing_unit_id__in=user_processing_units,
-            transferred_to__isnull=True  # Not transferred out to shops
-        ).count()
-
-        # Build stages data
-        stages = [
-            {
-                'name': 'Receive',
-                'is_active': receive_count > 0,
-                'is_completed': receive_count == 0,
-                'count': receive_count
-            },
-            {
-                'name': 'Inspect',
-                'is_active': inspect_count > 0,
-                'is_completed': inspect_count == 0 and receive_count == 0,
-                'count': inspect_count
-            },
-            {
-                'name': 'Process',
-                'is_active': process_count > 0,
-                'is_completed': process_count == 0 and inspect_count == 0,
-                'count': process_count
-            },
-            {
-                'name': 'Stock',
-                'is_active': stock_count > 0,
-                'is_completed': True,  # Stock is always "completed" if there are products
-                'count': stock_count
-            }
-        ]
-
-        pipeline_data['stages'] = stages
-        pipeline_data['total_pending'] = receive_count + inspect_count + process_count
+        # Stage counts are cached per unit and kept fresh by change events
+        pipeline_data = ProcessingPipelineService.get_pipeline(user_processing_units)
 
         return Response({'pipeline': pipeline_data})
 
@@ -2953,6 +2601,87 @@ class ShopViewSet(viewsets.ModelViewSet):
                 status=status_module.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @staticmethod
+    def _can_view_stock(user, shop):
+        """Active members of the shop, its owner and admins."""
+        is_shop_member = ShopUser.objects.filter(user=user, shop=shop, is_active=True).exists()
+        is_shop_owner = hasattr(user, 'profile') and user.profile.shop_id == shop.id
+        is_admin = user.is_staff or user.is_superuser or (
+            hasattr(user, 'profile') and normalize_role(user.profile.role) == ROLE_ADMIN
+        )
+        return is_shop_member or is_shop_owner or is_admin
+
+    @action(detail=True, methods=['get'], url_path='stock')
+    def stock(self, request, pk=None):
+        """
+        Stock of every product at the shop from the stock ledger, now or as
+        of ``?as_of=<ISO datetime>``.
+        """
+        from .utils.stock_ledger import StockLedgerService
+
+        shop = self.get_object()
+        if not self._can_view_stock(request.user, shop):
+            return Response(
+                {'error': 'You do not have permission to view stock for this shop'},
+                status=status_module.HTTP_403_FORBIDDEN
+            )
+        as_of = request.query_params.get('as_of')
+        at = None
+        if as_of:
+            at = parse_datetime(as_of)
+            if at is None:
+                return Response({'error': f'Invalid as_of: {as_of}'}, status=status_module.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+
+        stock = StockLedgerService.stock_as_of(shop.id, at)
+        return Response({
+            'shop': shop.id,
+            'as_of': (at or timezone.now()).isoformat(),
+            'stock': [
+                {'product': product_id, 'weight': weight}
+                for product_id, weight in sorted(stock.items())
+            ],
+        })
+
+    @action(detail=True, methods=['get'], url_path='stock-movements')
+    def stock_movements(self, request, pk=None):
+        """
+        Stock ledger of the shop, newest first, optionally filtered by
+        ``product`` and ``movement_type``. Pass ``next_cursor`` back as
+        ``cursor`` for the next page of ``page_size`` (default 50, max 200).
+        """
+        from .serializers import StockMovementSerializer
+        from .utils.keyset import InvalidCursor, KeysetPage
+
+        shop = self.get_object()
+        if not self._can_view_stock(request.user, shop):
+            return Response(
+                {'error': 'You do not have permission to view stock for this shop'},
+                status=status_module.HTTP_403_FORBIDDEN
+            )
+        params = request.query_params
+        movements = StockMovement.objects.filter(shop=shop).select_related('product', 'created_by')
+        if params.get('movement_type'):
+            movements = movements.filter(movement_type=params['movement_type'])
+        try:
+            cursor = KeysetPage.decode(params.get('cursor'))
+            if params.get('product'):
+                movements = movements.filter(product_id=int(params['product']))
+        except (InvalidCursor, ValueError) as e:
+            return Response({'error': str(e)}, status=status_module.HTTP_400_BAD_REQUEST)
+        try:
+            page_size = max(1, min(int(params.get('page_size') or 50), 200))
+        except ValueError:
+            page_size = 50
+
+        rows, next_key = KeysetPage.page(movements, cursor, page_size)
+        return Response({
+            'results': StockMovementSerializer(rows, many=True).data,
+            'next_cursor': KeysetPage.encode(next_key),
+            'has_more': next_key is not None,
+        })
+
     @action(detail=True, methods=['get'], url_path='join-requests', permission_classes=[IsAuthenticated])
     def join_requests(self, request, pk=None):
         """List join requests for a specific shop"""
@@ -3284,7 +3013,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Base queryset with essential optimizations
         base_qs = Product.objects.all().select_related(
             'processing_unit', 'animal', 'slaughter_part', 'category', 'transferred_to', 'received_by_shop'
-        ).order_by('-created_at')
+        ).prefetch_related(BatchRegistry.prefetch_public_code()).order_by('-created_at')
         
         try:
             profile = user.profile
@@ -3379,6 +3108,19 @@ class ProductViewSet(viewsets.ModelViewSet):
         except UserProfile.DoesNotExist:
             return Product.objects.none()
 
+    @action(detail=True, methods=['get'])
+    def lineage(self, request, pk=None):
+        """
+        Upstream lineage of a product: every slaughter part, animal and
+        abbatoir it was made from, with depth, read from the closure table.
+        """
+        product = self.get_object()
+        return Response({
+            'product_id': product.id,
+            'batch_number': product.batch_number,
+            **LineageService.get_lineage(product.id),
+        })
+
     @action(detail=False, methods=['post'], url_path='receive_products')
     def receive_products(self, request):
         """
@@ -3439,131 +3181,12 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status_module.HTTP_404_NOT_FOUND
             )
         
-        received_products = []
-        rejected_products = []
-        errors = []
-        
         try:
             with transaction.atomic():
-                # Process receives
-                for receive in receives:
-                    product_id = receive.get('product_id')
-                    weight_received = Decimal(str(receive.get('weight_received', receive.get('quantity_received', 0))))
-                    
-                    if weight_received <= 0:
-                        errors.append(f"Product {product_id}: weight_received must be greater than 0")
-                        continue
-                    
-                    try:
-                        product = Product.objects.get(
-                            id=product_id,
-                            transferred_to=user_shop,
-                            rejection_status__isnull=True  # Not rejected
-                        )
-                        
-                        # Validate weight
-                        total_accounted = product.weight_received + product.weight_rejected
-                        remaining = product.weight - total_accounted
-                        
-                        if weight_received > remaining:
-                            errors.append(
-                                f"Product {product_id}: Cannot receive {weight_received} {product.weight_unit}. "
-                                f"Only {remaining} {product.weight_unit} remaining (Total: {product.weight}, "
-                                f"Already received: {product.weight_received}, "
-                                f"Already rejected: {product.weight_rejected})"
-                            )
-                            continue
-                        
-                        # Update product
-                        product.weight_received += weight_received
-                        product.quantity_received = product.weight_received
-                        
-                        # If fully received, mark as received
-                        if product.weight_received + product.weight_rejected >= product.weight:
-                            product.received_by_shop = user_shop
-                            product.received_at = timezone.now()
-                        
-                        product.save()
-                        
-                        # Update inventory
-                        inventory, created = Inventory.objects.get_or_create(
-                            shop=user_shop,
-                            product=product,
-                            defaults={'quantity': Decimal('0'), 'weight': Decimal('0'), 'weight_unit': product.weight_unit}
-                        )
-                        inventory.weight += weight_received
-                        inventory.weight_unit = product.weight_unit
-                        inventory.last_updated = timezone.now()
-                        inventory.save()
-                        
-                        received_products.append({
-                            'product_id': product.id,
-                            'product_name': product.name,
-                            'weight_received': float(weight_received),
-                            'total_received_weight': float(product.weight_received),
-                            'total_weight': float(product.weight),
-                            'weight_unit': product.weight_unit,
-                        })
-                        
-                    except Product.DoesNotExist:
-                        errors.append(f"Product {product_id} not found or not available for receipt")
-                        continue
-                
-                # Process rejections
-                for rejection in rejections:
-                    product_id = rejection.get('product_id')
-                    weight_rejected = Decimal(str(rejection.get('weight_rejected', rejection.get('quantity_rejected', 0))))
-                    rejection_reason = rejection.get('rejection_reason', 'Not specified')
-                    
-                    if weight_rejected <= 0:
-                        errors.append(f"Product {product_id}: weight_rejected must be greater than 0")
-                        continue
-                    
-                    try:
-                        product = Product.objects.get(
-                            id=product_id,
-                            transferred_to=user_shop
-                        )
-                        
-                        # Validate weight
-                        total_accounted = product.weight_received + product.weight_rejected
-                        remaining = product.weight - total_accounted
-                        
-                        if weight_rejected > remaining:
-                            errors.append(
-                                f"Product {product_id}: Cannot reject {weight_rejected} {product.weight_unit}. "
-                                f"Only {remaining} {product.weight_unit} remaining (Total: {product.weight}, "
-                                f"Already received: {product.weight_received}, "
-                                f"Already rejected: {product.weight_rejected})"
-                            )
-                            continue
-                        
-                        # Update product
-                        product.weight_rejected += weight_rejected
-                        product.quantity_rejected = product.weight_rejected
-                        product.rejection_reason = rejection_reason
-                        product.rejected_by = request.user
-                        product.rejected_at = timezone.now()
-                        
-                        # If entire product is rejected, mark status as rejected
-                        if product.weight_rejected >= product.weight:
-                            product.rejection_status = 'rejected'
-                        
-                        product.save()
-                        
-                        rejected_products.append({
-                            'product_id': product.id,
-                            'product_name': product.name,
-                            'weight_rejected': float(weight_rejected),
-                            'total_rejected_weight': float(product.weight_rejected),
-                            'weight_unit': product.weight_unit,
-                            'rejection_reason': rejection_reason,
-                            'rejection_status': product.rejection_status
-                        })
-                        
-                    except Product.DoesNotExist:
-                        errors.append(f"Product {product_id} not found")
-                        continue
+                # Receives and rejections are validated in order and written in bulk
+                received_products, rejected_products, errors = ReceiveService.receive_products(
+                    request.user, user_shop, receives, rejections,
+                )
                 
                 # Create activity log
                 if received_products or rejected_products:
@@ -4115,23 +3738,21 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         try:
             profile = user.profile
             if profile.shop:
-                from django.db.models import Sum, Count
-                invoices = Invoice.objects.filter(shop=profile.shop)
-                
-                stats = {
-                    'total_invoices': invoices.count(),
-                    'draft': invoices.filter(status='draft').count(),
-                    'pending': invoices.filter(status='pending').count(),
-                    'sent': invoices.filter(status='sent').count(),
-                    'partially_paid': invoices.filter(status='partially_paid').count(),
-                    'paid': invoices.filter(status='paid').count(),
-                    'completed': invoices.filter(status='completed').count(),
-                    'cancelled': invoices.filter(status='cancelled').count(),
-                    'overdue': invoices.filter(status='overdue').count(),
-                    'total_value': invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0'),
-                    'total_paid': invoices.aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0'),
-                }
-                return Response(stats)
+                from .utils.shop_finance import ShopFinanceService
+                return Response(ShopFinanceService.invoice_stats(profile.shop))
+        except UserProfile.DoesNotExist:
+            pass
+        return Response({"error": "No shop associated with user"}, status=status_module.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=['get'])
+    def finance_summary(self, request):
+        """Running finance totals of the shop (invoices by status, paid, outstanding, sales)"""
+        user = request.user
+        try:
+            profile = user.profile
+            if profile.shop:
+                from .utils.shop_finance import ShopFinanceService
+                return Response(ShopFinanceService.get_summary(profile.shop))
         except UserProfile.DoesNotExist:
             pass
         return Response({"error": "No shop associated with user"}, status=status_module.HTTP_404_NOT_FOUND)
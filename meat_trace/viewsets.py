@@ -16,10 +16,9 @@ from datetime import timedelta
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 import logging
-import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from django.http import HttpResponse
+import os
+
+from .db_router import ReadReplicaMixin
 
 logger = logging.getLogger(__name__)
 
@@ -646,7 +645,7 @@ class AdminNotificationDeliveryViewSet(AdminViewSet):
 # ADMIN DASHBOARD VIEWSETS
 # ══════════════════════════════════════════════════════════════════════════════
 
-class AdminDashboardViewSet(viewsets.ViewSet):
+class AdminDashboardViewSet(ReadReplicaMixin, viewsets.ViewSet):
     """
     ViewSet for admin dashboard overview and statistics
     """
@@ -681,17 +680,20 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             members__is_active=True
         ).distinct().count()
 
-        # Data statistics
-        total_animals = Animal.objects.count()
-        total_products = Product.objects.count()
-        total_orders = Order.objects.count()
-        total_sales = Sale.objects.count()
+        # Data statistics (from the daily rollups)
+        from .utils.rollup_service import RollupService
+        all_time = RollupService.totals()
+        total_animals = all_time['animals_registered']
+        total_products = all_time['products_created']
+        total_orders = all_time['orders_placed']
+        total_sales = all_time['sales_recorded']
 
         # Recent activity (last 7 days)
         seven_days_ago = timezone.now() - timedelta(days=7)
-        recent_animals_count = Animal.objects.filter(created_at__gte=seven_days_ago).count()
-        recent_products_count = Product.objects.filter(created_at__gte=seven_days_ago).count()
-        recent_orders_count = Order.objects.filter(created_at__gte=seven_days_ago).count()
+        recent = RollupService.totals(start_date=timezone.localdate() - timedelta(days=6))
+        recent_animals_count = recent['animals_registered']
+        recent_products_count = recent['products_created']
+        recent_orders_count = recent['orders_placed']
         recent_activities_count = Activity.objects.filter(timestamp__gte=seven_days_ago).count()
 
         # System health
@@ -810,84 +812,35 @@ class AdminDashboardViewSet(viewsets.ViewSet):
         Get all active locations with coordinates for the Supply Chain Map.
         Returns processing units, shops, and abbatoirs with their geographic coordinates.
         """
-        from .models import ProcessingUnit, Shop, UserProfile
-        
-        locations = []
-        
-        # Get active processing units with coordinates
-        processing_units = ProcessingUnit.objects.filter(
-            is_active=True,
-            latitude__isnull=False,
-            longitude__isnull=False
-        )
-        for pu in processing_units:
-            locations.append({
-                'id': f'pu_{pu.id}',
-                'name': pu.name,
-                'type': 'Processing Unit',
-                'lat': float(pu.latitude),
-                'lng': float(pu.longitude),
-                'location': pu.location or '',
-                'contact_email': pu.contact_email or '',
-                'contact_phone': pu.contact_phone or '',
-            })
-        
-        # Get active shops with coordinates
-        shops = Shop.objects.filter(
-            is_active=True,
-            latitude__isnull=False,
-            longitude__isnull=False
-        )
-        for shop in shops:
-            locations.append({
-                'id': f'shop_{shop.id}',
-                'name': shop.name,
-                'type': 'Shop',
-                'lat': float(shop.latitude),
-                'lng': float(shop.longitude),
-                'location': shop.location or '',
-                'contact_email': shop.contact_email or '',
-                'contact_phone': shop.contact_phone or '',
-            })
-        
-        # Get abbatoirs with coordinates
-        abbatoirs = UserProfile.objects.filter(
-            role='Abbatoir',
-            user__is_active=True,
-            latitude__isnull=False,
-            longitude__isnull=False
-        ).select_related('user')
-        for abbatoir in abbatoirs:
-            locations.append({
-                'id': f'abbatoir_{abbatoir.id}',
-                'name': f"{abbatoir.user.first_name} {abbatoir.user.last_name}".strip() or abbatoir.user.username,
-                'type': 'Abbatoir',
-                'lat': float(abbatoir.latitude),
-                'lng': float(abbatoir.longitude),
-                'location': abbatoir.address or '',
-                'contact_email': abbatoir.user.email or '',
-                'contact_phone': abbatoir.phone or '',
-            })
-        
-        # Summary statistics
-        total_pu = ProcessingUnit.objects.filter(is_active=True).count()
-        total_shops = Shop.objects.filter(is_active=True).count()
-        total_abbatoirs = UserProfile.objects.filter(role='Abbatoir', user__is_active=True).count()
-        
-        geocoded_pu = processing_units.count()
-        geocoded_shops = shops.count()
-        geocoded_abbatoirs = abbatoirs.count()
-        
+        from .utils.map_service import MapService
+
+        locations = MapService.locations()
         return Response({
             'locations': locations,
             'total_count': len(locations),
-            'summary': {
-                'processing_units': {'total': total_pu, 'geocoded': geocoded_pu},
-                'shops': {'total': total_shops, 'geocoded': geocoded_shops},
-                'abbatoirs': {'total': total_abbatoirs, 'geocoded': geocoded_abbatoirs},
-            }
+            'summary': MapService.summary(),
         })
 
+    @action(detail=False, methods=['get'], url_path='map')
+    def map_geojson(self, request):
+        """
+        Supply Chain Map as a GeoJSON FeatureCollection.
+
+        ``bbox=west,south,east,north`` limits the features to the viewport and
+        ``zoom`` (0-18) picks the grid; below zoom 12 nearby locations are
+        returned as cluster features with ``point_count``. Without a bbox the
+        zoom is lowered until the whole world fits.
+        """
+        from .utils.map_service import MapService
+
+        try:
+            zoom = MapService.parse_zoom(request.query_params.get('zoom'))
+            bbox = MapService.parse_bbox(request.query_params.get('bbox'))
+            collection = MapService.feature_collection(bbox, zoom)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(collection)
+
 class AdminUserViewSet(viewsets.ModelViewSet):
     """
     ViewSet for admin user management
@@ -983,8 +936,14 @@ class AdminProcessingUnitViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        from .models import ProcessingUnit
-        return ProcessingUnit.objects.prefetch_related('members', 'products').all()
+        from .models import ProcessingUnit, ProcessingUnitUser, Product
+        from .utils.query_counts import count_subquery
+        # Counts read by AdminProcessingUnitSerializer; one query for the whole list
+        return ProcessingUnit.objects.annotate(
+            member_count=count_subquery(ProcessingUnitUser, 'processing_unit'),
+            active_members_count=count_subquery(ProcessingUnitUser, 'processing_unit', is_active=True),
+            product_count=count_subquery(Product, 'processing_unit'),
+        )
 
     def get_serializer_class(self):
         from .serializers import AdminProcessingUnitSerializer
@@ -1004,7 +963,10 @@ class AdminProcessingUnitViewSet(viewsets.ModelViewSet):
         """Get processing unit products"""
         processing_unit = self.get_object()
         from .serializers import ProductSerializer
-        products = processing_unit.products.select_related('animal', 'processing_unit').all()
+        from .utils.batch_registry import BatchRegistry
+        products = processing_unit.products.select_related('animal', 'processing_unit').prefetch_related(
+            BatchRegistry.prefetch_public_code()
+        )
         serializer = ProductSerializer(products, many=True)
         return Response(serializer.data)
 
@@ -1022,8 +984,16 @@ class AdminShopViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        from .models import Shop
-        return Shop.objects.prefetch_related('members', 'inventory', 'orders', 'sales').all()
+        from .models import Inventory, Order, Sale, Shop, ShopUser
+        from .utils.query_counts import count_subquery
+        # Counts read by AdminShopSerializer; one query for the whole list
+        return Shop.objects.annotate(
+            member_count=count_subquery(ShopUser, 'shop'),
+            active_members_count=count_subquery(ShopUser, 'shop', is_active=True),
+            inventory_count=count_subquery(Inventory, 'shop'),
+            order_count=count_subquery(Order, 'shop'),
+            sale_count=count_subquery(Sale, 'shop'),
+        )
 
     def get_serializer_class(self):
         from .serializers import AdminShopSerializer
@@ -1070,8 +1040,14 @@ class AdminAnimalViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Override to add lifecycle status filtering"""
-        from .models import Animal
-        queryset = Animal.objects.select_related('abbatoir', 'transferred_to').all()
+        from django.db.models import Exists, OuterRef
+        from .models import Animal, RejectionReason
+        # lifecycle_status reads the prefetched parts; has_rejections is annotated
+        queryset = Animal.objects.select_related('abbatoir', 'transferred_to').prefetch_related(
+            'slaughter_parts'
+        ).annotate(
+            has_rejections=Exists(RejectionReason.objects.filter(animal=OuterRef('pk')))
+        )
 
         lifecycle_status = self.request.query_params.get('lifecycle_status')
         if lifecycle_status:
@@ -1168,14 +1144,16 @@ class AdminAbbatoirViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         from django.contrib.auth import get_user_model
+        from .models import Animal
+        from .utils.query_counts import count_subquery
         User = get_user_model()
         return User.objects.filter(
             profile__role='Abbatoir',
             is_active=True
-        ).select_related('profile').prefetch_related('animals')
+        ).select_related('profile').annotate(animal_count=count_subquery(Animal, 'abbatoir'))
 
 
-class AdminAnalyticsViewSet(viewsets.ViewSet):
+class AdminAnalyticsViewSet(ReadReplicaMixin, viewsets.ViewSet):
     """
     ViewSet for admin analytics and reporting.
     Analytics are cached for 5 minutes to improve performance.
@@ -1201,37 +1179,19 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
         else:
             start_date = end_date - timedelta(days=30)
 
-        # User metrics
-        new_users_count = User.objects.filter(
-            date_joined__date__gte=start_date,
-            date_joined__date__lte=end_date
-        ).count()
+        # Activity counts and values come from the daily rollups
+        from .utils.rollup_service import RollupService
+        totals = RollupService.totals(start_date, end_date)
+        new_users_count = totals['new_users']
+        new_animals_count = totals['animals_registered']
+        new_products_count = totals['products_created']
+        new_orders_count = totals['orders_placed']
+        new_sales_count = totals['sales_recorded']
 
         active_users_count = User.objects.filter(
             last_login__date__gte=start_date
         ).distinct().count()
 
-        # Entity metrics
-        new_animals_count = Animal.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        ).count()
-
-        new_products_count = Product.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        ).count()
-
-        new_orders_count = Order.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        ).count()
-
-        new_sales_count = Sale.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        ).count()
-
         # Processing metrics - calculate from actual data
         # Processing efficiency: % of animals that have been processed or slaughtered
         total_animals = Animal.objects.filter(created_at__date__gte=start_date).count()
@@ -1255,13 +1215,10 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
             transfer_success_rate = 0
 
         # Financial metrics
-        total_sales_value = Sale.objects.filter(
-            created_at__date__gte=start_date
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        average_order_value = Order.objects.filter(
-            created_at__date__gte=start_date
-        ).aggregate(avg=Avg('total_amount'))['avg'] or 0
+        total_sales_value = totals['sales_value']
+        average_order_value = (
+            totals['order_value'] / new_orders_count if new_orders_count else 0
+        )
 
         # System metrics - based on actual data availability
         # System uptime: placeholder (would need actual monitoring)
@@ -1289,31 +1246,62 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
         serializer = AdminAnalyticsSerializer(analytics_data)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'])
-    def daily_stats(self, request):
-        """Get daily statistics for the last N days"""
-        days = int(request.query_params.get('days', 7))
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=days)
+    # Longest range (in buckets) the daily/weekly stats endpoints return
+    MAX_STATS_BUCKETS = 3660
 
+    def _stats_range(self, request, period, count_param, default_count):
+        """
+        Resolve the bucket range for a stats request.
+
+        Either ``start_date``/``end_date`` (ISO dates, inclusive) or the last
+        ``count_param`` buckets ending today. Raises ValueError on bad input.
+        """
+        from .utils.time_buckets import TimeBuckets
+
+        end_date = TimeBuckets.parse_date(request.query_params.get('end_date')) or timezone.localdate()
+        start_date = TimeBuckets.parse_date(request.query_params.get('start_date'))
+        if start_date is None:
+            count = int(request.query_params.get(count_param, default_count))
+            if count < 1:
+                raise ValueError(f'{count_param} must be a positive integer')
+            step = timedelta(days=1) if period == 'day' else timedelta(weeks=1)
+            start_date = TimeBuckets.bucket_start(end_date, period) - step * (count - 1)
+        if start_date > end_date:
+            raise ValueError('start_date must not be after end_date')
+
+        bucket_days = 1 if period == 'day' else 7
+        if (end_date - start_date).days >= self.MAX_STATS_BUCKETS * bucket_days:
+            raise ValueError(f'At most {self.MAX_STATS_BUCKETS} {period}s can be requested')
+        return start_date, end_date
+
+    def _entity_stats(self, start_date, end_date, period):
+        """New users, animals, products, orders and sales per bucket (one query each)."""
         from .models import Animal, Product, Order, Sale, User
+        from .utils.time_buckets import TimeBuckets
 
-        daily_stats = []
-        for i in range(days):
-            date = start_date + timedelta(days=i)
-
-            stats = {
-                'date': date.isoformat(),
-                'new_users': User.objects.filter(date_joined__date=date).count(),
-                'new_animals': Animal.objects.filter(created_at__date=date).count(),
-                'new_products': Product.objects.filter(created_at__date=date).count(),
-                'new_orders': Order.objects.filter(created_at__date=date).count(),
-                'new_sales': Sale.objects.filter(created_at__date=date).count(),
-            }
-            daily_stats.append(stats)
+        return TimeBuckets.table({
+            'new_users': (User.objects.all(), 'date_joined'),
+            'new_animals': (Animal.objects.all(), 'created_at'),
+            'new_products': (Product.objects.all(), 'created_at'),
+            'new_orders': (Order.objects.all(), 'created_at'),
+            'new_sales': (Sale.objects.all(), 'created_at'),
+        }, start_date, end_date, period)
+
+    @action(detail=False, methods=['get'])
+    def daily_stats(self, request):
+        """Get daily statistics for the last N days (or a start_date/end_date range)"""
+        try:
+            start_date, end_date = self._stats_range(request, 'day', 'days', 7)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        daily_stats = [
+            {'date': day.isoformat(), **counts}
+            for day, counts in self._entity_stats(start_date, end_date, 'day')
+        ]
 
         return Response({
-            'period': f'{days} days',
+            'period': f'{len(daily_stats)} days',
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
             'daily_stats': daily_stats
@@ -1321,45 +1309,23 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def weekly_stats(self, request):
-        """Get weekly statistics for the last N weeks"""
-        weeks = int(request.query_params.get('weeks', 4))
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(weeks=weeks)
-
-        from .models import Animal, Product, Order, Sale, User
-
-        weekly_stats = []
-        for i in range(weeks):
-            week_start = start_date + timedelta(weeks=i)
-            week_end = week_start + timedelta(days=6)
-
-            stats = {
-                'week': f'{week_start.isoformat()} to {week_end.isoformat()}',
-                'new_users': User.objects.filter(
-                    date_joined__date__gte=week_start,
-                    date_joined__date__lte=week_end
-                ).count(),
-                'new_animals': Animal.objects.filter(
-                    created_at__date__gte=week_start,
-                    created_at__date__lte=week_end
-                ).count(),
-                'new_products': Product.objects.filter(
-                    created_at__date__gte=week_start,
-                    created_at__date__lte=week_end
-                ).count(),
-                'new_orders': Order.objects.filter(
-                    created_at__date__gte=week_start,
-                    created_at__date__lte=week_end
-                ).count(),
-                'new_sales': Sale.objects.filter(
-                    created_at__date__gte=week_start,
-                    created_at__date__lte=week_end
-                ).count(),
+        """Get weekly (Monday to Sunday) statistics for the last N weeks (or a start_date/end_date range)"""
+        try:
+            start_date, end_date = self._stats_range(request, 'week', 'weeks', 4)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        weekly_stats = [
+            {
+                'week': f'{week_start.isoformat()} to {(week_start + timedelta(days=6)).isoformat()}',
+                'week_start': week_start.isoformat(),
+                **counts,
             }
-            weekly_stats.append(stats)
+            for week_start, counts in self._entity_stats(start_date, end_date, 'week')
+        ]
 
         return Response({
-            'period': f'{weeks} weeks',
+            'period': f'{len(weekly_stats)} weeks',
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
             'weekly_stats': weekly_stats
@@ -1367,209 +1333,116 @@ class AdminAnalyticsViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def custom_report(self, request):
-        """Get custom analytics report with granular filters"""
-        from .models import Animal, Product, Order, Sale, User, ProcessingUnit, Shop
-        
-        # Filters
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        animal_id = request.query_params.get('animal_id')
-        product_id = request.query_params.get('product_id')
-        shop_id = request.query_params.get('shop_id')
-        abbatoir_id = request.query_params.get('abbatoir_id')
-        processing_unit_id = request.query_params.get('processing_unit_id')
-
-        # Base filters
-        q_animals = Q()
-        q_products = Q()
-        q_orders = Q()
-        q_sales = Q()
+        """
+        Get custom analytics report with granular filters.
 
-        if start_date:
-            q_animals &= Q(created_at__date__gte=start_date)
-            q_products &= Q(created_at__date__gte=start_date)
-            q_orders &= Q(created_at__date__gte=start_date)
-            q_sales &= Q(created_at__date__gte=start_date)
-        if end_date:
-            q_animals &= Q(created_at__date__lte=end_date)
-            q_products &= Q(created_at__date__lte=end_date)
-            q_orders &= Q(created_at__date__lte=end_date)
-            q_sales &= Q(created_at__date__lte=end_date)
-        
-        if animal_id:
-            q_animals &= Q(id=animal_id)
-            q_products &= Q(animal_id=animal_id)
-            # Orders and Sales might not link directly to animal, skipping for simplicity or would need joins
-        
-        if product_id:
-            q_products &= Q(id=product_id)
-            q_orders &= Q(products__id=product_id)
-            q_sales &= Q(products__id=product_id)
-
-        if shop_id:
-            q_orders &= Q(shop_id=shop_id)
-            q_sales &= Q(shop_id=shop_id)
-            # Products link to shop via received_by_shop
-            q_products &= Q(received_by_shop_id=shop_id)
-
-        if abbatoir_id:
-            q_animals &= Q(abbatoir_id=abbatoir_id)
-        
-        if processing_unit_id:
-            q_products &= Q(processing_unit_id=processing_unit_id)
+        ``entities`` picks the lists returned (animals,products by default;
+        orders and sales on request). Each list is keyset-paginated newest
+        first: pass ``<entity>_cursor`` from ``pagination`` to get the next
+        page. The summary block is cached per filter combination.
+        """
+        from .utils.custom_report import CustomReportService
+        from .utils.keyset import InvalidCursor, KeysetPage
 
-        # Execute queries
-        animals = Animal.objects.filter(q_animals).select_related('abbatoir', 'transferred_to')
-        products = Product.objects.filter(q_products).select_related('animal', 'processing_unit', 'received_by_shop')
-        orders = Order.objects.filter(q_orders).select_related('shop', 'customer')
-        sales = Sale.objects.filter(q_sales).select_related('shop', 'seller')
+        params = request.query_params
+        try:
+            filters = CustomReportService.parse_filters(params)
+            entities = CustomReportService.parse_entities(params.get('entities'))
+            cursors = {entity: KeysetPage.decode(params.get(f'{entity}_cursor')) for entity in entities}
+        except (InvalidCursor, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = CustomReportService.clamp_page_size(params.get('page_size'))
 
         data = {
-            'summary': {
-                'total_animals': animals.count(),
-                'total_products': products.count(),
-                'total_orders': orders.count(),
-                'total_sales': sales.count(),
-                'total_revenue': sales.aggregate(total=Sum('total_amount'))['total'] or 0,
-            },
+            'summary': CustomReportService.summary(filters),
             'filters': {
-                'start_date': start_date,
-                'end_date': end_date,
-                'animal_id': animal_id,
-                'product_id': product_id,
-                'shop_id': shop_id,
-                'abbatoir_id': abbatoir_id,
-                'processing_unit_id': processing_unit_id,
-            }
+                key: params.get(key)
+                for key in CustomReportService.DATE_FILTERS + CustomReportService.ID_FILTERS
+            },
+            'pagination': {},
         }
-
-        # Serializing list data for the table
-        data['animals'] = [{
-            'id': a.id,
-            'animal_id': a.animal_id,
-            'species': a.species,
-            'abbatoir': a.abbatoir.username if a.abbatoir else 'Unknown',
-            'created_at': a.created_at.isoformat(),
-            'slaughtered': a.slaughtered
-        } for a in animals[:100]] # Limit to 100 for API response
-
-        data['products'] = [{
-            'id': p.id,
-            'name': p.name,
-            'batch_number': p.batch_number,
-            'processing_unit': p.processing_unit.name if p.processing_unit else 'N/A',
-            'created_at': p.created_at.isoformat()
-        } for p in products[:100]]
+        for entity in entities:
+            rows, next_key = CustomReportService.page(entity, filters, cursors[entity], page_size)
+            data[entity] = rows
+            data['pagination'][entity] = {
+                'next_cursor': KeysetPage.encode(next_key),
+                'has_more': next_key is not None,
+            }
 
         return Response(data)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get', 'post'])
     def export_excel(self, request):
-        """Export filtered report to Excel"""
-        from .models import Animal, Product, Order, Sale
-        
-        # Reuse same filter logic (ideally would refactor this into a method)
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        shop_id = request.query_params.get('shop_id')
-        processing_unit_id = request.query_params.get('processing_unit_id')
-        
-        q_animals = Q()
-        q_products = Q()
-        q_orders = Q()
-        q_sales = Q()
+        """
+        Export filtered report to Excel (or CSV with ``file_format=csv``).
 
-        if start_date:
-            q_animals &= Q(created_at__date__gte=start_date)
-            q_products &= Q(created_at__date__gte=start_date)
-            q_orders &= Q(created_at__date__gte=start_date)
-            q_sales &= Q(created_at__date__gte=start_date)
-        if end_date:
-            q_animals &= Q(created_at__date__lte=end_date)
-            q_products &= Q(created_at__date__lte=end_date)
-            q_orders &= Q(created_at__date__lte=end_date)
-            q_sales &= Q(created_at__date__lte=end_date)
-        
-        if shop_id:
-            q_orders &= Q(shop_id=shop_id)
-            q_sales &= Q(shop_id=shop_id)
-        if processing_unit_id:
-            q_products &= Q(processing_unit_id=processing_unit_id)
-
-        # Create Workbook
-        wb = openpyxl.Workbook()
-        
-        # Summary Sheet
-        ws_summary = wb.active
-        ws_summary.title = "Executive Summary"
-        
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        
-        summary_data = [
-            ["MeatTrace Industry Report", ""],
-            ["Generated At", timezone.now().strftime("%Y-%m-%d %H:%M:%S")],
-            ["Period", f"{start_date or 'Beginning'} to {end_date or 'Now'}"],
-            ["", ""],
-            ["Metric", "Value"],
-            ["Total Animals Registered", Animal.objects.filter(q_animals).count()],
-            ["Total Products Created", Product.objects.filter(q_products).count()],
-            ["Total Orders Placed", Order.objects.filter(q_orders).count()],
-            ["Total Sales Recorded", Sale.objects.filter(q_sales).count()],
-            ["Total Revenue", Sale.objects.filter(q_sales).aggregate(total=Sum('total_amount'))['total'] or 0],
-        ]
-        
-        for row in summary_data:
-            ws_summary.append(row)
-            
-        # Style Summary
-        for cell in ws_summary["A5:B5"][0]:
-            cell.font = header_font
-            cell.fill = header_fill
-        
-        # Animals Sheet
-        ws_animals = wb.create_sheet("Animals")
-        headers = ["ID", "Animal ID", "Species", "Abbatoir", "Registered At", "Slaughtered"]
-        ws_animals.append(headers)
-        for cell in ws_animals[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            
-        for a in Animal.objects.filter(q_animals).select_related('abbatoir')[:1000]:
-            ws_animals.append([
-                a.id, a.animal_id, a.species, 
-                a.abbatoir.username if a.abbatoir else 'Unknown',
-                a.created_at.strftime("%Y-%m-%d %H:%M"),
-                "Yes" if a.slaughtered else "No"
-            ])
-            
-        # Products Sheet
-        ws_products = wb.create_sheet("Products")
-        headers = ["ID", "Name", "Batch", "Processing Unit", "Created At"]
-        ws_products.append(headers)
-        for cell in ws_products[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            
-        for p in Product.objects.filter(q_products).select_related('processing_unit')[:1000]:
-            ws_products.append([
-                p.id, p.name, p.batch_number,
-                p.processing_unit.name if p.processing_unit else 'N/A',
-                p.created_at.strftime("%Y-%m-%d %H:%M")
-            ])
-
-        # Prepare response
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        filename = f"meattrace_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        The export runs as a background job; poll ``exports/<export_id>/``
+        for progress and fetch ``exports/<export_id>/download/`` once it
+        has completed.
+        """
+        from .utils.report_export import ReportExportService
+
+        params = request.data if request.method == 'POST' else request.query_params
+        file_format = params.get('file_format', 'xlsx')
+        if file_format not in ReportExportService.FORMATS:
+            return Response(
+                {'error': f"file_format must be one of: {', '.join(ReportExportService.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        export = ReportExportService.schedule(request.user, params, file_format)
+        return Response(self._export_payload(request, export), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'exports/(?P<export_id>[^/.]+)')
+    def export_status(self, request, export_id=None):
+        """Progress of a report export"""
+        from .models import DataExport
+
+        export = DataExport.objects.filter(export_id=export_id).first()
+        if export is None:
+            return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self._export_payload(request, export))
+
+    @action(detail=False, methods=['get'], url_path=r'exports/(?P<export_id>[^/.]+)/download')
+    def export_download(self, request, export_id=None):
+        """Stream a completed report export from disk"""
+        from django.http import FileResponse
+        from .models import DataExport
+        from .utils.report_export import ReportExportService
+
+        export = DataExport.objects.filter(export_id=export_id).first()
+        if export is None:
+            return Response({'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+        path = ReportExportService.file_path(export)
+        if export.status != 'completed' or not path or not os.path.exists(path):
+            return Response(
+                {'error': 'Export is not ready', 'status': export.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=ReportExportService.download_name(export),
+            content_type=ReportExportService.CONTENT_TYPES[export.export_format],
         )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+
+    @staticmethod
+    def _export_payload(request, export):
+        base = f'/api/v2/admin/analytics/exports/{export.export_id}/'
+        return {
+            'export_id': export.export_id,
+            'name': export.name,
+            'format': export.export_format,
+            'status': export.status,
+            'progress_percentage': float(export.progress_percentage),
+            'records_exported': export.records_exported,
+            'file_size_bytes': export.file_size_bytes,
+            'error_message': export.error_message,
+            'created_at': export.created_at,
+            'completed_at': export.completed_at,
+            'status_url': request.build_absolute_uri(base),
+            'download_url': request.build_absolute_uri(f'{base}download/') if export.status == 'completed' else None,
+        }
 
 
 # Import missing serializer for inventory
@@ -65,6 +65,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'meat_trace.middleware.APILoggingMiddleware',  # Custom API logging
     'meat_trace.audit_middleware.AdminAuditMiddleware',  # Admin action logging
+    'meat_trace.db_router.ReadYourWritesMiddleware',  # Keep writers on the primary (read replica)
 ]
 
 ROOT_URLCONF = 'meattrace_backend.urls'
@@ -143,8 +144,22 @@ DATABASES = {
 #     }
 # }
 
+# Read replica for analytics, admin dashboards, exports and reports.
+# Point DB_READ_REPLICA_NAME at a second SQLite file (or configure a
+# PostgreSQL replica above) to enable it; without it every read uses default.
+READ_REPLICA_ALIAS = 'read_replica'
+if os.environ.get('DB_READ_REPLICA_NAME'):
+    DATABASES[READ_REPLICA_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DB_READ_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Seconds a user's reads stay on the primary after one of their writes
+READ_REPLICA_STICKY_SECONDS = int(os.environ.get('READ_REPLICA_STICKY_SECONDS', '10'))
+
 # Database routing for read replicas
-# DATABASE_ROUTERS = ['meat_trace.db_router.AdminReadReplicaRouter']  # Removed - admin implementation removed
+DATABASE_ROUTERS = ['meat_trace.db_router.ReadReplicaRouter']
 
 
 # Password validation
@@ -335,6 +350,22 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Opt-in for local development without a broker: run every task inline
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == 'True'
+# Fail fast when Redis is unreachable instead of retrying for ~20s on every
+# publish; tasks.enqueue() then runs the work inline
+CELERY_BROKER_CONNECTION_TIMEOUT = 2
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'socket_connect_timeout': 2,
+    'max_retries': 1,
+    'interval_start': 0,
+    'interval_step': 0.5,
+    'interval_max': 0.5,
+}
+CELERY_REDIS_SOCKET_CONNECT_TIMEOUT = 2
+CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS = {
+    'retry_policy': {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.5, 'interval_max': 0.5},
+}
 
 # Celery Beat schedule for periodic tasks
 # Celery Beat schedule for periodic tasks
@@ -348,6 +379,14 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'meat_trace.tasks.generate_admin_reports',
         'schedule': crontab(hour=6, minute=0),  # Daily at 6 AM
     },
+    'refresh-daily-rollups': {
+        'task': 'meat_trace.tasks.refresh_daily_rollups',
+        'schedule': crontab(minute='*/10'),  # Every 10 minutes
+    },
+    'compact-stock-ledger': {
+        'task': 'meat_trace.tasks.compact_stock_ledger',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+    },
 }
 
 